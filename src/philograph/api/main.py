@@ -1,12 +1,16 @@
 import logging
 from contextlib import asynccontextmanager
 import fastapi
-from fastapi import FastAPI, status
+from fastapi import FastAPI, Response, status
 
 # Import config and core services needed for lifespan
 from .. import config
 from ..data_access import db_layer
 from ..utils import http_client
+from ..utils.metrics import PROMETHEUS_CONTENT_TYPE, metrics_registry
+from ..ingestion.extraction_pool import extraction_pool
+from ..ingestion.jobs import ingest_job_runner
+from ..ingestion.watcher import source_watcher
 
 # Import routers
 from .routers import ingest, search, documents, collections, acquisition
@@ -26,11 +30,17 @@ async def lifespan(app: FastAPI):
             await db_layer.initialize_schema(conn)
     except Exception as e:
         logger.error(f"Failed to initialize database schema during startup: {e}")
+    ingest_job_runner.start() # Process queued ingest jobs in the background
+    if config.SOURCE_WATCH_ENABLED:
+        source_watcher.start() # Queue jobs for new and changed source files
     yield
     # Shutdown: Cleanup resources
     logger.info("FastAPI application shutdown...")
+    await source_watcher.stop()
+    await ingest_job_runner.stop() # Before the pool closes, so running jobs can be requeued
     await db_layer.close_db_pool()
     await http_client.close_async_client()
+    await extraction_pool.shutdown()
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
@@ -46,6 +56,12 @@ async def read_root():
     """Basic health check endpoint."""
     return {"message": "PhiloGraph API is running"}
 
+# --- Metrics ---
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def read_metrics():
+    """Ingestion and search stage histograms and counters in the Prometheus text format."""
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # --- Include Routers ---
 app.include_router(ingest.router)
 app.include_router(search.router)
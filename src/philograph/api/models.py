@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional, Literal, Union
 from uuid import UUID
+from datetime import datetime
 
 from ..data_access import db_layer # For reusing Document model
 
@@ -14,6 +15,18 @@ class IngestResponse(BaseModel):
     document_id: Optional[int] = None
     status: str # e.g., "Success", "Skipped", "Error", "Directory Processed"
     details: Optional[List[Dict[str, Any]]] = None # For directory processing
+    job_id: Optional[int] = None # Background ingest job processing the request
+
+class IngestJobResponse(BaseModel):
+    job_id: int
+    path: str
+    status: str # "queued", "running", "succeeded" or "failed"
+    attempts: int
+    progress: Dict[str, Any] = Field(default_factory=dict) # files_done, succeeded, skipped, errors
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 class SearchFilter(BaseModel):
     author: Optional[str] = None
@@ -26,6 +39,13 @@ class SearchRequest(BaseModel):
     filters: Optional[SearchFilter] = None
     limit: int = Field(default=10, gt=0, le=100, description="Maximum number of results.") # Assuming default 10 if config not accessible here
     offset: int = Field(default=0, ge=0, description="Number of results to skip for pagination.")
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000, description="HNSW candidate list size for this query; higher trades latency for recall.")
+    exact: bool = Field(default=False, description="Bypass the vector index and scan exactly (slow; recall reference).")
+    mode: Literal["vector", "hybrid"] = Field(default="vector", description="'hybrid' fuses full-text and vector rankings (better for exact terms).")
+    continuation_token: Optional[str] = Field(default=None, description="next_token of the previous page (vector mode); continues after it instead of using offset.")
+
+class StreamSearchRequest(SearchRequest):
+    limit: int = Field(default=10, gt=0, le=10000, description="Maximum number of results; streamed, so large exports are allowed.")
 
 class SearchResultItemSourceDocument(BaseModel):
     doc_id: int
@@ -43,11 +63,19 @@ class SearchResultItem(BaseModel):
     chunk_id: int
     text: str
     distance: float
+    score: Optional[float] = None # Fusion score, set for hybrid searches
     source_document: SearchResultItemSourceDocument
     location: SearchResultItemLocation
 
 class SearchResponse(BaseModel):
     results: List[SearchResultItem]
+    next_token: Optional[str] = None # Continuation token for the next page, when this page was full and the pagination depth limit is not reached
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchRequest] = Field(..., min_length=1, max_length=50, description="Searches to run; results are returned in the same order.")
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]
 
 class DocumentResponse(db_layer.Document): # Reuse Pydantic model from db_layer
     pass
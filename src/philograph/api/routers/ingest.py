@@ -2,69 +2,83 @@ import logging
 from typing import Any, Dict, List, Optional
 
 import fastapi
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Path as FastApiPath
 
-from ..models import IngestRequest, IngestResponse
+from ..models import IngestRequest, IngestResponse, IngestJobResponse
+from ...data_access import db_layer
 from ...ingestion import pipeline as ingestion_pipeline
+from ...ingestion.jobs import queue_ingest_job
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _job_response(job: db_layer.IngestJob) -> IngestJobResponse:
+    return IngestJobResponse(
+        job_id=job.id, path=job.path, status=job.status, attempts=job.attempts, progress=job.progress,
+        error=job.error, created_at=job.created_at, started_at=job.started_at, finished_at=job.finished_at
+    )
+
+async def _get_job_or_404(job_id: int) -> db_layer.IngestJob:
+    try:
+        async with db_layer.get_db_connection() as conn:
+            job = await db_layer.get_ingest_job(conn, job_id)
+    except Exception as e:
+        logger.exception(f"Error retrieving ingest job {job_id}", exc_info=e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving ingest job.")
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingest job not found")
+    return job
+
 @router.post("/ingest", response_model=IngestResponse, status_code=status.HTTP_202_ACCEPTED, tags=["Ingestion"])
 async def handle_ingest_request(request: IngestRequest):
     """
-    Triggers the ingestion pipeline for a given file or directory path
+    Queues a background ingest job for a given file or directory path
     (relative to the configured source directory).
-    Returns immediately with status ACCEPTED, actual processing happens async.
-    (Note: Tier 0 implementation might block until complete for simplicity).
+    Returns immediately with status ACCEPTED and the job ID; poll
+    /ingest/jobs/{job_id} for progress and /ingest/jobs/{job_id}/result for the outcome.
     """
     logger.info(f"Received ingest request for path: {request.path}")
+    # Reject missing or out-of-tree paths up front rather than in a failed job
     try:
-        # For Tier 0, run synchronously and wait for the result
-        # In Tier 1+, this would likely enqueue a background task
-        result = await ingestion_pipeline.process_document(request.path)
-        logger.info(f"Pipeline result for {request.path}: {result}") # ADDED LOGGING
+        ingestion_pipeline.resolve_source_path(request.path)
+    except FileNotFoundError:
+        logger.warning(f"Ingestion source not found for {request.path}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion source file not found") # Standardized detail
+    except ValueError as ve:
+        logger.error(f"Invalid ingestion path {request.path}: {ve}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
 
-        # Use .get() for safety in case 'status' key is missing
-        result_status = result.get("status") # Renamed variable
-        if result_status == "Success":
-             # Return 200 OK (previously 201)
-             return IngestResponse(status=result_status, message=result.get("message", "Ingestion successful"), document_id=result.get("document_id"))
-        elif result_status == "Skipped":
-             # Return 200 OK if skipped
-             return IngestResponse(status=result_status, message=result.get("message", "Document already exists"))
-        elif result_status == "Directory Processed":
-             # Return 200 OK for directory summary
-             return IngestResponse(status=result_status, message=result.get("message"), details=result.get("details"))
-        elif result_status == "Error": # Explicitly check for Error status using renamed variable
-            error_message = result.get("message", "Ingestion failed")
-            logger.warning(f"Pipeline returned error status for {request.path}. Message: {error_message}") # ADDED LOGGING
-            # More robust check for "not found" case-insensitively
-            if "not found" in error_message.lower():
-                logger.warning(f"Ingestion source not found for {request.path}: {error_message}")
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion source file not found") # Standardized detail
-            else:
-                logger.error(f"Ingestion pipeline returned error for {request.path}: {error_message}")
-                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_message)
-        else: # Catch unexpected status from pipeline
-             logger.error(f"Unexpected status from ingestion pipeline for {request.path}. Full result: {result}") # ADDED LOGGING
-             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected status from ingestion pipeline.")
-
-    except ValueError as ve: # e.g., invalid path from pipeline
-        logger.error(f"Caught ValueError during ingestion for {request.path}: {ve}", exc_info=True) # ADDED LOGGING + exc_info
-        # More robust check for "not found" case-insensitively
-        if "not found" in str(ve).lower():
-             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion source file not found") # Standardized detail
-        else:
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
-    except RuntimeError as rte: # Catch errors raised by pipeline (embedding, db etc.)
-        logger.error(f"Caught RuntimeError during ingestion for {request.path}: {rte}", exc_info=True) # ADDED LOGGING + exc_info
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(rte))
+    try:
+        job_id = await queue_ingest_job(request.path)
     except Exception as e:
-        # Log the specific exception type as well
-        logger.exception(f"Caught unexpected {type(e).__name__} during ingestion for {request.path}", exc_info=e) # MODIFIED LOGGING
-        # Check if it's an HTTPException we already raised (like the 404) and re-raise it
-        if isinstance(e, HTTPException):
-            raise e
-        # Otherwise, raise the generic 500, fixing the status code reference
-        raise HTTPException(status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during ingestion.")
\ No newline at end of file
+        logger.exception(f"Caught unexpected {type(e).__name__} queueing ingestion for {request.path}", exc_info=e)
+        raise HTTPException(status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to queue ingestion job.")
+
+    return IngestResponse(status="Queued", message=f"Ingestion of '{request.path}' queued as job {job_id}.", job_id=job_id)
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobResponse, tags=["Ingestion"])
+async def get_ingest_job_status(job_id: int = FastApiPath(..., gt=0, description="ID of the ingest job.")):
+    """
+    Returns an ingest job's status and progress (files done, succeeded, skipped, errors).
+    """
+    return _job_response(await _get_job_or_404(job_id))
+
+@router.get("/ingest/jobs/{job_id}/result", response_model=IngestResponse, tags=["Ingestion"])
+async def get_ingest_job_result(job_id: int = FastApiPath(..., gt=0, description="ID of the ingest job.")):
+    """
+    Returns the pipeline result of a finished ingest job (409 while it is still queued or running).
+    """
+    job = await _get_job_or_404(job_id)
+    if job.status not in ("succeeded", "failed"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Ingest job {job_id} has not finished (status: {job.status}).")
+    result: Dict[str, Any] = job.result or {}
+    if job.status == "failed":
+        return IngestResponse(status="Error", message=job.error or result.get("message", "Ingestion failed"), job_id=job.id)
+    details: Optional[List[Dict[str, Any]]] = result.get("details")
+    return IngestResponse(
+        status=result.get("status", "Success"),
+        message=result.get("message", "Ingestion successful"),
+        document_id=result.get("document_id"),
+        details=details,
+        job_id=job.id
+    )
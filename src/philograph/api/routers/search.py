@@ -1,8 +1,11 @@
+import json
 import logging
 import psycopg
+from typing import Any, AsyncIterator, Dict
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 
-from ..models import SearchRequest, SearchResponse
+from ..models import BatchSearchRequest, BatchSearchResponse, SearchRequest, SearchResponse, StreamSearchRequest
 from ...search import service as search_service
 
 logger = logging.getLogger(__name__)
@@ -11,7 +14,9 @@ router = APIRouter()
 @router.post("/search", response_model=SearchResponse, tags=["Search"])
 async def handle_search_request(request: SearchRequest):
     """
-    Performs semantic search with optional metadata filtering.
+    Performs semantic (or hybrid lexical + semantic) search with optional metadata filtering.
+    Full vector search pages carry a `next_token`; send it back as `continuation_token` for the next page.
+    Tokens stop at the pagination depth limit (PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT / PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW rows).
     """
     logger.info(f"Received search request: query='{request.query[:50]}...', filters={request.filters}, limit={request.limit}")
     try:
@@ -20,9 +25,17 @@ async def handle_search_request(request: SearchRequest):
             query_text=request.query,
             top_k=request.limit,
             filters=filters_dict,
-            offset=request.offset # Pass offset to service layer
+            offset=request.offset, # Pass offset to service layer
+            ef_search=request.ef_search,
+            exact=request.exact,
+            mode=request.mode,
+            continuation_token=request.continuation_token
         )
-        return SearchResponse(results=results)
+        next_token = search_service.next_page_token(
+            results, request.limit, request.query, filters_dict, request.ef_search, request.exact, request.mode,
+            request.continuation_token
+        )
+        return SearchResponse(results=results, next_token=next_token)
     except ValueError as ve: # e.g., empty query, dimension mismatch
         logger.error(f"Value error during search: {ve}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
@@ -34,4 +47,84 @@ async def handle_search_request(request: SearchRequest):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Search failed due to unexpected database error")
     except Exception as e:
         logger.exception(f"Unexpected error during search for query: {request.query[:50]}...", exc_info=e)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during search.")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during search.")
+
+@router.post("/search/batch", response_model=BatchSearchResponse, tags=["Search"])
+async def handle_batch_search_request(request: BatchSearchRequest):
+    """
+    Performs several semantic searches in one request, embedding all queries together.
+    Results are returned per query, in request order.
+    """
+    logger.info(f"Received batch search request with {len(request.queries)} queries")
+    if any(query.continuation_token for query in request.queries):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="continuation_token is not supported in batch searches.")
+    try:
+        results = await search_service.perform_batch_search([
+            {
+                "query_text": query.query,
+                "top_k": query.limit,
+                "filters": query.filters.model_dump(exclude_none=True) if query.filters else None,
+                "offset": query.offset,
+                "ef_search": query.ef_search,
+                "exact": query.exact,
+                "mode": query.mode
+            }
+            for query in request.queries
+        ])
+        return BatchSearchResponse(results=[SearchResponse(results=query_results) for query_results in results])
+    except ValueError as ve:
+        logger.error(f"Value error during batch search: {ve}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except RuntimeError as rte:
+        logger.error(f"Runtime error during batch search: {rte}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(rte))
+    except psycopg.Error as db_err:
+        logger.error(f"Database error during batch search: {db_err}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Search failed due to unexpected database error")
+    except Exception as e:
+        logger.exception("Unexpected error during batch search", exc_info=e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during search.")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def _ndjson_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Encodes streamed results as NDJSON, one result object per line. The status code is sent
+    before the first row, so a failure mid-stream ends the body with an {"error": ...} line.
+    """
+    try:
+        async for result in results:
+            yield (json.dumps(result) + "\n").encode("utf-8")
+    except Exception as e:
+        logger.error(f"Error while streaming search results: {e}", exc_info=True)
+        yield (json.dumps({"error": str(e) if isinstance(e, RuntimeError) else "An unexpected error occurred during search."}) + "\n").encode("utf-8")
+
+@router.post("/search/stream", tags=["Search"], response_class=StreamingResponse)
+async def handle_stream_search_request(request: StreamSearchRequest):
+    """
+    Performs a search and streams the results as NDJSON (one SearchResultItem per line) as
+    they are read from the database, for exports with large limits.
+    """
+    logger.info(f"Received streamed search request: query='{request.query[:50]}...', filters={request.filters}, limit={request.limit}")
+    try:
+        filters_dict = request.filters.model_dump(exclude_none=True) if request.filters else None
+        results = await search_service.open_search_stream(
+            query_text=request.query,
+            top_k=request.limit,
+            filters=filters_dict,
+            offset=request.offset,
+            ef_search=request.ef_search,
+            exact=request.exact,
+            mode=request.mode,
+            continuation_token=request.continuation_token
+        )
+    except ValueError as ve:
+        logger.error(f"Value error during streamed search: {ve}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    except RuntimeError as rte:
+        logger.error(f"Runtime error during streamed search: {rte}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(rte))
+    except Exception as e:
+        logger.exception(f"Unexpected error during streamed search for query: {request.query[:50]}...", exc_info=e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred during search.")
+    return StreamingResponse(_ndjson_lines(results), media_type=NDJSON_MEDIA_TYPE)
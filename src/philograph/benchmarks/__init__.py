@@ -0,0 +1 @@
+# src/philograph/benchmarks/__init__.py
\ No newline at end of file
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from ..utils.embedding_utils import EMBEDDING_DTYPE
+
+logger = logging.getLogger(__name__)
+
+# --- Statistics ---
+
+def latency_summary(samples_seconds: Sequence[float]) -> Dict[str, float]:
+    """Summarizes latency samples (seconds) as p50/p95/p99/mean in milliseconds."""
+    if len(samples_seconds) == 0:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    samples_ms = np.asarray(samples_seconds, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(samples_ms.mean()), 3),
+    }
+
+def write_report(rows: List[Dict[str, Any]], output_path: Optional[str]) -> None:
+    """Writes benchmark result rows as JSON (for comparing runs), if an output path was given."""
+    if not output_path:
+        return
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+    logger.info(f"Benchmark report written to {output_path}")
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """
+    Peak resident set size of this process (or of its terminated, waited-for children) in MB.
+    Returns None where the `resource` module is unavailable (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+# --- Stub Servers ---
+
+def hashed_embedding(text: str, dimension: int) -> np.ndarray:
+    """Deterministic unit-length float32 embedding derived from a hash of the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(EMBEDDING_DTYPE)
+    return vector / np.linalg.norm(vector)
+
+class StubServer:
+    """
+    Minimal threaded HTTP server on localhost standing in for an external service.
+
+    `routes` maps a POST path to a handler taking the raw request body and returning
+    (status, content_type, body bytes). Every request sleeps `latency_seconds` first,
+    so benchmarks see a realistic network/service delay without leaving the machine.
+    """
+
+    def __init__(self, routes: Dict[str, Callable[[bytes], tuple]], latency_seconds: float = 0.0):
+        self.routes = routes
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Stub server is not running.")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency_seconds:
+                    time.sleep(stub.latency_seconds)
+                route = stub.routes.get(self.path.split("?")[0])
+                if route is None:
+                    status, content_type, payload = 404, "text/plain", b"Not found"
+                else:
+                    status, content_type, payload = route(body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass # Keep benchmark output clean
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Stub server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def stub_litellm_server(
+    dimension: int,
+    latency_seconds: float = 0.0,
+    vectors: Optional[Dict[str, np.ndarray]] = None
+) -> StubServer:
+    """
+    Stub LiteLLM proxy serving POST /embeddings in the OpenAI response format.
+
+    Texts found in `vectors` get that embedding (so benchmarks control query vectors);
+    anything else gets a deterministic hashed embedding of `dimension`.
+    """
+    vectors = vectors if vectors is not None else {}
+
+    def embeddings(body: bytes) -> tuple:
+        request = json.loads(body or b"{}")
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = []
+        for i, text in enumerate(inputs):
+            vector = vectors.get(text)
+            if vector is None:
+                vector = hashed_embedding(text, dimension)
+            data.append({"object": "embedding", "index": i, "embedding": np.asarray(vector).tolist()})
+        payload = {"object": "list", "model": request.get("model"), "data": data}
+        return 200, "application/json", json.dumps(payload).encode("utf-8")
+
+    return StubServer({"/embeddings": embeddings}, latency_seconds=latency_seconds)
+
+def make_tei(title: str, author: str, sections: List[tuple], references: List[str]) -> str:
+    """Builds a GROBID-style TEI document with the elements parse_grobid_tei reads."""
+    forename, _, surname = author.partition(" ")
+    divs = "".join(
+        f"<div><head>{escape(head)}</head>" + "".join(f"<p>{escape(p)}</p>" for p in paragraphs) + "</div>"
+        for head, paragraphs in sections
+    )
+    bibls = "".join(f"<bibl>{escape(ref)}</bibl>" for ref in references)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc>'
+        f'<titleStmt><title type="main">{escape(title)}</title></titleStmt>'
+        '<sourceDesc><biblStruct><analytic><author><persName>'
+        f'<forename>{escape(forename)}</forename><surname>{escape(surname)}</surname>'
+        '</persName></author></analytic></biblStruct></sourceDesc>'
+        f'</fileDesc></teiHeader><text><body>{divs}</body>'
+        f'<back><div type="references"><listBibl>{bibls}</listBibl></div></back></text></TEI>'
+    )
+
+def stub_grobid_server(tei_for_request: Callable[[bytes], str], latency_seconds: float = 0.0) -> StubServer:
+    """Stub GROBID service answering POST /api/processFulltextDocument with canned TEI for the uploaded body."""
+    def process_fulltext(body: bytes) -> tuple:
+        return 200, "application/xml", tei_for_request(body).encode("utf-8")
+
+    return StubServer({"/api/processFulltextDocument": process_fulltext}, latency_seconds=latency_seconds)
@@ -0,0 +1,304 @@
+"""
+End-to-end ingestion throughput benchmark.
+
+Generates a directory of TXT/MD/EPUB files plus placeholder PDFs, serves embeddings
+and GROBID TEI from local stub servers with injected latency, and runs
+`pipeline.process_document` over the directory against the configured database.
+Reports documents/minute, chunks/second, busy time per pipeline stage (fingerprinting,
+extraction, document and section inserts, chunking, embedding, chunk indexing,
+reference parsing and linking) and peak RSS.
+
+Benchmark documents are stored under a unique directory prefix and deleted afterwards
+(unless --keep-documents), so this can run against a development database:
+
+    python -m src.philograph.benchmarks.ingestion_benchmark --docs-per-type 25 \
+        --embedding-latency-ms 50 --grobid-latency-ms 500 --output ingest.json
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .. import config
+from ..data_access import db_layer
+from ..ingestion import pipeline
+from ..ingestion.extraction_pool import extraction_pool
+from ..utils import http_client
+from ..utils.embedding_cache import embedding_cache
+from ..utils.metrics import INGESTION_STAGES
+from ..utils.stage_timings import ingestion_stage_timings
+from .common import make_tei, peak_rss_mb, stub_grobid_server, stub_litellm_server, write_report
+
+logger = logging.getLogger(__name__)
+app = typer.Typer(help="Ingestion throughput benchmark")
+console = Console()
+
+STAGES = INGESTION_STAGES
+
+_VOCABULARY = (
+    "being time spirit reason critique judgment freedom nature concept intuition experience "
+    "understanding dialectic negation subject object consciousness world phenomenon essence "
+    "existence knowledge virtue ethics truth language meaning history art beauty sublime"
+).split()
+
+# --- Corpus Generation ---
+
+def _paragraphs(rng: np.random.Generator, count: int, words: int) -> List[str]:
+    return [
+        " ".join(rng.choice(_VOCABULARY, size=words)).capitalize() + "."
+        for _ in range(count)
+    ]
+
+def _references(rng: np.random.Generator, count: int) -> List[str]:
+    return [
+        f"Author{int(rng.integers(1, 500))}, A. ({int(rng.integers(1750, 2020))}). "
+        f"{' '.join(rng.choice(_VOCABULARY, size=4)).title()}. Journal of Philosophy."
+        for _ in range(count)
+    ]
+
+def write_epub(path: Path, title: str, author: str, chapters: List[Tuple[str, List[str]]]) -> None:
+    """Writes a minimal EPUB 2 (OPF manifest/spine plus NCX table of contents) readable by ebooklib."""
+    manifest, spine, nav_points = [], [], []
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip") # Must be first and stored
+        zf.writestr("META-INF/container.xml", (
+            '<?xml version="1.0"?><container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles></container>'
+        ))
+        for n, (chapter_title, paragraphs) in enumerate(chapters):
+            name = f"chapter{n}.xhtml"
+            body = "".join(f"<p>{escape(p)}</p>" for p in paragraphs)
+            zf.writestr(f"OEBPS/{name}", (
+                '<?xml version="1.0" encoding="utf-8"?><html xmlns="http://www.w3.org/1999/xhtml">'
+                f'<head><title>{escape(chapter_title)}</title></head><body><h1>{escape(chapter_title)}</h1>{body}</body></html>'
+            ))
+            manifest.append(f'<item id="c{n}" href="{name}" media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="c{n}"/>')
+            nav_points.append(
+                f'<navPoint id="n{n}" playOrder="{n + 1}"><navLabel><text>{escape(chapter_title)}</text></navLabel>'
+                f'<content src="{name}"/></navPoint>'
+            )
+        zf.writestr("OEBPS/toc.ncx", (
+            '<?xml version="1.0" encoding="utf-8"?><ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">'
+            f'<head><meta name="dtb:uid" content="{escape(title)}"/></head><docTitle><text>{escape(title)}</text></docTitle>'
+            f'<navMap>{"".join(nav_points)}</navMap></ncx>'
+        ))
+        zf.writestr("OEBPS/content.opf", (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="bookid">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:title>{escape(title)}</dc:title><dc:creator>{escape(author)}</dc:creator>'
+            f'<dc:language>en</dc:language><dc:identifier id="bookid">{escape(title)}</dc:identifier></metadata>'
+            f'<manifest><item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>{"".join(manifest)}</manifest>'
+            f'<spine toc="ncx">{"".join(spine)}</spine></package>'
+        ))
+
+def generate_documents(
+    directory: Path,
+    docs_per_type: int,
+    sections_per_doc: int = 5,
+    paragraphs_per_section: int = 8,
+    words_per_paragraph: int = 80,
+    seed: int = 42
+) -> Dict[str, int]:
+    """
+    Writes `docs_per_type` TXT, MD (with frontmatter), EPUB and placeholder PDF files.
+    PDF content is served by the stub GROBID server (see grobid_tei_for), so the PDFs
+    only need to be distinct. Returns the number of files written per extension.
+    """
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(docs_per_type):
+        sections = [
+            (f"Chapter {s + 1}", _paragraphs(rng, paragraphs_per_section, words_per_paragraph))
+            for s in range(sections_per_doc)
+        ]
+        flat_text = "\n\n".join(p for _, paragraphs in sections for p in paragraphs)
+        (directory / f"doc_{i:04d}.txt").write_text(flat_text, encoding="utf-8")
+        (directory / f"doc_{i:04d}.md").write_text(
+            f"---\ntitle: Markdown Document {i}\nauthor: Benchmark Author\nyear: {1900 + i % 100}\n---\n{flat_text}\n",
+            encoding="utf-8"
+        )
+        write_epub(directory / f"doc_{i:04d}.epub", f"EPUB Document {i}", "Benchmark Author", sections)
+        (directory / f"doc_{i:04d}.pdf").write_bytes(f"%PDF-1.4\n% benchmark document {i}\n%%EOF\n".encode("ascii"))
+    return {ext: docs_per_type for ext in (".txt", ".md", ".epub", ".pdf")}
+
+def grobid_tei_for(
+    sections_per_doc: int, paragraphs_per_section: int, words_per_paragraph: int, references_per_doc: int
+):
+    """Returns a stub GROBID responder producing deterministic TEI (sections and references) per uploaded file name."""
+    def tei_for_request(body: bytes) -> str:
+        # Seed from the multipart file name, not the whole body (the boundary is random)
+        match = re.search(rb'filename="([^"]+)"', body)
+        seed = int.from_bytes(hashlib.sha256(match.group(1) if match else body).digest()[:8], "big")
+        rng = np.random.default_rng(seed)
+        sections = [
+            (f"Section {s + 1}", _paragraphs(rng, paragraphs_per_section, words_per_paragraph))
+            for s in range(sections_per_doc)
+        ]
+        return make_tei(f"PDF Document {seed % 100000}", "Benchmark Author", sections, _references(rng, references_per_doc))
+    return tei_for_request
+
+# --- Measurement ---
+
+async def _count_chunks(source_prefix: str) -> int:
+    async with db_layer.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("""
+                SELECT count(*) FROM chunks c
+                JOIN sections s ON c.section_id = s.id
+                JOIN documents d ON s.doc_id = d.id
+                WHERE d.source_path LIKE %s;
+            """, (f"{source_prefix}%",))
+            return (await cur.fetchone())[0]
+
+async def _remove_documents(source_prefix: str) -> None:
+    """Deletes benchmark documents (cascading to sections/chunks) and the references linked to their chunks."""
+    async with db_layer.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("""
+                DELETE FROM relationships WHERE source_node_id IN (
+                    SELECT 'chunk:' || c.id FROM chunks c
+                    JOIN sections s ON c.section_id = s.id
+                    JOIN documents d ON s.doc_id = d.id
+                    WHERE d.source_path LIKE %s
+                );
+            """, (f"{source_prefix}%",))
+            await cur.execute("DELETE FROM documents WHERE source_path LIKE %s;", (f"{source_prefix}%",))
+
+def summarize_run(
+    result: Dict[str, Any], wall_seconds: float, chunks: int, stage_snapshot: Dict[str, Dict[str, float]]
+) -> Dict[str, Any]:
+    """Builds the report from process_document's directory result and the recorded stage timings."""
+    statuses = [list(entry.values())[0]["status"] for entry in result.get("details", [])]
+    succeeded = statuses.count("Success")
+    return {
+        "documents": len(statuses),
+        "succeeded": succeeded,
+        "skipped": statuses.count("Skipped"),
+        "errors": len(statuses) - succeeded - statuses.count("Skipped"),
+        "chunks": chunks,
+        "wall_seconds": round(wall_seconds, 3),
+        "documents_per_minute": round(succeeded / wall_seconds * 60, 2) if wall_seconds > 0 else 0.0,
+        "chunks_per_second": round(chunks / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "stages": {
+            stage: {
+                "busy_seconds": round(stage_snapshot.get(stage, {}).get("seconds", 0.0), 3),
+                "calls": int(stage_snapshot.get(stage, {}).get("count", 0)),
+            }
+            for stage in STAGES
+        },
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    summary = Table(title="Ingestion Benchmark", show_header=True, header_style="bold magenta")
+    for column in ["documents", "succeeded", "errors", "chunks", "wall_seconds", "documents_per_minute", "chunks_per_second", "peak_rss_mb", "peak_rss_children_mb"]:
+        summary.add_column(column, justify="right")
+    summary.add_row(*(str(report.get(column, "")) for column in [
+        "documents", "succeeded", "errors", "chunks", "wall_seconds", "documents_per_minute", "chunks_per_second", "peak_rss_mb", "peak_rss_children_mb"
+    ]))
+    console.print(summary)
+
+    stages = Table(title="Stage busy time (stages overlap, so totals can exceed wall time)", show_header=True, header_style="bold magenta")
+    stages.add_column("stage")
+    stages.add_column("busy_seconds", justify="right")
+    stages.add_column("calls", justify="right")
+    for stage, values in report["stages"].items():
+        stages.add_row(stage, str(values["busy_seconds"]), str(values["calls"]))
+    console.print(stages)
+
+async def run_benchmark(
+    docs_per_type: int, sections_per_doc: int, paragraphs_per_section: int, words_per_paragraph: int,
+    references_per_doc: int, embedding_latency_ms: float, grobid_latency_ms: float,
+    file_workers: Optional[int], use_embedding_cache: bool, seed: int, keep_documents: bool
+) -> Dict[str, Any]:
+    root = Path(tempfile.mkdtemp(prefix="philograph-ingest-benchmark-")).resolve()
+    run_dir = f"ingest-benchmark-{uuid.uuid4().hex[:8]}"
+    generate_documents(root / run_dir, docs_per_type, sections_per_doc, paragraphs_per_section, words_per_paragraph, seed)
+
+    originals = (config.SOURCE_FILE_DIR_ABSOLUTE, config.LITELLM_PROXY_URL, config.GROBID_API_URL, embedding_cache.persist)
+    tei_responder = grobid_tei_for(sections_per_doc, paragraphs_per_section, words_per_paragraph, references_per_doc)
+    try:
+        with stub_litellm_server(config.TARGET_EMBEDDING_DIMENSION, embedding_latency_ms / 1000.0) as litellm, \
+             stub_grobid_server(tei_responder, grobid_latency_ms / 1000.0) as grobid:
+            config.SOURCE_FILE_DIR_ABSOLUTE = root
+            config.LITELLM_PROXY_URL = litellm.url
+            config.GROBID_API_URL = grobid.url
+            # By default every chunk goes to the (stub) proxy, as on a first ingest
+            embedding_cache.persist = use_embedding_cache
+            if not use_embedding_cache:
+                embedding_cache.clear()
+
+            await db_layer.get_db_pool()
+            async with db_layer.get_db_connection() as conn:
+                await db_layer.initialize_schema(conn)
+            ingestion_stage_timings.reset()
+
+            start = time.perf_counter()
+            result = await pipeline.process_document(run_dir, max_workers=file_workers)
+            wall_seconds = time.perf_counter() - start
+            stage_snapshot = ingestion_stage_timings.snapshot()
+
+            await extraction_pool.shutdown() # Reap worker processes so their peak RSS is reported
+            report = summarize_run(result, wall_seconds, await _count_chunks(run_dir), stage_snapshot)
+            report.update({
+                "peak_rss_mb": peak_rss_mb(),
+                "peak_rss_children_mb": peak_rss_mb(children=True),
+                "embedding_requests": litellm.requests,
+                "grobid_requests": grobid.requests,
+                "settings": {
+                    "docs_per_type": docs_per_type, "sections_per_doc": sections_per_doc,
+                    "paragraphs_per_section": paragraphs_per_section, "words_per_paragraph": words_per_paragraph,
+                    "references_per_doc": references_per_doc, "embedding_latency_ms": embedding_latency_ms,
+                    "grobid_latency_ms": grobid_latency_ms, "file_workers": file_workers or config.INGEST_FILE_WORKERS,
+                    "embedding_batch_size": config.EMBEDDING_BATCH_SIZE, "embedding_max_concurrency": config.EMBEDDING_MAX_CONCURRENCY,
+                    "extraction_executor": config.EXTRACTION_EXECUTOR,
+                },
+            })
+            if not keep_documents:
+                await _remove_documents(run_dir)
+    finally:
+        config.SOURCE_FILE_DIR_ABSOLUTE, config.LITELLM_PROXY_URL, config.GROBID_API_URL, embedding_cache.persist = originals
+        shutil.rmtree(root, ignore_errors=True)
+        await http_client.close_async_client()
+        await db_layer.close_db_pool()
+    return report
+
+@app.command()
+def main(
+    docs_per_type: int = typer.Option(10, help="Documents generated per type (TXT, MD, EPUB, PDF)."),
+    sections_per_doc: int = typer.Option(5, help="Sections (chapters) per document."),
+    paragraphs_per_section: int = typer.Option(8, help="Paragraphs per section (one chunk each with the paragraph chunker)."),
+    words_per_paragraph: int = typer.Option(80, help="Words per paragraph."),
+    references_per_doc: int = typer.Option(20, help="References in each canned GROBID TEI response."),
+    embedding_latency_ms: float = typer.Option(50.0, help="Latency injected by the stub LiteLLM proxy per request."),
+    grobid_latency_ms: float = typer.Option(500.0, help="Latency injected by the stub GROBID server per PDF."),
+    file_workers: Optional[int] = typer.Option(None, help="Concurrent file workers (defaults to INGEST_FILE_WORKERS)."),
+    use_embedding_cache: bool = typer.Option(False, help="Allow the durable embedding cache (off: every chunk is embedded)."),
+    seed: int = typer.Option(42, help="Random seed for generated text."),
+    keep_documents: bool = typer.Option(False, help="Leave the ingested benchmark documents in the database."),
+    output: Optional[str] = typer.Option(None, help="Write the report as JSON to this path."),
+):
+    """Ingest a generated directory through the full pipeline and report throughput, stage timings and peak RSS."""
+    report = asyncio.run(run_benchmark(
+        docs_per_type, sections_per_doc, paragraphs_per_section, words_per_paragraph, references_per_doc,
+        embedding_latency_ms, grobid_latency_ms, file_workers, use_embedding_cache, seed, keep_documents
+    ))
+    print_report(report)
+    write_report(report, output)
+
+if __name__ == "__main__":
+    app()
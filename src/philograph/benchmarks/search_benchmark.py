@@ -0,0 +1,378 @@
+"""
+Recall/latency benchmark for vector search against a synthetic corpus.
+
+Loads a generated corpus into the configured Postgres/pgvector database, builds the
+HNSW index for each requested (m, ef_construction) pair, and drives
+`vector_search_chunks` (and optionally `SearchService.perform_search` behind a stub
+LiteLLM server) reporting p50/p95/p99 latency, QPS and recall@k against brute force.
+
+Run against a dedicated database (DB_NAME) -- the benchmark refuses to load into a
+non-empty chunks table and rebuilds `chunks_embedding_idx`:
+
+    python -m src.philograph.benchmarks.search_benchmark --docs 200 --chunks-per-doc 50 \
+        --distribution clustered --ef-search 20,40,100,200 --hnsw-m 16,32 --output search.json
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .. import config
+from ..data_access import db_layer
+from ..search import service as search_service
+from ..search.result_cache import search_result_cache
+from ..utils import http_client
+from ..utils.embedding_cache import embedding_cache
+from ..utils.embedding_utils import EMBEDDING_DTYPE
+from .common import latency_summary, stub_litellm_server, write_report
+
+logger = logging.getLogger(__name__)
+app = typer.Typer(help="Vector search recall/latency benchmark")
+console = Console()
+
+BENCHMARK_SOURCE_PREFIX = "benchmark://search/"
+BENCHMARK_YEARS = list(range(1900, 1910)) # Each year filter selects ~10% of the corpus
+
+# --- Synthetic Corpus ---
+
+@dataclass
+class SyntheticCorpus:
+    """Generated documents and their chunk embeddings (rows of `embeddings` are unit length)."""
+    embeddings: np.ndarray # (num_docs * chunks_per_doc, dimension) float32
+    doc_index: np.ndarray # Row -> document number
+    doc_years: np.ndarray # Document number -> year
+    num_docs: int
+    sections_per_doc: int
+    chunks_per_doc: int
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(EMBEDDING_DTYPE)
+
+def generate_corpus(
+    num_docs: int,
+    chunks_per_doc: int,
+    dimension: int,
+    distribution: str = "random",
+    num_clusters: int = 32,
+    sections_per_doc: int = 5,
+    seed: int = 42
+) -> SyntheticCorpus:
+    """
+    Generates unit-length chunk embeddings.
+
+    "random" draws isotropic Gaussian vectors (a hard case for HNSW: no structure);
+    "clustered" draws points around `num_clusters` centres, closer to real text embeddings.
+    """
+    if distribution not in ("random", "clustered"):
+        raise ValueError(f"Unknown distribution '{distribution}' (expected 'random' or 'clustered')")
+    rng = np.random.default_rng(seed)
+    total = num_docs * chunks_per_doc
+    if distribution == "random":
+        vectors = rng.standard_normal((total, dimension), dtype=np.float32)
+    else:
+        centres = rng.standard_normal((num_clusters, dimension), dtype=np.float32)
+        assignment = rng.integers(0, num_clusters, size=total)
+        vectors = centres[assignment] + 0.35 * rng.standard_normal((total, dimension), dtype=np.float32)
+    return SyntheticCorpus(
+        embeddings=_normalize_rows(vectors),
+        doc_index=np.repeat(np.arange(num_docs), chunks_per_doc),
+        doc_years=rng.choice(BENCHMARK_YEARS, size=num_docs),
+        num_docs=num_docs,
+        sections_per_doc=max(1, min(sections_per_doc, chunks_per_doc)),
+        chunks_per_doc=chunks_per_doc,
+    )
+
+def generate_queries(corpus: SyntheticCorpus, num_queries: int, seed: int = 7) -> np.ndarray:
+    """Query vectors: perturbed corpus points, so every query has a meaningful neighbourhood."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(corpus.embeddings), size=num_queries)
+    dimension = corpus.embeddings.shape[1]
+    noise = 0.3 * rng.standard_normal((num_queries, dimension), dtype=np.float32) / np.sqrt(dimension)
+    return _normalize_rows(corpus.embeddings[rows] + noise)
+
+def brute_force_top_k(corpus: SyntheticCorpus, query: np.ndarray, top_k: int, year: Optional[int] = None) -> np.ndarray:
+    """Exact top-k corpus rows by cosine distance, optionally restricted to documents of `year`."""
+    distances = 1.0 - corpus.embeddings @ query
+    if year is not None:
+        distances = np.where(corpus.doc_years[corpus.doc_index] == year, distances, np.inf)
+    k = min(top_k, int(np.isfinite(distances).sum()))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(distances, k - 1)[:k]
+    return candidates[np.argsort(distances[candidates])]
+
+def recall_at_k(returned_ids: Sequence[int], true_ids: Sequence[int]) -> float:
+    """Fraction of the true nearest neighbours present in the returned ids (1.0 if there are none)."""
+    if len(true_ids) == 0:
+        return 1.0
+    return len(set(returned_ids) & set(true_ids)) / len(true_ids)
+
+# --- Database Setup ---
+
+async def require_empty_chunks_table() -> None:
+    """
+    Refuses to run against a database that already holds chunks. The benchmark drops and rebuilds
+    chunks_embedding_idx, which must never happen to a real corpus. A missing table counts as empty.
+    """
+    async with db_layer.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT to_regclass('chunks') IS NOT NULL;")
+            if not (await cur.fetchone())[0]:
+                return
+            await cur.execute("SELECT EXISTS (SELECT 1 FROM chunks);")
+            if (await cur.fetchone())[0]:
+                raise RuntimeError("Benchmark requires an empty chunks table; point DB_NAME at a dedicated benchmark database.")
+
+async def load_corpus(corpus: SyntheticCorpus, insert_batch_size: int = 2000) -> np.ndarray:
+    """Inserts the corpus (documents, sections, chunks via COPY); returns chunk ids aligned with corpus rows."""
+    await require_empty_chunks_table()
+    async with db_layer.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            # Building the index once after loading is much faster than maintaining it per row
+            await cur.execute("DROP INDEX IF EXISTS chunks_embedding_idx;")
+
+    chunk_ids = np.empty(len(corpus.embeddings), dtype=np.int64)
+    chunks_per_section = -(-corpus.chunks_per_doc // corpus.sections_per_doc)
+    for doc in range(corpus.num_docs):
+        author, year = f"Benchmark Author {doc % 20}", int(corpus.doc_years[doc])
+        async with db_layer.get_db_connection() as conn:
+            doc_id = await db_layer.add_document(
+                conn, f"Benchmark Document {doc}", author, year, f"{BENCHMARK_SOURCE_PREFIX}{doc}", {"benchmark": True}
+            )
+            section_ids = await db_layer.add_sections_batch(
+                conn, doc_id, [(f"Section {s}", 1, s) for s in range(corpus.sections_per_doc)]
+            )
+            first_row = doc * corpus.chunks_per_doc
+            rows = []
+            for n in range(corpus.chunks_per_doc):
+                rows.append((
+                    section_ids[min(n // chunks_per_section, corpus.sections_per_doc - 1)],
+                    f"Benchmark chunk {doc}-{n}",
+                    n,
+                    corpus.embeddings[first_row + n]
+                ))
+            for start in range(0, len(rows), insert_batch_size):
+                ids = await db_layer.add_chunks_batch(
+                    conn, rows[start:start + insert_batch_size], doc_id=doc_id, doc_year=year
+                )
+                chunk_ids[first_row + start:first_row + start + len(ids)] = ids
+    logger.info(f"Loaded {corpus.num_docs} documents / {len(chunk_ids)} chunks.")
+    return chunk_ids
+
+async def build_index(m: int, ef_construction: int) -> float:
+    """(Re)builds the HNSW index with the given parameters; returns build time in seconds."""
+    async with db_layer.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("DROP INDEX IF EXISTS chunks_embedding_idx;")
+            start = time.perf_counter()
+            await cur.execute(f"""
+                CREATE INDEX chunks_embedding_idx
+                ON chunks
+                USING hnsw (embedding vector_cosine_ops)
+                WITH (m = {int(m)}, ef_construction = {int(ef_construction)});
+            """)
+            elapsed = time.perf_counter() - start
+            await cur.execute("ANALYZE chunks;")
+    return elapsed
+
+async def remove_corpus() -> None:
+    """Deletes benchmark documents (cascading to sections/chunks) and restores the configured index."""
+    async with db_layer.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("DELETE FROM documents WHERE source_path LIKE %s;", (f"{BENCHMARK_SOURCE_PREFIX}%",))
+    await build_index(config.PGVECTOR_HNSW_M, config.PGVECTOR_HNSW_EF_CONSTRUCTION)
+
+# --- Measurement ---
+
+async def _timed_queries(run_one, num_queries: int, concurrency: int) -> Tuple[List[float], List[Any], float]:
+    """Runs run_one(i) for every query with bounded concurrency; returns (latencies, results, wall seconds)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = [0.0] * num_queries
+    results: List[Any] = [None] * num_queries
+
+    async def timed(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            results[i] = await run_one(i)
+            latencies[i] = time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(num_queries)))
+    return latencies, results, time.perf_counter() - wall_start
+
+def _summarize(label: Dict[str, Any], latencies: List[float], wall: float, recalls: List[float]) -> Dict[str, Any]:
+    return {
+        **label,
+        "queries": len(latencies),
+        **latency_summary(latencies),
+        "qps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "recall_at_k": round(float(np.mean(recalls)), 4) if recalls else 0.0,
+    }
+
+async def run_db_pass(
+    corpus: SyntheticCorpus, chunk_ids: np.ndarray, queries: np.ndarray, years: List[Optional[int]],
+    top_k: int, ef_search: Optional[int], exact: bool, concurrency: int
+) -> Tuple[List[float], List[float], float]:
+    """Drives vector_search_chunks directly; returns (latencies, recalls, wall seconds)."""
+    async def run_one(i: int):
+        filters = {"year": years[i]} if years[i] is not None else None
+        async with db_layer.get_db_connection() as conn:
+            return await db_layer.vector_search_chunks(conn, queries[i], top_k, filters, ef_search=ef_search, exact=exact)
+
+    latencies, results, wall = await _timed_queries(run_one, len(queries), concurrency)
+    recalls = [
+        recall_at_k([r.chunk_id for r in results[i]], chunk_ids[brute_force_top_k(corpus, queries[i], top_k, years[i])])
+        for i in range(len(queries))
+    ]
+    return latencies, recalls, wall
+
+async def run_service_pass(
+    corpus: SyntheticCorpus, chunk_ids: np.ndarray, queries: np.ndarray, years: List[Optional[int]],
+    top_k: int, ef_search: Optional[int], exact: bool, concurrency: int, pass_id: str
+) -> Tuple[List[float], List[float], float]:
+    """
+    Drives SearchService.perform_search (embedding request to the stub proxy + search + formatting).
+    Query texts are unique per pass and the result cache is cleared, so every query pays the full path.
+    """
+    service = search_service.SearchService(db_layer)
+    search_result_cache.clear()
+
+    async def run_one(i: int):
+        filters = {"year": years[i]} if years[i] is not None else None
+        return await service.perform_search(f"{pass_id} query {i}", top_k, filters, ef_search=ef_search, exact=exact)
+
+    latencies, results, wall = await _timed_queries(run_one, len(queries), concurrency)
+    recalls = [
+        recall_at_k([r["chunk_id"] for r in results[i]], chunk_ids[brute_force_top_k(corpus, queries[i], top_k, years[i])])
+        for i in range(len(queries))
+    ]
+    return latencies, recalls, wall
+
+def _parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    table = Table(title="Vector Search Benchmark", show_header=True, header_style="bold magenta")
+    columns = ["path", "m", "ef_construction", "ef_search", "filtered", "p50_ms", "p95_ms", "p99_ms", "qps", "recall_at_k"]
+    for column in columns:
+        table.add_column(column, justify="right")
+    for row in rows:
+        table.add_row(*(str(row.get(column, "")) for column in columns))
+    console.print(table)
+
+async def run_benchmark(
+    docs: int, chunks_per_doc: int, distribution: str, clusters: int, num_queries: int, top_k: int,
+    ef_search_values: List[int], m_values: List[int], ef_construction_values: List[int],
+    filtered: bool, service_path: bool, embedding_latency_ms: float, concurrency: int, seed: int, keep_corpus: bool
+) -> List[Dict[str, Any]]:
+    dimension = config.TARGET_EMBEDDING_DIMENSION
+    corpus = generate_corpus(docs, chunks_per_doc, dimension, distribution, clusters, seed=seed)
+    queries = generate_queries(corpus, num_queries, seed=seed + 1)
+    rng = np.random.default_rng(seed + 2)
+    year_sets: Dict[bool, List[Optional[int]]] = {False: [None] * num_queries}
+    if filtered:
+        year_sets[True] = [int(y) for y in rng.choice(BENCHMARK_YEARS, size=num_queries)]
+
+    await db_layer.get_db_pool()
+    rows: List[Dict[str, Any]] = []
+    # Cleanup drops and rebuilds the HNSW index, so it only runs once the database is known to be ours
+    owns_database = False
+    try:
+        await require_empty_chunks_table()
+        owns_database = True
+        async with db_layer.get_db_connection() as conn:
+            await db_layer.initialize_schema(conn) # A fresh benchmark database starts empty
+        chunk_ids = await load_corpus(corpus)
+        for m in m_values:
+            for ef_construction in ef_construction_values:
+                build_seconds = await build_index(m, ef_construction)
+                console.print(f"Built HNSW index (m={m}, ef_construction={ef_construction}) in {build_seconds:.2f}s")
+                settings: List[Tuple[Optional[int], bool]] = [(ef, False) for ef in ef_search_values] + [(None, True)]
+                for is_filtered, years in year_sets.items():
+                    for ef_search, exact in settings:
+                        label = {
+                            "path": "db", "m": m, "ef_construction": ef_construction,
+                            "ef_search": "exact" if exact else ef_search, "filtered": is_filtered,
+                            "build_seconds": round(build_seconds, 3),
+                        }
+                        latencies, recalls, wall = await run_db_pass(
+                            corpus, chunk_ids, queries, years, top_k, ef_search, exact, concurrency
+                        )
+                        rows.append(_summarize(label, latencies, wall, recalls))
+
+        if service_path:
+            rows.extend(await _run_service_passes(
+                corpus, chunk_ids, queries, year_sets, top_k, ef_search_values,
+                m_values[-1], ef_construction_values[-1], embedding_latency_ms, concurrency
+            ))
+    finally:
+        if owns_database and not keep_corpus:
+            await remove_corpus()
+        await http_client.close_async_client()
+        await db_layer.close_db_pool()
+    return rows
+
+async def _run_service_passes(
+    corpus: SyntheticCorpus, chunk_ids: np.ndarray, queries: np.ndarray, year_sets: Dict[bool, List[Optional[int]]],
+    top_k: int, ef_search_values: List[int], m: int, ef_construction: int, embedding_latency_ms: float, concurrency: int
+) -> List[Dict[str, Any]]:
+    """Service-path passes against the last built index, with query embeddings served by a stub LiteLLM proxy."""
+    rows = []
+    original_url, original_persist = config.LITELLM_PROXY_URL, embedding_cache.persist
+    vectors: Dict[str, np.ndarray] = {}
+    with stub_litellm_server(config.TARGET_EMBEDDING_DIMENSION, embedding_latency_ms / 1000.0, vectors) as stub:
+        config.LITELLM_PROXY_URL = stub.url
+        embedding_cache.persist = False # Keep benchmark queries out of the durable cache table
+        try:
+            for is_filtered, years in year_sets.items():
+                for ef_search in ef_search_values:
+                    pass_id = f"m{m}-efc{ef_construction}-ef{ef_search}-f{int(is_filtered)}"
+                    vectors.update({f"{pass_id} query {i}": queries[i] for i in range(len(queries))})
+                    latencies, recalls, wall = await run_service_pass(
+                        corpus, chunk_ids, queries, years, top_k, ef_search, False, concurrency, pass_id
+                    )
+                    label = {"path": "service", "m": m, "ef_construction": ef_construction, "ef_search": ef_search, "filtered": is_filtered}
+                    rows.append(_summarize(label, latencies, wall, recalls))
+        finally:
+            config.LITELLM_PROXY_URL = original_url
+            embedding_cache.persist = original_persist
+    return rows
+
+@app.command()
+def main(
+    docs: int = typer.Option(100, help="Number of synthetic documents."),
+    chunks_per_doc: int = typer.Option(50, help="Chunks per document."),
+    distribution: str = typer.Option("clustered", help="Embedding distribution: 'random' or 'clustered'."),
+    clusters: int = typer.Option(32, help="Number of clusters for the clustered distribution."),
+    queries: int = typer.Option(200, help="Queries per measured pass."),
+    top_k: int = typer.Option(10, help="Results per query (k for recall@k)."),
+    ef_search: str = typer.Option("20,40,100,200", help="Comma-separated hnsw.ef_search values to sweep."),
+    hnsw_m: str = typer.Option(str(config.PGVECTOR_HNSW_M), help="Comma-separated HNSW m values (index rebuilt per value)."),
+    ef_construction: str = typer.Option(str(config.PGVECTOR_HNSW_EF_CONSTRUCTION), help="Comma-separated HNSW ef_construction values."),
+    filtered: bool = typer.Option(True, help="Also measure year-filtered searches (~10% selectivity)."),
+    service_path: bool = typer.Option(True, help="Also measure SearchService.perform_search behind a stub LiteLLM proxy."),
+    embedding_latency_ms: float = typer.Option(5.0, help="Latency injected by the stub LiteLLM proxy."),
+    concurrency: int = typer.Option(4, help="Queries in flight at once."),
+    seed: int = typer.Option(42, help="Random seed for corpus and queries."),
+    keep_corpus: bool = typer.Option(False, help="Leave the synthetic corpus in the database."),
+    output: Optional[str] = typer.Option(None, help="Write result rows as JSON to this path."),
+):
+    """Load a synthetic corpus and report latency percentiles, QPS and recall@k per index/search setting."""
+    rows = asyncio.run(run_benchmark(
+        docs, chunks_per_doc, distribution, clusters, queries, top_k,
+        _parse_int_list(ef_search), _parse_int_list(hnsw_m), _parse_int_list(ef_construction),
+        filtered, service_path, embedding_latency_ms, concurrency, seed, keep_corpus
+    ))
+    print_report(rows)
+    write_report(rows, output)
+
+if __name__ == "__main__":
+    app()
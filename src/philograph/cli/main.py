@@ -1,6 +1,7 @@
 import json
 import logging
 import sys
+import time
 from typing import Optional, List, Dict, Any
 
 import httpx
@@ -131,9 +132,29 @@ def display_results(data: Any):
 
 # --- CLI Commands ---
 
+def wait_for_ingest_job(job_id: int, poll_interval: float) -> Dict[str, Any]:
+    """Polls an ingest job until it finishes, showing its progress, and returns the job's result."""
+    last_progress = None
+    with console.status(f"Ingest job {job_id} queued...") as status_display:
+        while True:
+            job = make_api_request("GET", f"/ingest/jobs/{job_id}")
+            progress = job.get("progress") or {}
+            if progress != last_progress or job.get("status") == "running":
+                status_display.update(
+                    f"Ingest job {job_id} {job.get('status')}: {progress.get('files_done', 0)} files done "
+                    f"({progress.get('succeeded', 0)} ingested, {progress.get('skipped', 0)} skipped, {progress.get('errors', 0)} errors)"
+                )
+                last_progress = progress
+            if job.get("status") in ("succeeded", "failed"):
+                break
+            time.sleep(poll_interval)
+    return make_api_request("GET", f"/ingest/jobs/{job_id}/result")
+
 @app.command()
 def ingest(
-    path: str = typer.Argument(..., help="Path to the file or directory (relative to configured source directory).")
+    path: str = typer.Argument(..., help="Path to the file or directory (relative to configured source directory)."),
+    wait: bool = typer.Option(True, "--wait/--no-wait", help="Wait for the background ingest job to finish and show its result."),
+    poll_interval: float = typer.Option(2.0, "--poll-interval", min=0.1, help="Seconds between job status checks while waiting.")
 ):
     """
     Ingest a document or directory into PhiloGraph.
@@ -141,10 +162,19 @@ def ingest(
     # TDD: Test calling API /ingest endpoint with correct path
     # TDD: Test displaying success message from API
     # TDD: Test displaying error message from API
+    # TDD: Test waiting for the queued job and displaying its result
     logger.info(f"CLI: Initiating ingestion for path: {path}")
     console.print(f"Requesting ingestion for: {path}...")
     response_data = make_api_request("POST", "/ingest", json_data={"path": path})
-    display_results(response_data)
+    job_id = response_data.get("job_id") if isinstance(response_data, dict) else None
+    if not wait or job_id is None:
+        display_results(response_data)
+        return
+    result = wait_for_ingest_job(job_id, poll_interval)
+    if result.get("status") == "Error":
+        error_console.print(f"Error: Ingest job {job_id} failed: {result.get('message', 'Ingestion failed')}")
+        raise typer.Exit(code=1)
+    display_results(result)
 
 @app.command()
 def search(
@@ -152,7 +182,8 @@ def search(
     author: Optional[str] = typer.Option(None, "--author", "-a", help="Filter results by author (case-insensitive)."),
     year: Optional[int] = typer.Option(None, "--year", "-y", help="Filter results by publication year."),
     doc_id: Optional[int] = typer.Option(None, "--doc-id", "-d", help="Filter results by source document ID."),
-    limit: int = typer.Option(config.SEARCH_TOP_K, "--limit", "-l", help="Maximum number of results to return.")
+    limit: int = typer.Option(config.SEARCH_TOP_K, "--limit", "-l", help="Maximum number of results to return."),
+    hybrid: bool = typer.Option(False, "--hybrid", help="Fuse full-text and vector rankings (better for exact terms).")
 ):
     """
     Search for text chunks in PhiloGraph.
@@ -174,6 +205,8 @@ def search(
     payload = {"query": query, "limit": limit}
     if filters:
         payload['filters'] = filters # Send filters as a dictionary object
+    if hybrid:
+        payload['mode'] = "hybrid"
 
     console.print(f"Searching for '{query}'...")
     # Use POST request with JSON payload
@@ -195,6 +228,47 @@ def search(
         error_console.print(f"Error: Received unexpected response format from search API.")
 
 
+@app.command("search-batch")
+def search_batch(
+    queries: List[str] = typer.Argument(..., help="One or more search query texts."),
+    author: Optional[str] = typer.Option(None, "--author", "-a", help="Filter results by author (case-insensitive)."),
+    year: Optional[int] = typer.Option(None, "--year", "-y", help="Filter results by publication year."),
+    doc_id: Optional[int] = typer.Option(None, "--doc-id", "-d", help="Filter results by source document ID."),
+    limit: int = typer.Option(config.SEARCH_TOP_K, "--limit", "-l", help="Maximum number of results per query.")
+):
+    """
+    Run several searches in one request; filters and limit apply to every query.
+    """
+    # TDD: Test calling API /search/batch with one entry per query
+    # TDD: Test displaying results per query
+    logger.info(f"CLI: Batch searching {len(queries)} queries...")
+    filters = {}
+    if author: filters['author'] = author
+    if year: filters['year'] = year
+    if doc_id: filters['doc_id'] = doc_id
+
+    batch = []
+    for query in queries:
+        item = {"query": query, "limit": limit}
+        if filters:
+            item['filters'] = filters
+        batch.append(item)
+
+    console.print(f"Searching {len(queries)} queries...")
+    response_data = make_api_request("POST", "/search/batch", json_data={"queries": batch})
+    if isinstance(response_data, dict) and isinstance(response_data.get("results"), list):
+        for query, query_response in zip(queries, response_data["results"]):
+            console.print(f"[bold]Query:[/bold] {query}")
+            results = query_response.get("results", []) if isinstance(query_response, dict) else []
+            if not results:
+                console.print("No results found.")
+            else:
+                display_results({"results": results})
+    else:
+        logger.warning(f"Received unexpected response type from batch search API: {type(response_data)}")
+        error_console.print(f"Error: Received unexpected response format from search API.")
+
+
 @app.command()
 def show(
     item_type: str = typer.Argument(..., help="Type of item (e.g., 'document')."),
@@ -400,6 +474,45 @@ def acquire(
         display_results(initial_response) # Display the direct result/error
 
 
+def _ingest_submitter(client: httpx.AsyncClient):
+    """Returns a watcher submit callback that queues an ingest job through the API for each changed file."""
+    async def submit(relative_path: str) -> int:
+        response = await client.post("/ingest", json={"path": relative_path})
+        response.raise_for_status()
+        job_id = response.json().get("job_id")
+        console.print(f"Queued ingestion of {relative_path} (job {job_id}).")
+        return job_id
+    return submit
+
+@app.command()
+def watch(
+    poll: bool = typer.Option(False, "--poll", help="Rescan the source directory periodically instead of using filesystem notifications (e.g. on network mounts)."),
+    debounce: Optional[float] = typer.Option(None, "--debounce", min=0.0, help="Seconds a file must be unchanged before it is ingested (default: SOURCE_WATCH_DEBOUNCE_SECONDS).")
+):
+    """
+    Watch the source directory and ingest new and changed files until interrupted (Ctrl+C).
+    """
+    # TDD: Test queueing an ingest job through the API for each submitted file
+    # Imported here so the other commands do not load the ingestion pipeline
+    import asyncio
+    from ..ingestion.watcher import SourceWatcher
+
+    if not config.SOURCE_FILE_DIR_ABSOLUTE.is_dir():
+        error_console.print(f"Error: Source directory {config.SOURCE_FILE_DIR_ABSOLUTE} does not exist.")
+        raise typer.Exit(code=1)
+
+    async def run_watcher() -> None:
+        async with httpx.AsyncClient(base_url=config.API_URL, timeout=60.0) as client:
+            watcher = SourceWatcher(submit=_ingest_submitter(client), debounce_seconds=debounce, force_polling=True if poll else None)
+            await watcher.run()
+
+    logger.info(f"CLI: Watching {config.SOURCE_FILE_DIR_ABSOLUTE} for new and changed files")
+    console.print(f"Watching {config.SOURCE_FILE_DIR_ABSOLUTE} for new and changed files (Ctrl+C to stop)...")
+    try:
+        asyncio.run(run_watcher())
+    except KeyboardInterrupt:
+        console.print("Stopped watching.")
+
 # --- Main Execution ---
 if __name__ == "__main__":
     app()
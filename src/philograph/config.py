@@ -68,6 +68,15 @@ def get_int_env_variable(var_name: str, default: int | None = None) -> int | Non
         # If default was None, str_value wouldn't be None here, so this error is valid.
         raise ValueError(f"Invalid integer value for environment variable: {var_name}")
 
+def get_float_env_variable(var_name: str, default: float) -> float:
+    """Gets a float environment variable or returns a default."""
+    str_value = get_env_variable(var_name, str(default))
+    try:
+        return float(str_value)
+    except (TypeError, ValueError):
+        logger.error(f"Environment variable '{var_name}' has invalid float value: '{str_value}'.")
+        raise ValueError(f"Invalid float value for environment variable: {var_name}")
+
 def get_bool_env_variable(var_name: str, default: bool = False) -> bool:
     """Gets a boolean environment variable or returns a default."""
     # Bool default is never None, so we don't need special handling for None return from get_env_variable
@@ -118,7 +127,58 @@ TARGET_CHUNK_SIZE = get_int_env_variable("TARGET_CHUNK_SIZE", 512)
 # pgvector HNSW index parameters (adjust based on performance testing)
 PGVECTOR_HNSW_M = get_int_env_variable("PGVECTOR_HNSW_M", 16)
 PGVECTOR_HNSW_EF_CONSTRUCTION = get_int_env_variable("PGVECTOR_HNSW_EF_CONSTRUCTION", 64)
+# Query-time HNSW candidate list size (pgvector default 40); raised per query to at least top_k + offset
+PGVECTOR_HNSW_EF_SEARCH = get_int_env_variable("PGVECTOR_HNSW_EF_SEARCH", 40)
+# Iterative index scans for filtered searches (pgvector >= 0.8): "strict_order", "relaxed_order" or "off"
+PGVECTOR_HNSW_ITERATIVE_SCAN = get_env_variable("PGVECTOR_HNSW_ITERATIVE_SCAN", "strict_order")
+# Index tuples an iterative scan may visit (pgvector default 20000); raised to PER_ROW tuples for every row
+# up to the end of the requested page, capped at LIMIT. Continuation tokens end at LIMIT // PER_ROW rows.
+PGVECTOR_HNSW_MAX_SCAN_TUPLES = get_int_env_variable("PGVECTOR_HNSW_MAX_SCAN_TUPLES", 20000)
+PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW = get_int_env_variable("PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW", 50)
+PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT = get_int_env_variable("PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT", 1000000)
 EMBEDDING_BATCH_SIZE = get_int_env_variable("EMBEDDING_BATCH_SIZE", 32)
+# Maximum number of embedding batches in flight at once (adaptively reduced on 429s/timeouts)
+EMBEDDING_MAX_CONCURRENCY = get_int_env_variable("EMBEDDING_MAX_CONCURRENCY", 4)
+EMBEDDING_MAX_RETRIES = get_int_env_variable("EMBEDDING_MAX_RETRIES", 3)
+EMBEDDING_RETRY_BACKOFF_SECONDS = get_float_env_variable("EMBEDDING_RETRY_BACKOFF_SECONDS", 1.0)
+# Longest Retry-After (seconds) honoured from a rate-limited embedding response
+EMBEDDING_MAX_RETRY_AFTER_SECONDS = get_float_env_variable("EMBEDDING_MAX_RETRY_AFTER_SECONDS", 60.0)
+# Embedding cache: entries held in the in-process LRU tier, and whether to use the durable Postgres tier
+EMBEDDING_CACHE_SIZE = get_int_env_variable("EMBEDDING_CACHE_SIZE", 50000)
+EMBEDDING_CACHE_PERSIST = get_bool_env_variable("EMBEDDING_CACHE_PERSIST", True)
+# Pool connections the durable embedding cache tier may hold at once (lookups and writes combined)
+EMBEDDING_CACHE_DB_CONNECTIONS = get_int_env_variable("EMBEDDING_CACHE_DB_CONNECTIONS", 2)
+# Query embeddings: small TTL'd LRU in front of the embedding cache (TTL of 0 disables expiry)
+QUERY_EMBEDDING_CACHE_SIZE = get_int_env_variable("QUERY_EMBEDDING_CACHE_SIZE", 1024)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = get_float_env_variable("QUERY_EMBEDDING_CACHE_TTL_SECONDS", 3600.0)
+# Concurrent file workers for directory ingestion (capped by the ingestion share of DB_POOL_MAX_SIZE)
+INGEST_FILE_WORKERS = get_int_env_variable("INGEST_FILE_WORKERS", 4)
+# Embedding batches buffered between the chunk -> embed -> write stages of a single file's ingestion
+INGEST_QUEUE_SIZE = get_int_env_variable("INGEST_QUEUE_SIZE", 4)
+# Directory ingestion looks up the stored fingerprints of this many listed files per query
+INGEST_PRECHECK_BATCH_SIZE = get_int_env_variable("INGEST_PRECHECK_BATCH_SIZE", 1000)
+# Threads reading directories concurrently while listing a source tree for ingestion
+SOURCE_SCAN_WORKERS = get_int_env_variable("SOURCE_SCAN_WORKERS", 8)
+# Watch mode: submit new and changed files under SOURCE_FILE_DIR for ingestion (API lifespan when enabled,
+# or `cli watch`). Files are submitted once quiet for the debounce period; polling rescans the tree where
+# filesystem notifications are unavailable or forced (network mounts); at most QUEUE_SIZE files wait to be submitted
+SOURCE_WATCH_ENABLED = get_bool_env_variable("SOURCE_WATCH_ENABLED", False)
+SOURCE_WATCH_FORCE_POLLING = get_bool_env_variable("SOURCE_WATCH_FORCE_POLLING", False)
+SOURCE_WATCH_DEBOUNCE_SECONDS = get_float_env_variable("SOURCE_WATCH_DEBOUNCE_SECONDS", 2.0)
+SOURCE_WATCH_POLL_SECONDS = get_float_env_variable("SOURCE_WATCH_POLL_SECONDS", 30.0)
+SOURCE_WATCH_QUEUE_SIZE = get_int_env_variable("SOURCE_WATCH_QUEUE_SIZE", 100)
+# Background ingest jobs (POST /ingest): concurrent jobs per API process, how often idle workers poll the
+# ingest_jobs table, after how long without a heartbeat a running job is considered abandoned, and how
+# many times an abandoned job is retried before it is marked failed
+INGEST_JOB_WORKERS = get_int_env_variable("INGEST_JOB_WORKERS", 1)
+INGEST_JOB_POLL_SECONDS = get_float_env_variable("INGEST_JOB_POLL_SECONDS", 5.0)
+INGEST_JOB_STALE_SECONDS = get_float_env_variable("INGEST_JOB_STALE_SECONDS", 300.0)
+INGEST_JOB_MAX_ATTEMPTS = get_int_env_variable("INGEST_JOB_MAX_ATTEMPTS", 3)
+# EPUB/TXT extraction runs off the event loop: executor mode ("process", "thread" or "inline"),
+# pool size, and a per-file timeout after which the worker is killed (process mode)
+EXTRACTION_EXECUTOR = get_env_variable("EXTRACTION_EXECUTOR", "process")
+EXTRACTION_WORKERS = get_int_env_variable("EXTRACTION_WORKERS", 2)
+EXTRACTION_TIMEOUT_SECONDS = get_float_env_variable("EXTRACTION_TIMEOUT_SECONDS", 300.0)
 TARGET_EMBEDDING_DIMENSION = get_int_env_variable("TARGET_EMBEDDING_DIMENSION", 768) # From ADR 004
 
 # Optional external service URLs
@@ -127,6 +187,16 @@ ANYSTYLE_API_URL = get_env_variable("ANYSTYLE_API_URL", None)
 
 # --- Search Settings ---
 SEARCH_TOP_K = get_int_env_variable("SEARCH_TOP_K", 10)
+# Formatted search results cached per (query, filters, top_k, offset); invalidated on ingest (TTL of 0 disables expiry)
+SEARCH_RESULT_CACHE_SIZE = get_int_env_variable("SEARCH_RESULT_CACHE_SIZE", 512)
+SEARCH_RESULT_CACHE_TTL_SECONDS = get_float_env_variable("SEARCH_RESULT_CACHE_TTL_SECONDS", 300.0)
+# Hybrid search: Postgres text search configuration of the chunks.text_tsv column (fixed when the column is created),
+# candidates taken from each of the lexical and vector rankings, and the reciprocal rank fusion constant
+SEARCH_TEXT_CONFIG = get_env_variable("SEARCH_TEXT_CONFIG", "english")
+SEARCH_HYBRID_CANDIDATES = get_int_env_variable("SEARCH_HYBRID_CANDIDATES", 100)
+SEARCH_RRF_K = get_int_env_variable("SEARCH_RRF_K", 60)
+# Rows fetched per round trip from the server-side cursor of a streamed search (/search/stream)
+SEARCH_STREAM_FETCH_SIZE = get_int_env_variable("SEARCH_STREAM_FETCH_SIZE", 200)
 
 # --- Text Acquisition Settings ---
 ZLIBRARY_MCP_SERVER_NAME = get_env_variable("ZLIBRARY_MCP_SERVER_NAME", "zlibrary-mcp")
@@ -1,5 +1,6 @@
 import logging
 import asyncio
+import re
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -7,12 +8,16 @@ import psycopg
 from psycopg_pool import AsyncConnectionPool
 
 from .. import config
+from ..utils.db_utils import AUTHOR_KEY_SQL
 
 logger = logging.getLogger(__name__)
 
 # Global variable to hold the connection pool
 pool: AsyncConnectionPool | None = None
 
+# SEARCH_TEXT_CONFIG is interpolated into DDL, so it must be a plain identifier
+_TEXT_CONFIG_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 async def get_db_pool() -> AsyncConnectionPool:
     """Initializes and returns the async database connection pool."""
     global pool
@@ -68,6 +73,26 @@ async def get_db_connection() -> AsyncGenerator[psycopg.AsyncConnection, None]:
             # await conn.rollback()
             raise # Re-raise the error for endpoint handlers
 
+async def acquire_session_lock(key: int) -> psycopg.AsyncConnection | None:
+    """
+    Opens a dedicated connection (outside the pool) holding the session-level advisory lock `key`.
+
+    Returns the connection, which holds the lock until it is closed or lost, or None if
+    another session already holds the lock.
+    """
+    conn = await psycopg.AsyncConnection.connect(config.ASYNC_DATABASE_URL, autocommit=True)
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT pg_try_advisory_lock(%s);", (key,))
+            row = await cur.fetchone()
+    except BaseException:
+        await conn.close()
+        raise
+    if row and row[0]:
+        return conn
+    await conn.close()
+    return None
+
 async def close_db_pool():
     """Closes the database connection pool."""
     global pool
@@ -77,6 +102,22 @@ async def close_db_pool():
         pool = None
         logger.info("Database connection pool closed.")
 
+async def _validate_text_config(cur: psycopg.AsyncCursor) -> str:
+    """
+    Returns SEARCH_TEXT_CONFIG once it is known to name a text search configuration in pg_ts_config.
+
+    Raises:
+        ValueError: If it is not a plain identifier or no such configuration exists.
+    """
+    name = config.SEARCH_TEXT_CONFIG
+    if not _TEXT_CONFIG_NAME.match(name or ""):
+        raise ValueError(f"SEARCH_TEXT_CONFIG must be a text search configuration name, got {name!r}.")
+    await cur.execute("SELECT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = lower(%s));", (name,))
+    row = await cur.fetchone()
+    if not row or not row[0]:
+        raise ValueError(f"SEARCH_TEXT_CONFIG {name!r} is not a text search configuration in this database (see pg_ts_config).")
+    return name
+
 async def initialize_schema(conn: psycopg.AsyncConnection):
     """Creates necessary tables and extensions if they don't exist."""
     async with conn.cursor() as cur:
@@ -85,6 +126,10 @@ async def initialize_schema(conn: psycopg.AsyncConnection):
         # Enable pgvector extension
         logger.info("Enabling pgvector extension...")
         await cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        # Enable pg_trgm (trigram indexes for the author filter's substring match)
+        logger.info("Enabling pg_trgm extension...")
+        await cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+        text_config = await _validate_text_config(cur)
 
         # Create documents table
         logger.info("Creating documents table...")
@@ -99,6 +144,21 @@ async def initialize_schema(conn: psycopg.AsyncConnection):
                 created_at TIMESTAMPTZ DEFAULT NOW()
             );
         """)
+        # Normalized author key (see utils.db_utils.normalize_author_key) with a trigram index, so the
+        # author filter's substring match resolves to a set of document IDs without scanning documents
+        await cur.execute(f"""
+            ALTER TABLE documents ADD COLUMN IF NOT EXISTS author_key TEXT
+            GENERATED ALWAYS AS ({AUTHOR_KEY_SQL.format(column="author")}) STORED;
+        """)
+        await cur.execute("CREATE INDEX IF NOT EXISTS documents_author_key_trgm_idx ON documents USING gin (author_key gin_trgm_ops);")
+        # Source file fingerprint recorded at ingest time, so re-ingesting skips unchanged files
+        # (same size and mtime, or same content hash) and re-processes edited ones
+        await cur.execute("""
+            ALTER TABLE documents
+                ADD COLUMN IF NOT EXISTS file_size BIGINT,
+                ADD COLUMN IF NOT EXISTS file_mtime_ns BIGINT,
+                ADD COLUMN IF NOT EXISTS content_hash TEXT;
+        """)
 
         # Create sections table
         logger.info("Creating sections table...")
@@ -113,6 +173,9 @@ async def initialize_schema(conn: psycopg.AsyncConnection):
                 UNIQUE (doc_id, sequence) -- Ensure sequence is unique within a document
             );
         """)
+        # Hash of the section's extracted text; re-ingesting an edited file keeps (and does not
+        # re-embed) the chunks of sections whose hash is unchanged
+        await cur.execute("ALTER TABLE sections ADD COLUMN IF NOT EXISTS text_hash TEXT;")
 
         # Create chunks table
         logger.info("Creating chunks table...")
@@ -136,8 +199,50 @@ async def initialize_schema(conn: psycopg.AsyncConnection):
             USING hnsw (embedding vector_cosine_ops)
             WITH (m = {config.PGVECTOR_HNSW_M}, ef_construction = {config.PGVECTOR_HNSW_EF_CONSTRUCTION});
         """)
+        # Denormalized document filter columns, so filtered searches need no join to sections/documents.
+        # Written by add_chunks_batch and add_chunk; the UPDATE backfills chunks created before the columns existed.
+        logger.info("Adding denormalized filter columns to chunks...")
+        await cur.execute("""
+            ALTER TABLE chunks
+                ADD COLUMN IF NOT EXISTS doc_id INTEGER REFERENCES documents(id) ON DELETE CASCADE,
+                ADD COLUMN IF NOT EXISTS doc_year INTEGER;
+        """)
+        await cur.execute("CREATE INDEX IF NOT EXISTS chunks_doc_id_idx ON chunks (doc_id);")
+        await cur.execute("CREATE INDEX IF NOT EXISTS chunks_doc_year_idx ON chunks (doc_year);")
+        # Backfill only when some chunk lacks the columns (an indexed probe), so restarts do not rewrite chunks
+        await cur.execute("SELECT EXISTS (SELECT 1 FROM chunks WHERE doc_id IS NULL);")
+        backfill_needed = await cur.fetchone()
+        if backfill_needed and backfill_needed[0]:
+            logger.info("Backfilling denormalized filter columns on existing chunks...")
+            await cur.execute("""
+                UPDATE chunks c SET doc_id = d.id, doc_year = d.year
+                FROM sections s JOIN documents d ON s.doc_id = d.id
+                WHERE c.section_id = s.id AND c.doc_id IS NULL;
+            """)
+
+        # Full-text index for hybrid search: a generated tsvector column kept in sync by Postgres
+        logger.info("Creating full-text index on chunk text...")
+        await cur.execute(f"""
+            ALTER TABLE chunks ADD COLUMN IF NOT EXISTS text_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('{text_config}'::regconfig, text_content)) STORED;
+        """)
+        await cur.execute("CREATE INDEX IF NOT EXISTS chunks_text_tsv_idx ON chunks USING gin (text_tsv);")
         # Consider adding other indexes, e.g., on section_id if frequently queried
 
+        # Create embedding cache table (durable tier of utils.embedding_cache)
+        # Keyed by a hash of (model, dimension, normalized text); embedding dimension is unconstrained
+        # so entries for other models/dimensions can coexist.
+        logger.info("Creating embedding_cache table...")
+        await cur.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                embedding vector NOT NULL,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            );
+        """)
+
         # Create relationships table
         logger.info("Creating relationships table...")
         await cur.execute("""
@@ -182,4 +287,48 @@ async def initialize_schema(conn: psycopg.AsyncConnection):
         # Add index for faster retrieval of items in a collection
         await cur.execute("CREATE INDEX IF NOT EXISTS collection_items_collection_idx ON collection_items (collection_id);")
 
+        # Create ingest_jobs table (durable queue behind POST /ingest, claimed with FOR UPDATE SKIP LOCKED)
+        logger.info("Creating ingest_jobs table...")
+        await cur.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_jobs (
+                id SERIAL PRIMARY KEY,
+                path TEXT NOT NULL, -- Relative to SOURCE_FILE_DIR
+                status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                progress JSONB NOT NULL DEFAULT '{}'::jsonb, -- Files done and counts by result status
+                result JSONB, -- Pipeline result once finished
+                error TEXT,
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                started_at TIMESTAMPTZ,
+                heartbeat_at TIMESTAMPTZ,
+                finished_at TIMESTAMPTZ
+            );
+        """)
+        # Partial indexes keep claiming and stale-job recovery cheap however many finished jobs accumulate
+        await cur.execute("CREATE INDEX IF NOT EXISTS ingest_jobs_queued_idx ON ingest_jobs (id) WHERE status = 'queued';")
+        await cur.execute("CREATE INDEX IF NOT EXISTS ingest_jobs_running_idx ON ingest_jobs (heartbeat_at) WHERE status = 'running';")
+        # At most one queued job per path (add_ingest_job returns the waiting one), so watchers and repeated
+        # requests cannot pile up duplicate jobs. Duplicates queued before the index existed are failed first.
+        await cur.execute("SELECT to_regclass('ingest_jobs_queued_path_idx') IS NULL;")
+        dedupe_needed = await cur.fetchone()
+        if dedupe_needed and dedupe_needed[0]:
+            await cur.execute("""
+                UPDATE ingest_jobs j
+                SET status = 'failed', error = 'Duplicate of an earlier queued job for the same path', finished_at = NOW()
+                WHERE j.status = 'queued'
+                  AND EXISTS (SELECT 1 FROM ingest_jobs e WHERE e.status = 'queued' AND e.path = j.path AND e.id < j.id);
+            """)
+            await cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS ingest_jobs_queued_path_idx ON ingest_jobs (path) WHERE status = 'queued';")
+
+        # Create corpus_generation (a single row advanced by every ingest commit; scopes cached search
+        # results in every API process, see search.result_cache)
+        logger.info("Creating corpus_generation table...")
+        await cur.execute("""
+            CREATE TABLE IF NOT EXISTS corpus_generation (
+                id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                generation BIGINT NOT NULL DEFAULT 0
+            );
+        """)
+        await cur.execute("INSERT INTO corpus_generation (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;")
+
         logger.info("Database schema initialization complete.")
\ No newline at end of file
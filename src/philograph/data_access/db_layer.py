@@ -12,7 +12,9 @@ from .models import (
     Section,
     Chunk,
     SearchResult,
-    Relationship
+    Relationship,
+    IngestJob,
+    DocumentFingerprint
 )
 
 # Import and re-export connection management functions
@@ -20,28 +22,59 @@ from .connection import (
     get_db_pool,
     get_db_connection,
     close_db_pool,
-    initialize_schema
+    initialize_schema,
+    acquire_session_lock
 )
 
 # Import and re-export query functions
 from .queries.documents import (
     add_document,
+    update_document,
     get_document_by_id,
     check_document_exists,
+    get_document_fingerprint,
+    get_document_fingerprints,
+    set_document_fingerprint,
     add_section,
+    add_sections_batch,
+    get_document_sections,
+    delete_sections,
+    resequence_sections,
     add_chunk,
     add_chunks_batch,
-    get_chunk_by_id
+    update_chunks_doc_year,
+    get_first_chunk_id,
+    get_chunk_by_id,
+    get_corpus_generation,
+    bump_corpus_generation
 )
 from .queries.search import (
-    vector_search_chunks
+    vector_search_chunks,
+    vector_search_chunks_batch,
+    hybrid_search_chunks,
+    stream_search_chunks,
+    max_keyset_depth
+)
+from .queries.embedding_cache import (
+    get_cached_embeddings,
+    add_cached_embeddings
 )
 from .queries.relationships import (
     add_relationship,
     get_relationships,
     get_relationships_for_document,
+    delete_document_references,
     add_reference # Keep if still used directly, otherwise consider removing
 )
+from .queries.ingest_jobs import (
+    add_ingest_job,
+    claim_ingest_job,
+    update_ingest_job_progress,
+    finish_ingest_job,
+    release_ingest_job,
+    get_ingest_job,
+    requeue_stale_ingest_jobs
+)
 from .queries.collections import (
     add_collection,
     add_item_to_collection,
@@ -58,26 +91,56 @@ __all__ = [
     "Chunk",
     "SearchResult",
     "Relationship",
+    "IngestJob",
+    "DocumentFingerprint",
     # Connection Management
     "get_db_pool",
     "get_db_connection",
     "close_db_pool",
     "initialize_schema",
+    "acquire_session_lock",
     # Document/Chunk Queries
     "add_document",
+    "update_document",
     "get_document_by_id",
     "check_document_exists",
+    "get_document_fingerprint",
+    "get_document_fingerprints",
+    "set_document_fingerprint",
     "add_section",
+    "add_sections_batch",
+    "get_document_sections",
+    "delete_sections",
+    "resequence_sections",
     "add_chunk",
     "add_chunks_batch",
+    "update_chunks_doc_year",
+    "get_first_chunk_id",
     "get_chunk_by_id",
+    "get_corpus_generation",
+    "bump_corpus_generation",
     # Search Queries
     "vector_search_chunks",
+    "vector_search_chunks_batch",
+    "hybrid_search_chunks",
+    "stream_search_chunks",
+    # Embedding Cache Queries
+    "get_cached_embeddings",
+    "add_cached_embeddings",
     # Relationship Queries
     "add_relationship",
     "get_relationships",
     "get_relationships_for_document",
+    "delete_document_references",
     "add_reference",
+    # Ingest Job Queries
+    "add_ingest_job",
+    "claim_ingest_job",
+    "update_ingest_job_progress",
+    "finish_ingest_job",
+    "release_ingest_job",
+    "get_ingest_job",
+    "requeue_stale_ingest_jobs",
     # Collection Queries
     "add_collection",
     "add_item_to_collection",
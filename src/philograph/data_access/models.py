@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 # --- Pydantic Models for Data Access Layer ---
@@ -11,6 +12,12 @@ class Document(BaseModel):
     source_path: str
     metadata: Optional[Dict[str, Any]] = None
 
+class DocumentFingerprint(BaseModel):
+    document_id: int
+    file_size: Optional[int] = None
+    file_mtime_ns: Optional[int] = None
+    content_hash: Optional[str] = None # None for documents ingested before fingerprints were recorded
+
 class Section(BaseModel):
     id: int
     doc_id: int
@@ -38,10 +45,23 @@ class SearchResult(BaseModel):
     doc_source_path: Optional[str] = None
     section_title: Optional[str] = None
     chunk_sequence: Optional[int] = None
+    score: Optional[float] = None # Reciprocal rank fusion score (hybrid search only)
 
 class Relationship(BaseModel):
     id: int
     source_node_id: str
     target_node_id: str
     relation_type: str
-    metadata: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    metadata: Optional[Dict[str, Any]] = None
+
+class IngestJob(BaseModel):
+    id: int
+    path: str
+    status: str # queued, running, succeeded, failed
+    attempts: int = 0
+    progress: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -2,8 +2,8 @@ import logging
 import psycopg
 from typing import List, Optional, Dict, Any, Tuple
 
-from ..models import Document
-from ...utils.db_utils import json_serialize, format_vector_for_pgvector
+from ..models import Document, DocumentFingerprint
+from ...utils.db_utils import json_serialize, format_vector_for_pgvector, encode_vector_binary
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +53,47 @@ async def check_document_exists(conn: psycopg.AsyncConnection, source_path: str)
         logger.debug(f"Document exists check for {source_path}: {exists}")
         return exists
 
+async def update_document(conn: psycopg.AsyncConnection, doc_id: int, title: Optional[str], author: Optional[str], year: Optional[int], metadata: Optional[Dict[str, Any]]) -> None:
+    """Replaces a document's extracted metadata (re-ingestion of an edited source file)."""
+    logger.debug(f"Updating document {doc_id}")
+    sql = "UPDATE documents SET title = %s, author = %s, year = %s, metadata = %s WHERE id = %s;"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (title, author, year, json_serialize(metadata), doc_id))
+        if cur.rowcount != 1:
+            logger.error(f"Document {doc_id} not found for update.")
+            raise RuntimeError("Failed to update document in database.")
+
+async def get_document_fingerprint(conn: psycopg.AsyncConnection, source_path: str) -> Optional[DocumentFingerprint]:
+    """Returns the ID and source file fingerprint of the document at `source_path`, or None if it was never ingested."""
+    logger.debug(f"Getting document fingerprint: {source_path}")
+    sql = "SELECT id, file_size, file_mtime_ns, content_hash FROM documents WHERE source_path = %s;"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (source_path,))
+        result = await cur.fetchone()
+    if result is None:
+        return None
+    return DocumentFingerprint(document_id=result[0], file_size=result[1], file_mtime_ns=result[2], content_hash=result[3])
+
+async def get_document_fingerprints(conn: psycopg.AsyncConnection, source_paths: List[str]) -> Dict[str, DocumentFingerprint]:
+    """Returns {source_path: fingerprint} for those of `source_paths` that were ingested, in one ANY() query."""
+    if not source_paths:
+        return {}
+    logger.debug(f"Getting document fingerprints for {len(source_paths)} paths")
+    sql = "SELECT source_path, id, file_size, file_mtime_ns, content_hash FROM documents WHERE source_path = ANY(%s);"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (list(source_paths),))
+        rows = await cur.fetchall()
+    return {
+        row[0]: DocumentFingerprint(document_id=row[1], file_size=row[2], file_mtime_ns=row[3], content_hash=row[4])
+        for row in rows
+    }
+
+async def set_document_fingerprint(conn: psycopg.AsyncConnection, doc_id: int, file_size: int, file_mtime_ns: int, content_hash: str) -> None:
+    """Records the source file fingerprint a document was (re-)ingested from."""
+    sql = "UPDATE documents SET file_size = %s, file_mtime_ns = %s, content_hash = %s WHERE id = %s;"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (file_size, file_mtime_ns, content_hash, doc_id))
+
 # --- Section Queries ---
 
 async def add_section(conn: psycopg.AsyncConnection, doc_id: int, title: Optional[str], level: int, sequence: int) -> int:
@@ -73,47 +114,194 @@ async def add_section(conn: psycopg.AsyncConnection, doc_id: int, title: Optiona
             logger.error(f"Failed to retrieve ID after inserting section for doc_id {doc_id}")
             raise RuntimeError("Failed to add section to database.")
 
+async def add_sections_batch(
+    conn: psycopg.AsyncConnection,
+    doc_id: int,
+    sections: List[Tuple[Optional[str], int, int]],
+    text_hashes: Optional[List[Optional[str]]] = None
+) -> Dict[int, int]:
+    """
+    Adds all sections of a document in a single INSERT ... SELECT FROM unnest(...) statement.
+
+    Args:
+        sections: (title, level, sequence) tuples.
+        text_hashes: Hash of each section's text, in the same order (see get_document_sections).
+
+    Returns:
+        A mapping of section sequence number to the new section ID.
+    """
+    if not sections:
+        logger.warning(f"add_sections_batch called with empty list for doc_id {doc_id}.")
+        return {}
+
+    logger.debug(f"Adding batch of {len(sections)} sections for doc_id {doc_id}")
+    sql = """
+        INSERT INTO sections (doc_id, title, level, sequence, text_hash)
+        SELECT %s, t.title, t.level, t.sequence, t.text_hash
+        FROM unnest(%s::text[], %s::int[], %s::int[], %s::text[]) AS t(title, level, sequence, text_hash)
+        RETURNING id, sequence;
+    """
+    titles = [title for title, _, _ in sections]
+    levels = [level for _, level, _ in sections]
+    sequences = [sequence for _, _, sequence in sections]
+    hashes = list(text_hashes) if text_hashes is not None else [None] * len(sections)
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (doc_id, titles, levels, sequences, hashes))
+        rows = await cur.fetchall()
+    section_ids = {row[1]: row[0] for row in rows}
+    if len(section_ids) != len(sections):
+        logger.error(f"Inserted {len(section_ids)} of {len(sections)} sections for doc_id {doc_id}")
+        raise RuntimeError("Failed to add sections to database.")
+    logger.info(f"Added {len(section_ids)} sections for doc_id {doc_id}")
+    return section_ids
+
+async def get_document_sections(conn: psycopg.AsyncConnection, doc_id: int) -> List[Tuple[int, int, Optional[str]]]:
+    """Returns a document's sections as (section_id, sequence, text_hash) tuples in sequence order."""
+    sql = "SELECT id, sequence, text_hash FROM sections WHERE doc_id = %s ORDER BY sequence;"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (doc_id,))
+        return [(row[0], row[1], row[2]) for row in await cur.fetchall()]
+
+async def delete_sections(conn: psycopg.AsyncConnection, section_ids: List[int]) -> int:
+    """Deletes sections (and, by cascade, their chunks). Returns the number deleted."""
+    if not section_ids:
+        return 0
+    async with conn.cursor() as cur:
+        await cur.execute("DELETE FROM sections WHERE id = ANY(%s);", (list(section_ids),))
+        logger.info(f"Deleted {cur.rowcount} sections.")
+        return cur.rowcount
+
+async def resequence_sections(conn: psycopg.AsyncConnection, doc_id: int, sections: List[Tuple[int, Optional[str], int, int]]) -> None:
+    """
+    Moves a document's kept sections to new positions after re-extraction.
+
+    Args:
+        sections: (section_id, title, level, sequence) tuples; every section left in the
+                  document must be listed (removed sections are deleted beforehand).
+
+    The UNIQUE (doc_id, sequence) constraint is checked row by row, so sections are first
+    parked on negative sequences and then moved, letting them swap places.
+    """
+    if not sections:
+        return
+    park_sql = "UPDATE sections SET sequence = -1 - sequence WHERE doc_id = %s AND sequence >= 0;"
+    move_sql = """
+        UPDATE sections s SET title = t.title, level = t.level, sequence = t.sequence
+        FROM unnest(%s::int[], %s::text[], %s::int[], %s::int[]) AS t(id, title, level, sequence)
+        WHERE s.id = t.id AND s.doc_id = %s;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(park_sql, (doc_id,))
+        await cur.execute(move_sql, (
+            [section_id for section_id, _, _, _ in sections],
+            [title for _, title, _, _ in sections],
+            [level for _, _, level, _ in sections],
+            [sequence for _, _, _, sequence in sections],
+            doc_id
+        ))
+        if cur.rowcount != len(sections):
+            logger.error(f"Moved {cur.rowcount} of {len(sections)} sections for doc_id {doc_id}")
+            raise RuntimeError("Failed to resequence sections.")
+
 # --- Chunk Queries ---
 
+def _coerce_year(doc_year: Any) -> Optional[int]:
+    """Binary COPY needs a real int; metadata years may arrive as strings (e.g. from frontmatter)."""
+    try:
+        return int(doc_year) if doc_year is not None else None
+    except (TypeError, ValueError):
+        return None
+
 async def add_chunk(conn: psycopg.AsyncConnection, section_id: int, text_content: str, sequence: int, embedding_vector: List[float]) -> int:
-    """Adds a single chunk with its embedding."""
+    """Adds a single chunk with its embedding, copying its document's filter columns (doc_id, doc_year) from its section."""
     logger.debug(f"Adding chunk for section_id {section_id}, sequence {sequence}")
     sql = """
-        INSERT INTO chunks (section_id, text_content, sequence, embedding)
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO chunks (section_id, text_content, sequence, embedding, doc_id, doc_year)
+        SELECT s.id, %s, %s, %s, d.id, d.year
+        FROM sections s JOIN documents d ON d.id = s.doc_id
+        WHERE s.id = %s
         RETURNING id;
     """
     formatted_vector = format_vector_for_pgvector(embedding_vector)
     async with conn.cursor() as cur:
-        await cur.execute(sql, (section_id, text_content, sequence, formatted_vector))
+        await cur.execute(sql, (text_content, sequence, formatted_vector, section_id))
         result = await cur.fetchone()
         if result:
             logger.info(f"Chunk added with ID: {result[0]} for section_id {section_id}")
             return result[0]
         else:
-            logger.error(f"Failed to retrieve ID after inserting chunk for section_id {section_id}")
+            logger.error(f"Failed to retrieve ID after inserting chunk for section_id {section_id} (unknown section?)")
             raise RuntimeError("Failed to add chunk to database.")
 
-async def add_chunks_batch(conn: psycopg.AsyncConnection, chunks_data: List[Tuple[int, str, int, List[float]]]):
-    """Adds multiple chunks in a batch."""
+async def add_chunks_batch(
+    conn: psycopg.AsyncConnection,
+    chunks_data: List[Tuple[int, str, int, List[float]]],
+    doc_id: Optional[int] = None,
+    doc_year: Optional[int] = None
+) -> List[int]:
+    """
+    Adds multiple chunks in a batch using binary COPY.
+
+    Chunk IDs are allocated from the chunks id sequence up front (COPY cannot return
+    generated keys), and embeddings are sent in pgvector's binary format rather than as
+    text literals. Returns the new chunk IDs in the same order as `chunks_data`.
+
+    The chunks' denormalized filter columns (doc_id, doc_year) are written
+    in the COPY when `doc_id` is given (all chunks belong to that document); otherwise
+    they are filled from the chunks' sections and documents with one UPDATE.
+    """
     if not chunks_data:
         logger.warning("add_chunks_batch called with empty list.")
-        return
+        return []
 
     logger.info(f"Adding batch of {len(chunks_data)} chunks.")
+    id_sql = "SELECT nextval(pg_get_serial_sequence('chunks', 'id')) FROM generate_series(1, %s);"
+    columns, types = ["id", "section_id", "text_content", "sequence", "embedding"], ["int4", "int4", "text", "int4", "bytea"]
+    if doc_id is not None:
+        columns += ["doc_id", "doc_year"]
+        types += ["int4", "int4"]
+        document_fields = (doc_id, _coerce_year(doc_year))
+    else:
+        document_fields = ()
+    copy_sql = f"COPY chunks ({', '.join(columns)}) FROM STDIN (FORMAT BINARY);"
+    async with conn.cursor() as cur:
+        await cur.execute(id_sql, (len(chunks_data),))
+        chunk_ids = sorted(row[0] for row in await cur.fetchall())
+        if len(chunk_ids) != len(chunks_data):
+            logger.error(f"Allocated {len(chunk_ids)} chunk IDs for {len(chunks_data)} chunks.")
+            raise RuntimeError("Failed to allocate chunk IDs.")
+
+        async with cur.copy(copy_sql) as copy:
+            # The embedding is written as pre-encoded bytes; the server decodes the field with vector's binary input
+            copy.set_types(types)
+            for chunk_id, (section_id, text_content, sequence, embedding) in zip(chunk_ids, chunks_data):
+                await copy.write_row((chunk_id, section_id, text_content, sequence, encode_vector_binary(embedding), *document_fields))
+        if doc_id is None:
+            await cur.execute("""
+                UPDATE chunks c SET doc_id = d.id, doc_year = d.year
+                FROM sections s JOIN documents d ON s.doc_id = d.id
+                WHERE c.section_id = s.id AND c.id = ANY(%s);
+            """, (chunk_ids,))
+        logger.info(f"Successfully added batch of {len(chunk_ids)} chunks.")
+    return chunk_ids
+
+async def update_chunks_doc_year(conn: psycopg.AsyncConnection, doc_id: int, doc_year: Optional[int]) -> None:
+    """Rewrites the denormalized doc_year of a document's chunks after its year changed."""
+    sql = "UPDATE chunks SET doc_year = %s WHERE doc_id = %s AND doc_year IS DISTINCT FROM %s;"
+    year = _coerce_year(doc_year)
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (year, doc_id, year))
+
+async def get_first_chunk_id(conn: psycopg.AsyncConnection, doc_id: int) -> Optional[int]:
+    """Returns the ID of a document's first chunk (first section, first chunk), or None if it has none."""
     sql = """
-        INSERT INTO chunks (section_id, text_content, sequence, embedding)
-        VALUES (%s, %s, %s, %s);
+        SELECT c.id FROM chunks c JOIN sections s ON c.section_id = s.id
+        WHERE s.doc_id = %s ORDER BY s.sequence, c.sequence LIMIT 1;
     """
-    # Format data for execute_values or executemany
-    formatted_data = [
-        (section_id, text_content, sequence, format_vector_for_pgvector(embedding))
-        for section_id, text_content, sequence, embedding in chunks_data
-    ]
     async with conn.cursor() as cur:
-        # Use executemany for batch insertion
-        await cur.executemany(sql, formatted_data)
-        logger.info(f"Successfully added batch of {cur.rowcount} chunks.") # Log how many rows were affected
+        await cur.execute(sql, (doc_id,))
+        result = await cur.fetchone()
+    return result[0] if result else None
 
 async def get_chunk_by_id(conn: psycopg.AsyncConnection, chunk_id: int) -> Optional[Dict[str, Any]]:
     """Retrieves chunk details by ID. Returns a dictionary."""
@@ -132,4 +320,30 @@ async def get_chunk_by_id(conn: psycopg.AsyncConnection, chunk_id: int) -> Optio
             }
         else:
             logger.warning(f"Chunk with ID {chunk_id} not found.")
-            return None
\ No newline at end of file
+            return None
+
+# --- Corpus Generation ---
+
+async def get_corpus_generation(conn: psycopg.AsyncConnection) -> int:
+    """Returns the corpus generation, advanced by every committed ingest (0 if never advanced)."""
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT generation FROM corpus_generation WHERE id;")
+        result = await cur.fetchone()
+    return result[0] if result else 0
+
+async def bump_corpus_generation(conn: psycopg.AsyncConnection) -> int:
+    """
+    Advances the corpus generation in the caller's transaction and returns the new value.
+
+    Other connections see the new generation exactly when the transaction's chunk changes
+    commit. The row stays locked until then, so call this last in an ingest transaction.
+    """
+    sql = """
+        INSERT INTO corpus_generation (id, generation) VALUES (TRUE, 1)
+        ON CONFLICT (id) DO UPDATE SET generation = corpus_generation.generation + 1
+        RETURNING generation;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql)
+        result = await cur.fetchone()
+    return result[0]
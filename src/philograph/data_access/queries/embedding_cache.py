@@ -0,0 +1,57 @@
+import logging
+import psycopg
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from ...utils.db_utils import encode_vector_binary
+from ...utils.embedding_utils import to_embedding_vector
+
+logger = logging.getLogger(__name__)
+
+# Staging table for add_cached_embeddings; temporary, so private to the session and emptied at commit
+_CREATE_STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS embedding_cache_stage
+    (cache_key TEXT, model TEXT, dimension INTEGER, embedding vector)
+    ON COMMIT DELETE ROWS;
+"""
+_COPY_STAGE_SQL = "COPY embedding_cache_stage (cache_key, model, dimension, embedding) FROM STDIN (FORMAT BINARY);"
+_MOVE_STAGE_SQL = """
+    INSERT INTO embedding_cache (cache_key, model, dimension, embedding)
+    SELECT cache_key, model, dimension, embedding FROM embedding_cache_stage
+    ON CONFLICT (cache_key) DO NOTHING;
+"""
+
+# --- Embedding Cache Queries ---
+
+async def get_cached_embeddings(conn: psycopg.AsyncConnection, cache_keys: List[str]) -> Dict[str, np.ndarray]:
+    """Retrieves cached embeddings (as float32 arrays) for the given cache keys. Missing keys are absent from the result."""
+    if not cache_keys:
+        return {}
+    logger.debug(f"Looking up {len(cache_keys)} embedding cache keys")
+    sql = "SELECT cache_key, embedding::real[] FROM embedding_cache WHERE cache_key = ANY(%s);"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (cache_keys,))
+        rows = await cur.fetchall()
+        return {row[0]: to_embedding_vector(row[1]) for row in rows}
+
+async def add_cached_embeddings(conn: psycopg.AsyncConnection, entries: List[Tuple[str, str, int, np.ndarray]]):
+    """
+    Stores (cache_key, model, dimension, embedding) entries, ignoring keys that are already cached.
+
+    Entries are sent with binary COPY (embeddings in pgvector's binary format, as in
+    add_chunks_batch) into a session-local staging table, since COPY cannot skip conflicting
+    keys, and then moved into embedding_cache with one INSERT ... ON CONFLICT DO NOTHING.
+    """
+    if not entries:
+        return
+    logger.debug(f"Storing {len(entries)} embeddings in the embedding cache")
+    # One transaction (or savepoint), so the staged rows survive until they are moved even in autocommit mode
+    async with conn.transaction(), conn.cursor() as cur:
+        await cur.execute(_CREATE_STAGE_SQL)
+        async with cur.copy(_COPY_STAGE_SQL) as copy:
+            copy.set_types(["text", "text", "int4", "bytea"])
+            for cache_key, model, dimension, embedding in entries:
+                await copy.write_row((cache_key, model, dimension, encode_vector_binary(embedding)))
+        await cur.execute(_MOVE_STAGE_SQL)
+        await cur.execute("DELETE FROM embedding_cache_stage;")
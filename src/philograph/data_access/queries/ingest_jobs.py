@@ -0,0 +1,196 @@
+import logging
+import psycopg
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from ..models import IngestJob
+from ...utils.db_utils import json_serialize
+
+logger = logging.getLogger(__name__)
+
+_JOB_COLUMNS = "id, path, status, attempts, progress, result, error, created_at, started_at, finished_at"
+
+# Transaction-level advisory lock serializing claims, so two overlapping paths cannot be claimed at once
+CLAIM_LOCK_KEY = 7_068_202
+
+# Whether the normalized paths of jobs r and q overlap: equal, one under the other, or either the whole source directory (".")
+_OVERLAPPING_PATHS_SQL = (
+    "(r.path = q.path OR r.path = '.' OR q.path = '.'"
+    " OR starts_with(q.path, r.path || '/') OR starts_with(r.path, q.path || '/'))"
+)
+
+def _row_to_ingest_job(row: Sequence[Any]) -> IngestJob:
+    return IngestJob(
+        id=row[0], path=row[1], status=row[2], attempts=row[3], progress=row[4] or {},
+        result=row[5], error=row[6], created_at=row[7], started_at=row[8], finished_at=row[9]
+    )
+
+# --- Ingest Job Queries ---
+
+async def add_ingest_job(conn: psycopg.AsyncConnection, path: str) -> int:
+    """
+    Queues an ingest job for `path` (relative to the source directory) and returns its ID.
+
+    A path has at most one queued job (a partial unique index): if one is already waiting,
+    its ID is returned instead, since it will read the path in its latest state anyway.
+    """
+    logger.debug(f"Queueing ingest job for path: {path}")
+    # The no-op update makes RETURNING yield the existing queued job on conflict
+    sql = """
+        INSERT INTO ingest_jobs (path) VALUES (%s)
+        ON CONFLICT (path) WHERE status = 'queued' DO UPDATE SET path = EXCLUDED.path
+        RETURNING id;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (path,))
+        result = await cur.fetchone()
+        if result:
+            logger.info(f"Ingest job {result[0]} queued for path: {path}")
+            return result[0]
+        logger.error(f"Failed to retrieve ID after queueing ingest job for: {path}")
+        raise RuntimeError("Failed to queue ingest job.")
+
+async def claim_ingest_job(conn: psycopg.AsyncConnection) -> Optional[IngestJob]:
+    """
+    Claims the oldest queued job, marking it running, or returns None if the queue is empty.
+
+    A job whose path overlaps a running job's (the same path, a file in a running directory,
+    or a directory containing a running path) waits until that one finishes, so no file is
+    ingested by two jobs at once. Claims take the CLAIM_LOCK_KEY transaction lock first, so
+    concurrent workers (in this or other processes) see each other's committed claims; the
+    claim is durable, and the lock released, once the caller's transaction commits.
+    Paths are compared in the normalized form queue_ingest_job stores.
+    """
+    sql = f"""
+        UPDATE ingest_jobs
+        SET status = 'running', attempts = attempts + 1, started_at = NOW(), heartbeat_at = NOW()
+        WHERE id = (
+            SELECT id FROM ingest_jobs q
+            WHERE status = 'queued'
+              AND NOT EXISTS (SELECT 1 FROM ingest_jobs r WHERE r.status = 'running' AND {_OVERLAPPING_PATHS_SQL})
+            ORDER BY id
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING {_JOB_COLUMNS};
+    """
+    async with conn.cursor() as cur:
+        # A separate statement, so the claim's snapshot includes claims committed while waiting for the lock
+        await cur.execute("SELECT pg_advisory_xact_lock(%s);", (CLAIM_LOCK_KEY,))
+        await cur.execute(sql)
+        row = await cur.fetchone()
+    if row is None:
+        return None
+    job = _row_to_ingest_job(row)
+    logger.info(f"Claimed ingest job {job.id} (attempt {job.attempts}) for path: {job.path}")
+    return job
+
+async def update_ingest_job_progress(conn: psycopg.AsyncConnection, job_id: int, attempt: int, progress: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Records a heartbeat (and `progress`, if given) for a running job. Returns False if the
+    job is no longer running under this attempt (e.g. it was requeued as stale).
+    """
+    sql = """
+        UPDATE ingest_jobs SET heartbeat_at = NOW(), progress = COALESCE(%s::jsonb, progress)
+        WHERE id = %s AND status = 'running' AND attempts = %s;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (json_serialize(progress), job_id, attempt))
+        return cur.rowcount == 1
+
+async def finish_ingest_job(
+    conn: psycopg.AsyncConnection,
+    job_id: int,
+    attempt: int,
+    status: str,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None
+) -> bool:
+    """Marks a running job 'succeeded' or 'failed'. Returns False if this attempt no longer owns the job."""
+    if status not in ("succeeded", "failed"):
+        raise ValueError(f"Invalid final ingest job status: {status}")
+    sql = """
+        UPDATE ingest_jobs SET status = %s, result = %s::jsonb, error = %s, finished_at = NOW(), heartbeat_at = NOW()
+        WHERE id = %s AND status = 'running' AND attempts = %s;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (status, json_serialize(result), error, job_id, attempt))
+        finished = cur.rowcount == 1
+    if finished:
+        logger.info(f"Ingest job {job_id} {status}.")
+    else:
+        logger.warning(f"Ingest job {job_id} attempt {attempt} no longer owns the job; result not recorded.")
+    return finished
+
+# Queued job already waiting for a running job's path, which then takes over instead of the running job
+# being queued again (a path has at most one queued job)
+_SUPERSEDING_JOB_SQL = "(SELECT q.id FROM ingest_jobs q WHERE q.status = 'queued' AND q.path = r.path LIMIT 1)"
+
+async def release_ingest_job(conn: psycopg.AsyncConnection, job_id: int, attempt: int) -> bool:
+    """
+    Returns a running job to the queue (its worker is shutting down), or, if another job for
+    its path is already queued, marks it failed as superseded by that job. Returns False if
+    this attempt no longer owns the job.
+    """
+    sql = f"""
+        UPDATE ingest_jobs j
+        SET status = CASE WHEN s.superseded_by IS NULL THEN 'queued' ELSE 'failed' END,
+            error = CASE WHEN s.superseded_by IS NULL THEN j.error ELSE 'Interrupted; superseded by queued job ' || s.superseded_by END,
+            finished_at = CASE WHEN s.superseded_by IS NULL THEN NULL ELSE NOW() END,
+            heartbeat_at = NULL
+        FROM (SELECT r.id, {_SUPERSEDING_JOB_SQL} AS superseded_by FROM ingest_jobs r WHERE r.id = %s) s
+        WHERE j.id = s.id AND j.status = 'running' AND j.attempts = %s
+        RETURNING j.status;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (job_id, attempt))
+        row = await cur.fetchone()
+    if row is None:
+        return False
+    if row[0] == "queued":
+        logger.info(f"Ingest job {job_id} returned to the queue.")
+    else:
+        logger.info(f"Ingest job {job_id} interrupted; a queued job for its path takes over.")
+    return True
+
+async def get_ingest_job(conn: psycopg.AsyncConnection, job_id: int) -> Optional[IngestJob]:
+    """Retrieves an ingest job by ID."""
+    logger.debug(f"Getting ingest job by ID: {job_id}")
+    sql = f"SELECT {_JOB_COLUMNS} FROM ingest_jobs WHERE id = %s;"
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (job_id,))
+        row = await cur.fetchone()
+    return _row_to_ingest_job(row) if row else None
+
+async def requeue_stale_ingest_jobs(conn: psycopg.AsyncConnection, stale_seconds: float, max_attempts: int) -> Tuple[int, int]:
+    """
+    Recovers running jobs without a heartbeat for `stale_seconds` (their worker died): jobs
+    with attempts left are queued again, unless another job for their path is already queued;
+    the rest are marked failed. Returns (requeued, failed).
+    """
+    sql = f"""
+        UPDATE ingest_jobs j
+        SET status = CASE WHEN s.requeue THEN 'queued' ELSE 'failed' END,
+            error = CASE
+                WHEN s.requeue THEN j.error
+                WHEN s.superseded_by IS NOT NULL THEN 'Abandoned by its worker; superseded by queued job ' || s.superseded_by
+                ELSE 'Abandoned by its worker after ' || j.attempts || ' attempts'
+            END,
+            finished_at = CASE WHEN s.requeue THEN NULL ELSE NOW() END
+        FROM (
+            SELECT id, superseded_by, attempts < %s AND superseded_by IS NULL AS requeue
+            FROM (
+                SELECT r.id, r.attempts, {_SUPERSEDING_JOB_SQL} AS superseded_by
+                FROM ingest_jobs r
+                WHERE r.status = 'running' AND r.heartbeat_at < NOW() - make_interval(secs => %s)
+            ) stale
+        ) s
+        WHERE j.id = s.id
+        RETURNING j.status;
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (max_attempts, stale_seconds))
+        statuses = [row[0] for row in await cur.fetchall()]
+    requeued, failed = statuses.count("queued"), statuses.count("failed")
+    if statuses:
+        logger.warning(f"Recovered stale ingest jobs: {requeued} requeued, {failed} failed.")
+    return requeued, failed
@@ -109,6 +109,18 @@ async def get_relationships_for_document(conn: psycopg.AsyncConnection, doc_id:
 
 # --- Reference Query (Specific type of relationship) ---
 
+async def delete_document_references(conn: psycopg.AsyncConnection, doc_id: int) -> int:
+    """Deletes the 'cites' relationships sourced from a document's chunks (before its references are re-parsed)."""
+    sql = """
+        DELETE FROM relationships
+        WHERE relation_type = 'cites'
+          AND source_node_id IN (SELECT 'chunk:' || id FROM chunks WHERE doc_id = %s);
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(sql, (doc_id,))
+        logger.info(f"Deleted {cur.rowcount} references for doc_id {doc_id}.")
+        return cur.rowcount
+
 async def add_reference(conn: psycopg.AsyncConnection, source_chunk_id: int, cited_doc_details: Dict[str, Any]) -> int:
     """Adds a reference linked to a source chunk."""
     # This might be better handled by the generic add_relationship function
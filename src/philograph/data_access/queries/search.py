@@ -1,95 +1,537 @@
 import logging
 import psycopg
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence, Tuple
 
 from ..models import SearchResult
-from ...utils.db_utils import format_vector_for_pgvector
+from ... import config
+from ...utils.db_utils import format_vector_for_pgvector, normalize_author_key
 
 logger = logging.getLogger(__name__)
 
-async def vector_search_chunks(conn: psycopg.AsyncConnection, query_embedding: List[float], top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
-    """Performs vector similarity search on chunks with optional metadata filtering."""
-    if not query_embedding:
+# pgvector accepts hnsw.ef_search values in this range
+EF_SEARCH_MIN = 1
+EF_SEARCH_MAX = 1000
+
+# Planner/pgvector settings every search sets explicitly (server or role defaults may differ).
+# hnsw.iterative_scan is only sent when PGVECTOR_HNSW_ITERATIVE_SCAN is enabled: pgvector < 0.8
+# rejects it as an unrecognized parameter.
+_BASE_SEARCH_SETTINGS: Dict[str, str] = {
+    "hnsw.ef_search": "40",
+    "enable_indexscan": "on",
+}
+
+def _search_settings(
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    offset: int,
+    ef_search: Optional[int],
+    exact: bool,
+    keyset: bool = False,
+    scan_depth: int = 0
+) -> Dict[str, str]:
+    """
+    Returns the effective settings for one search.
+
+    Approximate searches use `ef_search` (or PGVECTOR_HNSW_EF_SEARCH), raised to at least
+    top_k + offset so the index can return a full page, plus an iterative scan for filtered
+    queries so rows removed by the filters do not shrink the result (and for pages larger
+    than EF_SEARCH_MAX, or `keyset` pages, which skip the rows of earlier pages). The index
+    still visits every skipped row, so the scan's tuple budget grows with the rows up to the
+    end of the page, `scan_depth` rows of earlier pages included (see _max_scan_tuples).
+    Exact searches disable index scans, giving a sequential-scan recall reference.
+    """
+    if ef_search is not None and not EF_SEARCH_MIN <= ef_search <= EF_SEARCH_MAX:
+        raise ValueError(f"ef_search must be between {EF_SEARCH_MIN} and {EF_SEARCH_MAX}, got {ef_search}.")
+    settings = dict(_BASE_SEARCH_SETTINGS)
+    iterative = config.PGVECTOR_HNSW_ITERATIVE_SCAN != "off"
+    if iterative:
+        settings["hnsw.iterative_scan"] = "off" # Reset, as the server or role may enable it
+    if exact:
+        settings["enable_indexscan"] = "off"
+        return settings
+    ef = min(max(ef_search or config.PGVECTOR_HNSW_EF_SEARCH, top_k + offset), EF_SEARCH_MAX)
+    settings["hnsw.ef_search"] = str(ef)
+    # Iterative scans also let pages beyond EF_SEARCH_MAX rows (streamed exports) keep reading the index
+    if iterative and (filters or keyset or top_k + offset > EF_SEARCH_MAX):
+        settings["hnsw.iterative_scan"] = config.PGVECTOR_HNSW_ITERATIVE_SCAN
+        settings["hnsw.max_scan_tuples"] = str(_max_scan_tuples(scan_depth + top_k + offset))
+    return settings
+
+def _max_scan_tuples(rows: int) -> int:
+    """Iterative scan tuple budget for reading `rows` rows, between the configured floor and limit."""
+    budget = max(config.PGVECTOR_HNSW_MAX_SCAN_TUPLES, rows * config.PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW)
+    return min(budget, max(config.PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT, config.PGVECTOR_HNSW_MAX_SCAN_TUPLES))
+
+def max_keyset_depth() -> int:
+    """Rows a keyset-paginated search may reach before its scan budget hits PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT."""
+    return config.PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT // max(1, config.PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW)
+
+def _settings_statement(settings: Dict[str, str], current: Optional[Dict[str, str]] = None) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Builds a transaction-local set_config statement for `settings`, or None if none are needed.
+
+    Without `current` every setting is sent, since the connection's values are unknown;
+    `current` (settings this transaction already set) limits it to the ones that differ.
+    """
+    current = current or {}
+    changed = [(name, value) for name, value in settings.items() if current.get(name) != value]
+    if not changed:
+        return None
+    sql = "SELECT " + ", ".join("set_config(%s, %s, true)" for _ in changed) + ";"
+    params: List[Any] = [item for pair in changed for item in pair]
+    return sql, params
+
+def _author_pattern(author: Any) -> str:
+    """LIKE pattern matching documents.author_key values that contain the normalized `author`."""
+    key = normalize_author_key(str(author)) or ""
+    return "%" + key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+# Resolves author LIKE patterns to matching document IDs via the trigram index on documents.author_key
+_AUTHOR_DOC_IDS_SQL = """
+    SELECT p.pattern, coalesce(array_agg(d.id ORDER BY d.id) FILTER (WHERE d.id IS NOT NULL), '{}')
+    FROM unnest(%s::text[]) AS p(pattern)
+    LEFT JOIN documents d ON d.author_key LIKE p.pattern
+    GROUP BY p.pattern"""
+
+async def _resolve_author_doc_ids(cur: psycopg.AsyncCursor, authors: Sequence[Any]) -> Dict[str, List[int]]:
+    """Returns {author pattern: [doc_id, ...]} for the given author filter values, in one query."""
+    patterns = sorted({_author_pattern(author) for author in authors})
+    await cur.execute(_AUTHOR_DOC_IDS_SQL, (patterns,))
+    resolved = {pattern: list(doc_ids) for pattern, doc_ids in await cur.fetchall()}
+    logger.debug(f"Resolved author filters to document IDs: {resolved}")
+    return resolved
+
+def _filter_clauses(filters: Optional[Dict[str, Any]], author_doc_ids: Optional[List[int]] = None) -> Tuple[List[str], List[Any]]:
+    """
+    Returns WHERE clauses and their parameters for the supported metadata filters.
+    Filters use the denormalized document columns on chunks (alias c), so they are
+    evaluated during the index scan instead of after a join to sections/documents.
+    An author filter must already be resolved to `author_doc_ids` (_resolve_author_doc_ids).
+    """
+    where_clauses: List[str] = []
+    params: List[Any] = []
+    if filters:
+        logger.debug(f"Applying filters: {filters}")
+        # Use %s placeholders consistently
+        if 'author' in filters:
+            if author_doc_ids is None:
+                raise ValueError("The author filter must be resolved to document IDs before building the query.")
+            where_clauses.append(f"c.doc_id = ANY(%s)")
+            params.append(author_doc_ids)
+        if 'year' in filters:
+            where_clauses.append(f"c.doc_year = %s")
+            params.append(filters['year'])
+        if 'doc_id' in filters:
+            where_clauses.append(f"c.doc_id = %s")
+            params.append(filters['doc_id'])
+        # Add more filters as needed
+    return where_clauses, params
+
+def _build_vector_search_query(
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    author_doc_ids: Optional[List[int]] = None,
+    after: Optional[Tuple[float, int]] = None
+) -> Tuple[str, List[Any]]:
+    """
+    Builds the SQL and parameters for a vector search over chunks.
+
+    The nearest chunks are selected from the chunks table alone (filters included);
+    sections and documents are joined only for the returned page. Rows are ordered by
+    (distance, chunk id), so pages are deterministic; `after` is a (distance, chunk id)
+    keyset position, and only rows strictly after it are returned.
+    """
+    if query_embedding is None or len(query_embedding) == 0:
         # Raise ValueError as expected by tests
-        # logger.warning("vector_search_chunks called with empty query embedding.")
-        # return []
         raise ValueError("Query embedding cannot be empty.")
 
-    logger.debug(f"Performing vector search with top_k={top_k}, filters={filters}")
     formatted_vector = format_vector_for_pgvector(query_embedding)
 
-    # Base query
-    base_sql = """
+    # Nearest-chunk query
+    nearest_sql = """
+            SELECT c.id, c.section_id, c.text_content, c.sequence, c.embedding <=> %s AS distance
+            FROM chunks c
+    """
+    params: List[Any] = [formatted_vector]
+
+    # Apply filters
+    where_clauses, filter_params = _filter_clauses(filters, author_doc_ids)
+    params.extend(filter_params)
+    if after is not None:
+        where_clauses.append("(c.embedding <=> %s, c.id) > (%s, %s)")
+        params.extend([formatted_vector, float(after[0]), int(after[1])])
+    if where_clauses:
+        nearest_sql += f" WHERE {' AND '.join(where_clauses)}"
+    nearest_sql += " ORDER BY distance, c.id LIMIT %s"
+    params.append(top_k)
+    if offset:
+        nearest_sql += " OFFSET %s"
+        params.append(offset)
+
+    # Join document/section details onto the page only
+    sql = f"""
         SELECT
             c.id as chunk_id,
             c.section_id,
             s.doc_id,
             c.text_content,
-            c.embedding <=> %s AS distance,
+            c.distance,
             d.title as doc_title,
             d.author as doc_author,
             d.year as doc_year,
             d.source_path as doc_source_path,
             s.title as section_title,
             c.sequence as chunk_sequence
-        FROM chunks c
+        FROM ({nearest_sql}) c
         JOIN sections s ON c.section_id = s.id
         JOIN documents d ON s.doc_id = d.id
+        ORDER BY c.distance, c.id"""
+    return sql, params
+
+def _hybrid_candidates(top_k: int, offset: int) -> int:
+    """Rows taken from each ranking before fusion: SEARCH_HYBRID_CANDIDATES, or the full page if larger."""
+    return max(config.SEARCH_HYBRID_CANDIDATES, top_k + offset)
+
+def _build_hybrid_search_query(
+    query_text: str,
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    author_doc_ids: Optional[List[int]] = None
+) -> Tuple[str, List[Any]]:
     """
-    params: List[Any] = [formatted_vector]
-    where_clauses: List[str] = []
+    Builds the SQL and parameters for a hybrid search over chunks.
 
-    # Apply filters
-    if filters:
-        logger.debug(f"Applying filters: {filters}")
-        # Use %s placeholders consistently
-        if 'author' in filters:
-            where_clauses.append(f"d.author ILIKE %s")
-            params.append(f"%{filters['author']}%")
-        if 'year' in filters:
-            where_clauses.append(f"d.year = %s")
-            params.append(filters['year'])
-        if 'doc_id' in filters:
-            where_clauses.append(f"d.id = %s")
-            params.append(filters['doc_id'])
-        # Add more filters as needed
+    The nearest chunks by cosine distance (HNSW index) and the best chunks by full-text
+    rank (GIN index on text_tsv, websearch query syntax) are each limited to
+    _hybrid_candidates rows and merged with reciprocal rank fusion,
+    score = sum(1 / (SEARCH_RRF_K + rank)), in a single statement. Rows selected are
+    those of the vector search plus the fused score.
+    """
+    if query_embedding is None or len(query_embedding) == 0:
+        raise ValueError("Query embedding cannot be empty.")
+    if not query_text or not query_text.strip():
+        raise ValueError("Query text cannot be empty for hybrid search.")
 
-    # Construct final query
-    if where_clauses:
-        sql = f"{base_sql} WHERE {' AND '.join(where_clauses)} ORDER BY distance LIMIT %s"
-        params.append(top_k)
-    else:
-        sql = f"{base_sql} ORDER BY distance LIMIT %s"
-        params.append(top_k)
+    formatted_vector = format_vector_for_pgvector(query_embedding)
+    candidates = _hybrid_candidates(top_k, offset)
+    where_clauses, filter_params = _filter_clauses(filters, author_doc_ids)
+    vector_where = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    lexical_where = " AND ".join(["c.text_tsv @@ q.query"] + where_clauses)
+
+    sql = f"""
+        WITH vector_ranked AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT c.id, c.embedding <=> %s AS distance
+                FROM chunks c
+                {vector_where}
+                ORDER BY distance LIMIT %s
+            ) v
+        ),
+        lexical_ranked AS (
+            SELECT id, row_number() OVER (ORDER BY lexical_rank DESC, id) AS rank
+            FROM (
+                SELECT c.id, ts_rank_cd(c.text_tsv, q.query) AS lexical_rank
+                FROM chunks c
+                CROSS JOIN websearch_to_tsquery(%s::regconfig, %s) AS q(query)
+                WHERE {lexical_where}
+                ORDER BY lexical_rank DESC LIMIT %s
+            ) l
+        ),
+        fused AS (
+            SELECT id, sum(1.0 / (%s + rank)) AS score
+            FROM (
+                SELECT id, rank FROM vector_ranked
+                UNION ALL
+                SELECT id, rank FROM lexical_ranked
+            ) ranked
+            GROUP BY id
+        )
+        SELECT
+            c.id as chunk_id,
+            c.section_id,
+            s.doc_id,
+            c.text_content,
+            c.embedding <=> %s AS distance,
+            d.title as doc_title,
+            d.author as doc_author,
+            d.year as doc_year,
+            d.source_path as doc_source_path,
+            s.title as section_title,
+            c.sequence as chunk_sequence,
+            f.score
+        FROM fused f
+        JOIN chunks c ON c.id = f.id
+        JOIN sections s ON c.section_id = s.id
+        JOIN documents d ON s.doc_id = d.id
+        ORDER BY f.score DESC, distance LIMIT %s"""
+    params: List[Any] = [
+        formatted_vector, *filter_params, candidates,
+        config.SEARCH_TEXT_CONFIG, query_text, *filter_params, candidates,
+        config.SEARCH_RRF_K, formatted_vector, top_k
+    ]
+    if offset:
+        sql += " OFFSET %s"
+        params.append(offset)
+    return sql, params
+
+def _prepare_search(
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    offset: int,
+    ef_search: Optional[int],
+    exact: bool,
+    lexical_query: Optional[str] = None,
+    author_doc_ids: Optional[List[int]] = None,
+    after: Optional[Tuple[float, int]] = None,
+    scan_depth: int = 0
+) -> Tuple[Dict[str, str], str, List[Any]]:
+    """Returns (settings, sql, params) for a vector search, or a hybrid search if `lexical_query` is given."""
+    if lexical_query is None:
+        sql, params = _build_vector_search_query(query_embedding, top_k, filters, offset, author_doc_ids, after)
+        settings = _search_settings(top_k, filters, offset, ef_search, exact, keyset=after is not None, scan_depth=scan_depth)
+        return settings, sql, params
+    if after is not None:
+        raise ValueError("Keyset pagination is only supported for vector searches.")
+    sql, params = _build_hybrid_search_query(lexical_query, query_embedding, top_k, filters, offset, author_doc_ids)
+    # The vector ranking must return the full candidate list, so size ef_search for it
+    return _search_settings(_hybrid_candidates(top_k, offset), filters, 0, ef_search, exact), sql, params
 
-    logger.debug(f"Executing search query: {sql} with params count: {len(params)}")
+def _row_to_search_result(row: Sequence[Any]) -> SearchResult:
+    """Maps a row selected by the vector or hybrid search query to a SearchResult."""
+    return SearchResult(
+        chunk_id=row[0],
+        section_id=row[1],
+        doc_id=row[2],
+        text_content=row[3],
+        distance=row[4],
+        doc_title=row[5],
+        doc_author=row[6],
+        doc_year=row[7],
+        doc_source_path=row[8],
+        section_title=row[9],
+        chunk_sequence=row[10],
+        score=row[11] if len(row) > 11 else None # Hybrid searches only
+    )
 
+async def vector_search_chunks(
+    conn: psycopg.AsyncConnection,
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    ef_search: Optional[int] = None,
+    exact: bool = False,
+    after: Optional[Tuple[float, int]] = None,
+    scan_depth: int = 0
+) -> List[SearchResult]:
+    """
+    Performs vector similarity search on chunks with optional metadata filtering and an optional result offset.
+
+    `ef_search` trades latency for recall on the HNSW index and `exact` bypasses the index
+    entirely; both are applied with transaction-local settings (see _search_settings).
+    `after` continues from the (distance, chunk_id) of a previous page's last result
+    (keyset pagination): unlike `offset`, earlier rows are not returned, but the index scan
+    still walks past them. `scan_depth` is the number of rows earlier pages returned and
+    sizes the scan budget for that walk; with a very selective filter a deep page can
+    still exhaust the budget and come back short.
+    """
+    logger.debug(f"Performing vector search with top_k={top_k}, filters={filters}, ef_search={ef_search}, exact={exact}, after={after}, scan_depth={scan_depth}")
+    search = (query_embedding, top_k, filters, offset, ef_search, exact)
+    return await _execute_search(conn, search, "vector search", after=after, scan_depth=scan_depth)
+
+async def hybrid_search_chunks(
+    conn: psycopg.AsyncConnection,
+    query_text: str,
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    ef_search: Optional[int] = None,
+    exact: bool = False
+) -> List[SearchResult]:
+    """
+    Performs hybrid lexical + vector search on chunks, fusing both rankings in one round trip.
+
+    Results are ordered by reciprocal rank fusion score (SearchResult.score); `distance` is
+    still the cosine distance. `ef_search` and `exact` apply to the vector ranking as in
+    vector_search_chunks.
+    """
+    logger.debug(f"Performing hybrid search with top_k={top_k}, filters={filters}, ef_search={ef_search}, exact={exact}")
+    search = (query_embedding, top_k, filters, offset, ef_search, exact, query_text)
+    return await _execute_search(conn, search, "hybrid search")
+
+async def _resolve_search(
+    cur: psycopg.AsyncCursor,
+    search: Tuple[Any, ...],
+    kind: str,
+    after: Optional[Tuple[float, int]] = None,
+    scan_depth: int = 0
+) -> Optional[Tuple[Dict[str, str], str, List[Any]]]:
+    """
+    Returns (settings, sql, params) for one search (a _prepare_search argument tuple),
+    resolving an author filter to its document IDs first. Returns None if the author
+    filter matches no document, in which case the search has no results.
+    """
+    filters = search[2]
+    author_doc_ids = None
+    if filters and 'author' in filters:
+        author_doc_ids = (await _resolve_author_doc_ids(cur, [filters['author']]))[_author_pattern(filters['author'])]
+        if not author_doc_ids:
+            logger.info(f"No documents match author filter '{filters['author']}'; {kind} skipped.")
+            return None
+    return _prepare_search(*search, author_doc_ids=author_doc_ids, after=after, scan_depth=scan_depth)
+
+async def _execute_search(
+    conn: psycopg.AsyncConnection,
+    search: Tuple[Any, ...],
+    kind: str,
+    after: Optional[Tuple[float, int]] = None,
+    scan_depth: int = 0
+) -> List[SearchResult]:
+    """Runs one search (a _prepare_search argument tuple) on a single cursor."""
     results = []
     async with conn.cursor() as cur:
         try:
+            prepared = await _resolve_search(cur, search, kind, after, scan_depth)
+            if prepared is None:
+                return []
+            settings, sql, params = prepared
+            settings_statement = _settings_statement(settings)
+            logger.debug(f"Executing search query: {sql} with params count: {len(params)}")
+            if settings_statement:
+                await cur.execute(*settings_statement)
             await cur.execute(sql, params)
             rows = await cur.fetchall()
-            logger.info(f"Vector search returned {len(rows)} results.")
-            for row in rows:
-                results.append(SearchResult(
-                    chunk_id=row[0],
-                    section_id=row[1],
-                    doc_id=row[2],
-                    text_content=row[3],
-                    distance=row[4],
-                    doc_title=row[5],
-                    doc_author=row[6],
-                    doc_year=row[7],
-                    doc_source_path=row[8],
-                    section_title=row[9],
-                    chunk_sequence=row[10]
-                ))
+            logger.info(f"{kind.capitalize()} returned {len(rows)} results.")
+            results = [_row_to_search_result(row) for row in rows]
+        except ValueError:
+            raise
         except psycopg.Error as e:
-            logger.error(f"Database error during vector search: {e}", exc_info=True)
+            logger.error(f"Database error during {kind}: {e}", exc_info=True)
             # Re-raise or handle as appropriate for the calling context
-            raise RuntimeError(f"Database error during vector search: {e}") from e
+            raise RuntimeError(f"Database error during {kind}: {e}") from e
         except Exception as e:
-            logger.error(f"Unexpected error during vector search: {e}", exc_info=True)
-            raise RuntimeError(f"Unexpected error during vector search: {e}") from e
+            logger.error(f"Unexpected error during {kind}: {e}", exc_info=True)
+            raise RuntimeError(f"Unexpected error during {kind}: {e}") from e
+
+    return results
+
+async def stream_search_chunks(
+    conn: psycopg.AsyncConnection,
+    query_embedding: Sequence[float],
+    top_k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    ef_search: Optional[int] = None,
+    exact: bool = False,
+    lexical_query: Optional[str] = None,
+    fetch_size: Optional[int] = None,
+    after: Optional[Tuple[float, int]] = None,
+    scan_depth: int = 0
+) -> AsyncIterator[SearchResult]:
+    """
+    Yields the results of a vector (or, with `lexical_query`, hybrid) search as they are fetched.
+
+    The query runs on a server-side cursor read `fetch_size` rows (default
+    SEARCH_STREAM_FETCH_SIZE) per round trip, so the first results arrive before the
+    rest are produced and memory does not grow with top_k. The cursor and the search
+    settings live in the connection's current transaction; the caller must keep the
+    connection (and the transaction) open until the iterator is exhausted or closed.
+    `after` and `scan_depth` are a keyset position as in vector_search_chunks.
+    """
+    kind = "hybrid search" if lexical_query is not None else "vector search"
+    search = (query_embedding, top_k, filters, offset, ef_search, exact, lexical_query)
+    count = 0
+    try:
+        async with conn.cursor() as cur:
+            prepared = await _resolve_search(cur, search, kind, after, scan_depth)
+            if prepared is None:
+                return
+            settings, sql, params = prepared
+            settings_statement = _settings_statement(settings)
+            if settings_statement:
+                await cur.execute(*settings_statement)
+        logger.debug(f"Streaming search query: {sql} with params count: {len(params)}")
+        async with conn.cursor(name="philograph_search_stream") as stream:
+            stream.itersize = fetch_size or config.SEARCH_STREAM_FETCH_SIZE
+            await stream.execute(sql, params)
+            async for row in stream:
+                count += 1
+                yield _row_to_search_result(row)
+    except ValueError:
+        raise
+    except psycopg.Error as e:
+        logger.error(f"Database error during streamed {kind}: {e}", exc_info=True)
+        raise RuntimeError(f"Database error during {kind}: {e}") from e
+    logger.info(f"Streamed {kind} returned {count} results.")
+
+async def vector_search_chunks_batch(
+    conn: psycopg.AsyncConnection,
+    searches: List[Tuple[Any, ...]]
+) -> List[List[SearchResult]]:
+    """
+    Runs several vector (or hybrid) searches on one connection in pipeline mode.
+
+    Each search is a (query_embedding, top_k, filters, offset, ef_search, exact) tuple,
+    optionally followed by a lexical query text that makes that search hybrid.
+    All queries are sent before any results are read, so the batch costs one round trip
+    instead of one per query. Results are returned in the order of `searches`.
+    Transaction-local settings persist across the batch, so the first query sends all of
+    its settings and each later one only those that differ from the previous query's. Author filters are resolved to document
+    IDs with one lookup for the whole batch beforehand; searches whose author matches no
+    document are not sent and return no results.
+    """
+    if not searches:
+        return []
+    try:
+        authors = [search[2]['author'] for search in searches if search[2] and 'author' in search[2]]
+        resolved: Dict[str, List[int]] = {}
+        if authors:
+            async with conn.cursor() as cur:
+                resolved = await _resolve_author_doc_ids(cur, authors)
+
+        queries: List[Optional[Tuple[Any, str, List[Any]]]] = []
+        current: Dict[str, str] = {}
+        for search in searches:
+            filters = search[2]
+            author_doc_ids = resolved[_author_pattern(filters['author'])] if filters and 'author' in filters else None
+            if author_doc_ids is not None and not author_doc_ids:
+                queries.append(None)
+                continue
+            settings, sql, params = _prepare_search(*search, author_doc_ids=author_doc_ids)
+            queries.append((_settings_statement(settings, current), sql, params))
+            current = settings
+        logger.debug(f"Executing {sum(q is not None for q in queries)} pipelined search queries.")
+
+        cursors = [conn.cursor() if query is not None else None for query in queries]
+        try:
+            async with conn.pipeline():
+                for cur, query in zip(cursors, queries):
+                    if query is None:
+                        continue
+                    settings_statement, sql, params = query
+                    if settings_statement:
+                        await conn.execute(*settings_statement)
+                    await cur.execute(sql, params)
+                all_rows = [await cur.fetchall() if cur is not None else [] for cur in cursors]
+        finally:
+            for cur in cursors:
+                if cur is not None:
+                    await cur.close()
+    except ValueError:
+        raise
+    except psycopg.Error as e:
+        logger.error(f"Database error during batch vector search: {e}", exc_info=True)
+        raise RuntimeError(f"Database error during vector search: {e}") from e
+    except Exception as e:
+        logger.error(f"Unexpected error during batch vector search: {e}", exc_info=True)
+        raise RuntimeError(f"Unexpected error during vector search: {e}") from e
 
-    return results
\ No newline at end of file
+    logger.info(f"Batch vector search returned {sum(len(rows) for rows in all_rows)} results for {len(queries)} queries.")
+    return [[_row_to_search_result(row) for row in rows] for rows in all_rows]
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Set
+
+from .. import config
+from ..utils.concurrency import AdaptiveConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("process", "thread", "inline")
+
+# --- Worker Processes ---
+
+def _worker_main(conn: Any) -> None:
+    """Worker process loop: runs (func, args) requests received on `conn` until it receives None."""
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        func, args = request
+        try:
+            reply = (True, func(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e: # Unpicklable result or exception
+            conn.send((False, RuntimeError(f"Extraction result could not be returned: {e}")))
+
+class _WorkerProcess:
+    """
+    One extraction worker process and the parent's end of its pipe.
+
+    terminate() and stop() block while the process exits; the pool runs them in a thread.
+    """
+
+    def __init__(self, context: Any):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), name="philograph-extraction", daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def terminate(self) -> None:
+        """Terminates the process; a pending recv on its pipe then ends with EOFError."""
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+
+    def stop(self) -> None:
+        """Asks an idle worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        self.terminate()
+        self.conn.close()
+
+# --- CPU-Bound Extraction Offloading ---
+
+class ExtractionPool:
+    """
+    Runs CPU-bound extraction functions (EPUB/TXT parsing) off the event loop.
+
+    Modes:
+        - "process": up to `max_workers` long-lived worker processes, each running
+          one call at a time; a pathological file is killed on timeout (only its own
+          worker, which is replaced) and a crashing parser cannot take the API process
+          or the other calls down.
+        - "thread": a ThreadPoolExecutor; cheaper, but timed-out work keeps
+          running in the background and still competes for the GIL.
+        - "inline": runs on the event loop (previous behaviour; for debugging).
+
+    The timeout starts when a worker picks the call up, so time spent queued
+    behind other files does not count against it. Functions run in "process"
+    mode must be picklable module-level callables.
+    """
+
+    def __init__(self, mode: str = "process", max_workers: int = 2, timeout: Optional[float] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Invalid extraction executor mode '{mode}'. Must be one of {EXECUTOR_MODES}.")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        # Process mode: a fixed limiter hands out workers; idle ones are reused, failed ones replaced
+        self._worker_slots = AdaptiveConcurrencyLimiter(self.max_workers, min_limit=self.max_workers)
+        self._idle_workers: List[_WorkerProcess] = []
+        self._busy_workers: Set[_WorkerProcess] = set()
+        self._reaping: Set[asyncio.Task] = set()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction")
+            logger.info(f"Started extraction {self.mode} pool with {self.max_workers} workers.")
+        return self._executor
+
+    def _take_worker(self) -> _WorkerProcess:
+        if self._idle_workers:
+            return self._idle_workers.pop()
+        # 'spawn' avoids forking a process that has a running event loop, DB pool and HTTP client
+        worker = _WorkerProcess(multiprocessing.get_context("spawn"))
+        logger.info(f"Started extraction worker process {worker.process.pid}.")
+        return worker
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs func(*args) in the pool, enforcing the per-call timeout.
+
+        Raises:
+            RuntimeError: If the call times out or the worker process crashes.
+        """
+        if self.mode == "inline":
+            return func(*args)
+        if self.mode == "thread":
+            return await self._run_in_thread(func, args)
+        return await self._run_in_process(func, args)
+
+    async def _run_in_thread(self, func: Callable[..., Any], args: tuple) -> Any:
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def mark_started() -> None:
+            if not started.done():
+                started.set_result(None)
+
+        def call() -> Any:
+            loop.call_soon_threadsafe(mark_started)
+            return func(*args)
+
+        future = loop.run_in_executor(self._get_executor(), call)
+        try:
+            await asyncio.wait([started, future], return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Extraction of {args[0] if args else func.__name__} timed out after {self.timeout}s; its thread keeps running in the background.")
+            raise RuntimeError(f"Extraction timed out after {self.timeout}s")
+        finally:
+            started.cancel()
+
+    async def _run_in_process(self, func: Callable[..., Any], args: tuple) -> Any:
+        name = args[0] if args else func.__name__
+        async with self._worker_slots.slot():
+            worker = self._take_worker()
+            self._busy_workers.add(worker)
+            reusable = False
+            receive: Optional[asyncio.Future] = None
+            try:
+                worker.conn.send((func, args))
+                # Shielded so a timeout or cancellation leaves the receiving thread to end with the process
+                receive = asyncio.ensure_future(asyncio.to_thread(worker.conn.recv))
+                ok, value = await asyncio.wait_for(asyncio.shield(receive), timeout=self.timeout)
+                reusable = True
+            except asyncio.TimeoutError:
+                logger.error(f"Extraction of {name} timed out after {self.timeout}s; killing its worker process {worker.process.pid}.")
+                raise RuntimeError(f"Extraction timed out after {self.timeout}s")
+            except (EOFError, OSError) as e:
+                logger.error(f"Extraction worker crashed while processing {name}: {e}")
+                raise RuntimeError("Extraction worker process crashed") from e
+            finally:
+                self._busy_workers.discard(worker)
+                if reusable:
+                    self._idle_workers.append(worker)
+                else:
+                    self._retire(worker, receive) # Timed out, crashed or cancelled mid-call: only this worker is replaced
+        if ok:
+            return value
+        raise value
+
+    def _retire(self, worker: _WorkerProcess, receive: Optional[asyncio.Future]) -> None:
+        """Kills a worker in the background, without blocking the event loop while it exits."""
+        task = asyncio.create_task(self._reap(worker, receive))
+        self._reaping.add(task)
+        task.add_done_callback(self._reaping.discard)
+
+    async def _reap(self, worker: _WorkerProcess, receive: Optional[asyncio.Future]) -> None:
+        await asyncio.to_thread(worker.terminate)
+        if receive is not None:
+            await asyncio.gather(receive, return_exceptions=True) # Its recv ends with EOFError once the process is gone
+        worker.conn.close() # Only once nothing reads from it, so the descriptor cannot be reused under a reader
+
+    async def shutdown(self) -> None:
+        """Shuts down the thread executor and the worker processes, if started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Extraction pool shut down.")
+        idle, busy = self._idle_workers, self._busy_workers
+        self._idle_workers, self._busy_workers = [], set()
+        # Busy workers' callers see the crash, fail that file and retire the worker
+        await asyncio.gather(
+            *(asyncio.to_thread(worker.stop) for worker in idle),
+            *(asyncio.to_thread(worker.terminate) for worker in busy)
+        )
+        if self._reaping:
+            await asyncio.gather(*list(self._reaping), return_exceptions=True)
+        if idle or busy:
+            logger.info(f"Stopped {len(idle) + len(busy)} extraction worker processes.")
+
+# Shared pool used by the ingestion pipeline
+extraction_pool = ExtractionPool(
+    mode=config.EXTRACTION_EXECUTOR,
+    max_workers=config.EXTRACTION_WORKERS,
+    timeout=config.EXTRACTION_TIMEOUT_SECONDS
+)
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .. import config
+from ..data_access import db_layer
+from . import pipeline as ingestion_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes for a job (file results arrive faster than that)
+PROGRESS_WRITE_INTERVAL = 1.0
+
+# --- Background Ingest Jobs ---
+
+class IngestJobRunner:
+    """
+    Processes queued ingest jobs (the ingest_jobs table) with a bounded pool of worker tasks.
+
+    /ingest only records a job and returns its ID; workers claim jobs with
+    FOR UPDATE SKIP LOCKED, so several API processes can share one queue. A running
+    job's heartbeat is refreshed while it works; jobs whose worker died (no heartbeat
+    for `stale_seconds`) are requeued, or failed after `max_attempts`. Every write
+    is guarded by the claiming attempt, so a worker that lost its job cannot
+    overwrite the outcome of the attempt that replaced it.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None
+    ):
+        self.workers = max(1, workers if workers is not None else config.INGEST_JOB_WORKERS)
+        self.poll_seconds = poll_seconds if poll_seconds is not None else config.INGEST_JOB_POLL_SECONDS
+        self.stale_seconds = stale_seconds if stale_seconds is not None else config.INGEST_JOB_STALE_SECONDS
+        self.max_attempts = max(1, max_attempts if max_attempts is not None else config.INGEST_JOB_MAX_ATTEMPTS)
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        """Starts the worker tasks on the running event loop (no-op if already started)."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"ingest-job-worker-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} ingest job workers.")
+
+    async def stop(self) -> None:
+        """Cancels the workers; jobs they were running are returned to the queue."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info("Stopped ingest job workers.")
+
+    def notify(self) -> None:
+        """Wakes idle workers after a job was queued, instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job = await self._next_job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingest job worker {index} failed to claim a job: {e}", exc_info=True)
+                job = None
+            if job is not None:
+                await self.run_job(job)
+                continue
+            await self._wait_for_work()
+
+    async def _next_job(self) -> Optional[db_layer.IngestJob]:
+        """Recovers stale jobs, then claims the oldest queued one (each in its own transaction)."""
+        async with db_layer.get_db_connection() as conn:
+            await db_layer.requeue_stale_ingest_jobs(conn, self.stale_seconds, self.max_attempts)
+        async with db_layer.get_db_connection() as conn:
+            return await db_layer.claim_ingest_job(conn)
+
+    async def _wait_for_work(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+        except asyncio.TimeoutError:
+            return
+        self._wakeup.clear()
+
+    async def run_job(self, job: db_layer.IngestJob) -> None:
+        """Runs a claimed job through the ingestion pipeline and records its outcome."""
+        progress: Dict[str, Any] = {"files_done": 0, "succeeded": 0, "skipped": 0, "errors": 0}
+        last_write = time.monotonic()
+
+        async def on_file_done(relative_path: str, result: Dict[str, Any]) -> None:
+            nonlocal last_write
+            progress["files_done"] += 1
+            result_status = result.get("status")
+            if result_status == "Success":
+                progress["succeeded"] += 1
+            elif result_status == "Skipped":
+                progress["skipped"] += 1
+            else:
+                progress["errors"] += 1
+            progress["last_path"] = relative_path
+            if time.monotonic() - last_write >= PROGRESS_WRITE_INTERVAL:
+                last_write = time.monotonic()
+                await self._record_progress(job, dict(progress))
+
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await ingestion_pipeline.process_document(job.path, on_file_done=on_file_done)
+        except asyncio.CancelledError:
+            heartbeat.cancel()
+            await self._release(job)
+            raise
+        except Exception as e:
+            heartbeat.cancel()
+            logger.exception(f"Ingest job {job.id} raised during ingestion of {job.path}", exc_info=e)
+            await self._finish(job, "failed", progress=progress, error=str(e) or type(e).__name__)
+            return
+        heartbeat.cancel()
+
+        if result.get("status") == "Error":
+            await self._finish(job, "failed", progress=progress, result=result, error=result.get("message", "Ingestion failed"))
+        else:
+            await self._finish(job, "succeeded", progress=progress, result=result)
+
+    async def _heartbeat(self, job: db_layer.IngestJob) -> None:
+        """Refreshes the job's heartbeat so other workers do not treat it as abandoned."""
+        interval = max(self.stale_seconds / 3, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            await self._record_progress(job, None)
+
+    async def _record_progress(self, job: db_layer.IngestJob, progress: Optional[Dict[str, Any]]) -> None:
+        try:
+            async with db_layer.get_db_connection() as conn:
+                owned = await db_layer.update_ingest_job_progress(conn, job.id, job.attempts, progress)
+            if not owned:
+                logger.warning(f"Ingest job {job.id} attempt {job.attempts} is no longer running; it was likely requeued as stale.")
+        except Exception as e:
+            logger.warning(f"Failed to record progress for ingest job {job.id}: {e}")
+
+    async def _finish(
+        self,
+        job: db_layer.IngestJob,
+        status: str,
+        progress: Dict[str, Any],
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        try:
+            async with db_layer.get_db_connection() as conn:
+                await db_layer.update_ingest_job_progress(conn, job.id, job.attempts, progress)
+                await db_layer.finish_ingest_job(conn, job.id, job.attempts, status, result=result, error=error)
+        except Exception as e:
+            # The job stays 'running' and is recovered as stale once its heartbeat lapses
+            logger.error(f"Failed to record outcome of ingest job {job.id}: {e}", exc_info=True)
+
+    async def _release(self, job: db_layer.IngestJob) -> None:
+        try:
+            async with db_layer.get_db_connection() as conn:
+                await db_layer.release_ingest_job(conn, job.id, job.attempts)
+        except Exception as e:
+            logger.warning(f"Failed to return ingest job {job.id} to the queue: {e}")
+
+# Shared instance started by the API lifespan
+ingest_job_runner = IngestJobRunner()
+
+async def queue_ingest_job(path: str) -> int:
+    """
+    Queues an ingest job for a path relative to the source directory and wakes this process's workers.
+
+    The path is stored normalized, so jobs for one path match however it was spelled.
+
+    Raises:
+        FileNotFoundError, ValueError: If the path does not exist or escapes the source directory.
+    """
+    path = ingestion_pipeline.normalize_source_path(path)
+    async with db_layer.get_db_connection() as conn:
+        job_id = await db_layer.add_ingest_job(conn, path)
+    ingest_job_runner.notify()
+    return job_id
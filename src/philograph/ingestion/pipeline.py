@@ -1,26 +1,224 @@
 import asyncio
+import hashlib
+import itertools
 import logging
 import os
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import httpx # For potential errors from http_client
+import numpy as np
 
 from .. import config
 from ..data_access import db_layer
 from ..utils import file_utils, http_client, text_processing
+from ..utils.concurrency import AdaptiveConcurrencyLimiter
+from ..utils.embedding_cache import embedding_cache
+from ..utils.embedding_utils import EMBEDDING_DTYPE, empty_embedding_matrix, to_embedding_matrix
+from ..utils.metrics import EMBEDDING_REQUESTS_TOTAL, INGESTION_CHUNKS_TOTAL, INGESTION_DOCUMENTS_TOTAL
+from ..utils.stage_timings import ingestion_stage_timings
+from .extraction_pool import extraction_pool
 
 logger = logging.getLogger(__name__)
 
+# Called with (relative file path, file result) after each file of a process_document call
+FileResultCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# File types picked up when ingesting (or watching) a directory
+SUPPORTED_EXTENSIONS = ['.pdf', '.epub', '.md', '.txt']
+
 # --- Helper: Embedding Generation ---
 
+# HTTP statuses from the LiteLLM proxy that signal overload and are worth retrying
+RETRYABLE_EMBEDDING_STATUS_CODES = {429, 503}
+
+# Shared across all concurrent callers so the cap on in-flight embedding requests is global
+_embedding_limiter = AdaptiveConcurrencyLimiter(config.EMBEDDING_MAX_CONCURRENCY)
+
+def _is_timeout_error(error: Exception) -> bool:
+    """Checks whether a request error was caused by a timeout (http_client wraps timeouts)."""
+    return isinstance(error, httpx.TimeoutException) or isinstance(error.__cause__, httpx.TimeoutException)
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """
+    Returns the backoff delay for a retry, honouring a numeric Retry-After header if present
+    (capped at EMBEDDING_MAX_RETRY_AFTER_SECONDS so a misbehaving server cannot stall ingestion).
+    """
+    if response is not None:
+        try:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                return min(max(0.0, float(retry_after)), config.EMBEDDING_MAX_RETRY_AFTER_SECONDS)
+        except (AttributeError, TypeError, ValueError):
+            pass
+    return config.EMBEDDING_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+
+async def _request_embedding_batch(
+    batch: List[Tuple[int, str, int]],
+    batch_num: int,
+    headers: Dict[str, str],
+    limiter: AdaptiveConcurrencyLimiter
+) -> np.ndarray:
+    """
+    Requests embeddings for a single batch, holding a limiter slot per attempt.
+    Rate-limited (429/503) and timed-out attempts shrink the limiter and are retried with backoff.
+    Returns a float32 matrix of shape (len(batch), TARGET_EMBEDDING_DIMENSION).
+    """
+    chunk_texts = [item[1] for item in batch] # Extract text
+    payload = {"model": config.EMBEDDING_MODEL_NAME, "input": chunk_texts}
+
+    attempt = 0
+    while True:
+        retry_after_response: Optional[httpx.Response] = None
+        dispatched: Optional[int] = None
+        logger.debug(f"Requesting embeddings for batch {batch_num} ({len(chunk_texts)} chunks, attempt {attempt + 1})")
+        try:
+            async with limiter.slot() as dispatched:
+                response = await http_client.make_async_request(
+                    "POST",
+                    f"{config.LITELLM_PROXY_URL}/embeddings",
+                    json_data=payload,
+                    headers=headers,
+                    timeout=120.0 # Increased timeout for potentially large batches
+                )
+                if response.status_code in RETRYABLE_EMBEDDING_STATUS_CODES:
+                    limiter.record_overload(dispatched)
+                    if attempt < config.EMBEDDING_MAX_RETRIES:
+                        retry_after_response = response
+                if retry_after_response is None:
+                    response.raise_for_status() # Check for HTTP errors
+                    response_data = response.json()
+        except httpx.RequestError as e:
+            if _is_timeout_error(e):
+                limiter.record_overload(dispatched)
+                if attempt < config.EMBEDDING_MAX_RETRIES:
+                    delay = _retry_delay(attempt)
+                    EMBEDDING_REQUESTS_TOTAL.inc(outcome="retried")
+                    logger.warning(f"Embedding batch {batch_num} timed out, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+            raise
+
+        if retry_after_response is not None:
+            delay = _retry_delay(attempt, retry_after_response)
+            EMBEDDING_REQUESTS_TOTAL.inc(outcome="retried")
+            logger.warning(f"Embedding batch {batch_num} rate limited (HTTP {retry_after_response.status_code}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        limiter.record_success()
+        break
+
+    if 'data' not in response_data or len(response_data['data']) != len(chunk_texts):
+        logger.error(f"Mismatch between requested ({len(chunk_texts)}) and received embeddings ({len(response_data.get('data', []))}) in batch {batch_num}. Response: {response_data}")
+        raise ValueError("Mismatch between requested and received embeddings in batch")
+
+    raw_embeddings = [item['embedding'] for item in response_data['data']]
+
+    # Validate dimensions of received embeddings (vectorized over the batch)
+    expected_dimension = config.TARGET_EMBEDDING_DIMENSION
+    try:
+        batch_embeddings = to_embedding_matrix(raw_embeddings)
+    except ValueError:
+        batch_embeddings = None
+    if batch_embeddings is None or batch_embeddings.shape[1] != expected_dimension:
+        mismatch = next(((i, e) for i, e in enumerate(raw_embeddings) if len(e) != expected_dimension), None)
+        if mismatch is None:
+            logger.error(f"Non-numeric embedding values received in batch {batch_num}.")
+            raise ValueError("Received non-numeric embedding values")
+        idx, emb = mismatch
+        chunk_info = batch[idx] # (section_id, text, sequence)
+        logger.error(f"Embedding dimension mismatch for chunk (section={chunk_info[0]}, seq={chunk_info[2]}) in batch {batch_num}. Expected {expected_dimension}, got {len(emb)}.")
+        raise ValueError(f"Received embedding with incorrect dimension ({len(emb)})")
+
+    logger.debug(f"Received embeddings for batch {batch_num}")
+    return batch_embeddings
+
+async def _embed_batch_or_raise(
+    batch: List[Tuple[int, str, int]],
+    batch_num: int,
+    headers: Dict[str, str],
+    limiter: AdaptiveConcurrencyLimiter
+) -> np.ndarray:
+    """Wraps _request_embedding_batch, translating failures into RuntimeErrors for the pipeline."""
+    try:
+        embeddings = await _request_embedding_batch(batch, batch_num, headers, limiter)
+    except httpx.HTTPStatusError as e:
+        EMBEDDING_REQUESTS_TOTAL.inc(outcome="error")
+        logger.error(f"HTTP error fetching embeddings for batch {batch_num}: {e.response.status_code} - {e.response.text}")
+        raise RuntimeError(f"Embedding generation failed (HTTP {e.response.status_code})") from e
+    except httpx.RequestError as e:
+        EMBEDDING_REQUESTS_TOTAL.inc(outcome="error")
+        logger.error(f"Request error fetching embeddings for batch {batch_num}: {e}")
+        raise RuntimeError("Embedding generation failed (Request Error)") from e
+    except (ValueError, KeyError, json.JSONDecodeError) as e:
+         EMBEDDING_REQUESTS_TOTAL.inc(outcome="error")
+         logger.error(f"Error processing embedding response for batch {batch_num}: {e}")
+         raise RuntimeError("Embedding generation failed (Processing Error)") from e
+    except Exception as e:
+        EMBEDDING_REQUESTS_TOTAL.inc(outcome="error")
+        logger.exception(f"Unexpected error fetching embeddings for batch {batch_num}", exc_info=e)
+        raise RuntimeError("Embedding generation failed (Unexpected Error)") from e
+    EMBEDDING_REQUESTS_TOTAL.inc(outcome="success")
+    return embeddings
+
+async def _dispatch_embedding_batches(
+    chunks_data: List[Tuple[int, str, int]],
+    batch_size: int,
+    max_concurrency: Optional[int]
+) -> np.ndarray:
+    """Sends chunks to the proxy in batches, keeping up to the limiter's bound in flight. Results are in input order."""
+    headers = {}
+    if config.LITELLM_API_KEY:
+        headers["Authorization"] = f"Bearer {config.LITELLM_API_KEY}"
+
+    limiter = _embedding_limiter if max_concurrency is None else AdaptiveConcurrencyLimiter(max_concurrency)
+    batches = [chunks_data[i : i + batch_size] for i in range(0, len(chunks_data), batch_size)]
+
+    logger.info(f"Requesting embeddings for {len(chunks_data)} chunks in {len(batches)} batches of {batch_size} (max concurrency {limiter.max_limit})...")
+
+    # Tasks are created in input order and gathered in that order, so results stay aligned with chunks_data
+    tasks = [
+        asyncio.create_task(_embed_batch_or_raise(batch, batch_num, headers, limiter))
+        for batch_num, batch in enumerate(batches, start=1)
+    ]
+    try:
+        batch_results = await asyncio.gather(*tasks)
+    except BaseException:
+        # Fail fast: cancel batches still waiting or in flight
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    embeddings = np.concatenate(batch_results) if batch_results else empty_embedding_matrix(config.TARGET_EMBEDDING_DIMENSION)
+    if len(embeddings) != len(chunks_data):
+         logger.error(f"Embedding count mismatch: Expected {len(chunks_data)}, got {len(embeddings)}")
+         raise RuntimeError("Embedding generation failed: Final count mismatch.")
+    return embeddings
+
 async def get_embeddings_in_batches(
     chunks_data: List[Tuple[int, str, int]], # (section_id, chunk_text, chunk_sequence)
-    batch_size: int = config.EMBEDDING_BATCH_SIZE
-) -> List[List[float]]:
+    batch_size: int = config.EMBEDDING_BATCH_SIZE,
+    max_concurrency: Optional[int] = None
+) -> np.ndarray:
     """
     Generates embeddings for text chunks in batches via LiteLLM Proxy.
+
+    Returns a contiguous float32 matrix of shape (len(chunks_data), TARGET_EMBEDDING_DIMENSION),
+    row i being the embedding of chunks_data[i].
+
+    Chunks whose text is already in the embedding cache (keyed by model,
+    dimension and normalized text) are served from it; only unique misses are
+    sent to the proxy and then written back to the cache.
+
+    Up to `max_concurrency` batches are kept in flight at once (defaults to the
+    shared limiter sized by config.EMBEDDING_MAX_CONCURRENCY); results are
+    returned in input order. Pass max_concurrency=1 for sequential dispatch.
     """
     # TDD: Test successful embedding request via LiteLLM proxy
     # TDD: Test handling of HTTP errors from LiteLLM proxy
@@ -28,73 +226,152 @@ async def get_embeddings_in_batches(
     # TDD: Test retry logic (potentially handled by LiteLLM itself or http_client)
     # TDD: Test handling of empty chunks_data list
     if not chunks_data:
-        return []
+        return empty_embedding_matrix(config.TARGET_EMBEDDING_DIMENSION)
 
-    all_embeddings: List[List[float]] = []
     total_chunks = len(chunks_data)
-    headers = {}
-    if config.LITELLM_API_KEY:
-        headers["Authorization"] = f"Bearer {config.LITELLM_API_KEY}"
 
-    logger.info(f"Requesting embeddings for {total_chunks} chunks in batches of {batch_size}...")
+    # Serve what we can from the embedding cache; only unique misses go to the proxy
+    cached_embeddings = await embedding_cache.get_many([item[1] for item in chunks_data])
+    miss_positions: Dict[str, List[int]] = {}
+    for idx, embedding in enumerate(cached_embeddings):
+        if embedding is None:
+            miss_positions.setdefault(chunks_data[idx][1], []).append(idx)
+    to_embed = [chunks_data[positions[0]] for positions in miss_positions.values()]
+    served_from_cache = total_chunks - sum(len(positions) for positions in miss_positions.values())
+    logger.info(f"Embedding cache served {served_from_cache}/{total_chunks} chunks (overall hit rate {embedding_cache.stats()['hit_rate']:.1%}).")
+
+    all_embeddings = np.empty((total_chunks, config.TARGET_EMBEDDING_DIMENSION), dtype=EMBEDDING_DTYPE)
+    filled = np.zeros(total_chunks, dtype=bool)
+    for idx, embedding in enumerate(cached_embeddings):
+        if embedding is not None:
+            all_embeddings[idx] = embedding
+            filled[idx] = True
+    if to_embed:
+        new_embeddings = await _dispatch_embedding_batches(to_embed, batch_size, max_concurrency)
+        for (_, chunk_text, _), embedding in zip(to_embed, new_embeddings):
+            positions = miss_positions[chunk_text]
+            all_embeddings[positions] = embedding
+            filled[positions] = True
+        await embedding_cache.put_many([item[1] for item in to_embed], new_embeddings)
+
+    logger.info(f"Successfully obtained {total_chunks} embeddings ({len(to_embed)} requested from proxy).")
+    if not filled.all():
+         logger.error(f"Final embedding count mismatch: Expected {total_chunks}, got {int(filled.sum())}")
+         raise RuntimeError("Embedding generation failed: Final count mismatch.")
 
-    for i in range(0, total_chunks, batch_size):
-        batch = chunks_data[i : i + batch_size]
-        chunk_texts = [item[1] for item in batch] # Extract text
+    return all_embeddings
 
-        if not chunk_texts:
-            continue
 
-        payload = {"model": config.EMBEDDING_MODEL_NAME, "input": chunk_texts}
-        batch_num = i // batch_size + 1
-        logger.debug(f"Requesting embeddings for batch {batch_num} ({len(chunk_texts)} chunks)")
+# --- Helper: Streaming Chunk Indexing ---
 
-        try:
-            response = await http_client.make_async_request(
-                "POST",
-                f"{config.LITELLM_PROXY_URL}/embeddings",
-                json_data=payload,
-                headers=headers,
-                timeout=120.0 # Increased timeout for potentially large batches
-            )
-            response.raise_for_status() # Check for HTTP errors
-            response_data = await response.json() # Await the coroutine
+# Marks the end of a stage's output on a queue
+_STAGE_DONE = object()
 
-            if 'data' not in response_data or len(response_data['data']) != len(chunk_texts):
-                logger.error(f"Mismatch between requested ({len(chunk_texts)}) and received embeddings ({len(response_data.get('data', []))}) in batch {batch_num}. Response: {response_data}")
-                raise ValueError("Mismatch between requested and received embeddings in batch")
+async def _stream_chunks_to_index(
+    conn: Any,
+    sections: List[Tuple[int, str]], # (section_id, section_text), in section order
+    batch_size: int = config.EMBEDDING_BATCH_SIZE,
+    embed_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    document_fields: Optional[Dict[str, Any]] = None
+) -> Tuple[int, Optional[int]]:
+    """
+    Chunks, embeds and writes a document's sections as overlapping stages joined by bounded queues:
 
-            batch_embeddings = [item['embedding'] for item in response_data['data']]
+        chunk (section by section) -> embed (`embed_workers` tasks) -> write (single writer on `conn`)
 
-            # Validate dimensions of received embeddings
-            for idx, emb in enumerate(batch_embeddings):
-                if len(emb) != config.TARGET_EMBEDDING_DIMENSION:
-                     chunk_info = batch[idx] # (section_id, text, sequence)
-                     logger.error(f"Embedding dimension mismatch for chunk (section={chunk_info[0]}, seq={chunk_info[2]}) in batch {batch_num}. Expected {config.TARGET_EMBEDDING_DIMENSION}, got {len(emb)}.")
-                     raise ValueError(f"Received embedding with incorrect dimension ({len(emb)})")
+    A batch is sent for embedding as soon as `batch_size` chunks are available, and embedded
+    batches are written while later ones are still embedding. The bounded queues apply
+    backpressure, so only a few batches are held in memory whatever the document size. All
+    writes go through `conn` and so share the caller's transaction. The first stage to fail
+    cancels the others and its error is re-raised. `document_fields` (doc_id, doc_year)
+    are passed to add_chunks_batch for the chunks' denormalized filter columns.
 
-            all_embeddings.extend(batch_embeddings)
-            logger.debug(f"Received embeddings for batch {batch_num}")
+    Returns:
+        (number of chunks indexed, ID of the document's first chunk or None)
+    """
+    embed_workers = max(1, embed_workers or config.EMBEDDING_MAX_CONCURRENCY)
+    queue_size = max(1, queue_size or config.INGEST_QUEUE_SIZE)
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    indexed_count = 0
+    first_chunk_id: Optional[int] = None
+
+    async def chunk_stage() -> None:
+        batch: List[Tuple[int, str, int]] = [] # (section_id, chunk_text, chunk_sequence)
+        batch_index = 0
+        for section_id, section_text in sections:
+            try:
+                # TDD: Test chunking produces expected chunk sizes and overlap
+                with ingestion_stage_timings.time("chunking"):
+                    chunks = text_processing.chunk_text_semantically(section_text, config.TARGET_CHUNK_SIZE)
+            except Exception as e:
+                logger.error(f"Chunking failed for section {section_id}: {e}", exc_info=True)
+                raise RuntimeError(f"Chunking/Section DB insert failed: {e}") from e
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error fetching embeddings for batch {batch_num}: {e.response.status_code} - {e.response.text}")
-            raise RuntimeError(f"Embedding generation failed (HTTP {e.response.status_code})") from e
-        except httpx.RequestError as e:
-            logger.error(f"Request error fetching embeddings for batch {batch_num}: {e}")
-            raise RuntimeError("Embedding generation failed (Request Error)") from e
-        except (ValueError, KeyError, json.JSONDecodeError) as e:
-             logger.error(f"Error processing embedding response for batch {batch_num}: {e}. Response: {response.text if 'response' in locals() else 'N/A'}")
-             raise RuntimeError("Embedding generation failed (Processing Error)") from e
-        except Exception as e:
-            logger.exception(f"Unexpected error fetching embeddings for batch {batch_num}", exc_info=e)
-            raise RuntimeError("Embedding generation failed (Unexpected Error)") from e
-
-    logger.info(f"Successfully received {len(all_embeddings)} embeddings.")
-    if len(all_embeddings) != total_chunks:
-         logger.error(f"Final embedding count mismatch: Expected {total_chunks}, got {len(all_embeddings)}")
-         raise RuntimeError("Embedding generation failed: Final count mismatch.")
+            chunk_sequence = 0
+            for chunk_text in chunks:
+                if chunk_text: # Ensure chunk is not empty
+                    batch.append((section_id, chunk_text, chunk_sequence))
+                    chunk_sequence += 1
+                    if len(batch) >= batch_size:
+                        await embed_queue.put((batch_index, batch))
+                        batch_index += 1
+                        batch = []
+        if batch:
+            await embed_queue.put((batch_index, batch))
+        for _ in range(embed_workers):
+            await embed_queue.put(_STAGE_DONE)
+
+    async def embed_stage() -> None:
+        while (item := await embed_queue.get()) is not _STAGE_DONE:
+            batch_index, batch = item
+            try:
+                with ingestion_stage_timings.time("embedding"):
+                    embeddings = await get_embeddings_in_batches(batch, batch_size=batch_size)
+            except Exception as e:
+                logger.error(f"Embedding generation failed for batch {batch_index}: {e}", exc_info=True)
+                raise RuntimeError(f"Embedding generation failed: {e}") from e
+            if len(embeddings) != len(batch):
+                logger.error(f"Embedding count mismatch before indexing: Expected {len(batch)}, got {len(embeddings)}")
+                raise RuntimeError("Embedding count mismatch before indexing.")
+            rows = [(section_id, chunk_text, chunk_sequence, embeddings[i]) for i, (section_id, chunk_text, chunk_sequence) in enumerate(batch)]
+            await write_queue.put((batch_index, rows))
+
+    # Tasks rather than bare gather() coroutines, so the cleanup below can cancel them all:
+    # gather does not cancel the other workers when one of them raises
+    embed_tasks = [asyncio.create_task(embed_stage()) for _ in range(embed_workers)]
+
+    async def embed_stages() -> None:
+        await asyncio.gather(*embed_tasks)
+        await write_queue.put(_STAGE_DONE)
+
+    async def write_stage() -> None:
+        nonlocal indexed_count, first_chunk_id
+        while (item := await write_queue.get()) is not _STAGE_DONE:
+            batch_index, rows = item
+            try:
+                with ingestion_stage_timings.time("chunk_indexing"):
+                    chunk_ids = await db_layer.add_chunks_batch(conn, rows, **(document_fields or {}))
+            except Exception as e:
+                logger.error(f"Indexing chunk batch {batch_index} failed: {e}", exc_info=True)
+                raise RuntimeError(f"DB chunk indexing failed: {e}") from e
+            indexed_count += len(rows)
+            if batch_index == 0 and chunk_ids:
+                first_chunk_id = chunk_ids[0]
 
-    return all_embeddings
+    tasks = [asyncio.create_task(stage()) for stage in (chunk_stage, embed_stages, write_stage)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks + embed_tasks:
+            task.cancel() # No-op for finished stages
+        await asyncio.gather(*tasks, *embed_tasks, return_exceptions=True)
+
+    return indexed_count, first_chunk_id
 
 
 # --- Helper: Content Extraction Dispatcher ---
@@ -112,21 +389,62 @@ async def extract_content_and_metadata(full_path: Path) -> Optional[Dict[str, An
     elif file_type == ".epub":
         # TDD: Test EPUB extraction returns text and metadata
         # TDD: Test handling of encrypted/DRM EPUBs (expect failure)
-        # This is CPU bound, but run in executor if it becomes blocking
-        return text_processing.extract_epub_content(full_path)
+        # CPU bound: run in the extraction pool so it does not stall the event loop
+        return await extraction_pool.run(text_processing.extract_epub_content, full_path)
     elif file_type in [".md", ".txt"]:
         # TDD: Test TXT/MD extraction reads content correctly
         # TDD: Test MD extraction handles frontmatter metadata
-        return text_processing.extract_text_content(full_path)
+        return await extraction_pool.run(text_processing.extract_text_content, full_path)
     else:
         logger.warning(f"Unsupported file type for extraction: {file_type} ({full_path})")
         return None
 
 # --- Main Ingestion Function ---
 
-async def process_document(file_path_relative: str) -> Dict[str, Any]:
+def resolve_source_path(file_path_relative: str) -> Path:
+    """
+    Resolves a path relative to the configured source directory.
+
+    Raises:
+        FileNotFoundError: If the path does not exist.
+        ValueError: If the path escapes the source directory or cannot be accessed.
+    """
+    try:
+        # Ensure the relative path doesn't try to escape the source dir
+        # Note: config.SOURCE_FILE_DIR_ABSOLUTE is already resolved
+        # .resolve(strict=True) will raise FileNotFoundError if path doesn't exist
+        full_path = (config.SOURCE_FILE_DIR_ABSOLUTE / file_path_relative).resolve(strict=True)
+    except FileNotFoundError:
+        raise
+    except Exception as path_e:
+        # Catch other potential path errors (e.g., permission denied, invalid characters)
+        raise ValueError(f"Invalid path or access error: {path_e}") from path_e
+    # Path traversal check (redundant if resolve(strict=True) works as expected, but keep for safety)
+    if config.SOURCE_FILE_DIR_ABSOLUTE not in full_path.parents and full_path != config.SOURCE_FILE_DIR_ABSOLUTE:
+        logger.error(f"Attempted path traversal: {file_path_relative}")
+        raise ValueError("Invalid path (traversal attempt)")
+    return full_path
+
+def normalize_source_path(file_path_relative: str) -> str:
+    """
+    Returns the canonical form of a source path: resolved and relative to the source directory,
+    with "/" separators ("." for the directory itself), so "books", "books/" and "./books" match.
+
+    Raises:
+        FileNotFoundError, ValueError: As resolve_source_path.
+    """
+    return resolve_source_path(file_path_relative).relative_to(config.SOURCE_FILE_DIR_ABSOLUTE).as_posix()
+
+async def process_document(
+    file_path_relative: str,
+    max_workers: Optional[int] = None,
+    on_file_done: Optional[FileResultCallback] = None
+) -> Dict[str, Any]:
     """
     Processes a single document or all documents in a directory.
+    Directories are processed by a pool of `max_workers` concurrent file workers
+    (defaults to config.INGEST_FILE_WORKERS). `on_file_done` is awaited with each
+    file's result as it completes (progress reporting for ingest jobs).
     """
     # TDD: Test processing a valid PDF file successfully
     # TDD: Test processing a valid EPUB file successfully
@@ -139,85 +457,322 @@ async def process_document(file_path_relative: str) -> Dict[str, Any]:
 
     # Resolve absolute path relative to configured source directory
     try:
-        # Ensure the relative path doesn't try to escape the source dir
-        # Note: config.SOURCE_FILE_DIR_ABSOLUTE is already resolved
-        # .resolve(strict=True) will raise FileNotFoundError if path doesn't exist
-        full_path = (config.SOURCE_FILE_DIR_ABSOLUTE / file_path_relative).resolve(strict=True)
-        # Path traversal check (redundant if resolve(strict=True) works as expected, but keep for safety)
-        if config.SOURCE_FILE_DIR_ABSOLUTE not in full_path.parents and full_path != config.SOURCE_FILE_DIR_ABSOLUTE:
-             logger.error(f"Attempted path traversal: {file_path_relative}")
-             # This case should ideally not be reached if resolve(strict=True) is used
-             return {"status": "Error", "message": "Invalid path (traversal attempt)"}
+        full_path = resolve_source_path(file_path_relative)
     except FileNotFoundError:
          # This is the expected exception if the path doesn't exist
          logger.warning(f"Path not found during resolution: {file_path_relative}")
          # Return the standard "not found" message for the API handler
          return {"status": "Error", "message": "File or directory not found"}
-    except Exception as path_e:
-         # Catch other potential path errors (e.g., permission denied, invalid characters)
+    except ValueError as path_e:
          logger.error(f"Error resolving path '{file_path_relative}': {path_e}")
-         return {"status": "Error", "message": f"Invalid path or access error: {path_e}"}
+         return {"status": "Error", "message": str(path_e)}
 
 
     if file_utils.check_directory_exists(full_path):
-        logger.info(f"Processing directory: {full_path}")
-        results = []
-        # Use file_utils to list files, respecting allowed extensions if needed
-        allowed_ext = ['.pdf', '.epub', '.md', '.txt']
-        # NOTE: file_utils.list_files_in_directory is a generator, needs async iteration
-        # This part needs adjustment if file_utils itself isn't async
-        # Assuming a synchronous version for now, or needs async file listing utility
-        for file_to_process in file_utils.list_files_in_directory(full_path, allowed_extensions=allowed_ext, recursive=True):
-            # Get path relative to the original source dir for consistency
-            try:
-                relative_sub_path = file_to_process.relative_to(config.SOURCE_FILE_DIR_ABSOLUTE)
-                logger.info(f"Queueing file from directory: {relative_sub_path}")
-                # Process each file individually (could be parallelized later)
-                result = await _process_single_file(relative_sub_path)
-                results.append({str(relative_sub_path): result})
-            except Exception as e:
-                 logger.error(f"Failed processing file {file_to_process} in directory {full_path}: {e}", exc_info=True)
-                 results.append({str(file_to_process): {"status": "Error", "message": str(e)}})
-        # Aggregate results (simple summary for now)
-        success_count = sum(1 for r in results if list(r.values())[0]['status'] == 'Success')
-        skipped_count = sum(1 for r in results if list(r.values())[0]['status'] == 'Skipped')
-        error_count = len(results) - success_count - skipped_count
-        return {
-            "status": "Directory Processed",
-            "message": f"Processed directory '{file_path_relative}'. Success: {success_count}, Skipped: {skipped_count}, Errors: {error_count}",
-            "details": results
-        }
+        return await _process_directory(full_path, file_path_relative, max_workers, on_file_done)
     elif file_utils.check_file_exists(full_path):
         logger.info(f"Processing single file: {full_path}")
         # Ensure we use the relative path for DB storage and checks
         relative_path_obj = full_path.relative_to(config.SOURCE_FILE_DIR_ABSOLUTE)
-        return await _process_single_file(relative_path_obj)
+        result = await _process_single_file(relative_path_obj)
+        await _report_file_done(on_file_done, str(relative_path_obj), result)
+        return result
     else:
         logger.error(f"Path not found or is not a file/directory: {full_path}")
         return {"status": "Error", "message": "File or directory not found"}
 
+async def _report_file_done(on_file_done: Optional[FileResultCallback], relative_path: str, result: Dict[str, Any]) -> None:
+    """Awaits the progress callback, if any; a failing callback is logged and does not fail ingestion."""
+    if on_file_done is None:
+        return
+    try:
+        await on_file_done(relative_path, result)
+    except Exception as e:
+        logger.warning(f"Progress callback failed for {relative_path}: {e}", exc_info=True)
+
+def _ingest_connection_budget() -> int:
+    """
+    Pool connections available to file transactions across the whole process.
+
+    DB_POOL_MAX_SIZE is shared by everything else that checks out connections while files
+    are ingested: each background job worker may hold one for its heartbeat/progress writes
+    and one for its directory's fingerprint pre-check, the durable embedding cache holds up to
+    EMBEDDING_CACHE_DB_CONNECTIONS (its own limit, not per file), and one is kept for searches.
+    """
+    reserved = 2 * max(1, config.INGEST_JOB_WORKERS) + 1
+    if embedding_cache.persist:
+        reserved += embedding_cache.db_connections
+    return max(1, config.DB_POOL_MAX_SIZE - reserved)
+
+# File-level connections (fingerprint lookups and each file's transaction) across all directory
+# and job workers; a fixed limit (min == max). Sized once, like the pool it partitions.
+_file_connection_limiter = AdaptiveConcurrencyLimiter(_ingest_connection_budget(), min_limit=_ingest_connection_budget())
+
+@asynccontextmanager
+async def _file_connection() -> AsyncIterator[Any]:
+    """A pooled connection for one file's database work, within the process-wide ingestion budget."""
+    async with _file_connection_limiter.slot():
+        async with db_layer.get_db_connection() as conn:
+            yield conn
+
+def _effective_file_workers(max_workers: Optional[int]) -> int:
+    """
+    Resolves the number of concurrent file workers for directory ingestion.
+    Each worker holds a pooled DB connection for its document transaction, so the
+    count is capped at the process-wide ingestion budget (_ingest_connection_budget);
+    concurrent jobs share that budget through _file_connection. Embedding requests
+    across all workers are separately capped by the shared embedding limiter
+    (EMBEDDING_MAX_CONCURRENCY).
+    """
+    requested = max_workers if max_workers is not None else config.INGEST_FILE_WORKERS
+    budget = _ingest_connection_budget()
+    workers = max(1, min(requested, budget))
+    if workers < requested:
+        logger.warning(f"Limiting directory ingestion to {workers} file workers (DB_POOL_MAX_SIZE={config.DB_POOL_MAX_SIZE}, ingestion budget {budget}).")
+    return workers
+
+async def _prefetch_fingerprints(relative_paths: List[str]) -> Optional[Dict[str, db_layer.DocumentFingerprint]]:
+    """
+    Looks up the stored fingerprints of a batch of listed files in one query. Returns None if
+    the lookup fails, in which case each file is checked individually as it is processed.
+    """
+    try:
+        async with db_layer.get_db_connection() as conn:
+            return await db_layer.get_document_fingerprints(conn, relative_paths)
+    except Exception as e:
+        logger.warning(f"Bulk pre-check of {len(relative_paths)} files failed; checking them individually: {e}")
+        return None
+
+def _is_unchanged(scanned: file_utils.ScannedFile, fingerprint: Optional[db_layer.DocumentFingerprint]) -> bool:
+    """True if the scanned file still has the size and mtime recorded when it was last ingested."""
+    if fingerprint is None or fingerprint.file_size is None:
+        return False
+    return (fingerprint.file_size, fingerprint.file_mtime_ns) == (scanned.size, scanned.mtime_ns)
+
+async def _process_directory(
+    full_path: Path,
+    file_path_relative: str,
+    max_workers: Optional[int] = None,
+    on_file_done: Optional[FileResultCallback] = None
+) -> Dict[str, Any]:
+    """
+    Processes all supported files under a directory with a bounded pool of concurrent file workers.
+
+    The tree is scanned by SOURCE_SCAN_WORKERS threads (file_utils.scan_files), which stat each
+    file as they list it. The listing is pre-checked INGEST_PRECHECK_BATCH_SIZE files at a time
+    with one fingerprint query per batch: unchanged files are skipped right away, and only the
+    rest are handed to the workers (with their fingerprints, so the workers need no lookup of their own).
+    If either stage fails, the other tasks are cancelled and the scan is closed before the error propagates.
+    """
+    workers = _effective_file_workers(max_workers)
+    logger.info(f"Processing directory: {full_path} with {workers} file workers")
+    # Use file_utils to list files, respecting allowed extensions if needed
+    scan = file_utils.scan_files(
+        full_path, allowed_extensions=SUPPORTED_EXTENSIONS, recursive=True, workers=config.SOURCE_SCAN_WORKERS
+    )
+    listing = enumerate(scan)
+    # The batch being read off the event loop, awaited before the scan is closed
+    reading: Optional[asyncio.Future] = None
+    batch_size = max(1, config.INGEST_PRECHECK_BATCH_SIZE)
+    results_by_index: Dict[int, Dict[str, Any]] = {}
+    # Bounded so the listing is not read far ahead of the workers
+    work_queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+
+    async def record_result(index: int, path_key: str, result: Dict[str, Any]) -> None:
+        results_by_index[index] = {path_key: result}
+        await _report_file_done(on_file_done, path_key, result)
+
+    async def read_batch() -> List[Tuple[int, file_utils.ScannedFile]]:
+        nonlocal reading
+        # The scan blocks on directory reads, so batches are pulled off the event loop. The read
+        # is shielded: a cancelled stage cannot stop the thread, only stop waiting for it.
+        reading = asyncio.ensure_future(asyncio.to_thread(lambda: list(itertools.islice(listing, batch_size))))
+        return await asyncio.shield(reading)
+
+    async def precheck_stage() -> None:
+        while batch := await read_batch():
+            relative_paths: Dict[int, Tuple[Path, file_utils.ScannedFile]] = {}
+            for index, scanned in batch:
+                # Get path relative to the original source dir for consistency
+                try:
+                    relative_paths[index] = (scanned.path.relative_to(config.SOURCE_FILE_DIR_ABSOLUTE), scanned)
+                except Exception as e:
+                    logger.error(f"Failed processing file {scanned.path} in directory {full_path}: {e}", exc_info=True)
+                    await record_result(index, str(scanned.path), {"status": "Error", "message": str(e)})
+            known_documents = await _prefetch_fingerprints([str(path) for path, _ in relative_paths.values()])
+            for index, (relative_sub_path, scanned) in relative_paths.items():
+                if known_documents is not None and _is_unchanged(scanned, known_documents.get(str(relative_sub_path))):
+                    INGESTION_DOCUMENTS_TOTAL.inc(status="skipped")
+                    await record_result(index, str(relative_sub_path), {"status": "Skipped", "message": "Document unchanged"})
+                    continue
+                await work_queue.put((index, relative_sub_path, known_documents))
+        # On failure there is nothing to drain: the workers are cancelled instead
+        for _ in range(workers):
+            await work_queue.put(_STAGE_DONE)
+
+    async def file_worker() -> None:
+        while (item := await work_queue.get()) is not _STAGE_DONE:
+            index, relative_sub_path, known_documents = item
+            logger.info(f"Queueing file from directory: {relative_sub_path}")
+            try:
+                result = await _process_single_file(relative_sub_path, known_documents=known_documents)
+            except Exception as e:
+                 logger.error(f"Failed processing file {relative_sub_path} in directory {full_path}: {e}", exc_info=True)
+                 result = {"status": "Error", "message": str(e)}
+            await record_result(index, str(relative_sub_path), result)
+
+    tasks = [asyncio.ensure_future(precheck_stage()), *(asyncio.ensure_future(file_worker()) for _ in range(workers))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if reading is not None:
+            await asyncio.gather(reading, return_exceptions=True)
+        # Closing the scan shuts down its directory readers, which may block briefly
+        await asyncio.to_thread(scan.close)
+
+    # Report details in listing order regardless of completion order
+    results = [results_by_index[index] for index in sorted(results_by_index)]
+    # Aggregate results (simple summary for now)
+    success_count = sum(1 for r in results if list(r.values())[0]['status'] == 'Success')
+    skipped_count = sum(1 for r in results if list(r.values())[0]['status'] == 'Skipped')
+    error_count = len(results) - success_count - skipped_count
+    return {
+        "status": "Directory Processed",
+        "message": f"Processed directory '{file_path_relative}'. Success: {success_count}, Skipped: {skipped_count}, Errors: {error_count}",
+        "details": results
+    }
+
+
+async def _process_single_file(
+    file_path_relative: Path,
+    known_documents: Optional[Dict[str, db_layer.DocumentFingerprint]] = None
+) -> Dict[str, Any]:
+    """Internal function to process a single file, counting the result by status."""
+    result = await _ingest_single_file(file_path_relative, known_documents)
+    INGESTION_DOCUMENTS_TOTAL.inc(status=result["status"].lower())
+    return result
+
+def _section_text_hash(text: str) -> str:
+    """Identifies a section's extracted text; sections whose hash is unchanged keep their chunks on re-ingestion."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _plan_section_reuse(
+    previous_sections: List[Tuple[int, int, Optional[str]]],
+    text_hashes: List[str]
+) -> Tuple[Dict[int, int], List[int]]:
+    """
+    Matches re-extracted sections to a document's existing sections by text hash.
+
+    Args:
+        previous_sections: (section_id, sequence, text_hash) of the stored sections, in order.
+        text_hashes: Hash of each re-extracted section, by new sequence.
+
+    Returns:
+        ({new sequence: reused section ID}, IDs of stored sections that no longer match)
+    """
+    available: Dict[str, List[int]] = {}
+    for section_id, _, text_hash in previous_sections:
+        if text_hash is not None:
+            available.setdefault(text_hash, []).append(section_id)
+    reused: Dict[int, int] = {}
+    for sequence, text_hash in enumerate(text_hashes):
+        candidates = available.get(text_hash)
+        if candidates:
+            reused[sequence] = candidates.pop(0)
+    reused_ids = set(reused.values())
+    return reused, [section_id for section_id, _, _ in previous_sections if section_id not in reused_ids]
+
+async def _reuse_unchanged_sections(
+    conn: Any,
+    doc_id: int,
+    sections: List[Tuple[Optional[str], str]],
+    text_hashes: List[str],
+    section_level: int,
+    doc_year: Optional[int]
+) -> Dict[int, int]:
+    """
+    Prepares a changed document for re-indexing: keeps (and moves into place) the sections whose
+    text is unchanged, deletes the rest with their chunks, and drops the document's references
+    (re-parsed afterwards). Returns {new sequence: reused section ID}.
+    """
+    previous_sections = await db_layer.get_document_sections(conn, doc_id)
+    reused, removed = _plan_section_reuse(previous_sections, text_hashes)
+    await db_layer.delete_document_references(conn, doc_id)
+    await db_layer.delete_sections(conn, removed)
+    await db_layer.resequence_sections(
+        conn, doc_id, [(section_id, sections[seq][0], section_level, seq) for seq, section_id in reused.items()]
+    )
+    await db_layer.update_chunks_doc_year(conn, doc_id, doc_year)
+    logger.info(f"Doc {doc_id}: keeping {len(reused)} unchanged sections, removing {len(removed)}, re-indexing {len(sections) - len(reused)}.")
+    return reused
+
+async def _ingest_single_file(
+    file_path_relative: Path,
+    known_documents: Optional[Dict[str, db_layer.DocumentFingerprint]] = None
+) -> Dict[str, Any]:
+    """
+    Extracts, chunks, embeds and indexes a single file in one document transaction.
 
-async def _process_single_file(file_path_relative: Path) -> Dict[str, Any]:
-    """Internal function to process a single file."""
+    Files ingested before are compared with the fingerprint recorded then: a file with the same
+    size and mtime (or, failing that, the same content hash) is skipped, and an edited file is
+    re-ingested in place, re-embedding only the sections whose text changed. `known_documents`
+    holds fingerprints already fetched by a directory pre-check (a path absent from it was never
+    ingested); without it the fingerprint is looked up here.
+    """
     full_path = (config.SOURCE_FILE_DIR_ABSOLUTE / file_path_relative).resolve()
     relative_path_str = str(file_path_relative) # Use consistent string representation for DB/logs
 
     logger.info(f"Starting ingestion for single file: {relative_path_str}")
 
-    # Check if document already processed
     try:
-        async with db_layer.get_db_connection() as conn:
-            exists = await db_layer.check_document_exists(conn, relative_path_str)
-            if exists:
-                logger.warning(f"Document already processed: {relative_path_str}. Skipping.")
-                return {"status": "Skipped", "message": "Document already exists"}
+        file_stat = file_utils.get_file_stat(full_path)
+    except OSError as e:
+        logger.error(f"Could not stat {relative_path_str}: {e}")
+        return {"status": "Error", "message": f"File fingerprint failed: {e}"}
+
+    # Check if document already processed, and whether the file changed since
+    try:
+        if known_documents is not None:
+            existing = known_documents.get(relative_path_str)
+        else:
+            async with _file_connection() as conn:
+                existing = await db_layer.get_document_fingerprint(conn, relative_path_str)
     except Exception as db_e:
          logger.error(f"Database check failed for {relative_path_str}: {db_e}", exc_info=True)
          return {"status": "Error", "message": f"DB check failed: {db_e}"}
+    if existing is not None and (existing.file_size, existing.file_mtime_ns) == tuple(file_stat):
+        logger.info(f"Document unchanged since last ingestion: {relative_path_str}. Skipping.")
+        return {"status": "Skipped", "message": "Document unchanged"}
+
+    try:
+        with ingestion_stage_timings.time("fingerprint"):
+            content_hash = await asyncio.to_thread(file_utils.hash_file, full_path)
+    except OSError as e:
+        logger.error(f"Could not hash {relative_path_str}: {e}")
+        return {"status": "Error", "message": f"File fingerprint failed: {e}"}
+
+    if existing is not None and existing.content_hash == content_hash:
+        # Same content under a new mtime: record it so the next run skips the file on size and mtime alone
+        try:
+            async with _file_connection() as conn:
+                await db_layer.set_document_fingerprint(conn, existing.document_id, file_stat.size, file_stat.mtime_ns, content_hash)
+        except Exception as db_e:
+            logger.error(f"Fingerprint update failed for {relative_path_str}: {db_e}", exc_info=True)
+            return {"status": "Error", "message": f"DB check failed: {db_e}"}
+        logger.info(f"Document content unchanged: {relative_path_str}. Skipping.")
+        return {"status": "Skipped", "message": "Document unchanged"}
+    if existing is not None and existing.content_hash is None:
+        # Ingested before fingerprints were recorded: its stored content cannot be compared, so it
+        # is re-ingested once like a changed file, which records the fingerprint for later runs
+        logger.info(f"Document {relative_path_str} has no recorded fingerprint; re-ingesting it once.")
 
     # 1. Extraction
     try:
-        extracted_data = await extract_content_and_metadata(full_path)
+        with ingestion_stage_timings.time("extraction"):
+            extracted_data = await extract_content_and_metadata(full_path)
         if extracted_data is None:
             return {"status": "Error", "message": "Extraction failed or unsupported format"}
         # extracted_data = { text_by_section: { "Section Title": "Text..." }, metadata: {...}, references_raw: [...] }
@@ -225,87 +780,81 @@ async def _process_single_file(file_path_relative: Path) -> Dict[str, Any]:
         logger.error(f"Extraction failed for {relative_path_str}: {e}", exc_info=True)
         return {"status": "Error", "message": f"Extraction failed: {e}"}
 
-    doc_id = -1 # Initialize doc_id
+    doc_id = existing.document_id if existing is not None else -1 # Initialize doc_id
     # Use a single connection for the transaction
     try:
-        async with db_layer.get_db_connection() as conn:
-            # 2. Database Entry (Initial Document)
+        async with _file_connection() as conn:
+            # 2. Database Entry (Initial Document, or the changed document's new metadata)
             try:
                 doc_metadata = extracted_data.get('metadata', {})
-                doc_id = await db_layer.add_document(conn,
-                                                   doc_metadata.get('title'),
-                                                   doc_metadata.get('author'),
-                                                   doc_metadata.get('year'),
-                                                   relative_path_str,
-                                                   doc_metadata)
-                logger.info(f"Added document record for {relative_path_str} with ID: {doc_id}")
+                with ingestion_stage_timings.time("document_insert"):
+                    if existing is None:
+                        doc_id = await db_layer.add_document(conn,
+                                                           doc_metadata.get('title'),
+                                                           doc_metadata.get('author'),
+                                                           doc_metadata.get('year'),
+                                                           relative_path_str,
+                                                           doc_metadata)
+                        logger.info(f"Added document record for {relative_path_str} with ID: {doc_id}")
+                    else:
+                        await db_layer.update_document(conn, doc_id,
+                                                       doc_metadata.get('title'),
+                                                       doc_metadata.get('author'),
+                                                       doc_metadata.get('year'),
+                                                       doc_metadata)
+                        logger.info(f"Re-ingesting changed document {relative_path_str} (ID: {doc_id})")
+                    await db_layer.set_document_fingerprint(conn, doc_id, file_stat.size, file_stat.mtime_ns, content_hash)
             except Exception as e:
                 logger.error(f"Failed to add document record for {relative_path_str}: {e}", exc_info=True)
                 # No need to rollback here, context manager handles it on exception
                 raise RuntimeError(f"DB document insert failed: {e}") from e # Raise to trigger outer catch
 
-            # 3. Chunking & Embedding Preparation
-            all_chunks_for_embedding: List[Tuple[int, str, int]] = [] # (section_id, chunk_text, chunk_sequence)
-            section_mapping: Dict[int, int] = {} # Map section_sequence to section_id
-
+            # 3. Section Insert
             try:
-                section_sequence = 0
-                for section_title, section_text in extracted_data.get('text_by_section', {}).items():
-                    if not section_text: # Skip empty sections
-                        continue
-                    # Add section to DB
-                    section_id = await db_layer.add_section(conn, doc_id, section_title, doc_metadata.get('structure_level', 0), section_sequence)
-                    section_mapping[section_sequence] = section_id
-
-                    # Chunk the section text
-                    # TDD: Test chunking produces expected chunk sizes and overlap
-                    chunks = text_processing.chunk_text_semantically(section_text, config.TARGET_CHUNK_SIZE)
-
-                    chunk_sequence = 0
-                    for chunk_text in chunks:
-                        if chunk_text: # Ensure chunk is not empty
-                            all_chunks_for_embedding.append((section_id, chunk_text, chunk_sequence))
-                            chunk_sequence += 1
-                    section_sequence += 1
+                # Insert all non-empty sections in one round-trip; section_sequence is the position among them
+                sections = [(title, text) for title, text in extracted_data.get('text_by_section', {}).items() if text]
+                text_hashes = [_section_text_hash(text) for _, text in sections]
+                section_level = doc_metadata.get('structure_level', 0)
+                section_ids: Dict[int, int] = {} # Map section_sequence to section_id
+                reused_sections: Dict[int, int] = {} # Unchanged sections of a re-ingested document
+                if existing is not None:
+                    with ingestion_stage_timings.time("section_insert"):
+                        reused_sections = await _reuse_unchanged_sections(
+                            conn, doc_id, sections, text_hashes, section_level, doc_metadata.get('year')
+                        )
+                new_sequences = [seq for seq in range(len(sections)) if seq not in reused_sections]
+                if new_sequences:
+                    with ingestion_stage_timings.time("section_insert"):
+                        section_ids = await db_layer.add_sections_batch(
+                            conn, doc_id, [(sections[seq][0], section_level, seq) for seq in new_sequences],
+                            text_hashes=[text_hashes[seq] for seq in new_sequences]
+                        )
             except Exception as e:
                 logger.error(f"Chunking or DB section insert failed for doc {doc_id}: {e}", exc_info=True)
                 raise RuntimeError(f"Chunking/Section DB insert failed: {e}") from e
 
-            if not all_chunks_for_embedding:
+            # 4. Chunking -> Embedding (via LiteLLM Proxy) -> Database Indexing, streamed batch by batch
+            logger.info(f"Indexing {len(new_sequences)} sections for doc {doc_id}...")
+            indexed_count, first_chunk_id = await _stream_chunks_to_index(
+                conn, [(section_ids[seq], sections[seq][1]) for seq in new_sequences],
+                document_fields={"doc_id": doc_id, "doc_year": doc_metadata.get('year')}
+            )
+            if existing is not None:
+                # The first section may have been kept, so its first chunk did not come from this run
+                first_chunk_id = await db_layer.get_first_chunk_id(conn, doc_id)
+            elif indexed_count == 0:
                  logger.warning(f"No text chunks generated for document {doc_id} ({relative_path_str}).")
                  # Decide if this is an error or just a warning. For now, treat as success with no chunks.
                  return {"status": "Success", "document_id": doc_id, "message": "Document added but no text chunks generated."}
+            logger.info(f"Successfully indexed {indexed_count} chunks for doc {doc_id}.")
 
-            # 4. Embedding Generation (via LiteLLM Proxy)
-            try:
-                all_embeddings = await get_embeddings_in_batches(all_chunks_for_embedding)
-            except Exception as e:
-                logger.error(f"Embedding generation failed for doc {doc_id}: {e}", exc_info=True)
-                raise RuntimeError(f"Embedding generation failed: {e}") from e
-
-            # 5. Database Indexing (Chunks with Embeddings)
-            chunks_to_index = []
-            if len(all_embeddings) != len(all_chunks_for_embedding):
-                 logger.error(f"Embedding count mismatch before indexing for doc {doc_id}: Expected {len(all_chunks_for_embedding)}, got {len(all_embeddings)}")
-                 raise RuntimeError("Embedding count mismatch before indexing.")
-
-            for i, (section_id, chunk_text, chunk_sequence) in enumerate(all_chunks_for_embedding):
-                chunks_to_index.append((section_id, chunk_text, chunk_sequence, all_embeddings[i]))
-
-            try:
-                logger.info(f"Indexing {len(chunks_to_index)} chunks for doc {doc_id}...")
-                await db_layer.add_chunks_batch(conn, chunks_to_index)
-                logger.info(f"Successfully indexed chunks for doc {doc_id}.")
-            except Exception as e:
-                logger.error(f"Indexing chunks failed for doc {doc_id}: {e}", exc_info=True)
-                raise RuntimeError(f"DB chunk indexing failed: {e}") from e
-
-            # 6. Citation Parsing & Linking (Optional/Basic)
+            # 5. Citation Parsing & Linking (Optional/Basic)
             try:
                 raw_references = extracted_data.get('references_raw')
                 if raw_references:
                     logger.info(f"Parsing {len(raw_references)} raw references for doc {doc_id}...")
-                    parsed_references = await text_processing.parse_references(raw_references)
+                    with ingestion_stage_timings.time("reference_parsing"):
+                        parsed_references = await text_processing.parse_references(raw_references)
                     # TDD: Test reference parsing extracts key fields (author, title, year)
                     # TDD: Test linking references to source chunks (requires chunk IDs or mapping)
 
@@ -314,16 +863,13 @@ async def _process_single_file(file_path_relative: Path) -> Dict[str, Any]:
                     if parsed_references:
                         # Example: Add references linked to the first chunk of the document (very basic)
                         # A better approach would require mapping refs back to text locations
-                        first_chunk_id_query = "SELECT id FROM chunks WHERE section_id IN (SELECT id FROM sections WHERE doc_id = %s) ORDER BY sequence ASC LIMIT 1;"
-                        async with conn.cursor() as cur:
-                            await cur.execute(first_chunk_id_query, (doc_id,))
-                            first_chunk_res = await cur.fetchone()
-                            link_chunk_id = first_chunk_res['id'] if first_chunk_res else None
+                        link_chunk_id = first_chunk_id
 
                         if link_chunk_id:
                             for ref_details in parsed_references:
                                 try:
-                                    await db_layer.add_reference(conn, link_chunk_id, ref_details)
+                                    with ingestion_stage_timings.time("reference_linking"):
+                                        await db_layer.add_reference(conn, link_chunk_id, ref_details)
                                 except Exception as ref_e:
                                      # logger.warning(f"Failed to add parsed reference to DB for doc {doc_id}: {ref_e}", exc_info=True)
                                      # Re-raise to fail the transaction
@@ -336,6 +882,10 @@ async def _process_single_file(file_path_relative: Path) -> Dict[str, Any]:
                 # Re-raise to fail the transaction
                 raise RuntimeError(f"Reference parsing/storing failed: {e}") from e
 
+            # Advance the corpus generation last (it locks a shared row until commit): cached search
+            # results in every process stop being served exactly when this document's chunks commit
+            await db_layer.bump_corpus_generation(conn)
+
             # --- Transaction Commit ---
             # If we reach here without exceptions, the context manager commits implicitly
 
@@ -346,7 +896,14 @@ async def _process_single_file(file_path_relative: Path) -> Dict[str, Any]:
         return {"status": "Error", "message": f"Ingestion transaction failed: {e}"}
 
     # --- Completion ---
+    INGESTION_CHUNKS_TOTAL.inc(indexed_count)
     logger.info(f"Successfully completed ingestion for: {relative_path_str} (Doc ID: {doc_id})")
+    if existing is not None:
+        return {
+            "status": "Success",
+            "document_id": doc_id,
+            "message": f"Document updated: re-indexed {len(new_sequences)} of {len(sections)} sections."
+        }
     return {"status": "Success", "document_id": doc_id}
 
 # Example of how to run this (e.g., from API handler)
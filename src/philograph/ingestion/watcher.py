@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .. import config
+from ..data_access import db_layer
+from ..utils import file_utils
+from .jobs import queue_ingest_job
+from .pipeline import SUPPORTED_EXTENSIONS
+
+try:
+    import watchfiles # Installed with uvicorn[standard]; inotify on Linux
+except ImportError:
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+# Called with a changed file's path relative to the source directory
+SubmitCallback = Callable[[str], Awaitable[object]]
+
+# Session advisory lock held by the one process that watches for an exclusive watcher
+WATCH_LOCK_KEY = 7_068_201
+
+# --- Source Directory Watcher ---
+
+class SourceWatcher:
+    """
+    Watches the source directory and submits new and changed files for ingestion.
+
+    Changes come from filesystem notifications (watchfiles: inotify on Linux) or, where
+    those are unavailable or `force_polling` is set (e.g. network mounts), from rescanning
+    the tree every `poll_seconds` and comparing each file's size and mtime. A file is only
+    submitted once it has been quiet for `debounce_seconds`, so a copy or a burst of saves
+    yields one submission. Quiet files wait in a bounded queue of `queue_size` paths that a
+    single consumer drains through `submit`; while the queue is full, further changes are
+    merged into the pending set instead of piling up.
+
+    An `exclusive` watcher only watches while its process holds the WATCH_LOCK_KEY advisory
+    lock, so with several API worker processes on one database a single one submits each
+    change; the others stand by and take over if the lock holder goes away.
+    """
+
+    def __init__(
+        self,
+        submit: SubmitCallback,
+        root: Optional[Path] = None,
+        debounce_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+        queue_size: Optional[int] = None,
+        force_polling: Optional[bool] = None,
+        exclusive: bool = False
+    ):
+        self.submit = submit
+        self.exclusive = exclusive
+        self.root = Path(root) if root is not None else config.SOURCE_FILE_DIR_ABSOLUTE
+        self.debounce_seconds = max(0.0, debounce_seconds if debounce_seconds is not None else config.SOURCE_WATCH_DEBOUNCE_SECONDS)
+        self.poll_seconds = max(0.1, poll_seconds if poll_seconds is not None else config.SOURCE_WATCH_POLL_SECONDS)
+        self.queue_size = max(1, queue_size if queue_size is not None else config.SOURCE_WATCH_QUEUE_SIZE)
+        self.polling = (force_polling if force_polling is not None else config.SOURCE_WATCH_FORCE_POLLING) or watchfiles is None
+        self._pending: Dict[Path, float] = {} # Path -> monotonic time of its last change
+        self._queued: Set[Path] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        """Starts watching on the running event loop (no-op if already started)."""
+        if self.running:
+            return
+        if not self.root.is_dir():
+            logger.error(f"Cannot watch {self.root}: not a directory.")
+            return
+        if self.exclusive:
+            self._tasks = [asyncio.create_task(self._lead(), name="source-watch-lead")]
+        else:
+            self._tasks = self._start_watching()
+
+    def _start_watching(self) -> List[asyncio.Task]:
+        self._pending.clear()
+        self._queued.clear()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stop_event = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self._watch(), name="source-watch"),
+            asyncio.create_task(self._release_quiet_files(), name="source-watch-debounce"),
+            asyncio.create_task(self._submit_queued(), name="source-watch-submit"),
+        ]
+        mode = f"polling every {self.poll_seconds}s" if self.polling else "filesystem notifications"
+        logger.info(f"Watching {self.root} for new and changed files ({mode}).")
+        return tasks
+
+    async def stop(self) -> None:
+        """Stops watching; changes not yet submitted are dropped (a later ingest of the directory picks them up)."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Stopped watching {self.root}.")
+
+    async def run(self) -> None:
+        """Watches until cancelled (for running the watcher on its own, e.g. from the CLI)."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    # --- Single Watcher Election ---
+
+    async def _lead(self) -> None:
+        """Watches while this process holds WATCH_LOCK_KEY; otherwise retries every poll_seconds."""
+        standing_by = False
+        while True:
+            try:
+                lock_conn = await db_layer.acquire_session_lock(WATCH_LOCK_KEY)
+            except Exception as e:
+                logger.warning(f"Could not take the source watcher lock ({e}); retrying in {self.poll_seconds}s.")
+                lock_conn = None
+            if lock_conn is None:
+                if not standing_by:
+                    logger.info(f"Another process is watching {self.root}; standing by.")
+                    standing_by = True
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            standing_by = False
+            tasks = self._start_watching()
+            holder = asyncio.create_task(self._hold_lock(lock_conn), name="source-watch-lock")
+            try:
+                await asyncio.wait([holder, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in (holder, *tasks):
+                    task.cancel()
+                await asyncio.gather(holder, *tasks, return_exceptions=True)
+                await lock_conn.close()
+            for task in tasks:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+            logger.warning(f"Lost the source watcher lock; stopped watching {self.root}.")
+
+    async def _hold_lock(self, lock_conn: Any) -> None:
+        """Returns once the lock connection (and with it the lock) is lost."""
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await lock_conn.execute("SELECT 1;")
+            except Exception as e:
+                logger.error(f"Source watcher lock connection failed: {e}")
+                return
+
+    # --- Change Detection ---
+
+    def _is_candidate(self, path: Path) -> bool:
+        """Supported file types only; hidden and temporary files (e.g. partial downloads) are ignored."""
+        return path.suffix.lower() in SUPPORTED_EXTENSIONS and not path.name.startswith((".", "~"))
+
+    def _mark_changed(self, path: Path) -> None:
+        if self._is_candidate(path):
+            self._pending[path] = time.monotonic()
+
+    async def _watch(self) -> None:
+        if not self.polling:
+            try:
+                await self._watch_notifications()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Filesystem notifications unavailable for {self.root} ({e}); polling every {self.poll_seconds}s instead.")
+                self.polling = True
+        await self._watch_polling()
+
+    async def _watch_notifications(self) -> None:
+        def watch_filter(change: "watchfiles.Change", path: str) -> bool:
+            return change != watchfiles.Change.deleted and self._is_candidate(Path(path))
+
+        async for changes in watchfiles.awatch(self.root, watch_filter=watch_filter, stop_event=self._stop_event, recursive=True):
+            for _, path in changes:
+                self._mark_changed(Path(path))
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        return {
+            scanned.path: (scanned.size, scanned.mtime_ns)
+            for scanned in file_utils.scan_files(
+                self.root, allowed_extensions=SUPPORTED_EXTENSIONS, recursive=True, workers=config.SOURCE_SCAN_WORKERS
+            )
+        }
+
+    async def _watch_polling(self) -> None:
+        # The first scan is the baseline: files already present are not submitted
+        snapshot = await asyncio.to_thread(self._snapshot)
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            current = await asyncio.to_thread(self._snapshot)
+            for path, stat in current.items():
+                if snapshot.get(path) != stat:
+                    self._mark_changed(path)
+            snapshot = current
+
+    # --- Debounce and Submission ---
+
+    def _quiet_seconds(self) -> float:
+        # A polled file must also be seen unchanged by the next scan before it counts as quiet
+        return self.debounce_seconds + (self.poll_seconds if self.polling else 0.0)
+
+    async def _release_quiet_files(self) -> None:
+        tick = max(0.05, min(self.debounce_seconds / 2, 1.0))
+        while True:
+            await asyncio.sleep(tick)
+            quiet_before = time.monotonic() - self._quiet_seconds()
+            for path in [path for path, changed_at in self._pending.items() if changed_at <= quiet_before]:
+                if self._pending.get(path, float("inf")) > quiet_before:
+                    continue # Changed again while waiting for queue space
+                del self._pending[path]
+                if path in self._queued:
+                    continue # Already waiting; it will be read in its latest state
+                self._queued.add(path)
+                await self._queue.put(path)
+
+    async def _submit_queued(self) -> None:
+        while True:
+            path = await self._queue.get()
+            self._queued.discard(path)
+            if not path.is_file():
+                continue # Removed or renamed since it changed
+            try:
+                relative_path = str(path.relative_to(config.SOURCE_FILE_DIR_ABSOLUTE))
+                await self.submit(relative_path)
+                logger.info(f"Submitted changed file for ingestion: {relative_path}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to submit changed file {path} for ingestion: {e}")
+
+# Shared instance started by the API lifespan when SOURCE_WATCH_ENABLED is set; one API process watches
+source_watcher = SourceWatcher(submit=queue_ingest_job, exclusive=True)
@@ -114,11 +114,39 @@ def handle_ingest_tool(arguments: Dict[str, Any]) -> Dict[str, Any]:
         raise MCPValidationError("Missing required argument: path")
 
     # Call the backend API's /ingest endpoint (using sync helper for simulation)
+    # The API queues a background job; its job_id can be polled with philograph_ingest_status
     response_data = call_backend_api_sync("POST", "/ingest", json_data={"path": path})
 
     # Return the result from the backend API directly
     return response_data
 
+# --- Tool Definition: philograph_ingest_status ---
+@mcp_server.tool(
+    name="philograph_ingest_status",
+    description="Check the progress of an ingest job started by philograph_ingest, including its result once finished.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "job_id": {
+                "type": "integer",
+                "description": "The job_id returned by philograph_ingest."
+            }
+        },
+        "required": ["job_id"]
+    }
+)
+def handle_ingest_status_tool(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Handles the 'philograph_ingest_status' MCP tool call."""
+    logger.info(f"[MCP Tool] Received 'philograph_ingest_status' call with args: {arguments}")
+    job_id = arguments.get("job_id")
+    if not isinstance(job_id, int) or isinstance(job_id, bool):
+        raise MCPValidationError("Missing or invalid required argument: job_id")
+
+    job = call_backend_api_sync("GET", f"/ingest/jobs/{job_id}")
+    if job.get("status") in ("succeeded", "failed"):
+        job["result"] = call_backend_api_sync("GET", f"/ingest/jobs/{job_id}/result")
+    return job
+
 # --- Tool Definition: philograph_search ---
 @mcp_server.tool(
     name="philograph_search",
@@ -130,6 +158,13 @@ def handle_ingest_tool(arguments: Dict[str, Any]) -> Dict[str, Any]:
                 "type": "string",
                 "description": "The natural language search query."
             },
+            "queries": {
+                "type": "array",
+                "description": "Several search queries to run in one batch (instead of 'query'). Filters and limit apply to each; results are returned per query.",
+                "items": {"type": "string"},
+                "minItems": 1,
+                "maxItems": 50
+            },
             "filters": {
                 "type": "object",
                 "description": "Optional metadata filters (e.g., {'author': 'Kant', 'year': 1781, 'doc_id': 123}).",
@@ -147,17 +182,47 @@ def handle_ingest_tool(arguments: Dict[str, Any]) -> Dict[str, Any]:
                 "default": config.SEARCH_TOP_K,
                 "minimum": 1,
                 "maximum": 100
+            },
+            "mode": {
+                "type": "string",
+                "enum": ["vector", "hybrid"],
+                "description": "'hybrid' also matches exact terms via full-text search (e.g. 'Aufhebung').",
+                "default": "vector"
             }
         },
-        "required": ["query"]
+        "anyOf": [{"required": ["query"]}, {"required": ["queries"]}]
     }
 )
 def handle_search_tool(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Handles the 'philograph_search' MCP tool call."""
+    """
+    Handles the 'philograph_search' MCP tool call.
+
+    With 'queries', all searches go to the backend's /search/batch endpoint in one call
+    and a list of {"query", "results"} entries is returned, one per query.
+    """
     logger.info(f"[MCP Tool] Received 'philograph_search' call with args: {arguments}")
     query = arguments.get("query")
+    queries = arguments.get("queries")
     filters = arguments.get("filters", None)
     limit = arguments.get("limit", config.SEARCH_TOP_K)
+    mode = arguments.get("mode")
+
+    if queries:
+        if not isinstance(queries, list) or not all(isinstance(q, str) and q for q in queries):
+            raise MCPValidationError("Argument 'queries' must be a list of non-empty strings")
+        batch = []
+        for q in queries:
+            item = {"query": q, "limit": limit}
+            if filters:
+                item["filters"] = filters
+            if mode:
+                item["mode"] = mode
+            batch.append(item)
+        response_data = call_backend_api_sync("POST", "/search/batch", json_data={"queries": batch})
+        return [
+            {"query": q, "results": query_response.get("results", [])}
+            for q, query_response in zip(queries, response_data.get("results", []))
+        ]
 
     if not query:
         raise MCPValidationError("Missing required argument: query")
@@ -165,6 +230,8 @@ def handle_search_tool(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     payload = {"query": query, "limit": limit}
     if filters:
         payload["filters"] = filters
+    if mode:
+        payload["mode"] = mode
 
     # Call the backend API's /search endpoint
     response_data = call_backend_api_sync("POST", "/search", json_data=payload)
@@ -0,0 +1,88 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = 2
+
+# --- Continuation Tokens ---
+# Vector search pages are keyset-paginated on (distance, chunk_id): a token carries the last
+# row of a page and the next page starts strictly after it, so pages neither overlap nor skip
+# rows when chunks are added between requests, and earlier rows are not returned again.
+# The HNSW index still walks past the earlier rows to reach the position, so a token also
+# carries the number of rows already returned ("depth"); searches size their index scan
+# budget from it, and the chain ends once a page would need more than the budget allows.
+
+class ContinuationPosition(NamedTuple):
+    """Where a continuation token resumes: after (distance, chunk_id), `depth` rows into the ranking."""
+    distance: float
+    chunk_id: int
+    depth: int
+
+def query_key(
+    query_text: str,
+    filters: Optional[Dict[str, Any]],
+    ef_search: Optional[int] = None,
+    exact: bool = False,
+    mode: str = "vector"
+) -> str:
+    """Short hash of everything that determines a search's ordering, binding tokens to their search."""
+    payload = json.dumps(
+        [" ".join(query_text.split()), filters or {}, ef_search, exact, mode], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def encode_continuation_token(distance: float, chunk_id: int, key: str, depth: int = 0) -> str:
+    """Encodes the position after a page's last row, `depth` rows into the ranking, as an opaque URL-safe token."""
+    payload = json.dumps(
+        {"v": TOKEN_VERSION, "k": key, "d": float(distance), "c": int(chunk_id), "n": int(depth)}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_continuation_token(token: str, key: str) -> ContinuationPosition:
+    """
+    Returns the position a token continues from.
+
+    Raises:
+        ValueError: If the token is malformed or was issued for a different search.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("v") != TOKEN_VERSION:
+            raise ValueError("unsupported version")
+        position = ContinuationPosition(float(payload["d"]), int(payload["c"]), int(payload["n"]))
+        if position.depth < 0:
+            raise ValueError("negative depth")
+        token_key = payload["k"]
+    except (ValueError, KeyError, TypeError, AttributeError, binascii.Error, UnicodeError) as e:
+        logger.debug(f"Rejected continuation token {token[:32]!r}: {e}")
+        raise ValueError("Invalid continuation token") from e
+    if token_key != key:
+        raise ValueError("Continuation token does not belong to this search")
+    return position
+
+def next_continuation_token(
+    results: List[Dict[str, Any]],
+    top_k: int,
+    key: str,
+    depth: int = 0,
+    max_depth: Optional[int] = None
+) -> Optional[str]:
+    """
+    Token for the page after `results` (formatted search results, `depth` rows into the
+    ranking), or None if this page was the last. With `max_depth`, the chain also ends
+    when the next page would reach beyond that many rows.
+    """
+    if len(results) < top_k or not results:
+        return None
+    next_depth = depth + len(results)
+    if max_depth is not None and next_depth + top_k > max_depth:
+        logger.info(f"Ending continuation after {next_depth} rows: the next page would exceed the {max_depth}-row pagination depth limit.")
+        return None
+    last = results[-1]
+    return encode_continuation_token(last["distance"], last["chunk_id"], key, next_depth)
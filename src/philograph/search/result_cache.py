@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import config
+from ..utils.cache import LRUCache
+from ..utils.embedding_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# --- Search Result Cache ---
+
+class SearchResultCache:
+    """
+    Caches formatted search results per query fingerprint (query text, filters, top_k, offset, recall settings).
+
+    Keys are scoped to the corpus generation stored in the database (corpus_generation),
+    which every ingest advances in the transaction that commits its chunks (anything
+    deleting documents must do the same). Searches read it before looking up or computing
+    results, so results computed against an older corpus are never served again, whichever
+    process ran the ingest; they simply age out of the LRU. If the generation cannot be
+    read, the cache is bypassed.
+
+    Cached result lists are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self._cache = LRUCache[List[Dict[str, Any]]](max_size, ttl_seconds=ttl_seconds)
+        self.generation: Optional[int] = None # Last generation read, for stats
+
+    @staticmethod
+    def fingerprint(
+        query_text: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        offset: int,
+        ef_search: Optional[int] = None,
+        exact: bool = False,
+        mode: str = "vector",
+        after: Optional[Tuple[float, int]] = None
+    ) -> str:
+        """
+        Builds the cache fingerprint; the query part reuses the embedding cache key (model, dimension, normalized text).
+        Recall settings, a non-default search mode and a keyset position (`after`) are appended only when set,
+        since they can change which rows are returned.
+        """
+        filters_key = json.dumps(filters or {}, sort_keys=True, default=str)
+        fingerprint = f"{make_cache_key(query_text)}|{filters_key}|{top_k}|{offset}"
+        if exact:
+            fingerprint += "|exact"
+        elif ef_search is not None:
+            fingerprint += f"|ef={ef_search}"
+        if mode != "vector":
+            fingerprint += f"|mode={mode}"
+        if after is not None:
+            fingerprint += f"|after={after[0]!r},{after[1]}"
+        return fingerprint
+
+    async def current_generation(self, db: Any) -> Optional[int]:
+        """
+        Reads the corpus generation through `db` (the db_layer, or a stand-in for it).
+        Returns None, bypassing the cache, if caching is disabled or the read fails.
+        """
+        if self._cache.max_size == 0:
+            return None
+        try:
+            async with db.get_db_connection() as conn:
+                self.generation = await db.get_corpus_generation(conn)
+        except Exception as e:
+            logger.warning(f"Could not read the corpus generation; bypassing the search result cache: {e}")
+            return None
+        return self.generation
+
+    def get(self, fingerprint: str, generation: Optional[int]) -> Optional[List[Dict[str, Any]]]:
+        """Returns cached results for the fingerprint at `generation`, or None."""
+        if generation is None:
+            return None
+        return self._cache.get((generation, fingerprint))
+
+    def set(self, fingerprint: str, results: List[Dict[str, Any]], generation: Optional[int]) -> None:
+        """
+        Stores results computed at `generation` (read before the search ran). Results from
+        a search that overlapped an ingest are stored under the old generation and never served.
+        """
+        if generation is not None:
+            self._cache.set((generation, fingerprint), results)
+
+    def clear(self) -> None:
+        """Removes all entries and resets counters (the generation is kept)."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns LRU counters plus the current generation."""
+        return {**self._cache.stats(), "generation": self.generation}
+
+# Shared instance used by the search service
+search_result_cache = SearchResultCache(
+    config.SEARCH_RESULT_CACHE_SIZE,
+    ttl_seconds=config.SEARCH_RESULT_CACHE_TTL_SECONDS or None
+)
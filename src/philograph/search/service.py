@@ -1,16 +1,35 @@
 import logging
 import json
 import psycopg
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx # For potential errors from http_client
+import numpy as np
 
 from .. import config
 from ..data_access import db_layer
 from ..utils import http_client
+from ..utils.cache import LRUCache
+from ..utils.concurrency import SingleFlight
+from ..utils.embedding_cache import embedding_cache, make_cache_key
+from ..utils.embedding_utils import to_embedding_vector
+from ..utils.metrics import SEARCH_REQUESTS_TOTAL
+from ..utils.stage_timings import search_stage_timings
+from .pagination import ContinuationPosition, decode_continuation_token, next_continuation_token, query_key
+from .result_cache import SearchResultCache, search_result_cache
 
 logger = logging.getLogger(__name__)
 
+# "vector": cosine distance only; "hybrid": full-text and vector rankings fused (see db_layer.hybrid_search_chunks)
+SEARCH_MODES = ("vector", "hybrid")
+
+# Query embeddings: a TTL'd LRU in front of the shared embedding cache, with concurrent identical misses coalesced
+query_embedding_cache = LRUCache[np.ndarray](
+    config.QUERY_EMBEDDING_CACHE_SIZE,
+    ttl_seconds=config.QUERY_EMBEDDING_CACHE_TTL_SECONDS or None
+)
+_query_embedding_flights: SingleFlight[np.ndarray] = SingleFlight()
+
 # --- Data Structures ---
 
 class SearchResult:
@@ -32,21 +51,34 @@ class SearchService:
         self,
         query_text: str,
         top_k: int = config.SEARCH_TOP_K,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        offset: int = 0,
+        ef_search: Optional[int] = None,
+        exact: bool = False,
+        mode: str = "vector",
+        continuation_token: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Performs semantic search with optional filtering.
 
+        Results are served from the search result cache when the same
+        (query, filters, top_k, offset) was searched since the last ingest.
+
         Args:
             query_text: The user's search query.
             top_k: The maximum number of results to return.
             filters: Optional dictionary of metadata filters.
+            offset: Number of results to skip (pagination).
+            ef_search: Optional HNSW candidate list size for this query (higher = better recall, slower).
+            exact: If True, bypass the vector index (exact scan, used as a recall reference).
+            mode: "vector" (default) or "hybrid" to fuse full-text and vector rankings.
+            continuation_token: Token from next_page_token for the previous page (vector mode; replaces offset).
 
         Returns:
             A list of formatted search result dictionaries.
 
         Raises:
-            ValueError: If query_text is empty or embedding dimension mismatch occurs.
+            ValueError: If query_text is empty, mode is unknown, the continuation token is invalid or embedding dimension mismatch occurs.
             RuntimeError: If embedding generation or database search fails.
         """
         # TDD: Test search with valid query returns formatted results
@@ -58,13 +90,28 @@ class SearchService:
 
         if not query_text:
             raise ValueError("Query text cannot be empty")
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'; expected one of {', '.join(SEARCH_MODES)}")
+
+        after = _continuation_position(continuation_token, query_text, filters, offset, ef_search, exact, mode)
+
+        logger.info(f"Performing search for query: '{query_text[:100]}...' with filters: {filters}, top_k: {top_k}, offset: {offset}, ef_search: {ef_search}, exact: {exact}, mode: {mode}, after: {after}")
 
-        logger.info(f"Performing search for query: '{query_text[:100]}...' with filters: {filters}, top_k: {top_k}")
+        # Read the generation before searching, so results racing an ingest are not cached as current
+        fingerprint = SearchResultCache.fingerprint(query_text, top_k, filters, offset, ef_search, exact, mode, after)
+        generation = await search_result_cache.current_generation(self.db_layer)
+        cached_results = search_result_cache.get(fingerprint, generation)
+        if cached_results is not None:
+            SEARCH_REQUESTS_TOTAL.inc(cache="hit")
+            logger.debug("Search results served from search result cache.")
+            return cached_results
+        SEARCH_REQUESTS_TOTAL.inc(cache="miss")
 
         # 1. Get Query Embedding
         try:
             # Assuming get_query_embedding remains a standalone helper for now
-            query_embedding = await get_query_embedding(query_text)
+            with search_stage_timings.time("query_embedding"):
+                query_embedding = await get_query_embedding(query_text)
             logger.debug("Successfully generated query embedding.")
         except httpx.RequestError as req_err:
             # More specific handling for connection errors to embedding service
@@ -85,11 +132,18 @@ class SearchService:
         # 2. Perform Database Search
         try:
             # Use self.db_layer now
-            async with self.db_layer.get_db_connection() as conn:
-                # TDD: Test db_layer.vector_search_chunks call with correct parameters
-                db_results: List[db_layer.SearchResult] = await self.db_layer.vector_search_chunks(
-                    conn, query_embedding, top_k, filters
-                )
+            with search_stage_timings.time("db_search"):
+                async with self.db_layer.get_db_connection() as conn:
+                    # TDD: Test db_layer.vector_search_chunks call with correct parameters
+                    if mode == "hybrid":
+                        db_results: List[db_layer.SearchResult] = await self.db_layer.hybrid_search_chunks(
+                            conn, query_text, query_embedding, top_k, filters, offset=offset, ef_search=ef_search, exact=exact
+                        )
+                    else:
+                        keyset = _keyset_arguments(after)
+                        db_results = await self.db_layer.vector_search_chunks(
+                            conn, query_embedding, top_k, filters, offset=offset, ef_search=ef_search, exact=exact, **keyset
+                        )
                 logger.info(f"Retrieved {len(db_results)} results from database.")
         except psycopg.Error as db_e:
             logger.error(f"Database search failed: {db_e}", exc_info=True)
@@ -104,25 +158,103 @@ class SearchService:
 
         # 3. Format Results
         # Assuming format_search_results remains a standalone helper for now
-        formatted_results = format_search_results(db_results)
+        with search_stage_timings.time("formatting"):
+            formatted_results = format_search_results(db_results)
+        search_result_cache.set(fingerprint, formatted_results, generation)
 
         return formatted_results
 # --- Helper: Query Embedding Generation ---
 
-async def get_query_embedding(text: str) -> List[float]:
-    """Generates an embedding for the given query text via LiteLLM Proxy."""
+async def get_query_embedding(text: str) -> np.ndarray:
+    """
+    Generates a float32 embedding for the given query text via LiteLLM Proxy.
+
+    Lookups go to the query embedding LRU (keyed by model, dimension and normalized
+    text, entries expire after QUERY_EMBEDDING_CACHE_TTL_SECONDS), then to the shared
+    embedding cache. Concurrent misses for the same key share one proxy request.
+    """
     # TDD: Test successful embedding generation for a query string
     # TDD: Test handling of HTTP errors from LiteLLM proxy during query embedding
     # TDD: Test handling of errors in LiteLLM response body for query embedding
     if not text:
         raise ValueError("Query text cannot be empty")
 
-    logger.debug(f"Requesting query embedding from LiteLLM: {config.LITELLM_PROXY_URL}")
+    key = make_cache_key(text)
+    cached = query_embedding_cache.get(key)
+    if cached is not None:
+        logger.debug("Query embedding served from query embedding cache.")
+        return cached
+
+    return await _query_embedding_flights.do(key, lambda: _load_query_embedding(text, key))
+
+async def _load_query_embedding(text: str, key: str) -> np.ndarray:
+    """Resolves a query embedding miss from the shared embedding cache or the proxy, filling both caches."""
+    embedding = (await embedding_cache.get_many([text]))[0]
+    if embedding is None:
+        embedding = await _request_query_embedding(text)
+        await embedding_cache.put_many([text], [embedding])
+    else:
+        logger.debug("Query embedding served from embedding cache.")
+    query_embedding_cache.set(key, embedding)
+    return embedding
+
+def get_query_embedding_cache_stats() -> Dict[str, Any]:
+    """Returns query embedding cache counters, including misses coalesced by single-flight."""
+    return {**query_embedding_cache.stats(), "coalesced": _query_embedding_flights.coalesced}
+
+async def get_query_embeddings(texts: List[str]) -> List[np.ndarray]:
+    """
+    Generates float32 embeddings for several query texts, aligned with `texts`.
+
+    Texts are looked up in the query embedding LRU and then the shared embedding
+    cache like get_query_embedding; all remaining misses (deduplicated by cache key)
+    are embedded in a single LiteLLM proxy request.
+    """
+    if not texts or any(not text for text in texts):
+        raise ValueError("Query text cannot be empty")
+
+    keys = [make_cache_key(text) for text in texts]
+    embeddings: Dict[str, np.ndarray] = {}
+    for key in keys:
+        cached = query_embedding_cache.get(key)
+        if cached is not None:
+            embeddings[key] = cached
+
+    # One representative text per missing key
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in embeddings:
+            missing.setdefault(key, text)
+    if missing:
+        missing_keys = list(missing)
+        missing_texts = [missing[key] for key in missing_keys]
+        shared = await embedding_cache.get_many(missing_texts)
+        to_request = [i for i, embedding in enumerate(shared) if embedding is None]
+        if to_request:
+            requested = await _request_query_embeddings([missing_texts[i] for i in to_request])
+            await embedding_cache.put_many([missing_texts[i] for i in to_request], requested)
+            for i, embedding in zip(to_request, requested):
+                shared[i] = embedding
+        for key, embedding in zip(missing_keys, shared):
+            query_embedding_cache.set(key, embedding)
+            embeddings[key] = embedding
+        logger.debug(f"Batch query embeddings: {len(missing)} cache misses, {len(to_request)} requested from proxy.")
+
+    return [embeddings[key] for key in keys]
+
+async def _request_query_embedding(text: str) -> np.ndarray:
+    """Requests a single query embedding from the LiteLLM Proxy (no caching)."""
+    return (await _request_query_embeddings([text]))[0]
+
+async def _request_query_embeddings(texts: List[str]) -> List[np.ndarray]:
+    """Requests query embeddings for `texts` from the LiteLLM Proxy in one request (no caching)."""
+
+    logger.debug(f"Requesting {len(texts)} query embedding(s) from LiteLLM: {config.LITELLM_PROXY_URL}")
     headers = {}
     if config.LITELLM_API_KEY:
         headers["Authorization"] = f"Bearer {config.LITELLM_API_KEY}"
 
-    payload = {"model": config.EMBEDDING_MODEL_NAME, "input": [text]} # Send query as a list with one item
+    payload = {"model": config.EMBEDDING_MODEL_NAME, "input": texts} # Queries are sent as one input list
 
     try:
         response = await http_client.make_async_request(
@@ -130,7 +262,7 @@ async def get_query_embedding(text: str) -> List[float]:
             f"{config.LITELLM_PROXY_URL}/embeddings",
             json_data=payload,
             headers=headers,
-            timeout=30.0 # Reasonable timeout for a single query embedding
+            timeout=30.0 # Reasonable timeout for a small batch of query embeddings
         )
         response.raise_for_status() # Check for HTTP errors
         # Log raw response before attempting to parse JSON
@@ -144,24 +276,27 @@ async def get_query_embedding(text: str) -> List[float]:
             logger.error(f"Failed to decode JSON response from LiteLLM: {json_err}", exc_info=True)
             raise RuntimeError("Embedding generation failed (JSON Decode Error)") from json_err
 
-        if 'data' not in response_data or not isinstance(response_data['data'], list) or len(response_data['data']) != 1 or 'embedding' not in response_data['data'][0]:
+        if 'data' not in response_data or not isinstance(response_data['data'], list) or len(response_data['data']) != len(texts) or not all('embedding' in item for item in response_data['data']):
             logger.error(f"Unexpected response format from LiteLLM embedding endpoint: {response_data}")
             raise ValueError("Invalid response format received from embedding service")
 
-        embedding = response_data['data'][0]['embedding']
+        embeddings = []
+        for item in response_data['data']:
+            embedding = to_embedding_vector(item['embedding'])
 
-        # Truncate embedding if it's longer than the target dimension (Workaround for MRL issue)
-        if len(embedding) > config.TARGET_EMBEDDING_DIMENSION:
-            logger.warning(f"Received embedding with dimension {len(embedding)}, truncating to {config.TARGET_EMBEDDING_DIMENSION}.")
-            embedding = embedding[:config.TARGET_EMBEDDING_DIMENSION]
+            # Truncate embedding if it's longer than the target dimension (Workaround for MRL issue)
+            if len(embedding) > config.TARGET_EMBEDDING_DIMENSION:
+                logger.warning(f"Received embedding with dimension {len(embedding)}, truncating to {config.TARGET_EMBEDDING_DIMENSION}.")
+                embedding = embedding[:config.TARGET_EMBEDDING_DIMENSION].copy()
 
-        # Validate embedding dimension
-        if len(embedding) != config.TARGET_EMBEDDING_DIMENSION:
-            logger.error(f"Query embedding dimension mismatch after potential truncation. Expected {config.TARGET_EMBEDDING_DIMENSION}, got {len(embedding)}.")
-            # Keep the original error message reflecting the received dimension before truncation for clarity
-            raise ValueError(f"Received query embedding with incorrect dimension ({response_data['data'][0]['embedding']})") # Report original length
+            # Validate embedding dimension
+            if len(embedding) != config.TARGET_EMBEDDING_DIMENSION:
+                logger.error(f"Query embedding dimension mismatch after potential truncation. Expected {config.TARGET_EMBEDDING_DIMENSION}, got {len(embedding)}.")
+                # Keep the original error message reflecting the received dimension before truncation for clarity
+                raise ValueError(f"Received query embedding with incorrect dimension ({item['embedding']})") # Report original length
+            embeddings.append(embedding)
 
-        return embedding
+        return embeddings
 
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error fetching query embedding: {e.response.status_code} - {e.response.text}", exc_info=True)
@@ -177,6 +312,55 @@ async def get_query_embedding(text: str) -> List[float]:
         raise RuntimeError("Embedding generation failed (Unexpected Error)") from e
 
 
+# --- Helper: Pagination ---
+
+def _continuation_position(
+    continuation_token: Optional[str],
+    query_text: str,
+    filters: Optional[Dict[str, Any]],
+    offset: int,
+    ef_search: Optional[int],
+    exact: bool,
+    mode: str
+) -> Optional[ContinuationPosition]:
+    """Decodes a continuation token into the keyset position it continues from."""
+    if not continuation_token:
+        return None
+    if mode != "vector":
+        raise ValueError("Continuation tokens are only supported for vector searches")
+    if offset:
+        raise ValueError("offset cannot be combined with a continuation token")
+    return decode_continuation_token(continuation_token, query_key(query_text, filters, ef_search, exact, mode))
+
+def _keyset_arguments(after: Optional[ContinuationPosition]) -> Dict[str, Any]:
+    """Keyword arguments continuing a db_layer vector search from `after` (none for a first page)."""
+    if after is None:
+        return {}
+    return {"after": (after.distance, after.chunk_id), "scan_depth": after.depth}
+
+def next_page_token(
+    results: List[Dict[str, Any]],
+    top_k: int,
+    query_text: str,
+    filters: Optional[Dict[str, Any]] = None,
+    ef_search: Optional[int] = None,
+    exact: bool = False,
+    mode: str = "vector",
+    continuation_token: Optional[str] = None
+) -> Optional[str]:
+    """
+    Returns the continuation token for the page after `results` (a full vector search page),
+    or None. Pass it back as `continuation_token` with the same query, filters and settings.
+    `continuation_token` is the token `results` were fetched with, if any. Tokens stop once
+    the next page would reach past db_layer.max_keyset_depth() rows, the deepest position
+    the index scan budget covers.
+    """
+    if mode != "vector":
+        return None
+    key = query_key(query_text, filters, ef_search, exact, mode)
+    depth = decode_continuation_token(continuation_token, key).depth if continuation_token else 0
+    return next_continuation_token(results, top_k, key, depth, db_layer.max_keyset_depth())
+
 # --- Helper: Result Formatting ---
 
 def format_search_results(db_results: List[db_layer.SearchResult]) -> List[Dict[str, Any]]:
@@ -184,50 +368,66 @@ def format_search_results(db_results: List[db_layer.SearchResult]) -> List[Dict[
     # TDD: Test formatting maps all relevant fields correctly
     # TDD: Test formatting handles missing optional fields (e.g., author, year) gracefully
     # TDD: Test formatting of empty db_results list
-    results_list = []
-    for row in db_results:
-        # Convert Pydantic model back to dict for JSON response if needed,
-        # or define API response models separately. Assuming dict for now.
-        formatted = {
-            "chunk_id": row.chunk_id,
-            "text": row.text_content,
-            "distance": row.distance,
-            "source_document": {
-                "doc_id": row.doc_id,
-                "title": row.doc_title,
-                "author": row.doc_author,
-                "year": row.doc_year,
-                "source_path": row.doc_source_path # Correct attribute name
-            },
-            "location": {
-                "section_id": row.section_id,
-                "section_title": row.section_title,
-                "chunk_sequence_in_section": row.chunk_sequence # Correct attribute name
-            }
+    return [format_search_result(row) for row in db_results]
+
+def format_search_result(row: db_layer.SearchResult) -> Dict[str, Any]:
+    """Formats one database search result into the API response structure."""
+    # Convert Pydantic model back to dict for JSON response if needed,
+    # or define API response models separately. Assuming dict for now.
+    formatted = {
+        "chunk_id": row.chunk_id,
+        "text": row.text_content,
+        "distance": row.distance,
+        "source_document": {
+            "doc_id": row.doc_id,
+            "title": row.doc_title,
+            "author": row.doc_author,
+            "year": row.doc_year,
+            "source_path": row.doc_source_path # Correct attribute name
+        },
+        "location": {
+            "section_id": row.section_id,
+            "section_title": row.section_title,
+            "chunk_sequence_in_section": row.chunk_sequence # Correct attribute name
         }
-        results_list.append(formatted)
-    return results_list
+    }
+    if getattr(row, "score", None) is not None:
+        formatted["score"] = row.score # Hybrid search fusion score
+    return formatted
 
 # --- Main Search Function ---
 
 async def perform_search(
     query_text: str,
     top_k: int = config.SEARCH_TOP_K,
-    filters: Optional[Dict[str, Any]] = None
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    ef_search: Optional[int] = None,
+    exact: bool = False,
+    mode: str = "vector",
+    continuation_token: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Performs semantic search with optional filtering.
 
+    Results are served from the search result cache when the same
+    (query, filters, top_k, offset) was searched since the last ingest.
+
     Args:
         query_text: The user's search query.
         top_k: The maximum number of results to return.
         filters: Optional dictionary of metadata filters.
+        offset: Number of results to skip (pagination).
+        ef_search: Optional HNSW candidate list size for this query (higher = better recall, slower).
+        exact: If True, bypass the vector index (exact scan, used as a recall reference).
+        mode: "vector" (default) or "hybrid" to fuse full-text and vector rankings.
+        continuation_token: Token from next_page_token for the previous page (vector mode; replaces offset).
 
     Returns:
         A list of formatted search result dictionaries.
 
     Raises:
-        ValueError: If query_text is empty or embedding dimension mismatch occurs.
+        ValueError: If query_text is empty, mode is unknown, the continuation token is invalid or embedding dimension mismatch occurs.
         RuntimeError: If embedding generation or database search fails.
     """
     # TDD: Test search with valid query returns formatted results
@@ -239,12 +439,27 @@ async def perform_search(
 
     if not query_text:
         raise ValueError("Query text cannot be empty")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}'; expected one of {', '.join(SEARCH_MODES)}")
+
+    after = _continuation_position(continuation_token, query_text, filters, offset, ef_search, exact, mode)
 
-    logger.info(f"Performing search for query: '{query_text[:100]}...' with filters: {filters}, top_k: {top_k}")
+    logger.info(f"Performing search for query: '{query_text[:100]}...' with filters: {filters}, top_k: {top_k}, offset: {offset}, ef_search: {ef_search}, exact: {exact}, mode: {mode}, after: {after}")
+
+    # Read the generation before searching, so results racing an ingest are not cached as current
+    fingerprint = SearchResultCache.fingerprint(query_text, top_k, filters, offset, ef_search, exact, mode, after)
+    generation = await search_result_cache.current_generation(db_layer)
+    cached_results = search_result_cache.get(fingerprint, generation)
+    if cached_results is not None:
+        SEARCH_REQUESTS_TOTAL.inc(cache="hit")
+        logger.debug("Search results served from search result cache.")
+        return cached_results
+    SEARCH_REQUESTS_TOTAL.inc(cache="miss")
 
     # 1. Get Query Embedding
     try:
-        query_embedding = await get_query_embedding(query_text)
+        with search_stage_timings.time("query_embedding"):
+            query_embedding = await get_query_embedding(query_text)
         logger.debug("Successfully generated query embedding.")
     except (ValueError, RuntimeError) as e:
         # Re-raise specific errors from embedding generation
@@ -256,11 +471,18 @@ async def perform_search(
 
     # 2. Perform Database Search
     try:
-        async with db_layer.get_db_connection() as conn:
-            # TDD: Test db_layer.vector_search_chunks call with correct parameters
-            db_results: List[db_layer.SearchResult] = await db_layer.vector_search_chunks(
-                conn, query_embedding, top_k, filters
-            )
+        with search_stage_timings.time("db_search"):
+            async with db_layer.get_db_connection() as conn:
+                # TDD: Test db_layer.vector_search_chunks call with correct parameters
+                if mode == "hybrid":
+                    db_results: List[db_layer.SearchResult] = await db_layer.hybrid_search_chunks(
+                        conn, query_text, query_embedding, top_k, filters, offset=offset, ef_search=ef_search, exact=exact
+                    )
+                else:
+                    keyset = _keyset_arguments(after)
+                    db_results = await db_layer.vector_search_chunks(
+                        conn, query_embedding, top_k, filters, offset=offset, ef_search=ef_search, exact=exact, **keyset
+                    )
             logger.info(f"Retrieved {len(db_results)} results from database.")
     except psycopg.Error as db_e:
         logger.error(f"Database search failed: {db_e}", exc_info=True)
@@ -270,10 +492,157 @@ async def perform_search(
         raise RuntimeError("Search failed due to unexpected database error") from e
 
     # 3. Format Results
-    formatted_results = format_search_results(db_results)
+    with search_stage_timings.time("formatting"):
+        formatted_results = format_search_results(db_results)
+    search_result_cache.set(fingerprint, formatted_results, generation)
 
     return formatted_results
 
+async def perform_batch_search(queries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Performs several semantic searches, returning formatted results per query.
+
+    Each query is a dict with the perform_search arguments: `query_text` (required),
+    `top_k`, `filters`, `offset`, `ef_search`, `exact` and `mode`. Queries answered by the search result cache are
+    skipped; the rest are embedded in one LiteLLM request and searched on a single
+    pooled connection with the queries pipelined.
+
+    Raises:
+        ValueError: If no queries are given or any query text is empty.
+        RuntimeError: If embedding generation or database search fails.
+    """
+    if not queries:
+        raise ValueError("At least one query is required")
+    if any(not query.get("query_text") for query in queries):
+        raise ValueError("Query text cannot be empty")
+    if any(query.get("mode", "vector") not in SEARCH_MODES for query in queries):
+        raise ValueError(f"Unknown search mode; expected one of {', '.join(SEARCH_MODES)}")
+
+    searches = [
+        (
+            query["query_text"], query.get("top_k", config.SEARCH_TOP_K), query.get("filters"),
+            query.get("offset", 0), query.get("ef_search"), query.get("exact", False), query.get("mode", "vector")
+        )
+        for query in queries
+    ]
+    logger.info(f"Performing batch search for {len(searches)} queries.")
+
+    # Read the generation before searching, so results racing an ingest are not cached as current
+    fingerprints = [SearchResultCache.fingerprint(*search) for search in searches]
+    generation = await search_result_cache.current_generation(db_layer)
+    results: List[Optional[List[Dict[str, Any]]]] = [search_result_cache.get(fp, generation) for fp in fingerprints]
+    pending = [i for i, cached in enumerate(results) if cached is None]
+    SEARCH_REQUESTS_TOTAL.inc(len(searches) - len(pending), cache="hit")
+    SEARCH_REQUESTS_TOTAL.inc(len(pending), cache="miss")
+    logger.debug(f"Batch search: {len(searches) - len(pending)} queries served from search result cache.")
+    if not pending:
+        return results
+
+    # 1. Get Query Embeddings (one proxy request for all uncached queries)
+    try:
+        with search_stage_timings.time("query_embedding"):
+            query_embeddings = await get_query_embeddings([searches[i][0] for i in pending])
+    except (ValueError, RuntimeError) as e:
+        raise e
+    except Exception as e:
+        logger.exception("Unexpected error during batch query embedding generation", exc_info=e)
+        raise RuntimeError("Search failed due to unexpected embedding error") from e
+
+    # 2. Perform Database Searches on one connection
+    try:
+        with search_stage_timings.time("db_search"):
+            async with db_layer.get_db_connection() as conn:
+                db_results_per_query = await db_layer.vector_search_chunks_batch(
+                    conn,
+                    [
+                        # Hybrid searches carry their query text for the lexical ranking
+                        (embedding, *searches[i][1:6]) + ((searches[i][0],) if searches[i][6] == "hybrid" else ())
+                        for i, embedding in zip(pending, query_embeddings)
+                    ]
+                )
+    except psycopg.Error as db_e:
+        logger.error(f"Database batch search failed: {db_e}", exc_info=True)
+        raise RuntimeError(f"Database search failed: {db_e}") from db_e
+    except RuntimeError:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error during database batch search", exc_info=e)
+        raise RuntimeError("Search failed due to unexpected database error") from e
+
+    # 3. Format and cache results
+    for i, db_results in zip(pending, db_results_per_query):
+        with search_stage_timings.time("formatting"):
+            formatted_results = format_search_results(db_results)
+        search_result_cache.set(fingerprints[i], formatted_results, generation)
+        results[i] = formatted_results
+
+    return results
+
+async def open_search_stream(
+    query_text: str,
+    top_k: int = config.SEARCH_TOP_K,
+    filters: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+    ef_search: Optional[int] = None,
+    exact: bool = False,
+    mode: str = "vector",
+    continuation_token: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Starts a streamed search, for result sets too large to build in memory (exports).
+
+    The query is validated and embedded before this returns, so those errors are raised
+    here; the returned iterator then holds a pooled connection and yields formatted
+    results as they are fetched from a server-side cursor. Streamed searches bypass the
+    search result cache. A `continuation_token` from a /search page resumes after that page.
+
+    Raises:
+        ValueError: If query_text is empty, mode is unknown or the continuation token is invalid.
+        RuntimeError: If embedding generation fails (or, while iterating, the database search).
+    """
+    if not query_text:
+        raise ValueError("Query text cannot be empty")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}'; expected one of {', '.join(SEARCH_MODES)}")
+
+    after = _continuation_position(continuation_token, query_text, filters, offset, ef_search, exact, mode)
+
+    logger.info(f"Streaming search for query: '{query_text[:100]}...' with filters: {filters}, top_k: {top_k}, offset: {offset}, mode: {mode}, after: {after}")
+    SEARCH_REQUESTS_TOTAL.inc(cache="bypass")
+    try:
+        with search_stage_timings.time("query_embedding"):
+            query_embedding = await get_query_embedding(query_text)
+    except (ValueError, RuntimeError) as e:
+        raise e
+    except Exception as e:
+        logger.exception("Unexpected error during query embedding generation", exc_info=e)
+        raise RuntimeError("Search failed due to unexpected embedding error") from e
+
+    lexical_query = query_text if mode == "hybrid" else None
+    return _stream_formatted_results(query_embedding, top_k, filters, offset, ef_search, exact, lexical_query, after)
+
+async def _stream_formatted_results(
+    query_embedding: np.ndarray,
+    top_k: int,
+    filters: Optional[Dict[str, Any]],
+    offset: int,
+    ef_search: Optional[int],
+    exact: bool,
+    lexical_query: Optional[str],
+    after: Optional[ContinuationPosition] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yields formatted results of db_layer.stream_search_chunks, holding one connection for the stream."""
+    try:
+        async with db_layer.get_db_connection() as conn:
+            async for row in db_layer.stream_search_chunks(
+                conn, query_embedding, top_k, filters, offset=offset, ef_search=ef_search, exact=exact,
+                lexical_query=lexical_query, **_keyset_arguments(after)
+            ):
+                yield format_search_result(row)
+    except psycopg.Error as db_e:
+        logger.error(f"Streamed database search failed: {db_e}", exc_info=True)
+        raise RuntimeError(f"Database search failed: {db_e}") from db_e
+
 # Example Usage (called from API layer)
 # async def main_search():
 #     query = "What is the nature of Geist?"
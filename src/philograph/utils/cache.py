@@ -0,0 +1,87 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+# --- In-Process LRU Cache ---
+
+class LRUCache(Generic[V]):
+    """
+    A size-bounded least-recently-used cache with hit/miss counters.
+
+    Entries optionally expire `ttl_seconds` after they were set; expired entries
+    are dropped lazily on lookup and count as misses.
+
+    Not thread-safe; intended for use from a single event loop.
+    A max_size of 0 disables caching (every lookup is a miss).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if max_size < 0:
+            raise ValueError("max_size cannot be negative")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive (or None for no expiry)")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[V, Optional[float]]]" = OrderedDict() # key -> (value, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and not self._is_expired(entry)
+
+    def _is_expired(self, entry: Tuple[V, Optional[float]]) -> bool:
+        expires_at = entry[1]
+        return expires_at is not None and self._clock() >= expires_at
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Returns the cached value (marking it most recently used) or None."""
+        entry = self._data.get(key)
+        if entry is not None:
+            if not self._is_expired(entry):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._data[key]
+            self.expired += 1
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Stores a value, evicting the least recently used entries beyond max_size."""
+        if self.max_size == 0:
+            return
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries and resets the counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
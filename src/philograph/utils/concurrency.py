@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Awaitable, Callable, Deque, Dict, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# --- Adaptive Concurrency Limiter ---
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds the number of in-flight operations, adapting the bound AIMD-style.
+
+    The limit starts at `max_limit`. An overload signal (e.g. HTTP 429 or a
+    timeout) halves it, down to `min_limit`; after a full window of successes
+    at the current limit it grows back by one, up to `max_limit`. Signals from
+    operations dispatched before the last decrease belong to the same overload
+    burst and are ignored, so concurrent failures halve the limit only once.
+
+    Waiters are plain futures created on the running loop, so a module-level
+    instance can be shared safely across event loops (e.g. between tests).
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        if max_limit < 1:
+            raise ValueError("max_limit must be at least 1")
+        self.max_limit = max_limit
+        self.min_limit = max(1, min(min_limit, max_limit))
+        self.limit = max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._dispatched = 0 # Slots taken so far; numbers each operation
+        self._decreased_at = 0 # Value of _dispatched at the last decrease
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> int:
+        """Waits until a slot is free under the current limit, then takes it; returns the operation's dispatch number."""
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken but cancelled before resuming: pass the wakeup on so the free slot is not lost
+                    self._waiters.remove(waiter)
+                    self._wake_waiters()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+        self._dispatched += 1
+        return self._dispatched
+
+    def release(self) -> None:
+        """Frees a slot and wakes waiters that can now proceed."""
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncGenerator[int, None]:
+        """Context manager holding one slot for the duration of the block; yields the dispatch number."""
+        dispatched = await self.acquire()
+        try:
+            yield dispatched
+        finally:
+            self.release()
+
+    def record_success(self) -> None:
+        """Additive increase: grow the limit after a window of successes."""
+        if self.limit >= self.max_limit:
+            return
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._successes = 0
+            self.limit += 1
+            logger.debug(f"Concurrency limit increased to {self.limit}")
+            self._wake_waiters()
+
+    def record_overload(self, dispatched: Optional[int] = None) -> None:
+        """
+        Multiplicative decrease: halve the limit on an overload signal.
+
+        `dispatched` is the failing operation's number from acquire()/slot(); if it was
+        dispatched before the last decrease, the signal is ignored. Without it the limit
+        is always halved.
+        """
+        if dispatched is not None and dispatched <= self._decreased_at:
+            return
+        self._successes = 0
+        self._decreased_at = self._dispatched
+        new_limit = max(self.min_limit, self.limit // 2)
+        if new_limit != self.limit:
+            logger.warning(f"Overload detected, reducing concurrency limit from {self.limit} to {new_limit}")
+            self.limit = new_limit
+
+    def _wake_waiters(self) -> None:
+        free_slots = self.limit - self._in_flight
+        for waiter in list(self._waiters):
+            if free_slots <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
+
+# --- Single-Flight Deduplication ---
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight await the same result (or exception) instead of repeating the work.
+    If the leading caller is cancelled, its followers are not: one of them runs the
+    function again as the new leader. Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Runs func() for key, or joins the call already in flight for it."""
+        while (future := self._in_flight.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                # Shield so a cancelled follower does not cancel the leader's shared future
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise # This follower was cancelled itself
+                # The leader was cancelled: retry, electing a new leader if none has taken over yet
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() # Mark retrieved so an unawaited failure is not logged as never retrieved
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
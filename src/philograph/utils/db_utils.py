@@ -1,11 +1,35 @@
 import json
-from typing import List, Optional, Dict, Any
+import struct
+from typing import List, Optional, Dict, Any, Sequence
+
+import numpy as np
 
 def format_vector_for_pgvector(vector: List[float]) -> str:
     """Formats a list of floats into the string representation required by pgvector."""
     # Convert list to string format like '[1.0,2.0,3.0]'
     return '[' + ','.join(map(str, vector)) + ']'
 
+def encode_vector_binary(vector: Sequence[float]) -> bytes:
+    """
+    Encodes floats in pgvector's binary wire format (as used by COPY ... FORMAT BINARY):
+    int16 dimension, int16 unused (0), then the values as big-endian float4.
+    """
+    values = np.asarray(vector, dtype='>f4') # No copy beyond a byte swap for float32 input
+    return struct.pack('>HH', len(values), 0) + values.tobytes()
+
+def normalize_author_key(author: Optional[str]) -> Optional[str]:
+    """
+    Normalizes an author name for the documents.author_key filter column:
+    whitespace collapsed and lower-cased. Must match AUTHOR_KEY_SQL.
+    """
+    if not author:
+        return None
+    key = " ".join(author.split()).lower()
+    return key or None
+
+# SQL equivalent of normalize_author_key, applied to an author column expression
+AUTHOR_KEY_SQL = "nullif(lower(regexp_replace(btrim({column}), '\\s+', ' ', 'g')), '')"
+
 def json_serialize(data: Optional[Dict[str, Any]]) -> Optional[str]:
     """Serializes a dictionary to a JSON string, returning None if input is None."""
     if data is None:
@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .. import config
+from ..data_access import db_layer
+from .cache import LRUCache
+from .concurrency import AdaptiveConcurrencyLimiter
+from .embedding_utils import to_embedding_vector
+
+logger = logging.getLogger(__name__)
+
+# --- Cache Keys ---
+
+def normalize_text(text: str) -> str:
+    """Normalizes text for cache keying: Unicode NFC, collapsed whitespace, stripped."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+def make_cache_key(text: str, model: Optional[str] = None, dimension: Optional[int] = None) -> str:
+    """
+    Builds a content-addressed cache key from (model, dimension, normalized text).
+    Defaults to the configured EMBEDDING_MODEL_NAME and TARGET_EMBEDDING_DIMENSION.
+    """
+    model = model if model is not None else config.EMBEDDING_MODEL_NAME
+    dimension = dimension if dimension is not None else config.TARGET_EMBEDDING_DIMENSION
+    text_hash = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return f"{model}:{dimension}:{text_hash}"
+
+# --- Two-Tier Embedding Cache ---
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache placed in front of the LiteLLM proxy.
+
+    Lookups go to a size-bounded in-process LRU tier first, then (if `persist`
+    is enabled) to the durable `embedding_cache` table in Postgres. Durable hits
+    are promoted into the LRU tier. The durable tier is best-effort: if the
+    database is unavailable, lookups fall through as misses and are logged.
+    At most `db_connections` pool connections are used by the durable tier at
+    once, however many files or searches are embedding concurrently.
+    """
+
+    def __init__(self, max_size: int, persist: bool = True, db_connections: Optional[int] = None):
+        self.memory = LRUCache[np.ndarray](max_size)
+        self.persist = persist
+        self.db_connections = max(1, db_connections if db_connections is not None else config.EMBEDDING_CACHE_DB_CONNECTIONS)
+        # A fixed limit (min == max), so it never adapts
+        self._db_slots = AdaptiveConcurrencyLimiter(self.db_connections, min_limit=self.db_connections)
+        self.lookups = 0
+        self.memory_hits = 0
+        self.durable_hits = 0
+
+    async def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Returns cached float32 embeddings aligned with `texts`; None marks a miss."""
+        keys = [make_cache_key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [self.memory.get(key) for key in keys]
+        self.lookups += len(keys)
+        self.memory_hits += sum(1 for emb in results if emb is not None)
+
+        missing_keys = list({keys[i] for i, emb in enumerate(results) if emb is None})
+        if missing_keys and self.persist:
+            durable = await self._get_durable(missing_keys)
+            if durable:
+                for key, embedding in durable.items():
+                    self.memory.set(key, embedding)
+                for i, key in enumerate(keys):
+                    if results[i] is None and key in durable:
+                        results[i] = durable[key]
+                        self.durable_hits += 1
+        return results
+
+    async def put_many(self, texts: List[str], embeddings: Sequence[Any]) -> None:
+        """Stores embeddings (rows of a float32 matrix, or lists) for `texts` in both tiers."""
+        entries = []
+        seen = set()
+        for text, embedding in zip(texts, embeddings):
+            key = make_cache_key(text)
+            # Own copy, so a cached row does not keep its whole batch matrix alive
+            embedding = np.array(to_embedding_vector(embedding))
+            self.memory.set(key, embedding)
+            if key not in seen:
+                seen.add(key)
+                entries.append((key, config.EMBEDDING_MODEL_NAME, config.TARGET_EMBEDDING_DIMENSION, embedding))
+        if entries and self.persist:
+            await self._put_durable(entries)
+
+    def clear(self) -> None:
+        """Clears the in-process tier and resets counters (the durable tier is left intact)."""
+        self.memory.clear()
+        self.lookups = 0
+        self.memory_hits = 0
+        self.durable_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns lookup counters and the combined hit rate across both tiers."""
+        hits = self.memory_hits + self.durable_hits
+        return {
+            "lookups": self.lookups,
+            "memory_hits": self.memory_hits,
+            "durable_hits": self.durable_hits,
+            "misses": self.lookups - hits,
+            "hit_rate": (hits / self.lookups) if self.lookups else 0.0,
+            "memory_size": len(self.memory),
+        }
+
+    async def _get_durable(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        try:
+            async with self._db_slots.slot(), db_layer.get_db_connection() as conn:
+                return await db_layer.get_cached_embeddings(conn, keys)
+        except Exception as e:
+            logger.warning(f"Durable embedding cache lookup failed, treating as misses: {e}")
+            return {}
+
+    async def _put_durable(self, entries) -> None:
+        try:
+            async with self._db_slots.slot(), db_layer.get_db_connection() as conn:
+                await db_layer.add_cached_embeddings(conn, entries)
+        except Exception as e:
+            logger.warning(f"Failed to persist {len(entries)} embeddings to the durable cache: {e}")
+
+# Shared instance used by ingestion and search
+embedding_cache = EmbeddingCache(config.EMBEDDING_CACHE_SIZE, persist=config.EMBEDDING_CACHE_PERSIST)
@@ -0,0 +1,40 @@
+import logging
+from typing import Any, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Embeddings are carried as float32 (4 bytes per value) matrices/rows end to end
+EMBEDDING_DTYPE = np.float32
+
+# --- Embedding Arrays ---
+
+def to_embedding_matrix(vectors: Sequence[Any]) -> np.ndarray:
+    """
+    Converts a batch of embedding vectors (e.g. parsed JSON lists) into a contiguous
+    float32 matrix of shape (n, dimension).
+
+    Raises:
+        ValueError: If the vectors are ragged, non-numeric, or not one-dimensional.
+    """
+    if len(vectors) == 0:
+        return np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+    try:
+        matrix = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Embeddings are not a rectangular numeric batch: {e}") from e
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D batch of embeddings, got shape {matrix.shape}")
+    return np.ascontiguousarray(matrix)
+
+def to_embedding_vector(vector: Any) -> np.ndarray:
+    """Converts a single embedding into a one-dimensional float32 array."""
+    array = np.asarray(vector, dtype=EMBEDDING_DTYPE)
+    if array.ndim != 1:
+        raise ValueError(f"Expected a 1-D embedding, got shape {array.shape}")
+    return array
+
+def empty_embedding_matrix(dimension: int) -> np.ndarray:
+    """Returns an empty (0, dimension) float32 matrix."""
+    return np.empty((0, dimension), dtype=EMBEDDING_DTYPE)
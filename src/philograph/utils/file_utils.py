@@ -1,7 +1,9 @@
 import os
+import hashlib
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Optional, Generator
+from typing import List, NamedTuple, Optional, Generator, Set, Tuple
 from typing import List, Generator
 
 logger = logging.getLogger(__name__)
@@ -22,45 +24,120 @@ def join_paths(*args: str | Path) -> Path:
     """Joins multiple path components."""
     return Path(os.path.join(*args))
 
-def list_files_in_directory(
+class FileStat(NamedTuple):
+    size: int
+    mtime_ns: int
+
+def get_file_stat(file_path: str | Path) -> FileStat:
+    """Returns the file's size and modification time (the cheap part of its fingerprint)."""
+    stat_result = os.stat(file_path)
+    return FileStat(size=stat_result.st_size, mtime_ns=stat_result.st_mtime_ns)
+
+def hash_file(file_path: str | Path, block_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 hex digest of the file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ScannedFile(NamedTuple):
+    path: Path
+    size: int
+    mtime_ns: int
+
+def _scan_directory(
+    dir_path: str,
+    allowed_extensions: Optional[List[str]],
+    recursive: bool
+) -> Tuple[List[ScannedFile], List[str]]:
+    """Reads one directory with os.scandir. Returns its matching files (with their stat) and its subdirectories."""
+    files: List[ScannedFile] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    # Like Path.rglob, do not descend into symlinked directories (avoids cycles)
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        if allowed_extensions and os.path.splitext(entry.name)[1].lower() not in allowed_extensions:
+                            continue
+                        stat_result = entry.stat()
+                        files.append(ScannedFile(Path(entry.path), stat_result.st_size, stat_result.st_mtime_ns))
+                except OSError as e:
+                    logger.warning(f"Skipping unreadable entry {entry.path}: {e}")
+    except OSError as e:
+        logger.warning(f"Could not scan directory {dir_path}: {e}")
+    files.sort()
+    subdirs.sort()
+    return files, subdirs
+
+def scan_files(
     dir_path: str | Path,
     allowed_extensions: Optional[List[str]] = None,
-    recursive: bool = False
-) -> Generator[Path, None, None]:
+    recursive: bool = False,
+    workers: int = 8
+) -> Generator[ScannedFile, None, None]:
     """
-    Lists files in a directory, optionally filtering by extension and recursing.
+    Lists files in a directory with their size and mtime, optionally filtering by extension and recursing.
+
+    Directories are read with os.scandir by a pool of `workers` threads, so on network-mounted
+    sources the latency of many directory reads overlaps. Files are yielded as each directory
+    is read (sorted within a directory; directories in completion order), with the stat taken
+    during the scan so callers need not stat them again.
 
     Args:
         dir_path: The directory path to scan.
         allowed_extensions: A list of lowercase extensions (including dot, e.g., ['.pdf', '.txt'])
                             to include. If None, all files are included.
         recursive: If True, scan subdirectories recursively.
+        workers: Directories read concurrently.
 
     Yields:
-        Path objects for matching files.
+        ScannedFile(path, size, mtime_ns) for matching files.
     """
     base_path = Path(dir_path)
     if not base_path.is_dir():
         logger.warning(f"Directory not found or not a directory: {dir_path}")
         return
 
-    logger.info(f"Scanning directory: {base_path} (Recursive: {recursive}, Extensions: {allowed_extensions})")
-
-    if recursive:
-        file_iterator = base_path.rglob('*') # Recursive glob
-    else:
-        file_iterator = base_path.glob('*') # Non-recursive glob
-
-    for item in file_iterator:
-        if item.is_file():
-            if allowed_extensions:
-                if item.suffix.lower() in allowed_extensions:
-                    yield item
-            else:
-                yield item
-        elif item.is_dir() and not recursive:
-             # Skip directories if not recursive, rglob handles recursion internally
-             pass
+    logger.info(f"Scanning directory: {base_path} (Recursive: {recursive}, Extensions: {allowed_extensions}, Workers: {workers})")
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="source-scan") as executor:
+        pending: Set[Future] = {executor.submit(_scan_directory, str(base_path), allowed_extensions, recursive)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    pending.update(executor.submit(_scan_directory, subdir, allowed_extensions, recursive) for subdir in subdirs)
+                    yield from files
+        finally:
+            # The consumer may stop early; drop directories not yet read
+            for future in pending:
+                future.cancel()
+
+def list_files_in_directory(
+    dir_path: str | Path,
+    allowed_extensions: Optional[List[str]] = None,
+    recursive: bool = False
+) -> Generator[Path, None, None]:
+    """
+    Lists files in a directory, optionally filtering by extension and recursing.
+
+    Args:
+        dir_path: The directory path to scan.
+        allowed_extensions: A list of lowercase extensions (including dot, e.g., ['.pdf', '.txt'])
+                            to include. If None, all files are included.
+        recursive: If True, scan subdirectories recursively.
+
+    Yields:
+        Path objects for matching files (see scan_files for their size and mtime).
+    """
+    for scanned in scan_files(dir_path, allowed_extensions=allowed_extensions, recursive=recursive):
+        yield scanned.path
 
 # Example Usage:
 # if __name__ == "__main__":
@@ -0,0 +1,186 @@
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) spanning a cached search (~1ms) to a slow GROBID/LiteLLM call (minutes)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Metric Types ---
+
+def _label_key(label_names: Sequence[str], labels: Dict[str, str]) -> Tuple[str, ...]:
+    if set(labels) != set(label_names):
+        raise ValueError(f"Expected labels {sorted(label_names)}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in label_names)
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """Monotonic counter, optionally partitioned by labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.label_names, labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(list(zip(self.label_names, key)))} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (seconds), optionally partitioned by labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # label key -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            bucket_counts, total, count = self._series.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    bucket_counts[i] += 1
+                    break
+            self._series[key] = (bucket_counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(_label_key(self.label_names, labels))
+            return series[2] if series else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                label_pairs = list(zip(self.label_names, key))
+                cumulative = 0
+                for upper_bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    le = _format_labels(label_pairs + [("le", _format_value(upper_bound))])
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(label_pairs)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(label_pairs)} {count}")
+        return lines
+
+# --- Registry ---
+
+class MetricsRegistry:
+    """Holds the process's metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clears all recorded values (the metric definitions stay registered). Intended for tests."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+# Shared registry exposed on the API's /metrics endpoint
+metrics_registry = MetricsRegistry()
+
+# --- Application Metrics ---
+
+# Stages timed by the ingestion pipeline (see stage_timings.ingestion_stage_timings), in pipeline order
+INGESTION_STAGES = (
+    "fingerprint", "extraction", "document_insert", "section_insert", "chunking",
+    "embedding", "chunk_indexing", "reference_parsing", "reference_linking",
+)
+
+INGESTION_STAGE_SECONDS = metrics_registry.histogram(
+    "philograph_ingestion_stage_seconds",
+    f"Time spent in each ingestion stage ({', '.join(INGESTION_STAGES)}).",
+    ["stage"]
+)
+INGESTION_DOCUMENTS_TOTAL = metrics_registry.counter(
+    "philograph_ingestion_documents_total",
+    "Files processed by the ingestion pipeline, by result status.",
+    ["status"]
+)
+INGESTION_CHUNKS_TOTAL = metrics_registry.counter(
+    "philograph_ingestion_chunks_total",
+    "Chunks embedded and indexed by the ingestion pipeline."
+)
+EMBEDDING_REQUESTS_TOTAL = metrics_registry.counter(
+    "philograph_embedding_requests_total",
+    "Ingestion embedding batch requests to the LiteLLM proxy, by outcome (success, retried, error).",
+    ["outcome"]
+)
+SEARCH_STAGE_SECONDS = metrics_registry.histogram(
+    "philograph_search_stage_seconds",
+    "Time spent in each search stage (query_embedding, db_search, formatting).",
+    ["stage"]
+)
+SEARCH_REQUESTS_TOTAL = metrics_registry.counter(
+    "philograph_search_requests_total",
+    "Search queries handled, by whether the search result cache answered them (hit, miss; bypass for streamed searches).",
+    ["cache"]
+)
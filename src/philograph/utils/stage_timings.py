@@ -0,0 +1,58 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .metrics import INGESTION_STAGE_SECONDS, SEARCH_STAGE_SECONDS, Histogram
+
+logger = logging.getLogger(__name__)
+
+# --- Stage Timings ---
+
+class StageTimings:
+    """
+    Accumulates busy time and call counts per named pipeline stage.
+
+    Stages may overlap (e.g. embedding batches run concurrently with chunk writes),
+    so per-stage totals are busy seconds and can add up to more than wall time.
+    Recording is cheap enough to stay enabled in production code paths. If a
+    `histogram` (labelled by "stage") is given, every recording is also observed
+    there for the /metrics endpoint.
+    """
+
+    def __init__(self, histogram: Optional[Histogram] = None):
+        self.histogram = histogram
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._seconds[stage] = self._seconds.get(stage, 0.0) + seconds
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+        if self.histogram is not None:
+            self.histogram.observe(seconds, stage=stage)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Times the enclosed block (including when it raises) under `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Returns {stage: {"seconds": total, "count": calls}}."""
+        with self._lock:
+            return {stage: {"seconds": self._seconds[stage], "count": self._counts[stage]} for stage in self._seconds}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seconds.clear()
+            self._counts.clear()
+
+# Shared instances recorded by the ingestion pipeline and the search service
+ingestion_stage_timings = StageTimings(histogram=INGESTION_STAGE_SECONDS)
+search_stage_timings = StageTimings(histogram=SEARCH_STAGE_SECONDS)
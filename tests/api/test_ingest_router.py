@@ -1,24 +1,42 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 from httpx import AsyncClient
 from fastapi import status
 
+from src.philograph.data_access.models import IngestJob
+
 # Assuming test_client fixture is available (e.g., in conftest.py)
 
+@pytest.fixture
+def mock_db_connection():
+    """Patches the router's db_layer connection context manager with a dummy connection."""
+    with patch("src.philograph.api.routers.ingest.db_layer.get_db_connection") as mock_get_conn:
+        mock_get_conn.return_value.__aenter__.return_value = MagicMock()
+        yield mock_get_conn
+
+def _job(status_value="running", result=None, error=None):
+    created = datetime(2026, 1, 1, 12, 0, 0)
+    return IngestJob(
+        id=7, path="valid/directory", status=status_value, attempts=1,
+        progress={"files_done": 2, "succeeded": 1, "skipped": 1, "errors": 0},
+        result=result, error=error, created_at=created, started_at=created,
+        finished_at=created if status_value in ("succeeded", "failed") else None
+    )
+
 # --- Test Ingest Router ---
 
 @pytest.mark.asyncio
-# Adjust patch path to the new location of process_document if it was moved,
-# or keep patching where it's called from (e.g., the router file)
-@patch("src.philograph.api.routers.ingest.ingestion_pipeline.process_document", new_callable=AsyncMock)
-async def test_ingest_single_file_success(mock_process_document: AsyncMock, test_client: AsyncClient):
+@patch("src.philograph.api.routers.ingest.queue_ingest_job", new_callable=AsyncMock)
+@patch("src.philograph.api.routers.ingest.ingestion_pipeline.resolve_source_path")
+async def test_ingest_queues_job(mock_resolve, mock_add_job, test_client: AsyncClient):
     """
-    Test POST /ingest with a single file path returns 202 Accepted on success.
-    Mocks the ingestion pipeline.
+    Test POST /ingest queues a background job and returns 202 Accepted with its ID immediately.
     """
     # Arrange
-    mock_result = {"status": "Success", "message": "Ingested file.pdf", "document_id": 123}
-    mock_process_document.return_value = mock_result
+    mock_resolve.return_value = Path("/source/valid/file.pdf")
+    mock_add_job.return_value = 7
     request_payload = {"path": "valid/file.pdf"}
 
     # Act
@@ -26,129 +44,150 @@ async def test_ingest_single_file_success(mock_process_document: AsyncMock, test
 
     # Assert
     assert response.status_code == status.HTTP_202_ACCEPTED
-    expected_response = {
-        "message": "Ingested file.pdf",
-        "document_id": 123,
-        "status": "Success",
-        "details": None
+    assert response.json() == {
+        "message": "Ingestion of 'valid/file.pdf' queued as job 7.",
+        "document_id": None,
+        "status": "Queued",
+        "details": None,
+        "job_id": 7
     }
-    # The router returns the model directly, check its JSON representation
-    assert response.json() == expected_response
-    mock_process_document.assert_awaited_once_with("valid/file.pdf")
-
+    mock_resolve.assert_called_once_with("valid/file.pdf")
+    mock_add_job.assert_awaited_once_with("valid/file.pdf") # Queues the job and wakes the job runner
 
 @pytest.mark.asyncio
-@patch("src.philograph.api.routers.ingest.ingestion_pipeline.process_document", new_callable=AsyncMock)
-async def test_ingest_single_file_skipped(mock_process_document: AsyncMock, test_client: AsyncClient):
+@patch("src.philograph.api.routers.ingest.queue_ingest_job", new_callable=AsyncMock)
+@patch("src.philograph.api.routers.ingest.ingestion_pipeline.resolve_source_path")
+async def test_ingest_source_not_found(mock_resolve, mock_add_job, test_client: AsyncClient):
     """
-    Test POST /ingest with a single file path returns 202 Accepted when skipped.
-    Mocks the ingestion pipeline returning a 'Skipped' status.
+    Test POST /ingest returns 404 without queueing a job when the path does not exist.
     """
-    # Arrange
-    mock_result = {"status": "Skipped", "message": "Document already exists"}
-    mock_process_document.return_value = mock_result
-    request_payload = {"path": "existing/file.pdf"}
+    mock_resolve.side_effect = FileNotFoundError("missing.pdf")
 
-    # Act
-    response = await test_client.post("/ingest", json=request_payload)
+    response = await test_client.post("/ingest", json={"path": "missing.pdf"})
 
-    # Assert
-    assert response.status_code == status.HTTP_202_ACCEPTED
-    expected_response = {
-        "message": "Document already exists",
-        "document_id": None, # No document_id when skipped
-        "status": "Skipped",
-        "details": None
-    }
-    assert response.json() == expected_response
-    mock_process_document.assert_awaited_once_with("existing/file.pdf")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Ingestion source file not found"}
+    mock_add_job.assert_not_awaited()
 
 @pytest.mark.asyncio
-@patch("src.philograph.api.routers.ingest.ingestion_pipeline.process_document", new_callable=AsyncMock)
-async def test_ingest_directory_success(mock_process_document: AsyncMock, test_client: AsyncClient):
+@patch("src.philograph.api.routers.ingest.queue_ingest_job", new_callable=AsyncMock)
+@patch("src.philograph.api.routers.ingest.ingestion_pipeline.resolve_source_path")
+async def test_ingest_invalid_path(mock_resolve, mock_add_job, test_client: AsyncClient):
     """
-    Test POST /ingest with a directory path returns 202 Accepted on success.
-    Mocks the ingestion pipeline returning a 'Directory Processed' status.
+    Test POST /ingest returns 400 Bad Request when the path escapes the source directory.
     """
-    # Arrange
-    mock_result = {
-        "status": "Directory Processed",
-        "message": "Processed 2 files in directory.",
-        "details": [
-            {"path": "dir/file1.pdf", "status": "Success", "document_id": 1},
-            {"path": "dir/file2.txt", "status": "Skipped"}
-        ]
-    }
-    mock_process_document.return_value = mock_result
-    request_payload = {"path": "valid/directory"}
+    error_message = "Path is outside the allowed source directory"
+    mock_resolve.side_effect = ValueError(error_message)
 
-    # Act
-    response = await test_client.post("/ingest", json=request_payload)
+    response = await test_client.post("/ingest", json={"path": "../etc/passwd"})
 
-    # Assert
-    assert response.status_code == status.HTTP_202_ACCEPTED
-    expected_response = {
-        "message": "Processed 2 files in directory.",
-        "document_id": None, # No single document_id for directory
-        "status": "Directory Processed",
-        "details": [
-            {"path": "dir/file1.pdf", "status": "Success", "document_id": 1},
-            {"path": "dir/file2.txt", "status": "Skipped"}
-        ]
-    }
-    assert response.json() == expected_response
-    mock_process_document.assert_awaited_once_with("valid/directory")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": error_message}
+    mock_add_job.assert_not_awaited()
 
 @pytest.mark.asyncio
-@patch("src.philograph.api.routers.ingest.ingestion_pipeline.process_document", new_callable=AsyncMock)
-async def test_ingest_pipeline_runtime_error(mock_process_document: AsyncMock, test_client: AsyncClient):
+@patch("src.philograph.api.routers.ingest.queue_ingest_job", new_callable=AsyncMock)
+@patch("src.philograph.api.routers.ingest.ingestion_pipeline.resolve_source_path")
+async def test_ingest_queue_error(mock_resolve, mock_add_job, test_client: AsyncClient):
     """
-    Test POST /ingest returns 500 Internal Server Error when the pipeline raises a RuntimeError.
+    Test POST /ingest returns 500 Internal Server Error when the job cannot be queued.
     """
-    # Arrange
-    error_message = "Pipeline failed during embedding"
-    mock_process_document.side_effect = RuntimeError(error_message)
-    request_payload = {"path": "file/that/causes/error.pdf"}
+    mock_resolve.return_value = Path("/source/valid/file.pdf")
+    mock_add_job.side_effect = RuntimeError("Failed to queue ingest job.")
 
-    # Act
-    response = await test_client.post("/ingest", json=request_payload)
+    response = await test_client.post("/ingest", json={"path": "valid/file.pdf"})
 
-    # Assert
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert response.json() == {"detail": error_message}
-    mock_process_document.assert_awaited_once_with("file/that/causes/error.pdf")
+    assert response.json() == {"detail": "Failed to queue ingestion job."}
 
 @pytest.mark.asyncio
-@patch("src.philograph.api.routers.ingest.ingestion_pipeline.process_document", new_callable=AsyncMock)
-async def test_ingest_pipeline_value_error(mock_process_document: AsyncMock, test_client: AsyncClient):
+async def test_ingest_missing_path(test_client: AsyncClient):
     """
-    Test POST /ingest returns 400 Bad Request when the pipeline raises a ValueError.
+    Test POST /ingest returns 422 Unprocessable Entity when 'path' is missing.
     """
     # Arrange
-    error_message = "Invalid path provided"
-    mock_process_document.side_effect = ValueError(error_message)
-    request_payload = {"path": "invalid/path/!@#"}
+    request_payload = {} # Missing 'path'
 
     # Act
     response = await test_client.post("/ingest", json=request_payload)
 
     # Assert
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert response.json() == {"detail": error_message}
-    mock_process_document.assert_awaited_once_with("invalid/path/!@#")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+# --- Test Ingest Job Endpoints ---
 
 @pytest.mark.asyncio
-async def test_ingest_missing_path(test_client: AsyncClient):
+@patch("src.philograph.api.routers.ingest.db_layer.get_ingest_job", new_callable=AsyncMock)
+async def test_get_ingest_job_status(mock_get_job, mock_db_connection, test_client: AsyncClient):
     """
-    Test POST /ingest returns 422 Unprocessable Entity when 'path' is missing.
+    Test GET /ingest/jobs/{job_id} returns the job's status and progress.
     """
-    # Arrange
-    request_payload = {} # Missing 'path'
+    mock_get_job.return_value = _job("running")
 
-    # Act
-    response = await test_client.post("/ingest", json=request_payload)
+    response = await test_client.get("/ingest/jobs/7")
 
-    # Assert
-    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
-    # Optionally, assert details about the error message if needed
-    # assert "Field required" in response.text
\ No newline at end of file
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["job_id"], data["status"], data["attempts"]) == (7, "running", 1)
+    assert data["progress"] == {"files_done": 2, "succeeded": 1, "skipped": 1, "errors": 0}
+    assert data["finished_at"] is None
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.ingest.db_layer.get_ingest_job", new_callable=AsyncMock)
+async def test_get_ingest_job_not_found(mock_get_job, mock_db_connection, test_client: AsyncClient):
+    """
+    Test GET /ingest/jobs/{job_id} returns 404 for an unknown job.
+    """
+    mock_get_job.return_value = None
+
+    response = await test_client.get("/ingest/jobs/99")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Ingest job not found"}
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.ingest.db_layer.get_ingest_job", new_callable=AsyncMock)
+async def test_get_ingest_job_result_succeeded(mock_get_job, mock_db_connection, test_client: AsyncClient):
+    """
+    Test GET /ingest/jobs/{job_id}/result returns the pipeline result of a finished job.
+    """
+    details = [{"dir/file1.pdf": {"status": "Success", "document_id": 1}}]
+    mock_get_job.return_value = _job("succeeded", result={"status": "Directory Processed", "message": "Processed.", "details": details})
+
+    response = await test_client.get("/ingest/jobs/7/result")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "message": "Processed.",
+        "document_id": None,
+        "status": "Directory Processed",
+        "details": details,
+        "job_id": 7
+    }
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.ingest.db_layer.get_ingest_job", new_callable=AsyncMock)
+async def test_get_ingest_job_result_failed(mock_get_job, mock_db_connection, test_client: AsyncClient):
+    """
+    Test GET /ingest/jobs/{job_id}/result reports a failed job's error.
+    """
+    mock_get_job.return_value = _job("failed", error="Embedding service unavailable")
+
+    response = await test_client.get("/ingest/jobs/7/result")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "Error"
+    assert response.json()["message"] == "Embedding service unavailable"
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.ingest.db_layer.get_ingest_job", new_callable=AsyncMock)
+async def test_get_ingest_job_result_not_finished(mock_get_job, mock_db_connection, test_client: AsyncClient):
+    """
+    Test GET /ingest/jobs/{job_id}/result returns 409 Conflict while the job is still running.
+    """
+    mock_get_job.return_value = _job("queued")
+
+    response = await test_client.get("/ingest/jobs/7/result")
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert "has not finished" in response.json()["detail"]
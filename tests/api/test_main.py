@@ -24,6 +24,17 @@ async def test_read_root(test_client: AsyncClient):
     assert response.status_code == 200
     assert response.json() == {"message": "PhiloGraph API is running"}
 
+@pytest.mark.asyncio
+async def test_read_metrics(test_client: AsyncClient):
+    """
+    Test that '/metrics' serves the ingestion and search metrics in the Prometheus text format.
+    """
+    response = await test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE philograph_ingestion_stage_seconds histogram" in response.text
+    assert "# TYPE philograph_search_requests_total counter" in response.text
+
 # All other test functions previously in this file have been moved to:
 # - tests/api/test_ingest_router.py
 # - tests/api/test_search_router.py
@@ -1,3 +1,4 @@
+import json
 import pytest
 import psycopg
 from unittest.mock import AsyncMock, patch
@@ -46,14 +47,18 @@ async def test_search_success_query_only(mock_perform_search: AsyncMock, test_cl
 
     # Assert
     assert response.status_code == status.HTTP_200_OK
-    expected_response = {"results": mock_results}
+    expected_response = {"results": [{**r, "score": None} for r in mock_results], "next_token": None}
     assert response.json() == expected_response
     # Assert mock was called correctly (with default limit and no filters)
     mock_perform_search.assert_awaited_once_with(
         query_text="test query",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -96,14 +101,18 @@ async def test_search_success_with_filters(mock_perform_search: AsyncMock, test_
 
     # Assert
     assert response.status_code == status.HTTP_200_OK
-    expected_response = {"results": mock_results}
+    expected_response = {"results": [{**r, "score": None} for r in mock_results], "next_token": None}
     assert response.json() == expected_response
     # Assert mock was called correctly with filters and custom limit
     mock_perform_search.assert_awaited_once_with(
         query_text="filtered query",
         top_k=5,
         filters=expected_filters_dict,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -152,13 +161,17 @@ async def test_search_empty_results(mock_perform_search: AsyncMock, test_client:
 
     # Assert
     assert response.status_code == status.HTTP_200_OK
-    expected_response = {"results": []}
+    expected_response = {"results": [], "next_token": None}
     assert response.json() == expected_response
     mock_perform_search.assert_awaited_once_with(
         query_text="query with no results",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -182,7 +195,11 @@ async def test_search_value_error(mock_perform_search: AsyncMock, test_client: A
         query_text="query causing value error",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -206,7 +223,11 @@ async def test_search_runtime_error(mock_perform_search: AsyncMock, test_client:
         query_text="query causing runtime error",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -235,13 +256,17 @@ async def test_search_success_with_offset(mock_perform_search: AsyncMock, test_c
 
     # Assert
     assert response.status_code == status.HTTP_200_OK
-    expected_response = {"results": mock_results}
+    expected_response = {"results": [{**r, "score": None} for r in mock_results], "next_token": None}
     assert response.json() == expected_response
     mock_perform_search.assert_awaited_once_with(
         query_text="offset query",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=5 # Check offset is passed
+        offset=5, # Check offset is passed
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -270,13 +295,17 @@ async def test_search_success_with_limit(mock_perform_search: AsyncMock, test_cl
 
     # Assert
     assert response.status_code == status.HTTP_200_OK
-    expected_response = {"results": mock_results}
+    expected_response = {"results": [{**r, "score": None} for r in mock_results], "next_token": None}
     assert response.json() == expected_response
     mock_perform_search.assert_awaited_once_with(
         query_text="limit query",
         top_k=3, # Check the specified limit
         filters=None,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -342,7 +371,11 @@ async def test_search_embedding_error(mock_perform_search: AsyncMock, test_clien
         query_text="query causing embedding error",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=0
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
     )
 
 @pytest.mark.asyncio
@@ -368,5 +401,110 @@ async def test_search_db_error(mock_perform_search: AsyncMock, test_client: Asyn
         query_text="query causing db error",
         top_k=config.SEARCH_TOP_K, # Use config default
         filters=None,
-        offset=0
-    )
\ No newline at end of file
+        offset=0,
+        ef_search=None,
+        exact=False,
+        mode="vector",
+        continuation_token=None
+    )
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.search.search_service.perform_batch_search", new_callable=AsyncMock)
+async def test_batch_search_success(mock_perform_batch_search: AsyncMock, test_client: AsyncClient):
+    """
+    Test POST /search/batch returns results per query, in request order.
+    """
+    # Arrange
+    result = {
+        "chunk_id": 101,
+        "text": "Chunk",
+        "distance": 0.1,
+        "source_document": {"doc_id": 1, "title": "Doc", "author": "A", "year": 2023, "source_path": "docs/a.txt"},
+        "location": {"section_id": 10, "section_title": "S", "chunk_sequence_in_section": 1}
+    }
+    mock_perform_batch_search.return_value = [[result], []]
+    request_payload = {"queries": [{"query": "first"}, {"query": "second", "filters": {"author": "A"}, "limit": 3, "offset": 3}]}
+
+    # Act
+    response = await test_client.post("/search/batch", json=request_payload)
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"results": [{"results": [{**result, "score": None}], "next_token": None}, {"results": [], "next_token": None}]}
+    mock_perform_batch_search.assert_awaited_once_with([
+        {"query_text": "first", "top_k": config.SEARCH_TOP_K, "filters": None, "offset": 0, "ef_search": None, "exact": False, "mode": "vector"},
+        {"query_text": "second", "top_k": 3, "filters": {"author": "A"}, "offset": 3, "ef_search": None, "exact": False, "mode": "vector"},
+    ])
+
+@pytest.mark.asyncio
+async def test_batch_search_empty_queries(test_client: AsyncClient):
+    """
+    Test POST /search/batch returns 422 Unprocessable Entity for an empty batch.
+    """
+    response = await test_client.post("/search/batch", json={"queries": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.search.search_service.perform_batch_search", new_callable=AsyncMock)
+async def test_batch_search_service_error(mock_perform_batch_search: AsyncMock, test_client: AsyncClient):
+    """
+    Test POST /search/batch maps service RuntimeErrors to 500.
+    """
+    mock_perform_batch_search.side_effect = RuntimeError("Embedding generation failed (HTTP 503)")
+    response = await test_client.post("/search/batch", json={"queries": [{"query": "q"}]})
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.json() == {"detail": "Embedding generation failed (HTTP 503)"}
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.search.search_service.open_search_stream", new_callable=AsyncMock)
+async def test_stream_search_returns_ndjson(mock_open_stream: AsyncMock, test_client: AsyncClient):
+    """
+    Test POST /search/stream streams one JSON result per line and allows limits above /search's cap.
+    """
+    result = {"chunk_id": 101, "text": "Chunk", "distance": 0.1}
+
+    async def results():
+        yield result
+        yield {**result, "chunk_id": 102}
+        raise RuntimeError("Database search failed: connection lost")
+
+    mock_open_stream.return_value = results()
+
+    response = await test_client.post("/search/stream", json={"query": "export", "limit": 5000})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("chunk_id") for line in lines[:2]] == [101, 102]
+    assert lines[2] == {"error": "Database search failed: connection lost"}
+    assert mock_open_stream.await_args.kwargs["top_k"] == 5000
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.search.search_service.open_search_stream", new_callable=AsyncMock)
+async def test_stream_search_value_error(mock_open_stream: AsyncMock, test_client: AsyncClient):
+    """
+    Test POST /search/stream maps errors raised before streaming starts to a status code.
+    """
+    mock_open_stream.side_effect = ValueError("Query text cannot be empty")
+    response = await test_client.post("/search/stream", json={"query": "q"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.asyncio
+@patch("src.philograph.api.routers.search.search_service.perform_search", new_callable=AsyncMock)
+async def test_search_full_page_returns_next_token(mock_perform_search: AsyncMock, test_client: AsyncClient):
+    """
+    Test POST /search returns a next_token for a full page, which is passed back as continuation_token.
+    """
+    result = {
+        "chunk_id": 101, "text": "Chunk", "distance": 0.1,
+        "source_document": {"doc_id": 1, "title": "Doc", "author": "A", "year": 2023, "source_path": "docs/a.txt"},
+        "location": {"section_id": 10, "section_title": "S", "chunk_sequence_in_section": 1}
+    }
+    mock_perform_search.return_value = [result]
+
+    first = await test_client.post("/search", json={"query": "paged", "limit": 1})
+    next_token = first.json()["next_token"]
+    second = await test_client.post("/search", json={"query": "paged", "limit": 1, "continuation_token": next_token})
+
+    assert first.status_code == second.status_code == status.HTTP_200_OK
+    assert next_token
+    assert mock_perform_search.await_args.kwargs["continuation_token"] == next_token
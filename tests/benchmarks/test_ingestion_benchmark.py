@@ -0,0 +1,58 @@
+import httpx
+
+from src.philograph.benchmarks import common
+from src.philograph.benchmarks import ingestion_benchmark as bench
+from src.philograph.utils import text_processing
+
+# --- Tests for generated inputs ---
+
+def test_generate_documents_writes_each_type(tmp_path):
+    """Test that every supported extension is generated with blank-line separated paragraphs."""
+    counts = bench.generate_documents(tmp_path, 2, sections_per_doc=2, paragraphs_per_section=3, words_per_paragraph=5)
+    assert counts == {".txt": 2, ".md": 2, ".epub": 2, ".pdf": 2}
+    assert sorted(p.suffix for p in tmp_path.iterdir()).count(".epub") == 2
+    text = (tmp_path / "doc_0000.txt").read_text(encoding="utf-8")
+    assert len(text.split("\n\n")) == 6
+    assert (tmp_path / "doc_0001.md").read_text(encoding="utf-8").startswith("---\ntitle: Markdown Document 1\n")
+
+def test_generated_epub_is_readable(tmp_path):
+    """Test that the hand-built EPUB round-trips through the pipeline's EPUB extractor."""
+    bench.write_epub(tmp_path / "book.epub", "A Title", "Some Author", [("Chapter 1", ["First paragraph."]), ("Chapter 2", ["Second."])])
+    result = text_processing.extract_epub_content(tmp_path / "book.epub")
+    assert result is not None
+    assert result["metadata"]["title"] == "A Title"
+    assert "First paragraph." in result["text_by_section"]["Chapter 1"]
+    assert "Second." in result["text_by_section"]["Chapter 2"]
+
+def test_make_tei_parses_sections_and_references():
+    """Test that canned TEI carries the title, sections and references parse_grobid_tei extracts."""
+    tei = common.make_tei("Title & More", "Jane Doe", [("Intro", ["One.", "Two."])], ["Ref A.", "Ref B."])
+    parsed = text_processing.parse_grobid_tei(tei)
+    assert parsed["metadata"]["title"] == "Title & More"
+    assert parsed["metadata"]["author"] == "Jane Doe"
+    assert parsed["text_by_section"]["Intro"] == "One. Two."
+    assert parsed["references_raw"] == ["Ref A.", "Ref B."]
+
+def test_stub_grobid_server_is_deterministic_per_file_name():
+    """Test that the stub GROBID server answers the fulltext route with the same TEI for the same file."""
+    responder = bench.grobid_tei_for(sections_per_doc=1, paragraphs_per_section=2, words_per_paragraph=3, references_per_doc=2)
+    with common.stub_grobid_server(responder) as stub:
+        endpoint = f"{stub.url}/api/processFulltextDocument"
+        first = httpx.post(endpoint, files={"input": ("a.pdf", b"%PDF", "application/pdf")})
+        again = httpx.post(endpoint, files={"input": ("a.pdf", b"%PDF", "application/pdf")})
+        other = httpx.post(endpoint, files={"input": ("b.pdf", b"%PDF", "application/pdf")})
+    assert first.status_code == 200
+    assert first.text == again.text != other.text
+    assert len(text_processing.parse_grobid_tei(first.text)["references_raw"]) == 2
+
+# --- Tests for reporting ---
+
+def test_summarize_run_rates_and_stages():
+    """Test that throughput is derived from successful documents and stage timings are reported per stage."""
+    result = {"details": [{"a": {"status": "Success"}}, {"b": {"status": "Skipped"}}, {"c": {"status": "Error"}}, {"d": {"status": "Success"}}]}
+    report = bench.summarize_run(result, 2.0, 50, {"embedding": {"seconds": 1.23456, "count": 4}})
+    assert (report["succeeded"], report["skipped"], report["errors"]) == (2, 1, 1)
+    assert report["documents_per_minute"] == 60.0
+    assert report["chunks_per_second"] == 25.0
+    assert report["stages"]["embedding"] == {"busy_seconds": 1.235, "calls": 4}
+    assert report["stages"]["chunk_indexing"] == {"busy_seconds": 0.0, "calls": 0}
@@ -0,0 +1,84 @@
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from src.philograph.benchmarks import common
+from src.philograph.benchmarks import search_benchmark as bench
+
+# --- Tests for benchmark statistics and stubs ---
+
+def test_latency_summary_percentiles():
+    """Test that latency samples (seconds) are summarized as millisecond percentiles."""
+    summary = common.latency_summary([i / 1000.0 for i in range(1, 101)])
+    assert summary["p50_ms"] == pytest.approx(50.5)
+    assert summary["p99_ms"] == pytest.approx(99.01)
+    assert common.latency_summary([])["p95_ms"] == 0.0
+
+def test_stub_litellm_server_serves_embeddings():
+    """Test that the stub proxy returns registered vectors, hashed fallbacks, and counts requests."""
+    known = np.ones(4, dtype=np.float32) / 2
+    with common.stub_litellm_server(4, vectors={"known": known}) as stub:
+        response = httpx.post(f"{stub.url}/embeddings", json={"model": "m", "input": ["known", "other"]})
+        missing = httpx.post(f"{stub.url}/nope", json={})
+    data = response.json()["data"]
+    assert data[0]["embedding"] == known.tolist()
+    assert data[1]["embedding"] == pytest.approx(common.hashed_embedding("other", 4).tolist())
+    assert missing.status_code == 404
+    assert stub.requests == 2
+
+# --- Tests for corpus generation and recall ---
+
+def test_generate_corpus_shapes_and_unit_rows():
+    """Test that corpora have one unit-length row per chunk and a year per document."""
+    corpus = bench.generate_corpus(6, 4, 16, distribution="clustered", num_clusters=3)
+    assert corpus.embeddings.shape == (24, 16)
+    assert corpus.embeddings.dtype == np.float32
+    assert np.allclose(np.linalg.norm(corpus.embeddings, axis=1), 1.0, atol=1e-5)
+    assert corpus.doc_index.tolist() == [d for d in range(6) for _ in range(4)]
+    assert set(corpus.doc_years) <= set(bench.BENCHMARK_YEARS)
+    with pytest.raises(ValueError, match="Unknown distribution"):
+        bench.generate_corpus(1, 1, 4, distribution="uniform")
+
+def test_brute_force_top_k_respects_year_filter():
+    """Test that ground truth orders by cosine distance and only includes rows of the filtered year."""
+    corpus = bench.generate_corpus(10, 5, 8, seed=1)
+    query = corpus.embeddings[7]
+    top = bench.brute_force_top_k(corpus, query, 3)
+    assert top[0] == 7
+
+    year = int(corpus.doc_years[0])
+    filtered = bench.brute_force_top_k(corpus, query, 50, year=year)
+    assert len(filtered) == int((corpus.doc_years[corpus.doc_index] == year).sum())
+    assert all(corpus.doc_years[corpus.doc_index[row]] == year for row in filtered)
+
+def test_recall_at_k():
+    """Test recall as the fraction of true neighbours returned."""
+    assert bench.recall_at_k([1, 2, 3], [1, 2, 4, 5]) == 0.5
+    assert bench.recall_at_k([], []) == 1.0
+
+# --- Tests for database safety ---
+
+@pytest.mark.asyncio
+async def test_run_benchmark_non_empty_database_is_left_untouched():
+    """Test that a database with existing chunks is neither initialized nor cleaned up (no index rebuild)."""
+    from unittest.mock import AsyncMock, patch
+
+    with patch.object(bench, "require_empty_chunks_table", new=AsyncMock(side_effect=RuntimeError("Benchmark requires an empty chunks table"))), \
+         patch.object(bench, "remove_corpus", new=AsyncMock()) as mock_remove, \
+         patch.object(bench, "load_corpus", new=AsyncMock()) as mock_load, \
+         patch.object(bench.db_layer, "get_db_pool", new=AsyncMock()), \
+         patch.object(bench.db_layer, "close_db_pool", new=AsyncMock()), \
+         patch.object(bench.db_layer, "get_db_connection") as mock_get_conn, \
+         patch.object(bench.http_client, "close_async_client", new=AsyncMock()):
+        with pytest.raises(RuntimeError, match="empty chunks table"):
+            await bench.run_benchmark(
+                docs=2, chunks_per_doc=2, distribution="random", clusters=1, num_queries=1, top_k=1,
+                ef_search_values=[10], m_values=[4], ef_construction_values=[8], filtered=False, service_path=False,
+                embedding_latency_ms=0.0, concurrency=1, seed=0, keep_corpus=False
+            )
+
+    mock_get_conn.assert_not_called() # No initialize_schema
+    mock_load.assert_not_awaited()
+    mock_remove.assert_not_awaited()
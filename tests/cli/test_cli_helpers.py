@@ -202,4 +202,40 @@ def test_make_api_request_unexpected_error(mock_error_console, mock_config, runn
     assert excinfo.value.exit_code == 1
     mock_client_instance.request.assert_called_once_with("GET", "http://fakeapi.com/unexpected", json=None, params=None)
     # Check error console output
-    mock_error_console.print.assert_called_once_with(f"An unexpected error occurred: {unexpected_error}")
\ No newline at end of file
+    mock_error_console.print.assert_called_once_with(f"An unexpected error occurred: {unexpected_error}")
+# --- Tests for wait_for_ingest_job ---
+
+@patch('src.philograph.cli.main.time.sleep')
+@patch('src.philograph.cli.main.make_api_request')
+def test_wait_for_ingest_job_polls_until_finished(mock_make_api_request, mock_sleep):
+    """Test wait_for_ingest_job polls the job until it finishes, then fetches its result."""
+    from src.philograph.cli.main import wait_for_ingest_job
+    job_result = {"status": "Success", "message": "Ingested", "document_id": 3, "job_id": 7}
+    mock_make_api_request.side_effect = [
+        {"job_id": 7, "status": "queued", "progress": {}},
+        {"job_id": 7, "status": "running", "progress": {"files_done": 1}},
+        {"job_id": 7, "status": "succeeded", "progress": {"files_done": 1, "succeeded": 1}},
+        job_result
+    ]
+
+    assert wait_for_ingest_job(7, 0.5) == job_result
+    assert [c.args for c in mock_make_api_request.call_args_list] == [
+        ("GET", "/ingest/jobs/7"), ("GET", "/ingest/jobs/7"), ("GET", "/ingest/jobs/7"), ("GET", "/ingest/jobs/7/result")
+    ]
+    assert mock_sleep.call_count == 2
+
+# --- Tests for the watch command's submitter ---
+
+@pytest.mark.asyncio
+async def test_ingest_submitter_queues_job():
+    """Test the watch submitter POSTs each changed file to /ingest and returns the queued job ID."""
+    from src.philograph.cli.main import _ingest_submitter
+    requests = []
+
+    def handler(request):
+        requests.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(202, json={"status": "Queued", "job_id": 11})
+
+    async with httpx.AsyncClient(base_url="http://fakeapi.com", transport=httpx.MockTransport(handler)) as client:
+        assert await _ingest_submitter(client)("new/book.pdf") == 11
+    assert requests == [("/ingest", {"path": "new/book.pdf"})]
@@ -158,6 +158,19 @@ def test_search_success_with_limit(runner):
     # Check if roughly the correct number of results are displayed (Rich table formatting makes exact count hard)
     assert result.stdout.count("Doc ") == test_limit
 
+# Test search with --hybrid option
+def test_search_hybrid_mode(runner):
+    """Test the search command requests hybrid mode when --hybrid is given."""
+    expected_payload = {"query": "Aufhebung", "limit": 10, "mode": "hybrid"}
+
+    with patch('philograph.cli.main.make_api_request') as mock_make_api_request:
+        mock_make_api_request.return_value = {"results": []}
+
+        result = runner.invoke(app, ["search", "Aufhebung", "--hybrid"])
+
+        assert result.exit_code == 0, f"STDOUT: {result.stdout}\nSTDERR: {result.stderr}"
+        mock_make_api_request.assert_called_once_with("POST", "/search", json_data=expected_payload)
+
 # Removed patch decorator
 @patch('src.philograph.cli.main.display_results', autospec=True) # Added autospec
 @patch('src.philograph.cli.main.error_console', autospec=True) # Added autospec
@@ -213,4 +226,30 @@ def test_search_empty_results(runner): # Removed mock_console, mock_display_resu
     assert "No results found." in result.stdout
     # display_results should NOT be called directly when results are empty (mock removed)
 
-# Removed test_search_filter_encoding_error as it's no longer relevant
\ No newline at end of file
+# Removed test_search_filter_encoding_error as it's no longer relevant
+# --- Tests for 'search-batch' command ---
+
+def test_search_batch_success(runner):
+    """Test the search-batch command sends one batch request and prints results per query."""
+    mock_api_response_data = {
+        "results": [
+            {"results": [{"chunk_id": 1, "text": "...", "distance": 0.1, "source_document": {"title": "Being and Time", "author": "Heidegger", "year": 1927, "doc_id": 1}}]},
+            {"results": []}
+        ]
+    }
+    expected_payload = {"queries": [
+        {"query": "time", "limit": 5, "filters": {"author": "Heidegger"}},
+        {"query": "being", "limit": 5, "filters": {"author": "Heidegger"}},
+    ]}
+
+    with patch('philograph.cli.main.make_api_request') as mock_make_api_request:
+        mock_make_api_request.return_value = mock_api_response_data
+
+        result = runner.invoke(app, ["search-batch", "time", "being", "--author", "Heidegger", "--limit", "5"])
+
+        assert result.exit_code == 0, f"STDOUT: {result.stdout}\nSTDERR: {result.stderr}"
+        mock_make_api_request.assert_called_once_with("POST", "/search/batch", json_data=expected_payload)
+    assert "Query: time" in result.stdout
+    assert "Being and Time" in result.stdout
+    assert "Query: being" in result.stdout
+    assert "No results found." in result.stdout
@@ -1,5 +1,6 @@
 # tests/conftest.py
 import pytest
+import sys
 import asyncio
 import pytest_asyncio
 from typing import AsyncGenerator
@@ -19,4 +20,23 @@ async def test_client() -> AsyncGenerator[AsyncClient, None]:
 # Removed custom event_loop fixture to avoid conflict with pytest-asyncio.
 # Removed custom test_client fixture. Tests will use FastAPI's TestClient directly.
 
+@pytest.fixture(autouse=True)
+def reset_embedding_cache():
+    """Clears the shared in-process caches and metrics so tests don't see each other's entries."""
+    # The package is imported both as 'philograph' and 'src.philograph' across the suite
+    for package in ("philograph", "src.philograph"):
+        module = sys.modules.get(f"{package}.utils.embedding_cache")
+        if module is not None:
+            module.embedding_cache.clear()
+        module = sys.modules.get(f"{package}.search.service")
+        if module is not None:
+            module.query_embedding_cache.clear()
+        module = sys.modules.get(f"{package}.search.result_cache")
+        if module is not None:
+            module.search_result_cache.clear()
+        module = sys.modules.get(f"{package}.utils.metrics")
+        if module is not None:
+            module.metrics_registry.reset()
+    yield
+
 # Optional: Add other shared fixtures here if needed
\ No newline at end of file
@@ -265,6 +265,16 @@ async def test_initialize_schema_success(mock_get_conn):
                 UNIQUE (section_id, sequence) -- Ensure sequence is unique within a section
             );
         """)
+    # Exact match for embedding cache table
+    mock_cursor.execute.assert_any_await("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                embedding vector NOT NULL,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            );
+        """)
     # Exact match for relationships table
     mock_cursor.execute.assert_any_await("""
             CREATE TABLE IF NOT EXISTS relationships (
@@ -336,4 +346,59 @@ async def test_initialize_schema_db_error(mock_get_conn):
     assert excinfo.value is db_error # Check if the original error is propagated
     mock_cursor.execute.assert_awaited_once() # Should fail on the first execute
     # Commit is usually handled by the connection context manager
-    # mock_conn.commit.assert_not_called() # Remove this assertion
\ No newline at end of file
+    # mock_conn.commit.assert_not_called() # Remove this assertion
+def _schema_cursor(mock_conn, fetchone_results):
+    mock_cursor = AsyncMock(spec=psycopg.AsyncCursor)
+    mock_cursor.fetchone.side_effect = fetchone_results
+    mock_conn.cursor.return_value.__aenter__.return_value = mock_cursor
+    return mock_cursor
+
+@pytest.mark.asyncio
+async def test_initialize_schema_skips_backfill_when_no_chunk_needs_it():
+    """Tests that the chunk filter column backfill UPDATE only runs when some chunk lacks doc_id."""
+    mock_conn = AsyncMock(spec=psycopg.AsyncConnection)
+    # fetchone: text search configuration exists, no chunk with a NULL doc_id, job dedupe index exists
+    mock_cursor = _schema_cursor(mock_conn, [(True,), (False,), (False,)])
+
+    await db_connection.initialize_schema(mock_conn)
+
+    statements = [call.args[0] for call in mock_cursor.execute.await_args_list]
+    assert "SELECT EXISTS (SELECT 1 FROM chunks WHERE doc_id IS NULL);" in statements
+    assert not any("UPDATE chunks" in sql for sql in statements)
+
+    mock_cursor = _schema_cursor(mock_conn, [(True,), (True,), (False,)])
+    await db_connection.initialize_schema(mock_conn)
+    assert any("UPDATE chunks" in call.args[0] for call in mock_cursor.execute.await_args_list)
+
+@pytest.mark.asyncio
+async def test_initialize_schema_dedupes_queued_jobs_before_unique_index():
+    """Tests that duplicate queued jobs are failed before the one-queued-job-per-path index is created, once."""
+    mock_conn = AsyncMock(spec=psycopg.AsyncConnection)
+    mock_cursor = _schema_cursor(mock_conn, [(True,), (False,), (True,)])
+
+    await db_connection.initialize_schema(mock_conn)
+
+    statements = [call.args[0] for call in mock_cursor.execute.await_args_list]
+    dedupe = next(i for i, sql in enumerate(statements) if "Duplicate of an earlier queued job" in sql)
+    index = statements.index("CREATE UNIQUE INDEX IF NOT EXISTS ingest_jobs_queued_path_idx ON ingest_jobs (path) WHERE status = 'queued';")
+    assert dedupe < index
+
+    mock_cursor = _schema_cursor(mock_conn, [(True,), (False,), (False,)]) # Index already exists
+    await db_connection.initialize_schema(mock_conn)
+    assert not any("ingest_jobs_queued_path_idx ON" in call.args[0] for call in mock_cursor.execute.await_args_list)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("text_config, fetchone_results", [
+    ("english'::regconfig, text_content)) STORED; DROP TABLE chunks; --", []), # Rejected before any lookup
+    ("klingon", [(False,)]), # Not in pg_ts_config
+])
+async def test_initialize_schema_rejects_invalid_text_config(text_config, fetchone_results):
+    """Tests that SEARCH_TEXT_CONFIG must name an existing text search configuration before it reaches DDL."""
+    mock_conn = AsyncMock(spec=psycopg.AsyncConnection)
+    mock_cursor = _schema_cursor(mock_conn, fetchone_results)
+
+    with patch('src.philograph.config.SEARCH_TEXT_CONFIG', text_config):
+        with pytest.raises(ValueError, match="SEARCH_TEXT_CONFIG"):
+            await db_connection.initialize_schema(mock_conn)
+
+    assert not any("CREATE TABLE" in call.args[0] for call in mock_cursor.execute.await_args_list)
@@ -257,6 +257,47 @@ async def test_add_section_invalid_doc_id(mock_get_conn):
     # Commit should not be called on error
     # mock_conn.commit.assert_not_called()
 
+@pytest.mark.asyncio
+async def test_add_sections_batch_success(mock_get_conn):
+    """Tests inserting all sections in one statement and mapping sequence -> ID."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchall.return_value = [(501, 0), (502, 1), (503, 2)] # (id, sequence)
+
+    sections = [("Intro", 1, 0), ("Chapter 1", 1, 1), (None, 2, 2)]
+    result = await doc_queries.add_sections_batch(mock_conn, 42, sections)
+
+    assert result == {0: 501, 1: 502, 2: 503}
+    mock_cursor.execute.assert_awaited_once()
+    sql, params = mock_cursor.execute.await_args.args
+    assert "unnest(%s::text[], %s::int[], %s::int[], %s::text[])" in sql
+    assert "RETURNING id, sequence" in sql
+    assert params == (42, ["Intro", "Chapter 1", None], [1, 1, 2], [0, 1, 2], [None, None, None])
+
+@pytest.mark.asyncio
+async def test_add_sections_batch_with_text_hashes(mock_get_conn):
+    """Tests that section text hashes are stored alongside the sections."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchall.return_value = [(501, 0), (502, 1)]
+
+    await doc_queries.add_sections_batch(mock_conn, 42, [("Intro", 0, 0), ("Body", 0, 1)], text_hashes=["h0", "h1"])
+
+    assert mock_cursor.execute.await_args.args[1][-1] == ["h0", "h1"]
+
+@pytest.mark.asyncio
+async def test_add_sections_batch_empty_list(mock_get_conn):
+    """Tests that an empty section list issues no query."""
+    mock_conn, mock_cursor = mock_get_conn
+    assert await doc_queries.add_sections_batch(mock_conn, 42, []) == {}
+    mock_cursor.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_add_sections_batch_missing_rows(mock_get_conn):
+    """Tests that fewer returned rows than sections raises RuntimeError."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchall.return_value = [(501, 0)]
+    with pytest.raises(RuntimeError, match="Failed to add sections to database"):
+        await doc_queries.add_sections_batch(mock_conn, 42, [("A", 0, 0), ("B", 0, 1)])
+
 # --- Test Chunk Operations ---
 
 @pytest.mark.asyncio
@@ -277,13 +318,16 @@ async def test_add_chunk_success(mock_format_vector, mock_get_conn):
 
     expected_id = 101
     # Note: SQL in implementation uses %s for dimension, adjust if needed
+    # The chunk's denormalized doc_id/doc_year are copied from its section's document
     expected_sql = """
-        INSERT INTO chunks (section_id, text_content, sequence, embedding)
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO chunks (section_id, text_content, sequence, embedding, doc_id, doc_year)
+        SELECT s.id, %s, %s, %s, d.id, d.year
+        FROM sections s JOIN documents d ON d.id = s.doc_id
+        WHERE s.id = %s
         RETURNING id;
     """
     # Params should match the SQL query structure
-    expected_params = (section_id, text_content, sequence, formatted_embedding)
+    expected_params = (text_content, sequence, formatted_embedding, section_id)
 
     # Call the function under test
     returned_id = await doc_queries.add_chunk(mock_conn, section_id, text_content, sequence, embedding_vector)
@@ -316,42 +360,64 @@ async def test_add_chunk_success(mock_format_vector, mock_get_conn):
 #     # Ensure commit was not called
 #     # mock_conn.commit.assert_not_called()
 
+def _mock_copy(mock_cursor):
+    """Configures cursor.copy() as an async context manager and returns the Copy mock."""
+    mock_copy = AsyncMock()
+    mock_copy.set_types = MagicMock()
+    mock_cursor.copy = MagicMock()
+    mock_cursor.copy.return_value.__aenter__.return_value = mock_copy
+    mock_cursor.copy.return_value.__aexit__.return_value = None
+    return mock_copy
+
 @pytest.mark.asyncio
-@patch('src.philograph.config.TARGET_EMBEDDING_DIMENSION', 3) # Mock dimension for test
-async def test_add_chunks_batch_success(mock_format_vector, mock_get_conn):
-    """Tests successfully adding multiple chunks in a batch."""
+async def test_add_chunks_batch_success(mock_get_conn):
+    """Tests adding multiple chunks via binary COPY with pre-allocated IDs returned in input order."""
     mock_conn, mock_cursor = mock_get_conn
+    mock_copy = _mock_copy(mock_cursor)
 
     chunks_data = [
         (789, "Chunk 1", 0, [0.1, 0.2, 0.3]),
         (789, "Chunk 2", 1, [0.4, 0.5, 0.6]),
         (790, "Chunk 3", 0, [0.7, 0.8, 0.9]),
     ]
-    formatted_embeddings = ["[0.1,0.2,0.3]", "[0.4,0.5,0.6]", "[0.7,0.8,0.9]"]
-    # Mock format_vector to return expected strings for each vector
-    mock_format_vector.side_effect = formatted_embeddings
+    # Sequence values may come back in any order; they are assigned in ascending order
+    mock_cursor.fetchall.return_value = [(12,), (10,), (11,)]
 
-    expected_sql = """
-        INSERT INTO chunks (section_id, text_content, sequence, embedding)
-        VALUES (%s, %s, %s, %s);
-    """
-    # Params for executemany should match the data structure
-    expected_params_list = [
-        (789, "Chunk 1", 0, formatted_embeddings[0]),
-        (789, "Chunk 2", 1, formatted_embeddings[1]),
-        (790, "Chunk 3", 0, formatted_embeddings[2]),
-    ]
-    # Simulate rowcount after executemany
-    mock_cursor.rowcount = len(chunks_data)
+    result = await doc_queries.add_chunks_batch(mock_conn, chunks_data, doc_id=5, doc_year=1807)
 
-    # Call the function under test
-    await doc_queries.add_chunks_batch(mock_conn, chunks_data)
+    assert result == [10, 11, 12]
+    mock_cursor.execute.assert_awaited_once_with(
+        "SELECT nextval(pg_get_serial_sequence('chunks', 'id')) FROM generate_series(1, %s);", (3,)
+    )
+    mock_cursor.copy.assert_called_once_with(
+        "COPY chunks (id, section_id, text_content, sequence, embedding, doc_id, doc_year) FROM STDIN (FORMAT BINARY);"
+    )
+    mock_copy.set_types.assert_called_once_with(["int4", "int4", "text", "int4", "bytea", "int4", "int4"])
+    assert mock_copy.write_row.await_count == 3
+    mock_copy.write_row.assert_any_await(
+        (10, 789, "Chunk 1", 0, db_utils.encode_vector_binary([0.1, 0.2, 0.3]), 5, 1807)
+    )
+    mock_copy.write_row.assert_any_await(
+        (12, 790, "Chunk 3", 0, db_utils.encode_vector_binary([0.7, 0.8, 0.9]), 5, 1807)
+    )
+    mock_cursor.executemany.assert_not_awaited()
 
-    # Assertions
-    assert mock_format_vector.call_count == len(chunks_data)
-    # Match exact SQL string from source
-    mock_cursor.executemany.assert_awaited_once_with(expected_sql, expected_params_list)
-    # mock_conn.commit.assert_awaited_once() # Commit handled by context manager
+@pytest.mark.asyncio
+async def test_add_chunks_batch_without_document_fills_filter_columns(mock_get_conn):
+    """Tests that without document fields the denormalized filter columns are filled from sections/documents."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_copy = _mock_copy(mock_cursor)
+    mock_cursor.fetchall.return_value = [(10,)]
+
+    await doc_queries.add_chunks_batch(mock_conn, [(789, "Chunk 1", 0, [0.1, 0.2, 0.3])])
+
+    mock_cursor.copy.assert_called_once_with(
+        "COPY chunks (id, section_id, text_content, sequence, embedding) FROM STDIN (FORMAT BINARY);"
+    )
+    mock_copy.write_row.assert_awaited_once_with((10, 789, "Chunk 1", 0, db_utils.encode_vector_binary([0.1, 0.2, 0.3])))
+    update_sql, update_params = mock_cursor.execute.await_args.args
+    assert "UPDATE chunks c SET doc_id = d.id" in update_sql
+    assert update_params == ([10],)
 
 @pytest.mark.asyncio
 async def test_add_chunks_batch_empty_list(mock_get_conn):
@@ -387,40 +453,35 @@ async def test_add_chunks_batch_empty_list(mock_get_conn):
 #     # mock_conn.commit.assert_not_called()
 
 @pytest.mark.asyncio
-@patch('src.philograph.config.TARGET_EMBEDDING_DIMENSION', 3) # Mock dimension for test
-async def test_add_chunks_batch_db_error(mock_format_vector, mock_get_conn):
-    """Tests that a database error during batch insert prevents commit."""
+async def test_add_chunks_batch_db_error(mock_get_conn):
+    """Tests that a database error during the COPY is propagated."""
     mock_conn, mock_cursor = mock_get_conn
+    mock_copy = _mock_copy(mock_cursor)
 
     chunks_data = [
         (789, "Chunk 1", 0, [0.1, 0.2, 0.3]),
         (999, "Chunk Invalid FK", 0, [0.7, 0.8, 0.9]), # Assume 999 is invalid section_id
     ]
-    formatted_embeddings = ["[0.1,0.2,0.3]", "[0.7,0.8,0.9]"]
-    mock_format_vector.side_effect = formatted_embeddings
-
-    # Simulate psycopg.IntegrityError on executemany
-    db_error = psycopg.IntegrityError("FK constraint violation")
-    mock_cursor.executemany.side_effect = db_error
+    mock_cursor.fetchall.return_value = [(1,), (2,)]
+    # Simulate psycopg.IntegrityError raised when the COPY completes
+    mock_cursor.copy.return_value.__aexit__.side_effect = psycopg.IntegrityError("FK constraint violation")
 
-    expected_sql = """
-        INSERT INTO chunks (section_id, text_content, sequence, embedding)
-        VALUES (%s, %s, %s, %s);
-    """
-    expected_params_list = [
-        (789, "Chunk 1", 0, formatted_embeddings[0]),
-        (999, "Chunk Invalid FK", 0, formatted_embeddings[1]),
-    ]
-
-    # Expect psycopg.IntegrityError to be raised and propagated
     with pytest.raises(psycopg.IntegrityError):
         await doc_queries.add_chunks_batch(mock_conn, chunks_data)
 
-    # Assertions
-    assert mock_format_vector.call_count == len(chunks_data)
-    # Match exact SQL string from source
-    mock_cursor.executemany.assert_awaited_once_with(expected_sql, expected_params_list)
-    # mock_conn.commit.assert_not_called() # Commit not called on error
+    assert mock_copy.write_row.await_count == 2
+
+@pytest.mark.asyncio
+async def test_add_chunks_batch_id_allocation_mismatch(mock_get_conn):
+    """Tests that a short ID allocation raises RuntimeError before any COPY."""
+    mock_conn, mock_cursor = mock_get_conn
+    _mock_copy(mock_cursor)
+    mock_cursor.fetchall.return_value = [(1,)]
+
+    with pytest.raises(RuntimeError, match="Failed to allocate chunk IDs"):
+        await doc_queries.add_chunks_batch(mock_conn, [(1, "a", 0, [0.1]), (1, "b", 1, [0.2])])
+
+    mock_cursor.copy.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_get_chunk_by_id_success(mock_get_conn):
@@ -460,4 +521,125 @@ async def test_get_chunk_by_id_not_found(mock_get_conn):
     # Match exact SQL string from source
     mock_cursor.execute.assert_awaited_once_with(expected_sql, expected_params)
     mock_cursor.fetchone.assert_awaited_once()
-    assert chunk_data is None
\ No newline at end of file
+    assert chunk_data is None
+
+# --- Test Re-ingestion Operations ---
+
+@pytest.mark.asyncio
+async def test_get_document_fingerprint(mock_get_conn):
+    """Tests reading a document's stored source fingerprint, and None for an unknown path."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchone.side_effect = [(5, 1024, 17, "abc"), None]
+
+    fingerprint = await doc_queries.get_document_fingerprint(mock_conn, "kant.pdf")
+
+    assert (fingerprint.document_id, fingerprint.file_size, fingerprint.file_mtime_ns, fingerprint.content_hash) == (5, 1024, 17, "abc")
+    mock_cursor.execute.assert_awaited_with(
+        "SELECT id, file_size, file_mtime_ns, content_hash FROM documents WHERE source_path = %s;", ("kant.pdf",)
+    )
+    assert await doc_queries.get_document_fingerprint(mock_conn, "missing.pdf") is None
+
+@pytest.mark.asyncio
+async def test_get_document_fingerprints_bulk(mock_get_conn):
+    """Tests looking up the fingerprints of many paths with one ANY() query, and no query for none."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchall.return_value = [("a.pdf", 5, 1024, 17, "abc")]
+
+    assert await doc_queries.get_document_fingerprints(mock_conn, []) == {}
+    mock_cursor.execute.assert_not_awaited()
+    result = await doc_queries.get_document_fingerprints(mock_conn, ["a.pdf", "b.pdf"])
+
+    assert list(result) == ["a.pdf"]
+    assert result["a.pdf"].document_id == 5
+    sql, params = mock_cursor.execute.await_args.args
+    assert "WHERE source_path = ANY(%s)" in sql
+    assert params == (["a.pdf", "b.pdf"],)
+
+@pytest.mark.asyncio
+async def test_set_document_fingerprint(mock_get_conn):
+    """Tests recording a document's source fingerprint."""
+    mock_conn, mock_cursor = mock_get_conn
+
+    await doc_queries.set_document_fingerprint(mock_conn, 5, 1024, 17, "abc")
+
+    mock_cursor.execute.assert_awaited_once_with(
+        "UPDATE documents SET file_size = %s, file_mtime_ns = %s, content_hash = %s WHERE id = %s;", (1024, 17, "abc", 5)
+    )
+
+@pytest.mark.asyncio
+async def test_update_document_missing_raises(mock_get_conn):
+    """Tests that updating a document that no longer exists raises RuntimeError."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.rowcount = 0
+
+    with pytest.raises(RuntimeError, match="Failed to update document in database."):
+        await doc_queries.update_document(mock_conn, 5, "Title", "Author", 1800, {"title": "Title"})
+
+@pytest.mark.asyncio
+async def test_delete_sections(mock_get_conn):
+    """Tests deleting sections with one ANY() statement, and no query for an empty list."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.rowcount = 2
+
+    assert await doc_queries.delete_sections(mock_conn, []) == 0
+    mock_cursor.execute.assert_not_awaited()
+    assert await doc_queries.delete_sections(mock_conn, [11, 12]) == 2
+    mock_cursor.execute.assert_awaited_once_with("DELETE FROM sections WHERE id = ANY(%s);", ([11, 12],))
+
+@pytest.mark.asyncio
+async def test_resequence_sections_parks_then_moves(mock_get_conn):
+    """Tests sections are parked on negative sequences before being moved, so they can swap places."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.rowcount = 2
+
+    await doc_queries.resequence_sections(mock_conn, 5, [(12, "B", 0, 0), (11, "A", 0, 1)])
+
+    (park_sql, park_params), (move_sql, move_params) = [call.args for call in mock_cursor.execute.await_args_list]
+    assert "sequence = -1 - sequence" in park_sql
+    assert park_params == (5,)
+    assert "unnest(%s::int[], %s::text[], %s::int[], %s::int[])" in move_sql
+    assert move_params == ([12, 11], ["B", "A"], [0, 0], [0, 1], 5)
+
+@pytest.mark.asyncio
+async def test_resequence_sections_missing_rows(mock_get_conn):
+    """Tests that moving fewer sections than given raises RuntimeError."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.rowcount = 1
+
+    with pytest.raises(RuntimeError, match="Failed to resequence sections."):
+        await doc_queries.resequence_sections(mock_conn, 5, [(12, "B", 0, 0), (11, "A", 0, 1)])
+
+@pytest.mark.asyncio
+async def test_update_chunks_doc_year_coerces_year(mock_get_conn):
+    """Tests the denormalized year is rewritten only where it differs, with string years coerced."""
+    mock_conn, mock_cursor = mock_get_conn
+
+    await doc_queries.update_chunks_doc_year(mock_conn, 5, "1781")
+
+    sql, params = mock_cursor.execute.await_args.args
+    assert "doc_year IS DISTINCT FROM %s" in sql
+    assert params == (1781, 5, 1781)
+
+# --- Tests for the corpus generation ---
+
+@pytest.mark.asyncio
+async def test_get_corpus_generation(mock_get_conn):
+    """Tests reading the shared corpus generation, defaulting to 0 without a row."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchone.return_value = (42,)
+    assert await doc_queries.get_corpus_generation(mock_conn) == 42
+    assert "FROM corpus_generation" in mock_cursor.execute.await_args.args[0]
+
+    mock_cursor.fetchone.return_value = None
+    assert await doc_queries.get_corpus_generation(mock_conn) == 0
+
+@pytest.mark.asyncio
+async def test_bump_corpus_generation(mock_get_conn):
+    """Tests the generation is advanced with one upsert that returns the new value."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchone.return_value = (43,)
+
+    assert await doc_queries.bump_corpus_generation(mock_conn) == 43
+    sql = mock_cursor.execute.await_args.args[0]
+    assert "ON CONFLICT (id) DO UPDATE SET generation = corpus_generation.generation + 1" in sql
+    assert "RETURNING generation" in sql
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import psycopg
+from unittest.mock import AsyncMock, MagicMock
+
+from src.philograph.data_access.queries import embedding_cache as cache_queries
+from src.philograph.utils.db_utils import encode_vector_binary
+
+@pytest.fixture
+def mock_conn_cursor():
+    """Provides a mocked connection whose cursor() context manager yields a mocked cursor."""
+    mock_conn = AsyncMock(spec=psycopg.AsyncConnection)
+    mock_cursor = AsyncMock(spec=psycopg.AsyncCursor)
+    mock_conn.cursor.return_value.__aenter__.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+# --- Tests for get_cached_embeddings ---
+
+@pytest.mark.asyncio
+async def test_get_cached_embeddings_success(mock_conn_cursor):
+    """Tests looking up cached embeddings by key with a single ANY() query."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchall.return_value = [("k1", [0.1, 0.2])]
+
+    result = await cache_queries.get_cached_embeddings(mock_conn, ["k1", "k2"])
+
+    assert list(result) == ["k1"]
+    assert result["k1"].dtype == np.float32
+    np.testing.assert_array_equal(result["k1"], np.asarray([0.1, 0.2], dtype=np.float32))
+    mock_cursor.execute.assert_awaited_once_with(
+        "SELECT cache_key, embedding::real[] FROM embedding_cache WHERE cache_key = ANY(%s);",
+        (["k1", "k2"],)
+    )
+
+@pytest.mark.asyncio
+async def test_get_cached_embeddings_empty_keys(mock_conn_cursor):
+    """Tests that no query is issued for an empty key list."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    assert await cache_queries.get_cached_embeddings(mock_conn, []) == {}
+    mock_cursor.execute.assert_not_awaited()
+
+# --- Tests for add_cached_embeddings ---
+
+@pytest.mark.asyncio
+async def test_add_cached_embeddings_success(mock_conn_cursor):
+    """Tests storing entries with a binary COPY into the staging table, then one ON CONFLICT DO NOTHING insert."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_copy = AsyncMock()
+    mock_copy.set_types = MagicMock()
+    mock_cursor.copy = MagicMock()
+    mock_cursor.copy.return_value.__aenter__.return_value = mock_copy
+    mock_cursor.copy.return_value.__aexit__.return_value = None
+
+    await cache_queries.add_cached_embeddings(mock_conn, [("k1", "philo-embed", 2, [0.1, 0.2])])
+
+    mock_cursor.copy.assert_called_once_with(
+        "COPY embedding_cache_stage (cache_key, model, dimension, embedding) FROM STDIN (FORMAT BINARY);"
+    )
+    mock_copy.set_types.assert_called_once_with(["text", "text", "int4", "bytea"])
+    mock_copy.write_row.assert_awaited_once_with(("k1", "philo-embed", 2, encode_vector_binary([0.1, 0.2])))
+    statements = [call.args[0] for call in mock_cursor.execute.await_args_list]
+    assert "CREATE TEMP TABLE IF NOT EXISTS embedding_cache_stage" in statements[0]
+    assert "ON CONFLICT (cache_key) DO NOTHING" in statements[1]
+    assert statements[2] == "DELETE FROM embedding_cache_stage;"
+    mock_cursor.executemany.assert_not_awaited()
+    mock_conn.transaction.assert_called_once_with()
+
+@pytest.mark.asyncio
+async def test_add_cached_embeddings_empty(mock_conn_cursor):
+    """Tests that nothing is sent for an empty entry list."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    await cache_queries.add_cached_embeddings(mock_conn, [])
+    mock_cursor.execute.assert_not_awaited()
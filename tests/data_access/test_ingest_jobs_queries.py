@@ -0,0 +1,155 @@
+import json
+from datetime import datetime
+
+import pytest
+import psycopg
+from unittest.mock import AsyncMock
+
+from src.philograph.data_access.queries import ingest_jobs as job_queries
+
+@pytest.fixture
+def mock_conn_cursor():
+    """Provides a mocked connection whose cursor() context manager yields a mocked cursor."""
+    mock_conn = AsyncMock(spec=psycopg.AsyncConnection)
+    mock_cursor = AsyncMock(spec=psycopg.AsyncCursor)
+    mock_conn.cursor.return_value.__aenter__.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+def _job_row(status="running", attempts=1, progress=None, result=None):
+    created = datetime(2026, 1, 1, 12, 0, 0)
+    return (5, "kant", status, attempts, progress, result, None, created, created, None)
+
+# --- Tests for add_ingest_job ---
+
+@pytest.mark.asyncio
+async def test_add_ingest_job_returns_id(mock_conn_cursor):
+    """Tests queueing a job inserts the path and returns the new ID, or the ID of the job already queued for it."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchone.return_value = (5,)
+
+    assert await job_queries.add_ingest_job(mock_conn, "kant") == 5
+    sql, params = mock_cursor.execute.await_args.args
+    assert "INSERT INTO ingest_jobs (path) VALUES (%s)" in sql
+    assert "ON CONFLICT (path) WHERE status = 'queued' DO UPDATE" in sql
+    assert "RETURNING id" in sql
+    assert params == ("kant",)
+
+@pytest.mark.asyncio
+async def test_add_ingest_job_no_id_raises(mock_conn_cursor):
+    """Tests a RuntimeError is raised when no ID is returned."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchone.return_value = None
+
+    with pytest.raises(RuntimeError, match="Failed to queue ingest job."):
+        await job_queries.add_ingest_job(mock_conn, "kant")
+
+# --- Tests for claim_ingest_job ---
+
+@pytest.mark.asyncio
+async def test_claim_ingest_job_skips_locked_rows(mock_conn_cursor):
+    """Tests claiming locks the oldest queued job with SKIP LOCKED and counts the attempt."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchone.return_value = _job_row()
+
+    job = await job_queries.claim_ingest_job(mock_conn)
+
+    assert (job.id, job.path, job.status, job.attempts, job.progress) == (5, "kant", "running", 1, {})
+    lock_call, claim_call = mock_cursor.execute.await_args_list
+    assert lock_call.args == ("SELECT pg_advisory_xact_lock(%s);", (job_queries.CLAIM_LOCK_KEY,))
+    sql = claim_call.args[0]
+    assert "WHERE status = 'queued'" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "attempts = attempts + 1" in sql
+    # A file is never ingested by two jobs at once: same path, under a running path, or containing one
+    assert "r.status = 'running' AND (r.path = q.path OR r.path = '.' OR q.path = '.'" in sql
+    assert "starts_with(q.path, r.path || '/') OR starts_with(r.path, q.path || '/')" in sql
+
+@pytest.mark.asyncio
+async def test_claim_ingest_job_empty_queue(mock_conn_cursor):
+    """Tests None is returned when no job is queued."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchone.return_value = None
+
+    assert await job_queries.claim_ingest_job(mock_conn) is None
+
+# --- Tests for progress, finish and release ---
+
+@pytest.mark.asyncio
+async def test_update_ingest_job_progress_guarded_by_attempt(mock_conn_cursor):
+    """Tests progress is serialized as JSON and only written for the owning attempt."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.rowcount = 0
+
+    owned = await job_queries.update_ingest_job_progress(mock_conn, 5, 2, {"files_done": 3})
+
+    assert owned is False
+    sql, params = mock_cursor.execute.call_args[0]
+    assert "status = 'running' AND attempts = %s" in sql
+    assert json.loads(params[0]) == {"files_done": 3}
+    assert params[1:] == (5, 2)
+
+@pytest.mark.asyncio
+async def test_update_ingest_job_progress_heartbeat_only(mock_conn_cursor):
+    """Tests a heartbeat without progress keeps the stored progress."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.rowcount = 1
+
+    assert await job_queries.update_ingest_job_progress(mock_conn, 5, 1) is True
+    assert mock_cursor.execute.call_args[0][1] == (None, 5, 1)
+
+@pytest.mark.asyncio
+async def test_finish_ingest_job_records_outcome(mock_conn_cursor):
+    """Tests finishing stores the status, JSON result and error for the owning attempt."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.rowcount = 1
+
+    assert await job_queries.finish_ingest_job(mock_conn, 5, 1, "failed", result={"status": "Error"}, error="boom") is True
+    params = mock_cursor.execute.call_args[0][1]
+    assert params[0] == "failed"
+    assert json.loads(params[1]) == {"status": "Error"}
+    assert params[2:] == ("boom", 5, 1)
+
+@pytest.mark.asyncio
+async def test_finish_ingest_job_invalid_status(mock_conn_cursor):
+    """Tests only final statuses are accepted."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    with pytest.raises(ValueError, match="Invalid final ingest job status"):
+        await job_queries.finish_ingest_job(mock_conn, 5, 1, "running")
+    mock_cursor.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_release_ingest_job(mock_conn_cursor):
+    """Tests releasing returns a running job to the queue unless a queued job for its path supersedes it."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchone.side_effect = [("queued",), ("failed",), None]
+
+    assert await job_queries.release_ingest_job(mock_conn, 5, 1) is True
+    sql, params = mock_cursor.execute.call_args[0]
+    assert "CASE WHEN s.superseded_by IS NULL THEN 'queued' ELSE 'failed' END" in sql
+    assert params == (5, 1)
+    assert await job_queries.release_ingest_job(mock_conn, 5, 1) is True # Superseded
+    assert await job_queries.release_ingest_job(mock_conn, 5, 1) is False # No longer owned
+
+# --- Tests for get_ingest_job and requeue_stale_ingest_jobs ---
+
+@pytest.mark.asyncio
+async def test_get_ingest_job(mock_conn_cursor):
+    """Tests fetching a job by ID, and None for an unknown ID."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchone.side_effect = [_job_row("succeeded", progress={"files_done": 1}, result={"status": "Success"}), None]
+
+    job = await job_queries.get_ingest_job(mock_conn, 5)
+    assert (job.status, job.progress, job.result) == ("succeeded", {"files_done": 1}, {"status": "Success"})
+    assert await job_queries.get_ingest_job(mock_conn, 6) is None
+
+@pytest.mark.asyncio
+async def test_requeue_stale_ingest_jobs_counts(mock_conn_cursor):
+    """Tests stale jobs are requeued or failed by attempts, and the counts are returned."""
+    mock_conn, mock_cursor = mock_conn_cursor
+    mock_cursor.fetchall.return_value = [("queued",), ("failed",), ("queued",)]
+
+    assert await job_queries.requeue_stale_ingest_jobs(mock_conn, 300.0, 3) == (2, 1)
+    sql, params = mock_cursor.execute.call_args[0]
+    assert "heartbeat_at < NOW() - make_interval(secs => %s)" in sql
+    assert "attempts < %s AND superseded_by IS NULL AS requeue" in sql
+    assert params == (3, 300.0)
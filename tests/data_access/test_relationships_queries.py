@@ -518,4 +518,15 @@ async def test_get_relationships_invalid_direction_again(mock_get_conn): # Renam
     mock_conn, mock_cursor = mock_get_conn
 
     with pytest.raises(ValueError, match="Invalid direction specified"):
-        await rel_queries.get_relationships(mock_conn, "doc:1", direction="sideways")
\ No newline at end of file
+        await rel_queries.get_relationships(mock_conn, "doc:1", direction="sideways")
+@pytest.mark.asyncio
+async def test_delete_document_references(mock_get_conn):
+    """Tests deleting the 'cites' relationships sourced from a document's chunks."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.rowcount = 3
+
+    assert await rel_queries.delete_document_references(mock_conn, 5) == 3
+    sql, params = mock_cursor.execute.await_args.args
+    assert "relation_type = 'cites'" in sql
+    assert "SELECT 'chunk:' || id FROM chunks WHERE doc_id = %s" in sql
+    assert params == (5,)
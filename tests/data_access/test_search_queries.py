@@ -29,10 +29,16 @@ def mock_format_vector(mocker):
     # Patch the function where it's looked up (in the search queries module)
     return mocker.patch('src.philograph.data_access.queries.search.format_vector_for_pgvector')
 
+def _set_config(*pairs):
+    """Expected transaction-local settings statement for (name, value) pairs, in order."""
+    sql = "SELECT " + ", ".join("set_config(%s, %s, true)" for _ in pairs) + ";"
+    return sql, [item for pair in pairs for item in pair]
+
 # --- Test Vector Search Operations ---
 
 @pytest.mark.asyncio
 @patch('src.philograph.config.TARGET_EMBEDDING_DIMENSION', 3) # Corrected config var
+@patch('src.philograph.config.PGVECTOR_HNSW_EF_SEARCH', 40)
 async def test_vector_search_chunks_success(mock_format_vector, mock_get_conn):
     """Tests basic vector search returns correctly mapped SearchResult objects."""
     mock_conn, mock_cursor = mock_get_conn
@@ -49,24 +55,6 @@ async def test_vector_search_chunks_success(mock_format_vector, mock_get_conn):
     ]
     mock_cursor.fetchall.return_value = db_results_tuples
 
-    # Construct expected SQL (adjust based on actual implementation in search_queries.py)
-    expected_base_sql = """
-        SELECT
-            c.id as chunk_id,
-            c.section_id,
-            s.doc_id,
-            c.text_content,
-            c.embedding <=> %s AS distance,
-            d.title as doc_title,
-            d.author as doc_author,
-            d.year as doc_year,
-            d.source_path as doc_source_path,
-            s.title as section_title,
-            c.sequence as chunk_sequence
-        FROM chunks c
-        JOIN sections s ON c.section_id = s.id
-        JOIN documents d ON s.doc_id = d.id
-    """
     # Adjusted to match the $N placeholder style used in the implementation
     # Use the exact SQL string from the 'Actual' part of the pytest error
     expected_sql = """
@@ -75,17 +63,20 @@ async def test_vector_search_chunks_success(mock_format_vector, mock_get_conn):
             c.section_id,
             s.doc_id,
             c.text_content,
-            c.embedding <=> %s AS distance,
+            c.distance,
             d.title as doc_title,
             d.author as doc_author,
             d.year as doc_year,
             d.source_path as doc_source_path,
             s.title as section_title,
             c.sequence as chunk_sequence
-        FROM chunks c
+        FROM (
+            SELECT c.id, c.section_id, c.text_content, c.sequence, c.embedding <=> %s AS distance
+            FROM chunks c
+     ORDER BY distance, c.id LIMIT %s) c
         JOIN sections s ON c.section_id = s.id
         JOIN documents d ON s.doc_id = d.id
-     ORDER BY distance LIMIT %s"""
+        ORDER BY c.distance, c.id"""
     expected_params = [formatted_query_embedding, top_k] # Use list for params
 
     # Call the function under test
@@ -93,7 +84,12 @@ async def test_vector_search_chunks_success(mock_format_vector, mock_get_conn):
 
     # Assertions
     mock_format_vector.assert_called_once_with(query_embedding)
-    mock_cursor.execute.assert_awaited_once_with(expected_sql, expected_params)
+    # Every search sets its settings explicitly rather than relying on the server defaults
+    assert mock_cursor.execute.await_count == 2
+    assert mock_cursor.execute.await_args_list[0].args == _set_config(
+        ("hnsw.ef_search", "40"), ("enable_indexscan", "on"), ("hnsw.iterative_scan", "off")
+    )
+    mock_cursor.execute.assert_awaited_with(expected_sql, expected_params)
     mock_cursor.fetchall.assert_awaited_once()
     assert len(search_results) == top_k
     assert all(isinstance(res, SearchResult) for res in search_results)
@@ -105,6 +101,7 @@ async def test_vector_search_chunks_success(mock_format_vector, mock_get_conn):
 
 @pytest.mark.asyncio
 @patch('src.philograph.config.TARGET_EMBEDDING_DIMENSION', 3) # Corrected config var
+@patch('src.philograph.config.PGVECTOR_HNSW_EF_SEARCH', 40)
 async def test_vector_search_chunks_with_filters(mock_format_vector, mock_get_conn):
     """Tests vector search with metadata filters."""
     mock_conn, mock_cursor = mock_get_conn
@@ -115,30 +112,11 @@ async def test_vector_search_chunks_with_filters(mock_format_vector, mock_get_co
     top_k = 5
     filters = {"author": "Test Author", "year": 2023, "doc_id": 123}
 
-    # Simulate database results (empty for simplicity, focus is on query construction)
-    mock_cursor.fetchall.return_value = []
+    # The author lookup matches documents 3 and 4; search results are empty (focus is on query construction)
+    mock_cursor.fetchall.side_effect = [[("%test author%", [3, 4])], []]
 
-    # Construct expected SQL (adjust based on actual implementation in search_queries.py)
-    expected_base_sql = """
-        SELECT
-            c.id as chunk_id,
-            c.section_id,
-            s.doc_id,
-            c.text_content,
-            c.embedding <=> %s AS distance,
-            d.title as doc_title,
-            d.author as doc_author,
-            d.year as doc_year,
-            d.source_path as doc_source_path,
-            s.title as section_title,
-            c.sequence as chunk_sequence
-        FROM chunks c
-        JOIN sections s ON c.section_id = s.id
-        JOIN documents d ON s.doc_id = d.id
-    """
     # Adjusted to match the $N placeholder style used in the implementation
-    expected_where = " WHERE d.author ILIKE %s AND d.year = %s AND d.id = %s" # Use %s placeholders
-    expected_order_limit = " ORDER BY distance LIMIT %s" # Use %s placeholder
+    # Filters use the denormalized chunk columns inside the nearest-chunk subquery; the author is resolved to document IDs
     # Use the exact SQL string from the 'Actual' part of the pytest error
     expected_full_sql = """
         SELECT
@@ -146,22 +124,25 @@ async def test_vector_search_chunks_with_filters(mock_format_vector, mock_get_co
             c.section_id,
             s.doc_id,
             c.text_content,
-            c.embedding <=> %s AS distance,
+            c.distance,
             d.title as doc_title,
             d.author as doc_author,
             d.year as doc_year,
             d.source_path as doc_source_path,
             s.title as section_title,
             c.sequence as chunk_sequence
-        FROM chunks c
+        FROM (
+            SELECT c.id, c.section_id, c.text_content, c.sequence, c.embedding <=> %s AS distance
+            FROM chunks c
+     WHERE c.doc_id = ANY(%s) AND c.doc_year = %s AND c.doc_id = %s ORDER BY distance, c.id LIMIT %s) c
         JOIN sections s ON c.section_id = s.id
         JOIN documents d ON s.doc_id = d.id
-     WHERE d.author ILIKE %s AND d.year = %s AND d.id = %s ORDER BY distance LIMIT %s"""
+        ORDER BY c.distance, c.id"""
 
-    # Parameters for %s placeholders: embedding, author, year, doc_id, top_k
+    # Parameters for %s placeholders: embedding, author doc IDs, year, doc_id, top_k
     expected_params = [
         formatted_query_embedding,
-        f"%{filters['author']}%",
+        [3, 4],
         filters['year'],
         filters['doc_id'],
         top_k
@@ -172,9 +153,34 @@ async def test_vector_search_chunks_with_filters(mock_format_vector, mock_get_co
 
     # Assertions
     mock_format_vector.assert_called_once_with(query_embedding)
+    # The author is resolved through the trigram-indexed documents.author_key first; filtered searches
+    # then enable an iterative index scan (transaction-local) and run the query
+    assert mock_cursor.execute.await_count == 3
+    assert mock_cursor.execute.await_args_list[0].args[1] == (["%test author%"],)
+    mock_cursor.execute.assert_any_await(*_set_config(
+        ("hnsw.ef_search", "40"), ("enable_indexscan", "on"),
+        ("hnsw.iterative_scan", config.PGVECTOR_HNSW_ITERATIVE_SCAN), ("hnsw.max_scan_tuples", str(config.PGVECTOR_HNSW_MAX_SCAN_TUPLES))
+    ))
     # Check the constructed SQL and parameters
-    mock_cursor.execute.assert_awaited_once_with(expected_full_sql, expected_params)
-    mock_cursor.fetchall.assert_awaited_once()
+    mock_cursor.execute.assert_awaited_with(expected_full_sql, expected_params)
+    assert mock_cursor.fetchall.await_count == 2
+
+@pytest.mark.asyncio
+async def test_vector_search_chunks_unmatched_author_skips_search(mock_format_vector, mock_get_conn):
+    """Tests that an author filter matching no document returns no results without running the vector scan."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_cursor.fetchall.return_value = [("%nobody%", [])]
+
+    results = await search_queries.vector_search_chunks(mock_conn, [0.1], 5, {"author": "Nobody"})
+
+    assert results == []
+    mock_cursor.execute.assert_awaited_once()
+    assert "d.author_key LIKE p.pattern" in mock_cursor.execute.await_args.args[0]
+
+def test_author_pattern_normalizes_and_escapes():
+    """Tests that author filter values are normalized and LIKE wildcards in them are matched literally."""
+    assert search_queries._author_pattern("  Immanuel   KANT ") == "%immanuel kant%"
+    assert search_queries._author_pattern("100%_a\\b") == "%100\\%\\_a\\\\b%"
 
 # Note: Dimension check might be moved outside DB layer. Remove/move if needed.
 # @pytest.mark.asyncio
@@ -224,4 +230,269 @@ async def test_vector_search_chunks_db_error(mock_format_vector, mock_get_conn):
     # Assertions
     mock_format_vector.assert_called_once_with(query_embedding)
     mock_cursor.execute.assert_awaited_once() # Ensure execute was called
-    mock_cursor.fetchall.assert_not_awaited() # Fetch should not be called on error
\ No newline at end of file
+    mock_cursor.fetchall.assert_not_awaited() # Fetch should not be called on error
+@pytest.mark.asyncio
+async def test_vector_search_chunks_with_offset(mock_format_vector, mock_get_conn):
+    """Tests that a non-zero offset adds an OFFSET clause after LIMIT."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_format_vector.return_value = "[0.1,0.2,0.3]"
+    mock_cursor.fetchall.return_value = []
+
+    await search_queries.vector_search_chunks(mock_conn, [0.1, 0.2, 0.3], 5, {"year": 2023}, offset=10)
+
+    sql, params = mock_cursor.execute.await_args.args
+    assert "WHERE c.doc_year = %s ORDER BY distance, c.id LIMIT %s OFFSET %s) c" in sql
+    assert params == ["[0.1,0.2,0.3]", 2023, 5, 10]
+
+@pytest.mark.asyncio
+async def test_vector_search_chunks_after_keyset_position(mock_format_vector, mock_get_conn):
+    """Tests that `after` continues strictly after a (distance, chunk id) position with an iterative scan."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_format_vector.return_value = "[0.1]"
+    mock_cursor.fetchall.return_value = []
+
+    await search_queries.vector_search_chunks(mock_conn, [0.1], 5, after=(0.25, 42), scan_depth=2000)
+
+    settings_call, query_call = mock_cursor.execute.await_args_list
+    # The index still walks the 2000 rows of earlier pages, so the scan budget covers them
+    expected_tuples = (2000 + 5) * config.PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW
+    assert settings_call.args[1][2:] == [
+        "enable_indexscan", "on", "hnsw.iterative_scan", config.PGVECTOR_HNSW_ITERATIVE_SCAN,
+        "hnsw.max_scan_tuples", str(expected_tuples)
+    ]
+    sql, params = query_call.args
+    assert "WHERE (c.embedding <=> %s, c.id) > (%s, %s) ORDER BY distance, c.id LIMIT %s) c" in sql
+    assert params == ["[0.1]", "[0.1]", 0.25, 42, 5]
+
+@patch('src.philograph.config.PGVECTOR_HNSW_MAX_SCAN_TUPLES_LIMIT', 100000)
+def test_search_settings_scan_budget_grows_with_depth_up_to_limit():
+    """Tests that the iterative scan budget covers the rows up to the end of the page, within the configured bounds."""
+    def budget(scan_depth):
+        return int(search_queries._search_settings(10, None, 0, None, False, keyset=True, scan_depth=scan_depth)["hnsw.max_scan_tuples"])
+    assert budget(0) == config.PGVECTOR_HNSW_MAX_SCAN_TUPLES
+    assert budget(990) == 1000 * config.PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW
+    assert budget(10 ** 6) == 100000
+    assert search_queries.max_keyset_depth() == 100000 // config.PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW
+
+@pytest.mark.asyncio
+async def test_hybrid_search_rejects_keyset_position(mock_format_vector):
+    """Tests that keyset positions are refused for hybrid searches, whose fused order is not stable across pages."""
+    with pytest.raises(ValueError, match="only supported for vector searches"):
+        search_queries._prepare_search([0.1], 5, None, 0, None, False, "Geist", after=(0.1, 1))
+
+@pytest.mark.asyncio
+@patch('src.philograph.config.PGVECTOR_HNSW_EF_SEARCH', 40)
+async def test_vector_search_chunks_batch_pipelines_queries(mock_format_vector):
+    """Tests that batch search sends every query before reading results, inside one pipeline."""
+    mock_format_vector.side_effect = lambda emb: str(list(emb))
+    mock_conn = MagicMock(spec=psycopg.AsyncConnection)
+    cursors = [AsyncMock(spec=psycopg.AsyncCursor) for _ in range(2)]
+    events = []
+    for n, cur in enumerate(cursors):
+        cur.execute.side_effect = lambda *args, n=n: events.append(f"execute{n}")
+        cur.fetchall.side_effect = lambda n=n: events.append(f"fetch{n}") or [
+            (100 + n, 7, 3, f"Chunk {n}", 0.1 * n, 'Doc', 'Auth', 2020, '/p.txt', 'Sec', n)
+        ]
+    mock_conn.cursor.side_effect = cursors
+
+    results = await search_queries.vector_search_chunks_batch(mock_conn, [
+        ([0.1, 0.2], 5, None, 0, None, False),
+        ([0.3, 0.4], 3, {"doc_id": 3}, 6, None, True),
+    ])
+
+    mock_conn.pipeline.assert_called_once()
+    assert events == ["execute0", "execute1", "fetch0", "fetch1"]
+    # The first query sets everything; the exact-mode query then only changes index scans
+    assert [call.args for call in mock_conn.execute.await_args_list] == [
+        _set_config(("hnsw.ef_search", "40"), ("enable_indexscan", "on"), ("hnsw.iterative_scan", "off")),
+        _set_config(("enable_indexscan", "off")),
+    ]
+    sql, params = cursors[1].execute.await_args.args
+    assert "WHERE c.doc_id = %s ORDER BY distance, c.id LIMIT %s OFFSET %s) c" in sql
+    assert params == ["[0.3, 0.4]", 3, 3, 6]
+    assert [[r.chunk_id for r in rows] for rows in results] == [[100], [101]]
+    assert all(cur.close.await_count == 1 for cur in cursors)
+
+@pytest.mark.asyncio
+async def test_vector_search_chunks_batch_resolves_authors_once(mock_format_vector):
+    """Tests that a batch resolves all author filters in one lookup and skips searches matching no document."""
+    mock_format_vector.return_value = "[0.1]"
+    mock_conn = MagicMock(spec=psycopg.AsyncConnection)
+    lookup = AsyncMock(spec=psycopg.AsyncCursor)
+    lookup.__aenter__.return_value = lookup
+    lookup.fetchall.return_value = [("%hegel%", [3, 8]), ("%nobody%", [])]
+    search_cursor = AsyncMock(spec=psycopg.AsyncCursor)
+    search_cursor.fetchall.return_value = [(100, 7, 3, "Chunk", 0.1, 'Doc', 'Hegel', 1807, '/p.txt', 'Sec', 0)]
+    mock_conn.cursor.side_effect = [lookup, search_cursor]
+
+    results = await search_queries.vector_search_chunks_batch(mock_conn, [
+        ([0.1], 5, {"author": "Hegel"}, 0, None, False),
+        ([0.1], 5, {"author": "Nobody"}, 0, None, False),
+    ])
+
+    lookup.execute.assert_awaited_once()
+    assert lookup.execute.await_args.args[1] == (["%hegel%", "%nobody%"],)
+    sql, params = search_cursor.execute.await_args.args
+    assert "WHERE c.doc_id = ANY(%s) ORDER BY distance" in sql
+    assert params[1] == [3, 8]
+    assert [[r.chunk_id for r in rows] for rows in results] == [[100], []]
+
+@pytest.mark.asyncio
+async def test_vector_search_chunks_batch_db_error(mock_format_vector):
+    """Tests that a database error in a batch is wrapped and cursors are still closed."""
+    mock_format_vector.return_value = "[0.1]"
+    mock_conn = MagicMock(spec=psycopg.AsyncConnection)
+    cursor = AsyncMock(spec=psycopg.AsyncCursor)
+    cursor.fetchall.side_effect = psycopg.Error("Simulated pipeline error")
+    mock_conn.cursor.return_value = cursor
+
+    with pytest.raises(RuntimeError, match="Database error during vector search"):
+        await search_queries.vector_search_chunks_batch(mock_conn, [([0.1], 5, None, 0, None, False)])
+
+    cursor.close.assert_awaited_once()
+
+@pytest.mark.asyncio
+@patch('src.philograph.config.PGVECTOR_HNSW_EF_SEARCH', 40)
+async def test_vector_search_chunks_ef_search_override(mock_format_vector, mock_get_conn):
+    """Tests that ef_search is set transaction-locally and raised to cover top_k + offset."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_format_vector.return_value = "[0.1]"
+    mock_cursor.fetchall.return_value = []
+
+    await search_queries.vector_search_chunks(mock_conn, [0.1], 10, ef_search=200)
+    first_call = mock_cursor.execute.await_args_list[0]
+    assert first_call.args == _set_config(("hnsw.ef_search", "200"), ("enable_indexscan", "on"), ("hnsw.iterative_scan", "off"))
+
+    mock_cursor.execute.reset_mock()
+    await search_queries.vector_search_chunks(mock_conn, [0.1], 50, offset=30)
+    first_call = mock_cursor.execute.await_args_list[0]
+    assert first_call.args == _set_config(("hnsw.ef_search", "80"), ("enable_indexscan", "on"), ("hnsw.iterative_scan", "off"))
+
+@pytest.mark.asyncio
+@patch('src.philograph.config.PGVECTOR_HNSW_EF_SEARCH', 40)
+async def test_vector_search_chunks_exact_mode(mock_format_vector, mock_get_conn):
+    """Tests that exact mode disables index scans instead of tuning the HNSW scan."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_format_vector.return_value = "[0.1]"
+    mock_cursor.fetchall.return_value = []
+
+    await search_queries.vector_search_chunks(mock_conn, [0.1], 5, {"year": 2023}, exact=True)
+
+    first_call = mock_cursor.execute.await_args_list[0]
+    assert first_call.args == _set_config(("hnsw.ef_search", "40"), ("enable_indexscan", "off"), ("hnsw.iterative_scan", "off"))
+    assert mock_cursor.execute.await_count == 2
+
+@pytest.mark.asyncio
+@patch('src.philograph.config.PGVECTOR_HNSW_ITERATIVE_SCAN', "off")
+@patch('src.philograph.config.PGVECTOR_HNSW_EF_SEARCH', 40)
+async def test_vector_search_chunks_iterative_scan_off_sends_no_iterative_settings(mock_format_vector, mock_get_conn):
+    """Tests that with iterative scans off no hnsw.iterative_scan setting is sent (pgvector < 0.8 rejects it)."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_format_vector.return_value = "[0.1]"
+    mock_cursor.fetchall.return_value = []
+
+    await search_queries.vector_search_chunks(mock_conn, [0.1], 5, {"year": 2023})
+    await search_queries.vector_search_chunks(mock_conn, [0.1], 5, exact=True)
+
+    settings_calls = [call.args for call in mock_cursor.execute.await_args_list if "set_config" in call.args[0]]
+    assert settings_calls == [
+        _set_config(("hnsw.ef_search", "40"), ("enable_indexscan", "on")),
+        _set_config(("hnsw.ef_search", "40"), ("enable_indexscan", "off")),
+    ]
+
+@pytest.mark.asyncio
+async def test_vector_search_chunks_invalid_ef_search(mock_format_vector, mock_get_conn):
+    """Tests that an out-of-range ef_search is rejected before touching the database."""
+    mock_conn, mock_cursor = mock_get_conn
+    with pytest.raises(ValueError, match="ef_search must be between"):
+        await search_queries.vector_search_chunks(mock_conn, [0.1], 5, ef_search=5000)
+    mock_cursor.execute.assert_not_awaited()
+
+# --- Test Hybrid Search ---
+
+@pytest.mark.asyncio
+@patch('src.philograph.config.SEARCH_HYBRID_CANDIDATES', 100)
+@patch('src.philograph.config.SEARCH_RRF_K', 60)
+@patch('src.philograph.config.SEARCH_TEXT_CONFIG', "english")
+async def test_hybrid_search_chunks_fuses_rankings_in_one_query(mock_format_vector, mock_get_conn):
+    """Tests that hybrid search sends one fused statement, sizes ef_search for the candidates and maps the score."""
+    mock_conn, mock_cursor = mock_get_conn
+    mock_format_vector.return_value = "[0.1]"
+    mock_cursor.fetchall.side_effect = [
+        [("%hegel%", [3])],
+        [(5, 7, 3, "Aufhebung text", 0.4, 'Doc', 'Hegel', 1807, '/p.txt', 'Sec', 0, 0.0325)]
+    ]
+
+    results = await search_queries.hybrid_search_chunks(mock_conn, "Aufhebung", [0.1], 10, {"author": "Hegel"}, offset=20)
+
+    _, settings_call, query_call = mock_cursor.execute.await_args_list
+    assert settings_call.args[1] == [
+        "hnsw.ef_search", "100", "enable_indexscan", "on",
+        "hnsw.iterative_scan", config.PGVECTOR_HNSW_ITERATIVE_SCAN, "hnsw.max_scan_tuples", str(config.PGVECTOR_HNSW_MAX_SCAN_TUPLES)
+    ]
+    sql, params = query_call.args
+    assert "websearch_to_tsquery(%s::regconfig, %s)" in sql
+    assert "c.text_tsv @@ q.query AND c.doc_id = ANY(%s)" in sql
+    assert sql.rstrip().endswith("ORDER BY f.score DESC, distance LIMIT %s OFFSET %s")
+    assert params == ["[0.1]", [3], 100, "english", "Aufhebung", [3], 100, 60, "[0.1]", 10, 20]
+    assert results[0].score == pytest.approx(0.0325)
+    assert results[0].distance == pytest.approx(0.4)
+
+@pytest.mark.asyncio
+async def test_hybrid_search_chunks_requires_query_text(mock_format_vector, mock_get_conn):
+    """Tests that hybrid search rejects an empty lexical query before touching the database."""
+    mock_conn, mock_cursor = mock_get_conn
+    with pytest.raises(ValueError, match="Query text cannot be empty"):
+        await search_queries.hybrid_search_chunks(mock_conn, "  ", [0.1], 5)
+    mock_cursor.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_vector_search_chunks_batch_mixes_hybrid_queries(mock_format_vector):
+    """Tests that a batch search with a trailing query text runs that search as hybrid."""
+    mock_format_vector.return_value = "[0.1]"
+    mock_conn = MagicMock(spec=psycopg.AsyncConnection)
+    cursors = [AsyncMock(spec=psycopg.AsyncCursor) for _ in range(2)]
+    for cur in cursors:
+        cur.fetchall.return_value = []
+    mock_conn.cursor.side_effect = cursors
+
+    await search_queries.vector_search_chunks_batch(mock_conn, [
+        ([0.1], 5, None, 0, None, False),
+        ([0.1], 5, None, 0, None, False, "différance"),
+    ])
+
+    assert "websearch_to_tsquery" not in cursors[0].execute.await_args.args[0]
+    sql, params = cursors[1].execute.await_args.args
+    assert "websearch_to_tsquery" in sql
+    assert "différance" in params
+
+# --- Test Streamed Search ---
+
+@pytest.mark.asyncio
+async def test_stream_search_chunks_reads_server_side_cursor(mock_format_vector):
+    """Tests that a streamed search applies settings on a regular cursor and yields rows from a named cursor."""
+    mock_format_vector.return_value = "[0.1]"
+    mock_conn = MagicMock(spec=psycopg.AsyncConnection)
+    settings_cursor = AsyncMock(spec=psycopg.AsyncCursor)
+    settings_cursor.__aenter__.return_value = settings_cursor
+    stream_cursor = AsyncMock(spec=psycopg.AsyncServerCursor)
+    stream_cursor.__aenter__.return_value = stream_cursor
+    stream_cursor.__aiter__.return_value = [
+        (100 + n, 7, 3, f"Chunk {n}", 0.1 * n, 'Doc', 'Auth', 2020, '/p.txt', 'Sec', n) for n in range(3)
+    ]
+    mock_conn.cursor.side_effect = [settings_cursor, stream_cursor]
+
+    results = [r async for r in search_queries.stream_search_chunks(mock_conn, [0.1], 5000, fetch_size=50)]
+
+    assert [r.chunk_id for r in results] == [100, 101, 102]
+    assert mock_conn.cursor.call_args_list[1].kwargs == {"name": "philograph_search_stream"}
+    assert stream_cursor.itersize == 50
+    # Pages larger than the ef_search cap keep reading the index with an iterative scan
+    settings_sql, settings_params = settings_cursor.execute.await_args.args
+    assert settings_params == [
+        "hnsw.ef_search", "1000", "enable_indexscan", "on",
+        "hnsw.iterative_scan", config.PGVECTOR_HNSW_ITERATIVE_SCAN, "hnsw.max_scan_tuples", str(5000 * config.PGVECTOR_HNSW_SCAN_TUPLES_PER_ROW)
+    ]
+    sql, params = stream_cursor.execute.await_args.args
+    assert sql.rstrip().endswith("ORDER BY c.distance, c.id")
+    assert params == ["[0.1]", 5000]
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from philograph.ingestion.extraction_pool import ExtractionPool
+
+# Mark all tests in this module as asyncio
+pytestmark = pytest.mark.asyncio
+
+# Worker-side functions must be picklable module-level callables (spawned processes import this module)
+
+def _parse(path: str) -> dict:
+    return {"path": path, "pid": os.getpid()}
+
+def _crash(path: str) -> None:
+    os._exit(1)
+
+def _hang_ignoring_sigterm(path: str) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(30)
+
+async def test_extraction_pool_invalid_mode():
+    """Test that an unknown executor mode is rejected."""
+    with pytest.raises(ValueError, match="Invalid extraction executor mode"):
+        ExtractionPool(mode="fibers")
+
+async def test_extraction_pool_inline_runs_on_caller():
+    """Test that inline mode calls the function directly."""
+    pool = ExtractionPool(mode="inline")
+    result = await pool.run(_parse, "a.epub")
+    assert result == {"path": "a.epub", "pid": os.getpid()}
+
+async def test_extraction_pool_thread_mode():
+    """Test that thread mode returns the function result."""
+    pool = ExtractionPool(mode="thread", max_workers=1)
+    try:
+        result = await pool.run(_parse, "a.txt")
+    finally:
+        await pool.shutdown()
+    assert result["path"] == "a.txt"
+
+async def test_extraction_pool_process_mode_runs_out_of_process():
+    """Test that process mode executes the function in a separate worker process."""
+    pool = ExtractionPool(mode="process", max_workers=1, timeout=60)
+    try:
+        result = await pool.run(_parse, "a.epub")
+    finally:
+        await pool.shutdown()
+    assert result["path"] == "a.epub"
+    assert result["pid"] != os.getpid()
+
+async def test_extraction_pool_timeout_kills_worker_and_recovers():
+    """Test that a timed-out extraction raises RuntimeError and the pool is usable afterwards."""
+    pool = ExtractionPool(mode="process", max_workers=1, timeout=60)
+    try:
+        await pool.run(_parse, "warmup") # Pay the spawn cost before enforcing a short timeout
+        pool.timeout = 0.5
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="timed out"):
+            await pool.run(time.sleep, 30)
+        assert time.monotonic() - start < 10
+        pool.timeout = 60
+        result = await pool.run(_parse, "after.epub")
+    finally:
+        await pool.shutdown()
+    assert result["path"] == "after.epub"
+
+async def test_extraction_pool_crash_is_isolated():
+    """Test that a crashing worker surfaces as RuntimeError without affecting the caller."""
+    pool = ExtractionPool(mode="process", max_workers=1, timeout=60)
+    try:
+        with pytest.raises(RuntimeError, match="crashed"):
+            await pool.run(_crash, "bad.epub")
+        result = await pool.run(_parse, "good.epub")
+    finally:
+        await pool.shutdown()
+    assert result["path"] == "good.epub"
+
+def _slow_parse(path: str, seconds: float) -> dict:
+    time.sleep(seconds)
+    return {"path": path, "pid": os.getpid()}
+
+async def test_extraction_pool_timeout_starts_when_a_worker_picks_the_call_up():
+    """Test that time spent queued behind another file does not count against a call's timeout."""
+    pool = ExtractionPool(mode="process", max_workers=1, timeout=60)
+    try:
+        await pool.run(_parse, "warmup")
+        pool.timeout = 1.5
+        # Run one after the other on the single worker: the second finishes ~2s after submission
+        results = await asyncio.gather(pool.run(_slow_parse, "a.epub", 1.0), pool.run(_slow_parse, "b.epub", 1.0))
+    finally:
+        await pool.shutdown()
+    assert [r["path"] for r in results] == ["a.epub", "b.epub"]
+
+async def test_extraction_pool_timeout_kills_only_the_offending_worker():
+    """Test that a timed-out call neither fails nor restarts the file running next to it."""
+    pool = ExtractionPool(mode="process", max_workers=2, timeout=60)
+    try:
+        warmup = await asyncio.gather(pool.run(_slow_parse, "warmup-1", 0.2), pool.run(_slow_parse, "warmup-2", 0.2))
+        pool.timeout = 3.0
+
+        async def run_neighbour():
+            await asyncio.sleep(1.0) # Still running when the stuck call times out at 3s
+            return await pool.run(_slow_parse, "neighbour.epub", 2.5)
+
+        stuck, neighbour = await asyncio.gather(pool.run(time.sleep, 30), run_neighbour(), return_exceptions=True)
+    finally:
+        await pool.shutdown()
+    assert isinstance(stuck, RuntimeError) and "timed out" in str(stuck)
+    assert neighbour["path"] == "neighbour.epub"
+    assert neighbour["pid"] in {result["pid"] for result in warmup} # Finished on its original worker, not re-run
+
+async def test_extraction_pool_kill_does_not_block_the_event_loop():
+    """Test that killing a stuck worker (which ignores SIGTERM) happens off the loop and closes its pipe."""
+    pool = ExtractionPool(mode="process", max_workers=1, timeout=60)
+    longest_gap = 0.0
+
+    async def tick():
+        nonlocal longest_gap
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(0.05)
+            now = time.monotonic()
+            longest_gap, last = max(longest_gap, now - last), now
+
+    try:
+        await pool.run(_parse, "warmup")
+        worker = pool._idle_workers[0]
+        pool.timeout = 0.5
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(RuntimeError, match="timed out"):
+            await pool.run(_hang_ignoring_sigterm, "stuck.epub")
+        await asyncio.gather(*list(pool._reaping)) # SIGTERM is ignored: the worker is killed after ~1s
+        ticker.cancel()
+    finally:
+        await pool.shutdown()
+    assert longest_gap < 0.5
+    assert not worker.process.is_alive()
+    assert worker.conn.closed
@@ -3,6 +3,7 @@ import json
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
 import httpx
 
@@ -11,6 +12,7 @@ from philograph import config
 from philograph.ingestion import pipeline
 from philograph.utils import text_processing # For mocking extraction functions
 from philograph.utils import file_utils # For mocking file utils
+from philograph.ingestion.extraction_pool import ExtractionPool
 
 # Mark all tests in this module as asyncio
 pytestmark = pytest.mark.asyncio
@@ -19,10 +21,10 @@ pytestmark = pytest.mark.asyncio
 
 async def test_get_embeddings_in_batches_empty_input():
     """
-    Test that get_embeddings_in_batches returns an empty list for empty input.
+    Test that get_embeddings_in_batches returns an empty matrix for empty input.
     """
     result = await pipeline.get_embeddings_in_batches([])
-    assert result == []
+    assert result.shape == (0, config.TARGET_EMBEDDING_DIMENSION)
 
 @patch("philograph.utils.http_client.make_async_request")
 async def test_get_embeddings_in_batches_success(mock_make_request):
@@ -40,7 +42,7 @@ async def test_get_embeddings_in_batches_success(mock_make_request):
 
     mock_response = AsyncMock(spec=httpx.Response)
     mock_response.status_code = 200
-    async def mock_json():
+    def mock_json(): # httpx.Response.json() is synchronous
         return {
             "data": [
                 {"embedding": mock_embedding_1},
@@ -55,7 +57,9 @@ async def test_get_embeddings_in_batches_success(mock_make_request):
 
     result = await pipeline.get_embeddings_in_batches(chunks_data, batch_size=5)
 
-    assert result == expected_embeddings
+    assert result.dtype == np.float32
+    assert result.shape == (2, expected_dimension)
+    np.testing.assert_array_equal(result, np.asarray(expected_embeddings, dtype=np.float32))
     mock_make_request.assert_called_once()
     call_args, call_kwargs = mock_make_request.call_args
     assert call_args[0] == "POST"
@@ -106,7 +110,7 @@ async def test_get_embeddings_in_batches_missing_data_field(mock_make_request):
     chunks_data = [(1, "Chunk text", 0)]
     mock_response = AsyncMock(spec=httpx.Response)
     mock_response.status_code = 200
-    async def mock_json():
+    def mock_json(): # httpx.Response.json() is synchronous
         return {"model": "mock_model", "usage": {}}
     mock_response.json = mock_json
     mock_response.raise_for_status = MagicMock()
@@ -125,7 +129,7 @@ async def test_get_embeddings_in_batches_mismatched_data_length(mock_make_reques
     mock_embedding_1 = [0.1] * config.TARGET_EMBEDDING_DIMENSION
     mock_response = AsyncMock(spec=httpx.Response)
     mock_response.status_code = 200
-    async def mock_json():
+    def mock_json(): # httpx.Response.json() is synchronous
         return {"data": [{"embedding": mock_embedding_1}], "model": "mock", "usage": {}} # Only one embedding
     mock_response.json = mock_json
     mock_response.raise_for_status = MagicMock()
@@ -147,22 +151,22 @@ async def test_get_embeddings_in_batches_multiple_batches(mock_make_request):
 
     async def mock_response_batch_1(*args, **kwargs):
         mock_resp = AsyncMock(spec=httpx.Response); mock_resp.status_code = 200
-        async def mj(): return {"data": [{"embedding": mock_embeddings[0]}, {"embedding": mock_embeddings[1]}], "model": "mock", "usage": {}}
+        def mj(): return {"data": [{"embedding": mock_embeddings[0]}, {"embedding": mock_embeddings[1]}], "model": "mock", "usage": {}}
         mock_resp.json = mj; mock_resp.raise_for_status = MagicMock(); return mock_resp
     async def mock_response_batch_2(*args, **kwargs):
         mock_resp = AsyncMock(spec=httpx.Response); mock_resp.status_code = 200
-        async def mj(): return {"data": [{"embedding": mock_embeddings[2]}, {"embedding": mock_embeddings[3]}], "model": "mock", "usage": {}}
+        def mj(): return {"data": [{"embedding": mock_embeddings[2]}, {"embedding": mock_embeddings[3]}], "model": "mock", "usage": {}}
         mock_resp.json = mj; mock_resp.raise_for_status = MagicMock(); return mock_resp
     async def mock_response_batch_3(*args, **kwargs):
         mock_resp = AsyncMock(spec=httpx.Response); mock_resp.status_code = 200
-        async def mj(): return {"data": [{"embedding": mock_embeddings[4]}], "model": "mock", "usage": {}}
+        def mj(): return {"data": [{"embedding": mock_embeddings[4]}], "model": "mock", "usage": {}}
         mock_resp.json = mj; mock_resp.raise_for_status = MagicMock(); return mock_resp
 
     mock_make_request.side_effect = [await mock_response_batch_1(), await mock_response_batch_2(), await mock_response_batch_3()]
 
     result = await pipeline.get_embeddings_in_batches(chunks_data, batch_size=batch_size)
 
-    assert result == expected_result
+    np.testing.assert_array_equal(result, np.asarray(expected_result, dtype=np.float32))
     assert mock_make_request.call_count == 3
     call1_args, call1_kwargs = mock_make_request.call_args_list[0]
     assert call1_kwargs['json_data']['input'] == ["C1", "C2"]
@@ -179,7 +183,7 @@ async def test_get_embeddings_in_batches_invalid_dimension(mock_make_request):
     chunks_data = [(1, "Chunk text", 0)]
     invalid_embedding = [0.5] * (config.TARGET_EMBEDDING_DIMENSION - 1)
     mock_response = AsyncMock(spec=httpx.Response); mock_response.status_code = 200
-    async def mj(): return {"data": [{"embedding": invalid_embedding}], "model": "mock", "usage": {}}
+    def mj(): return {"data": [{"embedding": invalid_embedding}], "model": "mock", "usage": {}}
     mock_response.json = mj; mock_response.raise_for_status = MagicMock()
     mock_make_request.return_value = mock_response
 
@@ -187,6 +191,147 @@ async def test_get_embeddings_in_batches_invalid_dimension(mock_make_request):
         await pipeline.get_embeddings_in_batches(chunks_data, batch_size=1)
     mock_make_request.assert_called_once()
 
+def _embedding_response(embeddings, status_code=200, headers=None):
+    mock_resp = AsyncMock(spec=httpx.Response)
+    mock_resp.status_code = status_code
+    mock_resp.headers = headers or {}
+    def mj(): return {"data": [{"embedding": e} for e in embeddings], "model": "mock", "usage": {}}
+    mock_resp.json = mj
+    mock_resp.raise_for_status = MagicMock()
+    return mock_resp
+
+@patch("philograph.utils.http_client.make_async_request")
+async def test_get_embeddings_in_batches_concurrent_preserves_order(mock_make_request):
+    """
+    Test that concurrently dispatched batches are returned in input order,
+    with no more than max_concurrency requests in flight.
+    """
+    dim = config.TARGET_EMBEDDING_DIMENSION
+    chunks_data = [(1, f"C{i}", i) for i in range(8)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_request(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        texts = kwargs['json_data']['input']
+        # Earlier batches take longer, so completion order is reversed
+        await asyncio.sleep(0.01 * (10 - int(texts[0][1:])))
+        in_flight -= 1
+        return _embedding_response([[float(t[1:])] * dim for t in texts])
+
+    mock_make_request.side_effect = fake_request
+
+    result = await pipeline.get_embeddings_in_batches(chunks_data, batch_size=2, max_concurrency=3)
+
+    assert [emb[0] for emb in result] == [float(i) for i in range(8)]
+    assert mock_make_request.call_count == 4
+    assert max_in_flight == 3
+
+@patch("philograph.ingestion.pipeline.asyncio.sleep", new_callable=AsyncMock)
+@patch("philograph.utils.http_client.make_async_request")
+async def test_get_embeddings_in_batches_retries_rate_limited_batch(mock_make_request, mock_sleep):
+    """
+    Test that a 429 response is retried (honouring Retry-After) and shrinks the concurrency limit.
+    """
+    dim = config.TARGET_EMBEDDING_DIMENSION
+    rate_limited = _embedding_response([], status_code=429, headers={"Retry-After": "2"})
+    mock_make_request.side_effect = [rate_limited, _embedding_response([[0.3] * dim])]
+    limiter = pipeline.AdaptiveConcurrencyLimiter(4)
+
+    with patch("philograph.ingestion.pipeline._embedding_limiter", limiter):
+        result = await pipeline.get_embeddings_in_batches([(1, "Chunk text", 0)], batch_size=1)
+
+    np.testing.assert_array_equal(result, np.full((1, dim), 0.3, dtype=np.float32))
+    assert mock_make_request.call_count == 2
+    mock_sleep.assert_awaited_once_with(2.0)
+    rate_limited.raise_for_status.assert_not_called()
+    assert limiter.limit == 2
+
+@patch("philograph.ingestion.pipeline.asyncio.sleep", new_callable=AsyncMock)
+@patch("philograph.utils.http_client.make_async_request")
+async def test_get_embeddings_in_batches_concurrent_rate_limits_halve_limit_once(mock_make_request, mock_sleep):
+    """
+    Test that batches rate limited in the same burst shrink the concurrency limit only once.
+    """
+    dim = config.TARGET_EMBEDDING_DIMENSION
+    both_sent = asyncio.Event()
+    calls = 0
+    limits_on_retry = []
+
+    async def respond(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls <= 2:
+            if calls == 2:
+                both_sent.set()
+            await both_sent.wait()
+            return _embedding_response([], status_code=429)
+        limits_on_retry.append(limiter.limit)
+        return _embedding_response([[0.3] * dim])
+
+    mock_make_request.side_effect = respond
+    limiter = pipeline.AdaptiveConcurrencyLimiter(4)
+
+    with patch("philograph.ingestion.pipeline._embedding_limiter", limiter):
+        result = await pipeline.get_embeddings_in_batches([(1, "Chunk one", 0), (2, "Chunk two", 1)], batch_size=1)
+
+    assert len(result) == 2
+    assert mock_make_request.call_count == 4
+    assert limits_on_retry[0] == 2
+
+@patch("philograph.ingestion.pipeline.config.EMBEDDING_MAX_RETRY_AFTER_SECONDS", 30.0)
+async def test_retry_delay_caps_retry_after():
+    """
+    Test that Retry-After is honoured up to EMBEDDING_MAX_RETRY_AFTER_SECONDS and invalid values fall back to backoff.
+    """
+    def response(retry_after):
+        return _embedding_response([], status_code=429, headers={"Retry-After": retry_after})
+
+    assert pipeline._retry_delay(0, response("5")) == 5.0
+    assert pipeline._retry_delay(0, response("86400")) == 30.0
+    assert pipeline._retry_delay(0, response("-3")) == 0.0
+    assert pipeline._retry_delay(1, response("soon")) == config.EMBEDDING_RETRY_BACKOFF_SECONDS * 2
+
+@patch("philograph.ingestion.pipeline.asyncio.sleep", new_callable=AsyncMock)
+@patch("philograph.utils.http_client.make_async_request")
+async def test_get_embeddings_in_batches_retries_timeout_then_fails(mock_make_request, mock_sleep):
+    """
+    Test that timeouts are retried up to EMBEDDING_MAX_RETRIES before failing.
+    """
+    timeout = httpx.RequestError("Timeout requesting url")
+    timeout.__cause__ = httpx.ReadTimeout("read timed out")
+    mock_make_request.side_effect = timeout
+
+    with patch("philograph.ingestion.pipeline.config.EMBEDDING_MAX_RETRIES", 2):
+        with pytest.raises(RuntimeError, match=r"Embedding generation failed \(Request Error\)"):
+            await pipeline.get_embeddings_in_batches([(1, "Chunk text", 0)], batch_size=1, max_concurrency=2)
+
+    assert mock_make_request.call_count == 3
+    assert mock_sleep.await_count == 2
+
+@patch("philograph.utils.http_client.make_async_request")
+async def test_get_embeddings_in_batches_only_sends_unique_cache_misses(mock_make_request):
+    """
+    Test that cached chunks are not re-embedded and duplicate texts are requested once.
+    """
+    dim = config.TARGET_EMBEDDING_DIMENSION
+    await pipeline.embedding_cache.put_many(["Cached chunk"], [[0.9] * dim])
+    mock_make_request.return_value = _embedding_response([[0.4] * dim])
+    chunks_data = [(1, "Cached chunk", 0), (1, "New chunk", 1), (2, "New chunk", 0)]
+
+    result = await pipeline.get_embeddings_in_batches(chunks_data, batch_size=5)
+
+    np.testing.assert_array_equal(result, np.asarray([[0.9] * dim, [0.4] * dim, [0.4] * dim], dtype=np.float32))
+    mock_make_request.assert_called_once()
+    assert mock_make_request.call_args.kwargs['json_data']['input'] == ["New chunk"]
+
+    # A second pass is served entirely from the cache
+    mock_make_request.reset_mock()
+    np.testing.assert_array_equal(await pipeline.get_embeddings_in_batches(chunks_data, batch_size=5), result)
+    mock_make_request.assert_not_called()
+
 # --- Tests for extract_content_and_metadata ---
 
 @patch("philograph.ingestion.pipeline.text_processing.call_grobid_extractor", new_callable=AsyncMock)
@@ -206,6 +351,8 @@ async def test_extract_content_and_metadata_pdf(mock_get_ext, mock_call_grobid):
     mock_get_ext.assert_called_once_with(mock_path)
     mock_call_grobid.assert_awaited_once_with(mock_path) # Check await
 
+# Mocks cannot be pickled into worker processes, so run extraction in a thread pool here
+@patch("philograph.ingestion.pipeline.extraction_pool", new=ExtractionPool(mode="thread", max_workers=1))
 @patch("philograph.ingestion.pipeline.text_processing.extract_epub_content")
 @patch("philograph.ingestion.pipeline.file_utils.get_file_extension")
 async def test_extract_content_and_metadata_epub(mock_get_ext, mock_extract_epub):
@@ -224,6 +371,7 @@ async def test_extract_content_and_metadata_epub(mock_get_ext, mock_extract_epub
     mock_extract_epub.assert_called_once_with(mock_path)
 
 @pytest.mark.parametrize("ext", [".txt", ".md"])
+@patch("philograph.ingestion.pipeline.extraction_pool", new=ExtractionPool(mode="thread", max_workers=1))
 @patch("philograph.ingestion.pipeline.text_processing.extract_text_content")
 @patch("philograph.ingestion.pipeline.file_utils.get_file_extension")
 async def test_extract_content_and_metadata_text(mock_get_ext, mock_extract_text, ext):
@@ -252,4 +400,94 @@ async def test_extract_content_and_metadata_unsupported(mock_get_ext):
     result = await pipeline.extract_content_and_metadata(mock_path)
 
     assert result is None
-    mock_get_ext.assert_called_once_with(mock_path)
\ No newline at end of file
+    mock_get_ext.assert_called_once_with(mock_path)
+# --- Tests for _stream_chunks_to_index ---
+
+@patch("philograph.ingestion.pipeline.db_layer.add_chunks_batch", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.get_embeddings_in_batches", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically")
+async def test_stream_chunks_to_index_batches_and_overlaps(mock_chunk_text, mock_get_embeddings, mock_add_chunks):
+    """
+    Test that chunks are embedded and written batch by batch across sections, with writes
+    overlapping later embeddings, and that the first chunk's ID comes from the first batch.
+    """
+    events = []
+    mock_chunk_text.side_effect = [["a1", "a2", "a3"], ["b1", "b2"]]
+
+    async def fake_embed(batch, batch_size):
+        events.append(f"embed {batch[0][1]}")
+        await asyncio.sleep(0.01)
+        return [[0.0]] * len(batch)
+
+    async def fake_write(conn, rows):
+        events.append(f"write {rows[0][1]}")
+        await asyncio.sleep(0.01)
+        return [100 + int(rows[0][1][1]) * 10 + i for i in range(len(rows))]
+
+    mock_get_embeddings.side_effect = fake_embed
+    mock_add_chunks.side_effect = fake_write
+    mock_conn = AsyncMock()
+
+    indexed, first_chunk_id = await pipeline._stream_chunks_to_index(
+        mock_conn, [(1, "Section A"), (2, "Section B")], batch_size=2, embed_workers=1, queue_size=1
+    )
+
+    assert indexed == 5
+    assert first_chunk_id == 110
+    # Batches span section boundaries: [a1, a2], [a3, b1], [b2]
+    assert [call.args[0] for call in mock_get_embeddings.call_args_list] == [
+        [(1, "a1", 0), (1, "a2", 1)], [(1, "a3", 2), (2, "b1", 0)], [(2, "b2", 1)]
+    ]
+    assert mock_add_chunks.call_args_list[0].args[1][0] == (1, "a1", 0, [0.0])
+    # The first batch is written while the next one is still being embedded
+    assert events.index("write a1") < events.index("embed b2")
+
+@patch("philograph.ingestion.pipeline.db_layer.add_chunks_batch", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.get_embeddings_in_batches", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically")
+async def test_stream_chunks_to_index_embedding_failure_cancels_stages(mock_chunk_text, mock_get_embeddings, mock_add_chunks):
+    """Test that an embedding failure is raised as RuntimeError and stops the other stages."""
+    mock_chunk_text.return_value = [f"c{i}" for i in range(50)]
+    mock_get_embeddings.side_effect = RuntimeError("Embedding API down")
+
+    with pytest.raises(RuntimeError, match="Embedding generation failed: Embedding API down"):
+        await pipeline._stream_chunks_to_index(AsyncMock(), [(1, "Long section")], batch_size=2, embed_workers=2, queue_size=1)
+
+    mock_add_chunks.assert_not_called()
+    # Backpressure: with bounded queues, embedding stopped well before all 25 batches were requested
+    assert mock_get_embeddings.await_count < 25
+
+@patch("philograph.ingestion.pipeline.db_layer.add_chunks_batch", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.get_embeddings_in_batches", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically")
+async def test_stream_chunks_to_index_failure_leaves_no_embed_workers(mock_chunk_text, mock_get_embeddings, mock_add_chunks):
+    """Test that when one embed worker fails, the other workers are cancelled rather than left running."""
+    mock_chunk_text.return_value = [f"c{i}" for i in range(50)]
+    calls = 0
+
+    async def fake_embed(batch, batch_size):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.01)
+            raise RuntimeError("Embedding API down")
+        await asyncio.sleep(0.05) # Other workers are mid-request when the first one fails
+        return [[0.0]] * len(batch)
+
+    mock_get_embeddings.side_effect = fake_embed
+    mock_add_chunks.return_value = [1, 2]
+
+    with pytest.raises(RuntimeError, match="Embedding generation failed"):
+        await pipeline._stream_chunks_to_index(AsyncMock(), [(1, "Long section")], batch_size=2, embed_workers=4, queue_size=1)
+    calls_at_failure = calls
+    await asyncio.sleep(0.2)
+
+    alive = [task for task in asyncio.all_tasks() if not task.done() and "embed_stage" in repr(task.get_coro())]
+    assert alive == []
+    assert calls == calls_at_failure # No embedding requests after the failure
+
+@patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically")
+async def test_stream_chunks_to_index_no_chunks(mock_chunk_text):
+    """Test that sections producing no chunks index nothing."""
+    mock_chunk_text.return_value = ["", ""]
+    assert await pipeline._stream_chunks_to_index(AsyncMock(), [(1, "   ")]) == (0, None)
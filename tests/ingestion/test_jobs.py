@@ -0,0 +1,162 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from philograph.data_access.models import IngestJob
+from philograph.ingestion import jobs
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def mock_db():
+    """Patches the db_layer used by the runner; get_db_connection yields a dummy connection."""
+    with patch("philograph.ingestion.jobs.db_layer") as mock_db_layer:
+        conn = MagicMock()
+
+        @asynccontextmanager
+        async def get_db_connection():
+            yield conn
+
+        mock_db_layer.get_db_connection = get_db_connection
+        mock_db_layer.update_ingest_job_progress = AsyncMock(return_value=True)
+        mock_db_layer.finish_ingest_job = AsyncMock(return_value=True)
+        mock_db_layer.release_ingest_job = AsyncMock(return_value=True)
+        mock_db_layer.requeue_stale_ingest_jobs = AsyncMock(return_value=(0, 0))
+        mock_db_layer.claim_ingest_job = AsyncMock(return_value=None)
+        yield mock_db_layer
+
+def _job(path="library"):
+    return IngestJob(id=9, path=path, status="running", attempts=2)
+
+# --- Tests for run_job ---
+
+@patch("philograph.ingestion.jobs.ingestion_pipeline.process_document", new_callable=AsyncMock)
+async def test_run_job_success_records_result_and_progress(mock_process_document, mock_db):
+    """Test a finished directory job stores its result and final per-file counts."""
+    async def fake_process(path, on_file_done=None):
+        await on_file_done("library/a.txt", {"status": "Success", "document_id": 1})
+        await on_file_done("library/b.txt", {"status": "Skipped"})
+        await on_file_done("library/c.txt", {"status": "Error", "message": "bad"})
+        return {"status": "Directory Processed", "message": "done", "details": []}
+
+    mock_process_document.side_effect = fake_process
+
+    await jobs.IngestJobRunner(workers=1, stale_seconds=60).run_job(_job())
+
+    final_progress = mock_db.update_ingest_job_progress.await_args_list[-1].args[3]
+    assert final_progress == {"files_done": 3, "succeeded": 1, "skipped": 1, "errors": 1, "last_path": "library/c.txt"}
+    mock_db.finish_ingest_job.assert_awaited_once()
+    args, kwargs = mock_db.finish_ingest_job.await_args
+    assert args[1:] == (9, 2, "succeeded")
+    assert kwargs["result"]["status"] == "Directory Processed"
+
+@patch("philograph.ingestion.jobs.ingestion_pipeline.process_document", new_callable=AsyncMock)
+async def test_run_job_pipeline_error_fails_job(mock_process_document, mock_db):
+    """Test an Error result from the pipeline marks the job failed with its message."""
+    mock_process_document.return_value = {"status": "Error", "message": "File or directory not found"}
+
+    await jobs.IngestJobRunner(workers=1).run_job(_job("missing.pdf"))
+
+    args, kwargs = mock_db.finish_ingest_job.await_args
+    assert args[3] == "failed"
+    assert kwargs["error"] == "File or directory not found"
+
+@patch("philograph.ingestion.jobs.ingestion_pipeline.process_document", new_callable=AsyncMock)
+async def test_run_job_exception_fails_job(mock_process_document, mock_db):
+    """Test an exception from the pipeline marks the job failed instead of killing the worker."""
+    mock_process_document.side_effect = RuntimeError("Embedding service unavailable")
+
+    await jobs.IngestJobRunner(workers=1).run_job(_job())
+
+    args, kwargs = mock_db.finish_ingest_job.await_args
+    assert args[3] == "failed"
+    assert kwargs["error"] == "Embedding service unavailable"
+
+@patch("philograph.ingestion.jobs.ingestion_pipeline.process_document", new_callable=AsyncMock)
+async def test_run_job_cancelled_releases_job(mock_process_document, mock_db):
+    """Test a job interrupted by shutdown is returned to the queue rather than finished."""
+    started = asyncio.Event()
+
+    async def slow_process(path, on_file_done=None):
+        started.set()
+        await asyncio.sleep(10)
+
+    mock_process_document.side_effect = slow_process
+    task = asyncio.create_task(jobs.IngestJobRunner(workers=1).run_job(_job()))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    mock_db.release_ingest_job.assert_awaited_once()
+    assert mock_db.release_ingest_job.await_args.args[1:] == (9, 2)
+    mock_db.finish_ingest_job.assert_not_awaited()
+
+# --- Tests for the worker pool ---
+
+@patch("philograph.ingestion.jobs.ingestion_pipeline.process_document", new_callable=AsyncMock)
+async def test_workers_claim_and_run_queued_jobs(mock_process_document, mock_db):
+    """Test workers recover stale jobs, claim queued ones until the queue is empty, and stop cleanly."""
+    mock_process_document.return_value = {"status": "Success", "document_id": 1}
+    mock_db.claim_ingest_job.side_effect = [_job("a.pdf"), _job("b.pdf")] + [None] * 100
+    runner = jobs.IngestJobRunner(workers=2, poll_seconds=0.01, stale_seconds=60, max_attempts=3)
+
+    runner.start()
+    runner.start() # Idempotent
+    assert len(runner._tasks) == 2
+    for _ in range(100):
+        if mock_db.finish_ingest_job.await_count == 2:
+            break
+        await asyncio.sleep(0.01)
+    await runner.stop()
+
+    assert not runner.running
+    assert sorted(call.args[0] for call in mock_process_document.await_args_list) == ["a.pdf", "b.pdf"]
+    mock_db.requeue_stale_ingest_jobs.assert_awaited()
+    assert mock_db.requeue_stale_ingest_jobs.await_args.args[1:] == (60, 3)
+
+async def test_worker_survives_claim_errors(mock_db):
+    """Test a database error while claiming is logged and the worker keeps polling."""
+    mock_db.claim_ingest_job.side_effect = [RuntimeError("connection lost")] + [None] * 100
+    runner = jobs.IngestJobRunner(workers=1, poll_seconds=0.01)
+
+    runner.start()
+    for _ in range(100):
+        if mock_db.claim_ingest_job.await_count >= 2:
+            break
+        await asyncio.sleep(0.01)
+    assert runner.running
+    await runner.stop()
+    assert mock_db.claim_ingest_job.await_count >= 2
+
+async def test_queue_ingest_job_wakes_workers(mock_db, tmp_path):
+    """Test queueing a job records it and wakes the shared runner's idle workers."""
+    mock_db.add_ingest_job = AsyncMock(return_value=12)
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "book.pdf").touch()
+
+    with patch("philograph.ingestion.jobs.ingest_job_runner") as mock_runner, \
+         patch("philograph.config.SOURCE_FILE_DIR_ABSOLUTE", tmp_path.resolve()):
+        assert await jobs.queue_ingest_job("new/book.pdf") == 12
+
+    assert mock_db.add_ingest_job.await_args.args[1] == "new/book.pdf"
+    mock_runner.notify.assert_called_once()
+
+async def test_queue_ingest_job_normalizes_path(mock_db, tmp_path):
+    """Test that different spellings of one path queue the same normalized path."""
+    mock_db.add_ingest_job = AsyncMock(return_value=12)
+    source_dir = tmp_path / "source"
+    (source_dir / "books").mkdir(parents=True)
+    (tmp_path / "outside").mkdir()
+
+    with patch("philograph.ingestion.jobs.ingest_job_runner"), \
+         patch("philograph.config.SOURCE_FILE_DIR_ABSOLUTE", source_dir.resolve()):
+        for spelling in ("books", "books/", "./books", "books/../books"):
+            await jobs.queue_ingest_job(spelling)
+        await jobs.queue_ingest_job("")
+        with pytest.raises(ValueError):
+            await jobs.queue_ingest_job("../outside")
+
+    assert [call.args[1] for call in mock_db.add_ingest_job.await_args_list] == ["books"] * 4 + ["."]
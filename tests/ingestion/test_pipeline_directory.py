@@ -1,6 +1,7 @@
 # tests/ingestion/test_pipeline_directory.py
 import asyncio
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -9,18 +10,32 @@ import pytest
 # Assuming config values are needed and potentially mocked
 from philograph import config
 from philograph.ingestion import pipeline
+from philograph.data_access import db_layer
 # No db_layer needed directly for these tests, but keep file_utils
 from philograph.utils import file_utils
 
+# The real pre-check, kept before the autouse fixture below patches it
+_ORIGINAL_PREFETCH = pipeline._prefetch_fingerprints
+
 # Mark all tests in this module as asyncio
 pytestmark = pytest.mark.asyncio
 
+def _scanned(paths, size=0, mtime_ns=0):
+    """Wraps listed paths as the scanner yields them (with their stat)."""
+    return (file_utils.ScannedFile(path, size, mtime_ns) for path in paths)
+
+@pytest.fixture(autouse=True)
+def mock_prefetch_fingerprints():
+    """No file in these directories has been ingested before (see the pre-check tests below)."""
+    with patch("philograph.ingestion.pipeline._prefetch_fingerprints", new_callable=AsyncMock, return_value={}) as mock_prefetch:
+        yield mock_prefetch
+
 # --- Tests for process_document (Directory Scenarios) ---
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
 @patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
-@patch("philograph.ingestion.pipeline.file_utils.list_files_in_directory")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
 @patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_empty_directory(
@@ -40,7 +55,7 @@ async def test_process_document_empty_directory(
     mock_resolve.return_value = full_path # Configure mock resolve
     mock_check_dir.return_value = True  # It is a directory
     mock_check_file.return_value = False # It is not a file
-    mock_list_files.return_value = iter([]) # Generator yielding nothing
+    mock_list_files.return_value = _scanned([]) # Generator yielding nothing
 
     # --- Call Function ---
     result = await pipeline.process_document(relative_path_str)
@@ -56,7 +71,7 @@ async def test_process_document_empty_directory(
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
 @patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
-@patch("philograph.ingestion.pipeline.file_utils.list_files_in_directory")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
 @patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_directory_with_one_supported_file(
@@ -82,7 +97,7 @@ async def test_process_document_directory_with_one_supported_file(
     mock_check_file.return_value = False # It is not a file (when checking the dir path)
 
     # Mock list_files to yield the single PDF file path
-    mock_list_files.return_value = iter([full_file_path])
+    mock_list_files.return_value = _scanned([full_file_path])
 
     # Mock the result of _process_single_file for the PDF
     mock_process_single_file.return_value = {"status": "Success", "document_id": 1}
@@ -100,14 +115,14 @@ async def test_process_document_directory_with_one_supported_file(
 
     # Check mocks
     mock_check_dir.assert_called_once_with(full_dir_path)
-    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True)
+    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True, workers=config.SOURCE_SCAN_WORKERS)
     # IMPORTANT: Assert _process_single_file was called with the Path object relative to SOURCE_FILE_DIR_ABSOLUTE
-    mock_process_single_file.assert_called_once_with(relative_file_path_obj)
+    mock_process_single_file.assert_called_once_with(relative_file_path_obj, known_documents={})
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
 @patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
-@patch("philograph.ingestion.pipeline.file_utils.list_files_in_directory")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
 @patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_directory_with_unsupported_files(
@@ -135,13 +150,13 @@ async def test_process_document_directory_with_unsupported_files(
     # Note: The implementation's list_files call *already* filters by allowed_extensions.
     # So, mocking list_files to return these shouldn't result in _process_single_file being called.
     # If the implementation *didn't* filter, this mock would need to be empty.
-    mock_list_files.return_value = iter([]) # list_files filters internally
+    mock_list_files.return_value = _scanned([]) # list_files filters internally
 
     # --- Call Function ---
     result = await pipeline.process_document(relative_dir_str)
 
     # --- Assertions ---
-    # Expecting success, but 0 files processed as they are filtered out by list_files_in_directory
+    # Expecting success, but 0 files processed as they are filtered out by scan_files
     assert result == {
         "status": "Directory Processed",
         "message": "Processed directory 'dir_unsupported'. Success: 0, Skipped: 0, Errors: 0",
@@ -151,14 +166,14 @@ async def test_process_document_directory_with_unsupported_files(
     # Check mocks
     mock_check_dir.assert_called_once_with(full_dir_path)
     # list_files is called, but it yields nothing because of the extension filter
-    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True)
+    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True, workers=config.SOURCE_SCAN_WORKERS)
     mock_process_single_file.assert_not_called() # No supported files yielded
 
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
 @patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
-@patch("philograph.ingestion.pipeline.file_utils.list_files_in_directory")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
 @patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_directory_with_mixed_files(
@@ -185,7 +200,7 @@ async def test_process_document_directory_with_mixed_files(
     mock_check_file.return_value = False
 
     # Mock list_files to yield *only* the supported file path, as the implementation filters
-    mock_list_files.return_value = iter([supported_file_full_path])
+    mock_list_files.return_value = _scanned([supported_file_full_path])
 
     # Mock the result of _process_single_file for the MD file
     mock_process_single_file.return_value = {"status": "Success", "document_id": 2}
@@ -203,15 +218,15 @@ async def test_process_document_directory_with_mixed_files(
 
     # Check mocks
     mock_check_dir.assert_called_once_with(full_dir_path)
-    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True)
-    mock_process_single_file.assert_called_once_with(supported_file_rel_path_obj)
-    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True)
+    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True, workers=config.SOURCE_SCAN_WORKERS)
+    mock_process_single_file.assert_called_once_with(supported_file_rel_path_obj, known_documents={})
+    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True, workers=config.SOURCE_SCAN_WORKERS)
     # mock_check_file.assert_not_called() # This assertion was incorrect for this test
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
 @patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
-@patch("philograph.ingestion.pipeline.file_utils.list_files_in_directory")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
 @patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_directory_with_subdirectory(
@@ -242,7 +257,7 @@ async def test_process_document_directory_with_subdirectory(
     mock_check_file.return_value = False # It is not a file (when checking the dir path)
 
     # Mock list_files to yield files from parent and child directories
-    mock_list_files.return_value = iter([full_file1_path, full_file2_path])
+    mock_list_files.return_value = _scanned([full_file1_path, full_file2_path])
 
     # Mock the result of _process_single_file
     mock_process_single_file.side_effect = [
@@ -266,16 +281,16 @@ async def test_process_document_directory_with_subdirectory(
 
     # Check mocks
     mock_check_dir.assert_called_once_with(full_parent_dir_path)
-    mock_list_files.assert_called_once_with(full_parent_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True)
+    mock_list_files.assert_called_once_with(full_parent_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True, workers=config.SOURCE_SCAN_WORKERS)
     # Assert _process_single_file was called with the correct relative Path objects
     assert mock_process_single_file.call_count == 2
-    mock_process_single_file.assert_any_call(relative_file1_path_obj)
-    mock_process_single_file.assert_any_call(relative_file2_path_obj)
+    mock_process_single_file.assert_any_call(relative_file1_path_obj, known_documents={})
+    mock_process_single_file.assert_any_call(relative_file2_path_obj, known_documents={})
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
 @patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
-@patch("philograph.ingestion.pipeline.file_utils.list_files_in_directory")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
 @patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_directory_permission_error(
@@ -318,14 +333,14 @@ async def test_process_document_directory_permission_error(
     # and path resolution. Let's mock list_files to yield paths, and have the relative_to call fail.
 
     def list_files_generator(*args, **kwargs):
-        yield full_file1_path
+        yield file_utils.ScannedFile(full_file1_path, 0, 0)
         # Simulate error when trying to process the next path from the generator
         # The code tries `file_to_process.relative_to(...)`
         mock_problem_path = MagicMock(spec=Path)
         mock_problem_path.relative_to.side_effect = PermissionError("Cannot access path")
         mock_problem_path.__str__ = MagicMock(return_value=str(full_problematic_path)) # For logging
-        yield mock_problem_path
-        yield full_file2_path
+        yield file_utils.ScannedFile(mock_problem_path, 0, 0)
+        yield file_utils.ScannedFile(full_file2_path, 0, 0)
 
     mock_list_files.side_effect = list_files_generator
 
@@ -357,8 +372,248 @@ async def test_process_document_directory_permission_error(
 
     # Check mocks
     mock_check_dir.assert_called_once_with(full_dir_path)
-    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True)
+    mock_list_files.assert_called_once_with(full_dir_path, allowed_extensions=['.pdf', '.epub', '.md', '.txt'], recursive=True, workers=config.SOURCE_SCAN_WORKERS)
     # Assert _process_single_file was called twice for the valid files
     assert mock_process_single_file.call_count == 2
-    mock_process_single_file.assert_any_call(relative_file1_path_obj)
-    mock_process_single_file.assert_any_call(relative_file2_path_obj)
\ No newline at end of file
+    mock_process_single_file.assert_any_call(relative_file1_path_obj, known_documents={})
+    mock_process_single_file.assert_any_call(relative_file2_path_obj, known_documents={})
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
+@patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
+@patch("pathlib.Path.resolve") # Mock resolve
+async def test_process_document_directory_concurrent_workers(
+    mock_resolve,
+    mock_process_single_file,
+    mock_list_files,
+    mock_check_file,
+    mock_check_dir,
+):
+    """
+    Test that files are processed by a bounded worker pool and that details
+    and counts are reported in listing order regardless of completion order.
+    """
+    relative_dir_str = "library"
+    full_dir_path = Path("/test/source") / relative_dir_str
+    file_names = [f"{relative_dir_str}/book{i}.txt" for i in range(7)]
+
+    mock_resolve.return_value = full_dir_path
+    mock_check_dir.return_value = True
+    mock_check_file.return_value = False
+    mock_list_files.return_value = _scanned([Path("/test/source") / name for name in file_names])
+
+    in_flight = 0
+    peak = 0
+
+    async def fake_process(relative_path, known_documents=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        index = int(relative_path.stem[-1])
+        await asyncio.sleep(0.01 * (7 - index)) # Later files finish first
+        in_flight -= 1
+        if index == 3:
+            return {"status": "Skipped", "message": "Document already exists"}
+        if index == 5:
+            return {"status": "Error", "message": "Extraction failed"}
+        return {"status": "Success", "document_id": index}
+
+    mock_process_single_file.side_effect = fake_process
+
+    result = await pipeline.process_document(relative_dir_str, max_workers=3)
+
+    assert peak == 3
+    assert [list(detail.keys())[0] for detail in result["details"]] == file_names
+    assert result["message"] == "Processed directory 'library'. Success: 5, Skipped: 1, Errors: 1"
+
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists")
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
+@patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock) # Mock the internal function
+@patch("pathlib.Path.resolve") # Mock resolve
+async def test_process_document_directory_reports_each_file(
+    mock_resolve,
+    mock_process_single_file,
+    mock_list_files,
+    mock_check_file,
+    mock_check_dir,
+):
+    """
+    Test that on_file_done is awaited once per file with its result, and that a
+    failing callback does not fail the ingestion.
+    """
+    relative_dir_str = "library"
+    full_dir_path = Path("/test/source") / relative_dir_str
+    mock_resolve.return_value = full_dir_path
+    mock_check_dir.return_value = True
+    mock_check_file.return_value = False
+    mock_list_files.return_value = _scanned([full_dir_path / "a.txt", full_dir_path / "b.txt"])
+    mock_process_single_file.side_effect = [{"status": "Success", "document_id": 1}, {"status": "Skipped"}]
+
+    reported = []
+
+    async def on_file_done(relative_path, result):
+        reported.append((relative_path, result["status"]))
+        raise RuntimeError("progress store unavailable")
+
+    result = await pipeline.process_document(relative_dir_str, max_workers=1, on_file_done=on_file_done)
+
+    assert result["status"] == "Directory Processed"
+    assert sorted(reported) == [("library/a.txt", "Success"), ("library/b.txt", "Skipped")]
+
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.config.INGEST_PRECHECK_BATCH_SIZE", 2)
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists", return_value=True)
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists", return_value=False)
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
+@patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock)
+@patch("pathlib.Path.resolve", return_value=Path("/test/source/library"))
+async def test_process_document_directory_prechecks_in_batches(
+    mock_resolve,
+    mock_process_single_file,
+    mock_list_files,
+    mock_check_file,
+    mock_check_dir,
+    mock_prefetch_fingerprints,
+):
+    """
+    Test that listed files are pre-checked with one fingerprint lookup per batch, that files
+    with an unchanged size and mtime are skipped without being processed, and that the rest
+    are processed with the batch's fingerprints.
+    """
+    names = ["library/a.txt", "library/b.txt", "library/c.txt"]
+    mock_list_files.return_value = (
+        file_utils.ScannedFile(Path("/test/source") / name, 10, 5 if name.endswith("a.txt") else 6) for name in names
+    )
+    unchanged = db_layer.DocumentFingerprint(document_id=1, file_size=10, file_mtime_ns=5, content_hash="h")
+    edited = db_layer.DocumentFingerprint(document_id=2, file_size=10, file_mtime_ns=5, content_hash="h")
+    first_batch = {"library/a.txt": unchanged, "library/b.txt": edited}
+    mock_prefetch_fingerprints.side_effect = [first_batch, {}]
+    mock_process_single_file.return_value = {"status": "Success", "document_id": 3}
+
+    result = await pipeline.process_document("library")
+
+    assert [call.args[0] for call in mock_prefetch_fingerprints.await_args_list] == [names[:2], names[2:]]
+    assert result["details"][0] == {"library/a.txt": {"status": "Skipped", "message": "Document unchanged"}}
+    assert result["message"] == "Processed directory 'library'. Success: 2, Skipped: 1, Errors: 0"
+    assert mock_process_single_file.await_count == 2
+    mock_process_single_file.assert_any_await(Path("library/b.txt"), known_documents=first_batch)
+    mock_process_single_file.assert_any_await(Path("library/c.txt"), known_documents={})
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.config.INGEST_PRECHECK_BATCH_SIZE", 1)
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists", return_value=True)
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists", return_value=False)
+@patch("philograph.ingestion.pipeline.file_utils.scan_files")
+@patch("philograph.ingestion.pipeline._process_single_file", new_callable=AsyncMock)
+@patch("pathlib.Path.resolve", return_value=Path("/test/source/library"))
+async def test_process_document_directory_precheck_failure_cancels_workers(
+    mock_resolve,
+    mock_process_single_file,
+    mock_list_files,
+    mock_check_file,
+    mock_check_dir,
+    mock_prefetch_fingerprints,
+):
+    """
+    Test that a failing pre-check propagates its error only after the file workers still
+    processing are cancelled and the scan is closed.
+    """
+    scan_closed = False
+
+    def scan(*args, **kwargs):
+        nonlocal scan_closed
+        try:
+            for name in ["a.txt", "b.txt", "c.txt"]:
+                yield file_utils.ScannedFile(Path("/test/source/library") / name, 0, 0)
+        finally:
+            scan_closed = True
+
+    worker_started = asyncio.Event()
+    worker_cancelled = False
+
+    async def slow_file(*args, **kwargs):
+        nonlocal worker_cancelled
+        worker_started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            worker_cancelled = True
+            raise
+
+    async def prefetch(relative_paths):
+        if relative_paths == ["library/b.txt"]:
+            await worker_started.wait()
+            raise RuntimeError("pre-check failed")
+        return {}
+
+    mock_list_files.side_effect = scan
+    mock_process_single_file.side_effect = slow_file
+    mock_prefetch_fingerprints.side_effect = prefetch
+
+    with pytest.raises(RuntimeError, match="pre-check failed"):
+        await asyncio.wait_for(pipeline.process_document("library", max_workers=2), timeout=5)
+
+    assert worker_cancelled
+    assert scan_closed
+
+
+@patch("philograph.ingestion.pipeline.db_layer.get_db_connection")
+async def test_prefetch_fingerprints_failure_falls_back(mock_get_db_conn):
+    """Test that a failed bulk lookup returns None, so files are checked individually."""
+    mock_get_db_conn.side_effect = RuntimeError("Database pool is not initialized.")
+
+    assert await _ORIGINAL_PREFETCH(["library/a.txt"]) is None
+
+
+@patch("philograph.ingestion.pipeline.config.DB_POOL_MAX_SIZE", 10)
+@patch("philograph.ingestion.pipeline.config.INGEST_JOB_WORKERS", 2)
+async def test_effective_file_workers_capped_by_db_pool():
+    """
+    Test that the worker count is capped at the pool share left after job heartbeats and
+    pre-checks (2 per job worker), the durable embedding cache and one connection for searches.
+    """
+    with patch.object(pipeline.embedding_cache, "persist", True), patch.object(pipeline.embedding_cache, "db_connections", 2):
+        assert pipeline._ingest_connection_budget() == 3
+        assert pipeline._effective_file_workers(10) == 3
+        assert pipeline._effective_file_workers(1) == 1
+        assert pipeline._effective_file_workers(0) == 1
+    with patch.object(pipeline.embedding_cache, "persist", False):
+        assert pipeline._ingest_connection_budget() == 5
+
+@patch("philograph.ingestion.pipeline.config.DB_POOL_MAX_SIZE", 2)
+async def test_effective_file_workers_small_pool_keeps_one_worker():
+    """Test that a pool smaller than the reserved share still allows one file worker."""
+    assert pipeline._effective_file_workers(4) == 1
+
+async def test_file_connections_share_one_budget():
+    """Test that file connections across concurrent callers never exceed the process-wide budget."""
+    in_use = 0
+    peak = 0
+
+    @asynccontextmanager
+    async def fake_connection():
+        nonlocal in_use, peak
+        in_use += 1
+        peak = max(peak, in_use)
+        try:
+            await asyncio.sleep(0.01)
+            yield MagicMock()
+        finally:
+            in_use -= 1
+
+    async def use_connection():
+        async with pipeline._file_connection():
+            await asyncio.sleep(0.01)
+
+    limiter = pipeline.AdaptiveConcurrencyLimiter(2, min_limit=2)
+    with patch.object(pipeline, "_file_connection_limiter", limiter), \
+         patch.object(pipeline.db_layer, "get_db_connection", side_effect=fake_connection):
+        await asyncio.gather(*(use_connection() for _ in range(6)))
+
+    assert peak == 2
@@ -10,11 +10,26 @@ import httpx # Keep for potential exception types in dependencies
 # Assuming config values are needed and potentially mocked
 from philograph import config
 from philograph.ingestion import pipeline
+from philograph.utils import file_utils
 from philograph.data_access import db_layer # For mocking types if needed
 
 # Mark all tests in this module as asyncio
 pytestmark = pytest.mark.asyncio
 
+@pytest.fixture(autouse=True)
+def mock_file_fingerprint():
+    """The source files are mocked, so stub their stat and content hash (and the fingerprint write)."""
+    with patch("philograph.ingestion.pipeline.file_utils.get_file_stat", return_value=file_utils.FileStat(size=1024, mtime_ns=1_700_000_000_000_000_000)), \
+         patch("philograph.ingestion.pipeline.file_utils.hash_file", return_value="a" * 64), \
+         patch("philograph.ingestion.pipeline.db_layer.set_document_fingerprint", new_callable=AsyncMock) as mock_set_fingerprint:
+        yield mock_set_fingerprint
+
+@pytest.fixture(autouse=True)
+def mock_corpus_generation():
+    """Stubs the corpus generation bump that ends each ingest transaction."""
+    with patch("philograph.ingestion.pipeline.db_layer.bump_corpus_generation", new_callable=AsyncMock, return_value=1) as mock_bump:
+        yield mock_bump
+
 # --- Tests for process_document (Single File Scenarios) ---
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
@@ -35,6 +50,7 @@ async def test_process_document_single_pdf_success(
     mock_get_db_conn,
     mock_check_file,
     mock_check_dir,
+    mock_corpus_generation,
 ):
     """
     Test successfully processing a single new PDF document.
@@ -60,19 +76,17 @@ async def test_process_document_single_pdf_success(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB calls within the connection context
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
     mock_add_doc = AsyncMock(return_value=123) # Mock document ID
-    mock_add_section = AsyncMock(side_effect=[1, 2]) # Mock section IDs
-    mock_add_chunks = AsyncMock(return_value=None)
+    mock_add_sections = AsyncMock(return_value={0: 1, 1: 2}) # Mock section IDs by sequence
+    mock_add_chunks = AsyncMock(return_value=[1001, 1002, 1003]) # Mock chunk IDs (first is used for reference linking)
     mock_add_ref = AsyncMock(return_value=None)
-    # Mock the fetchone for finding the first chunk ID for reference linking
-    mock_cursor.fetchone = AsyncMock(return_value={'id': 1001}) # Mock chunk ID
 
     # Assign mocks to the connection object's methods (or patch db_layer directly)
     # Patching db_layer directly might be cleaner
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists), \
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists), \
          patch("philograph.ingestion.pipeline.db_layer.add_document", mock_add_doc), \
-         patch("philograph.ingestion.pipeline.db_layer.add_section", mock_add_section), \
+         patch("philograph.ingestion.pipeline.db_layer.add_sections_batch", mock_add_sections), \
          patch("philograph.ingestion.pipeline.db_layer.add_chunks_batch", mock_add_chunks), \
          patch("philograph.ingestion.pipeline.db_layer.add_reference", mock_add_ref):
 
@@ -107,6 +121,8 @@ async def test_process_document_single_pdf_success(
 
     # --- Assertions ---
     assert result == {"status": "Success", "document_id": 123}
+    # Successful ingest invalidates cached search results (in the transaction that commits its chunks)
+    mock_corpus_generation.assert_awaited_once_with(mock_get_db_conn.return_value.__aenter__.return_value)
 
     # Check mocks were called correctly
     mock_check_dir.assert_called_once_with(full_path)
@@ -117,9 +133,11 @@ async def test_process_document_single_pdf_success(
     mock_add_doc.assert_called_once_with(
         mock_conn, "Test PDF", "Tester", None, relative_path_str, {"title": "Test PDF", "author": "Tester"}
     )
-    assert mock_add_section.call_count == 2
-    mock_add_section.assert_any_call(mock_conn, 123, "Abstract", 0, 0)
-    mock_add_section.assert_any_call(mock_conn, 123, "Section 1", 0, 1)
+    # All sections are inserted in a single batch: (title, level, sequence)
+    mock_add_sections.assert_called_once_with(
+        mock_conn, 123, [("Abstract", 0, 0), ("Section 1", 0, 1)],
+        text_hashes=[pipeline._section_text_hash("This is the abstract."), pipeline._section_text_hash("This is the first section content.")]
+    )
 
     assert mock_chunk_text.call_count == 2
     mock_chunk_text.assert_any_call("This is the abstract.", config.TARGET_CHUNK_SIZE)
@@ -128,8 +146,8 @@ async def test_process_document_single_pdf_success(
     mock_get_embeddings.assert_called_once()
     # Check the structure passed to get_embeddings
     expected_embedding_input = [
-        (1, "Abstract chunk 1", 0), # section_id 1 from first mock_add_section call
-        (2, "Section 1 chunk 1", 0), # section_id 2 from second mock_add_section call
+        (1, "Abstract chunk 1", 0), # section_id 1 for section sequence 0
+        (2, "Section 1 chunk 1", 0), # section_id 2 for section sequence 1
         (2, "Section 1 chunk 2", 1),
     ]
     call_args, _ = mock_get_embeddings.call_args
@@ -147,12 +165,8 @@ async def test_process_document_single_pdf_success(
     assert call_args[1] == expected_chunks_input
 
     mock_parse_references.assert_called_once_with(["Ref 1", "Ref 2"])
-    # Check cursor execute for finding chunk id
-    mock_cursor.execute.assert_called_once_with(
-        "SELECT id FROM chunks WHERE section_id IN (SELECT id FROM sections WHERE doc_id = %s) ORDER BY sequence ASC LIMIT 1;",
-        (123,)
-    )
-    mock_cursor.fetchone.assert_called_once()
+    # Reference linking uses the chunk IDs returned by add_chunks_batch (no extra lookup query)
+    mock_cursor.execute.assert_not_called()
     # Check add_reference calls
     assert mock_add_ref.call_count == 2
     mock_add_ref.assert_any_call(mock_conn, 1001, {"title": "Ref Title 1", "author": "Ref Author 1"})
@@ -172,7 +186,7 @@ async def test_process_document_existing_document_skipped(
     mock_check_dir,
 ):
     """
-    Test that processing is skipped if the document already exists in the DB.
+    Test that processing is skipped if the document exists in the DB with the file's size and mtime.
     """
     relative_path_str = "existing_doc.txt"
     relative_path_obj = Path(relative_path_str)
@@ -187,15 +201,19 @@ async def test_process_document_existing_document_skipped(
     mock_conn = AsyncMock()
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
-    # Mock DB check_document_exists to return True
-    mock_check_doc_exists = AsyncMock(return_value=True)
+    # Mock the stored fingerprint to match the file's stat (see mock_file_fingerprint)
+    mock_check_doc_exists = AsyncMock(return_value=db_layer.DocumentFingerprint(
+        document_id=5, file_size=1024, file_mtime_ns=1_700_000_000_000_000_000, content_hash="a" * 64
+    ))
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists):
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists), \
+         patch("philograph.ingestion.pipeline.file_utils.hash_file") as mock_hash_file:
         # --- Call Function ---
         result = await pipeline.process_document(relative_path_str)
 
     # --- Assertions ---
-    assert result == {"status": "Skipped", "message": "Document already exists"}
+    assert result == {"status": "Skipped", "message": "Document unchanged"}
+    mock_hash_file.assert_not_called() # Size and mtime match, so the content is not read
 
     # Check mocks
     mock_check_dir.assert_called_once_with(full_path)
@@ -205,3 +223,158 @@ async def test_process_document_existing_document_skipped(
 
     # Ensure extraction and further processing steps were NOT called
     mock_extract.assert_not_called()
+
+# --- Tests for re-ingestion of previously ingested files ---
+
+def _mock_db_connection(mock_get_db_conn):
+    mock_conn = AsyncMock()
+    mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
+    return mock_conn
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists", return_value=False)
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists", return_value=True)
+@patch("philograph.ingestion.pipeline.db_layer.get_db_connection")
+@patch("philograph.ingestion.pipeline.extract_content_and_metadata", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.get_embeddings_in_batches", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically")
+@patch("philograph.ingestion.pipeline.text_processing.parse_references", new_callable=AsyncMock)
+@patch("pathlib.Path.resolve", return_value=Path("/test/source/doc.txt"))
+async def test_process_document_legacy_document_reingested_once(
+    mock_resolve, mock_parse_references, mock_chunk_text, mock_get_embeddings, mock_extract,
+    mock_get_db_conn, mock_check_file, mock_check_dir, mock_file_fingerprint
+):
+    """
+    Test that a document ingested before fingerprints were recorded is treated as changed:
+    it is re-ingested in place and its fingerprint recorded, so later runs can skip it.
+    """
+    mock_conn = _mock_db_connection(mock_get_db_conn)
+    legacy = db_layer.DocumentFingerprint(document_id=5)
+    mock_extract.return_value = {
+        "metadata": {"title": "Doc", "author": "Author", "year": 1800},
+        "text_by_section": {"Introduction": "Current introduction."},
+        "references_raw": []
+    }
+    mock_chunk_text.return_value = ["Current introduction."]
+    mock_get_embeddings.return_value = [[0.1] * config.TARGET_EMBEDDING_DIMENSION]
+
+    mock_db = {
+        name: AsyncMock(return_value=value) for name, value in {
+            "get_document_fingerprint": legacy, "update_document": None, "get_document_sections": [(11, 0, None)],
+            "delete_document_references": 0, "delete_sections": 1, "resequence_sections": None,
+            "update_chunks_doc_year": None, "add_sections_batch": {0: 21}, "add_chunks_batch": [1001],
+            "get_first_chunk_id": 1001, "add_document": None
+        }.items()
+    }
+    patches = [patch(f"philograph.ingestion.pipeline.db_layer.{name}", mock) for name, mock in mock_db.items()]
+    for p in patches:
+        p.start()
+    pipeline.ingestion_stage_timings.reset()
+    try:
+        result = await pipeline.process_document("doc.txt")
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert result["status"] == "Success" and result["document_id"] == 5
+    assert {"fingerprint", "document_insert", "section_insert"} <= set(pipeline.ingestion_stage_timings.snapshot())
+    mock_db["add_document"].assert_not_awaited()
+    mock_db["delete_sections"].assert_awaited_once_with(mock_conn, [11]) # Legacy sections have no text hash to reuse
+    mock_file_fingerprint.assert_awaited_once_with(mock_conn, 5, 1024, 1_700_000_000_000_000_000, "a" * 64)
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists", return_value=False)
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists", return_value=True)
+@patch("philograph.ingestion.pipeline.db_layer.get_db_connection")
+@patch("philograph.ingestion.pipeline.extract_content_and_metadata", new_callable=AsyncMock)
+@patch("pathlib.Path.resolve", return_value=Path("/test/source/doc.txt"))
+async def test_process_document_touched_file_same_content_skipped(
+    mock_resolve, mock_extract, mock_get_db_conn, mock_check_file, mock_check_dir, mock_file_fingerprint
+):
+    """
+    Test that a file whose mtime changed but whose content hash did not is skipped, and its new mtime recorded.
+    """
+    _mock_db_connection(mock_get_db_conn)
+    stored = db_layer.DocumentFingerprint(document_id=5, file_size=1024, file_mtime_ns=1, content_hash="a" * 64)
+
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", AsyncMock(return_value=stored)):
+        result = await pipeline.process_document("doc.txt")
+
+    assert result == {"status": "Skipped", "message": "Document unchanged"}
+    assert mock_file_fingerprint.await_args.args[1:] == (5, 1024, 1_700_000_000_000_000_000, "a" * 64)
+    mock_extract.assert_not_called()
+
+@patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
+@patch("philograph.ingestion.pipeline.file_utils.check_directory_exists", return_value=False)
+@patch("philograph.ingestion.pipeline.file_utils.check_file_exists", return_value=True)
+@patch("philograph.ingestion.pipeline.db_layer.get_db_connection")
+@patch("philograph.ingestion.pipeline.extract_content_and_metadata", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.get_embeddings_in_batches", new_callable=AsyncMock)
+@patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically")
+@patch("philograph.ingestion.pipeline.text_processing.parse_references", new_callable=AsyncMock)
+@patch("pathlib.Path.resolve", return_value=Path("/test/source/doc.txt"))
+async def test_process_document_changed_file_reindexes_changed_sections(
+    mock_resolve, mock_parse_references, mock_chunk_text, mock_get_embeddings, mock_extract,
+    mock_get_db_conn, mock_check_file, mock_check_dir, mock_file_fingerprint, mock_corpus_generation
+):
+    """
+    Test that an edited file is re-ingested in place: unchanged sections keep their chunks
+    (moved to their new position), changed ones are replaced and only they are chunked and embedded.
+    """
+    mock_conn = _mock_db_connection(mock_get_db_conn)
+    stored = db_layer.DocumentFingerprint(document_id=5, file_size=10, file_mtime_ns=1, content_hash="b" * 64)
+    previous_sections = [
+        (11, 0, pipeline._section_text_hash("Old introduction.")),
+        (12, 1, pipeline._section_text_hash("Unchanged chapter."))
+    ]
+    mock_extract.return_value = {
+        "metadata": {"title": "Doc", "author": "Author", "year": 1800},
+        "text_by_section": {"Chapter One": "Unchanged chapter.", "Introduction": "New introduction."},
+        "references_raw": ["Ref 1"]
+    }
+    mock_chunk_text.return_value = ["New introduction."]
+    mock_get_embeddings.return_value = [[0.1] * config.TARGET_EMBEDDING_DIMENSION]
+    mock_parse_references.return_value = [{"title": "Ref Title 1"}]
+
+    mock_db = {
+        name: AsyncMock(return_value=value) for name, value in {
+            "get_document_fingerprint": stored, "update_document": None, "get_document_sections": previous_sections,
+            "delete_document_references": 1, "delete_sections": 1, "resequence_sections": None,
+            "update_chunks_doc_year": None, "add_sections_batch": {1: 21}, "add_chunks_batch": [1001],
+            "get_first_chunk_id": 900, "add_reference": 1, "add_document": None
+        }.items()
+    }
+    patches = [patch(f"philograph.ingestion.pipeline.db_layer.{name}", mock) for name, mock in mock_db.items()]
+    for p in patches:
+        p.start()
+    try:
+        result = await pipeline.process_document("doc.txt")
+    finally:
+        for p in patches:
+            p.stop()
+
+    assert result == {"status": "Success", "document_id": 5, "message": "Document updated: re-indexed 1 of 2 sections."}
+    mock_corpus_generation.assert_awaited_once_with(mock_conn)
+    mock_db["add_document"].assert_not_awaited()
+    mock_db["update_document"].assert_awaited_once_with(mock_conn, 5, "Doc", "Author", 1800, mock_extract.return_value["metadata"])
+    assert mock_file_fingerprint.await_args.args[1:] == (5, 1024, 1_700_000_000_000_000_000, "a" * 64)
+    mock_db["delete_sections"].assert_awaited_once_with(mock_conn, [11])
+    mock_db["resequence_sections"].assert_awaited_once_with(mock_conn, 5, [(12, "Chapter One", 0, 0)])
+    mock_db["update_chunks_doc_year"].assert_awaited_once_with(mock_conn, 5, 1800)
+    mock_db["add_sections_batch"].assert_awaited_once_with(
+        mock_conn, 5, [("Introduction", 0, 1)], text_hashes=[pipeline._section_text_hash("New introduction.")]
+    )
+    mock_chunk_text.assert_called_once_with("New introduction.", config.TARGET_CHUNK_SIZE)
+    assert mock_db["add_chunks_batch"].await_args.args[1][0][0] == 21
+    # References are re-linked to the document's first chunk, which was kept
+    mock_db["delete_document_references"].assert_awaited_once_with(mock_conn, 5)
+    mock_db["add_reference"].assert_awaited_once_with(mock_conn, 900, {"title": "Ref Title 1"})
+
+async def test_plan_section_reuse_matches_by_hash():
+    """Test sections are reused by text hash (each stored section at most once) and unmatched ones removed."""
+    previous = [(1, 0, "h1"), (2, 1, "h2"), (3, 2, "h1"), (4, 3, None)]
+
+    reused, removed = pipeline._plan_section_reuse(previous, ["h1", "h3", "h1", "h1"])
+
+    assert reused == {0: 1, 2: 3}
+    assert removed == [2, 4]
@@ -10,11 +10,26 @@ import httpx # Keep for potential exception types in dependencies
 # Assuming config values are needed and potentially mocked
 from philograph import config
 from philograph.ingestion import pipeline
+from philograph.utils import file_utils
 from philograph.data_access import db_layer # For mocking types if needed
 
 # Mark all tests in this module as asyncio
 pytestmark = pytest.mark.asyncio
 
+@pytest.fixture(autouse=True)
+def mock_file_fingerprint():
+    """The source files are mocked, so stub their stat and content hash (and the fingerprint write)."""
+    with patch("philograph.ingestion.pipeline.file_utils.get_file_stat", return_value=file_utils.FileStat(size=1024, mtime_ns=1_700_000_000_000_000_000)), \
+         patch("philograph.ingestion.pipeline.file_utils.hash_file", return_value="a" * 64), \
+         patch("philograph.ingestion.pipeline.db_layer.set_document_fingerprint", new_callable=AsyncMock) as mock_set_fingerprint:
+        yield mock_set_fingerprint
+
+@pytest.fixture(autouse=True)
+def mock_corpus_generation():
+    """Stubs the corpus generation bump that ends each ingest transaction."""
+    with patch("philograph.ingestion.pipeline.db_layer.bump_corpus_generation", new_callable=AsyncMock, return_value=1) as mock_bump:
+        yield mock_bump
+
 # --- Tests for process_document (Single File Error Scenarios) ---
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
@@ -91,12 +106,12 @@ async def test_process_document_extraction_error(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB check_document_exists to return False (new document)
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
 
     # Mock Extraction to raise an error
     mock_extract.side_effect = Exception("GROBID failed")
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists):
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists):
         # --- Call Function ---
         result = await pipeline.process_document(relative_path_str)
 
@@ -150,9 +165,9 @@ async def test_process_document_embedding_error(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB calls (assuming doc check passes and doc/section are added)
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
     mock_add_doc = AsyncMock(return_value=456) # Mock document ID
-    mock_add_section = AsyncMock(return_value=3) # Mock section ID
+    mock_add_sections = AsyncMock(return_value={0: 3}) # Mock section IDs by sequence
 
     # Mock Extraction (successful)
     mock_extract.return_value = {
@@ -167,9 +182,9 @@ async def test_process_document_embedding_error(
     # Mock Embeddings to raise an error
     mock_get_embeddings.side_effect = RuntimeError("Embedding API down")
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists), \
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists), \
          patch("philograph.ingestion.pipeline.db_layer.add_document", mock_add_doc), \
-         patch("philograph.ingestion.pipeline.db_layer.add_section", mock_add_section):
+         patch("philograph.ingestion.pipeline.db_layer.add_sections_batch", mock_add_sections):
 
         # --- Call Function ---
         result = await pipeline.process_document(relative_path_str)
@@ -185,7 +200,7 @@ async def test_process_document_embedding_error(
     mock_check_doc_exists.assert_called_once_with(mock_conn, relative_path_str)
     mock_extract.assert_called_once_with(full_path)
     mock_add_doc.assert_called_once()
-    mock_add_section.assert_called_once()
+    mock_add_sections.assert_called_once()
     mock_chunk_text.assert_called_once()
     mock_get_embeddings.assert_called_once() # Should be called
 
@@ -230,9 +245,9 @@ async def test_process_document_indexing_error(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB calls (assuming doc check passes and doc/section are added)
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
     mock_add_doc = AsyncMock(return_value=789) # Mock document ID
-    mock_add_section = AsyncMock(return_value=4) # Mock section ID
+    mock_add_sections = AsyncMock(return_value={0: 4}) # Mock section IDs by sequence
 
     # Mock Extraction (successful)
     mock_extract.return_value = {
@@ -251,9 +266,9 @@ async def test_process_document_indexing_error(
     # Mock Indexing to raise an error
     mock_add_chunks.side_effect = Exception("DB connection lost during indexing")
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists), \
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists), \
          patch("philograph.ingestion.pipeline.db_layer.add_document", mock_add_doc), \
-         patch("philograph.ingestion.pipeline.db_layer.add_section", mock_add_section):
+         patch("philograph.ingestion.pipeline.db_layer.add_sections_batch", mock_add_sections):
         # Note: mock_add_chunks is patched via decorator
 
         # --- Call Function ---
@@ -270,7 +285,7 @@ async def test_process_document_indexing_error(
     mock_check_doc_exists.assert_called_once_with(mock_conn, relative_path_str)
     mock_extract.assert_called_once_with(full_path)
     mock_add_doc.assert_called_once()
-    mock_add_section.assert_called_once()
+    mock_add_sections.assert_called_once()
     mock_chunk_text.assert_called_once()
     mock_get_embeddings.assert_called_once()
     mock_add_chunks.assert_called_once() # Should be called
@@ -292,7 +307,7 @@ async def test_process_document_db_check_error(
     mock_check_dir,
 ):
     """
-    Test handling when the initial db_layer.check_document_exists call fails.
+    Test handling when the initial db_layer.get_document_fingerprint call fails.
     """
     relative_path_str = "doc_db_check_error.txt"
     relative_path_obj = Path(relative_path_str)
@@ -310,7 +325,7 @@ async def test_process_document_db_check_error(
     # Mock DB check_document_exists to raise an error
     mock_check_doc_exists = AsyncMock(side_effect=Exception("DB connection pool exhausted"))
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists):
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists):
         # --- Call Function ---
         result = await pipeline.process_document(relative_path_str)
 
@@ -332,11 +347,11 @@ async def test_process_document_db_check_error(
 @patch("philograph.ingestion.pipeline.db_layer.get_db_connection")
 @patch("philograph.ingestion.pipeline.extract_content_and_metadata", new_callable=AsyncMock)
 @patch("philograph.ingestion.pipeline.db_layer.add_document", new_callable=AsyncMock) # Mock to raise error
-@patch("philograph.ingestion.pipeline.db_layer.add_section", new_callable=AsyncMock) # Mock to check not called
+@patch("philograph.ingestion.pipeline.db_layer.add_sections_batch", new_callable=AsyncMock) # Mock to check not called
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_db_add_doc_error(
     mock_resolve, # Add mock argument
-    mock_add_section, # Mocked to check not called
+    mock_add_sections, # Mocked to check not called
     mock_add_doc, # Mocked to raise error
     mock_extract,
     mock_get_db_conn,
@@ -360,7 +375,7 @@ async def test_process_document_db_add_doc_error(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB check_document_exists to return False (new document)
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
 
     # Mock Extraction (successful)
     mock_extract.return_value = {
@@ -372,7 +387,7 @@ async def test_process_document_db_add_doc_error(
     # Mock add_document to raise an error
     mock_add_doc.side_effect = Exception("DB constraint violation on add_document")
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists):
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists):
         # Note: mock_add_doc is patched via decorator
 
         # --- Call Function ---
@@ -391,7 +406,7 @@ async def test_process_document_db_add_doc_error(
     mock_add_doc.assert_called_once() # Should be called
 
     # Ensure subsequent steps were NOT called
-    mock_add_section.assert_not_called()
+    mock_add_sections.assert_not_called()
 
 @patch("philograph.ingestion.pipeline.config.SOURCE_FILE_DIR_ABSOLUTE", Path("/test/source"))
 @patch("philograph.ingestion.pipeline.file_utils.check_directory_exists")
@@ -399,13 +414,13 @@ async def test_process_document_db_add_doc_error(
 @patch("philograph.ingestion.pipeline.db_layer.get_db_connection")
 @patch("philograph.ingestion.pipeline.extract_content_and_metadata", new_callable=AsyncMock)
 @patch("philograph.ingestion.pipeline.db_layer.add_document", new_callable=AsyncMock)
-@patch("philograph.ingestion.pipeline.db_layer.add_section", new_callable=AsyncMock) # Mock to raise error
+@patch("philograph.ingestion.pipeline.db_layer.add_sections_batch", new_callable=AsyncMock) # Mock to raise error
 @patch("philograph.ingestion.pipeline.text_processing.chunk_text_semantically") # Mock to check not called
 @patch("pathlib.Path.resolve") # Mock resolve
 async def test_process_document_db_add_section_error(
     mock_resolve, # Add mock argument
     mock_chunk_text, # Mocked to check not called
-    mock_add_section, # Mocked to raise error
+    mock_add_sections, # Mocked to raise error
     mock_add_doc,
     mock_extract,
     mock_get_db_conn,
@@ -413,7 +428,7 @@ async def test_process_document_db_add_section_error(
     mock_check_dir,
 ):
     """
-    Test handling when db_layer.add_section raises an error within the transaction.
+    Test handling when db_layer.add_sections_batch raises an error within the transaction.
     """
     relative_path_str = "doc_add_section_error.pdf"
     relative_path_obj = Path(relative_path_str)
@@ -429,7 +444,7 @@ async def test_process_document_db_add_section_error(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB check_document_exists to return False (new document)
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
 
     # Mock add_document (successful)
     mock_add_doc.return_value = 999 # Mock document ID
@@ -441,18 +456,18 @@ async def test_process_document_db_add_section_error(
         "references_raw": []
     }
 
-    # Mock add_section to raise an error
-    mock_add_section.side_effect = Exception("DB constraint violation on add_section")
+    # Mock add_sections_batch to raise an error
+    mock_add_sections.side_effect = Exception("DB constraint violation on add_sections_batch")
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists):
-        # Note: add_doc and add_section are patched via decorator
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists):
+        # Note: add_doc and add_sections_batch are patched via decorator
 
         # --- Call Function ---
         result = await pipeline.process_document(relative_path_str)
 
     # --- Assertions ---
     # Expecting the error to be caught by the transaction block and reported
-    assert result == {"status": "Error", "message": "Ingestion transaction failed: Chunking/Section DB insert failed: DB constraint violation on add_section"}
+    assert result == {"status": "Error", "message": "Ingestion transaction failed: Chunking/Section DB insert failed: DB constraint violation on add_sections_batch"}
 
     # Check mocks up to the point of failure
     mock_check_dir.assert_called_once_with(full_path)
@@ -461,7 +476,7 @@ async def test_process_document_db_add_section_error(
     mock_check_doc_exists.assert_called_once_with(mock_conn, relative_path_str)
     mock_extract.assert_called_once_with(full_path)
     mock_add_doc.assert_called_once()
-    mock_add_section.assert_called_once() # Should be called
+    mock_add_sections.assert_called_once() # Should be called
 
     # Ensure subsequent steps were NOT called
     mock_chunk_text.assert_not_called()
@@ -508,12 +523,10 @@ async def test_process_document_db_add_reference_error(
     mock_get_db_conn.return_value.__aenter__.return_value = mock_conn
 
     # Mock DB calls (assuming doc check, add doc/section/chunks pass)
-    mock_check_doc_exists = AsyncMock(return_value=False)
+    mock_check_doc_exists = AsyncMock(return_value=None)
     mock_add_doc = AsyncMock(return_value=1000) # Mock document ID
-    mock_add_section = AsyncMock(return_value=5) # Mock section ID
-    mock_add_chunks = AsyncMock(return_value=None)
-    # Mock fetchone for finding the first chunk ID for reference linking
-    mock_cursor.fetchone = AsyncMock(return_value={'id': 1002}) # Mock chunk ID
+    mock_add_sections = AsyncMock(return_value={0: 5}) # Mock section IDs by sequence
+    mock_add_chunks = AsyncMock(return_value=[1002]) # Mock chunk IDs (first is used for reference linking)
 
     # Mock Extraction (successful, with references)
     mock_extract.return_value = {
@@ -535,9 +548,9 @@ async def test_process_document_db_add_reference_error(
     # Mock add_reference to raise an error
     mock_add_ref.side_effect = Exception("DB constraint violation on add_reference")
 
-    with patch("philograph.ingestion.pipeline.db_layer.check_document_exists", mock_check_doc_exists), \
+    with patch("philograph.ingestion.pipeline.db_layer.get_document_fingerprint", mock_check_doc_exists), \
          patch("philograph.ingestion.pipeline.db_layer.add_document", mock_add_doc), \
-         patch("philograph.ingestion.pipeline.db_layer.add_section", mock_add_section), \
+         patch("philograph.ingestion.pipeline.db_layer.add_sections_batch", mock_add_sections), \
          patch("philograph.ingestion.pipeline.db_layer.add_chunks_batch", mock_add_chunks):
         # Note: add_reference is patched via decorator
 
@@ -555,11 +568,10 @@ async def test_process_document_db_add_reference_error(
     mock_check_doc_exists.assert_called_once_with(mock_conn, relative_path_str)
     mock_extract.assert_called_once_with(full_path)
     mock_add_doc.assert_called_once()
-    mock_add_section.assert_called_once()
+    mock_add_sections.assert_called_once()
     mock_chunk_text.assert_called_once()
     mock_get_embeddings.assert_called_once()
     mock_add_chunks.assert_called_once()
     mock_parse_references.assert_called_once()
-    mock_cursor.execute.assert_called_once() # Check that chunk ID was queried
-    mock_cursor.fetchone.assert_called_once()
+    mock_cursor.execute.assert_not_called() # Chunk ID comes from add_chunks_batch
     mock_add_ref.assert_called_once() # Should be called
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from philograph.ingestion import watcher as watcher_module
+from philograph.ingestion.watcher import SourceWatcher
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Points the source directory at a temporary directory."""
+    with patch("philograph.ingestion.watcher.config.SOURCE_FILE_DIR_ABSOLUTE", tmp_path):
+        yield tmp_path
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.02)
+
+# --- Tests for debouncing and the bounded queue ---
+
+async def test_burst_of_changes_submitted_once_after_quiet(source_dir):
+    """Test that repeated changes to a file within the debounce period yield a single submission."""
+    (source_dir / "kant").mkdir()
+    book = source_dir / "kant" / "critique.pdf"
+    book.write_bytes(b"%PDF")
+    submit = AsyncMock()
+    watcher = SourceWatcher(submit=submit, debounce_seconds=0.2, force_polling=True, poll_seconds=60)
+    watcher.polling = False # Drive changes by hand; no poll interval in the quiet period
+
+    with patch.object(SourceWatcher, "_watch", new=AsyncMock()):
+        watcher.start()
+        for _ in range(5):
+            watcher._mark_changed(book)
+            await asyncio.sleep(0.05)
+        await _wait_for(lambda: submit.await_count == 1)
+        await asyncio.sleep(0.3)
+        await watcher.stop()
+
+    submit.assert_awaited_once_with(os.path.join("kant", "critique.pdf"))
+
+async def test_ignores_unsupported_hidden_and_removed_files(source_dir):
+    """Test that only supported, visible files that still exist are submitted."""
+    for name in ["notes.docx", ".partial.pdf", "~lock.md", "gone.txt", "kept.txt"]:
+        (source_dir / name).write_text("x")
+    submit = AsyncMock()
+    watcher = SourceWatcher(submit=submit, debounce_seconds=0.05, force_polling=True)
+    watcher.polling = False
+
+    with patch.object(SourceWatcher, "_watch", new=AsyncMock()):
+        watcher.start()
+        for name in ["notes.docx", ".partial.pdf", "~lock.md", "gone.txt", "kept.txt"]:
+            watcher._mark_changed(source_dir / name)
+        (source_dir / "gone.txt").unlink()
+        await _wait_for(lambda: submit.await_count == 1)
+        await asyncio.sleep(0.2)
+        await watcher.stop()
+
+    submit.assert_awaited_once_with("kept.txt")
+
+async def test_full_queue_merges_changes_and_submit_errors_are_logged(source_dir):
+    """Test that a slow consumer bounds the queue, duplicates merge, and a failed submit does not stop the watcher."""
+    paths = [source_dir / f"book{i}.txt" for i in range(4)]
+    for path in paths:
+        path.write_text("x")
+    release = asyncio.Event()
+    submitted = []
+
+    async def slow_submit(relative_path):
+        await release.wait()
+        submitted.append(relative_path)
+        if relative_path == "book0.txt":
+            raise RuntimeError("API unavailable")
+
+    watcher = SourceWatcher(submit=slow_submit, debounce_seconds=0.05, queue_size=1, force_polling=True)
+    watcher.polling = False
+
+    with patch.object(SourceWatcher, "_watch", new=AsyncMock()):
+        watcher.start()
+        for path in paths:
+            watcher._mark_changed(path)
+        await asyncio.sleep(0.3)
+        assert watcher._queue.qsize() == 1 # book0 is being submitted, book1 waits, the rest stay pending
+        watcher._mark_changed(paths[3]) # Still pending: merged into its existing entry
+        release.set()
+        await _wait_for(lambda: len(submitted) == 4)
+        await asyncio.sleep(0.2)
+        await watcher.stop()
+
+    assert sorted(submitted) == ["book0.txt", "book1.txt", "book2.txt", "book3.txt"]
+
+# --- Tests for change detection ---
+
+async def test_polling_detects_new_and_modified_files(source_dir):
+    """Test that polling submits files added or modified after the baseline scan, but not existing ones."""
+    existing = source_dir / "existing.md"
+    existing.write_text("old")
+    edited = source_dir / "edited.md"
+    edited.write_text("old")
+    submit = AsyncMock()
+    watcher = SourceWatcher(submit=submit, debounce_seconds=0.0, poll_seconds=0.1, force_polling=True)
+
+    watcher.start()
+    await asyncio.sleep(0.05) # Baseline scan
+    (source_dir / "sub").mkdir()
+    (source_dir / "sub" / "new.epub").write_bytes(b"epub")
+    os.utime(edited, ns=(1, 1))
+    await _wait_for(lambda: submit.await_count == 2)
+    await watcher.stop()
+
+    assert sorted(call.args[0] for call in submit.await_args_list) == ["edited.md", os.path.join("sub", "new.epub")]
+
+async def test_notification_failure_falls_back_to_polling(source_dir):
+    """Test that an error from the notification backend switches the watcher to polling."""
+    watcher = SourceWatcher(submit=AsyncMock(), force_polling=False)
+    watcher.polling = False
+
+    with patch.object(SourceWatcher, "_watch_notifications", new=AsyncMock(side_effect=OSError("inotify watch limit reached"))), \
+         patch.object(SourceWatcher, "_watch_polling", new=AsyncMock()) as mock_polling:
+        await watcher._watch()
+
+    assert watcher.polling is True
+    mock_polling.assert_awaited_once()
+
+@pytest.mark.skipif(watcher_module.watchfiles is None, reason="watchfiles not installed")
+async def test_notifications_detect_new_file(source_dir):
+    """Test that filesystem notifications pick up a newly created file."""
+    submit = AsyncMock()
+    watcher = SourceWatcher(submit=submit, debounce_seconds=0.1, force_polling=False)
+
+    watcher.start()
+    await asyncio.sleep(0.3) # Let the watch be established
+    (source_dir / "dropped.pdf").write_bytes(b"%PDF")
+    await _wait_for(lambda: submit.await_count >= 1, timeout=10.0)
+    await watcher.stop()
+
+    submit.assert_any_await("dropped.pdf")
+
+async def test_start_on_missing_directory_is_noop(tmp_path):
+    """Test that a missing watch root is logged and nothing is started."""
+    watcher = SourceWatcher(submit=AsyncMock(), root=tmp_path / "missing")
+
+    watcher.start()
+
+    assert not watcher.running
+    await watcher.stop()
+
+# --- Tests for single watcher election ---
+
+async def test_exclusive_watcher_stands_by_without_lock(source_dir):
+    """Test that an exclusive watcher does not watch while another process holds the watcher lock."""
+    acquire = AsyncMock(return_value=None)
+    watcher = SourceWatcher(submit=AsyncMock(), poll_seconds=0.1, exclusive=True)
+
+    with patch("philograph.ingestion.watcher.db_layer.acquire_session_lock", acquire), \
+         patch.object(SourceWatcher, "_start_watching") as start_watching:
+        watcher.start()
+        await _wait_for(lambda: acquire.await_count >= 2) # Keeps retrying
+        await watcher.stop()
+
+    acquire.assert_awaited_with(watcher_module.WATCH_LOCK_KEY)
+    start_watching.assert_not_called()
+
+async def test_exclusive_watcher_watches_while_holding_lock(source_dir):
+    """Test that the lock holder watches, and stops (closing the lock connection) once the lock connection fails."""
+    lock_conn = AsyncMock()
+    grants = iter([lock_conn])
+    acquire = AsyncMock(side_effect=lambda key: next(grants, None))
+    submit = AsyncMock()
+
+    async def watch_nothing(self):
+        await asyncio.Event().wait()
+    watcher = SourceWatcher(submit=submit, debounce_seconds=0.05, poll_seconds=0.2, exclusive=True)
+
+    with patch("philograph.ingestion.watcher.db_layer.acquire_session_lock", acquire), \
+         patch.object(SourceWatcher, "_watch", new=watch_nothing):
+        watcher.start()
+        await _wait_for(lambda: watcher._queue is not None)
+        book = source_dir / "book.txt"
+        book.write_text("text")
+        watcher.polling = False
+        watcher._mark_changed(book)
+        await _wait_for(lambda: submit.await_count == 1)
+
+        lock_conn.execute.side_effect = OSError("connection lost")
+        await _wait_for(lambda: lock_conn.close.await_count == 1)
+        assert watcher.running # Back to standing by, retrying the lock
+        await watcher.stop()
+
+    submit.assert_awaited_once_with("book.txt")
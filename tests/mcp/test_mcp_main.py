@@ -167,6 +167,36 @@ def test_philograph_ingest_missing_path():
     with pytest.raises(mcp_main.MCPValidationError, match="Missing required argument: path"):
         mcp_main.handle_ingest_tool(args)
 
+# --- Tests for philograph_ingest_status Tool ---
+
+@patch("src.philograph.mcp.main.call_backend_api_sync")
+def test_philograph_ingest_status_running(mock_call_api):
+    """Test philograph_ingest_status returns a running job's progress without fetching a result."""
+    job = {"job_id": 7, "path": "kant", "status": "running", "attempts": 1, "progress": {"files_done": 2}}
+    mock_call_api.return_value = job
+
+    result = mcp_main.handle_ingest_status_tool({"job_id": 7})
+
+    assert result == job
+    mock_call_api.assert_called_once_with("GET", "/ingest/jobs/7")
+
+@patch("src.philograph.mcp.main.call_backend_api_sync")
+def test_philograph_ingest_status_finished_includes_result(mock_call_api):
+    """Test philograph_ingest_status attaches the pipeline result once the job has finished."""
+    job = {"job_id": 7, "path": "kant", "status": "succeeded", "attempts": 1, "progress": {"files_done": 1}}
+    job_result = {"status": "Success", "message": "Ingested", "document_id": 3, "job_id": 7}
+    mock_call_api.side_effect = [job, job_result]
+
+    result = mcp_main.handle_ingest_status_tool({"job_id": 7})
+
+    assert result["result"] == job_result
+    assert mock_call_api.call_args_list[1].args == ("GET", "/ingest/jobs/7/result")
+
+def test_philograph_ingest_status_invalid_job_id():
+    """Test philograph_ingest_status validation for a missing or non-integer job_id."""
+    with pytest.raises(mcp_main.MCPValidationError, match="job_id"):
+        mcp_main.handle_ingest_status_tool({"job_id": "7"})
+
 # --- Tests for philograph_search Tool ---
 
 @patch("src.philograph.mcp.main.call_backend_api_sync")
@@ -188,6 +218,15 @@ def test_philograph_search_success_query_only(mock_call_api):
     assert result == mock_api_response["results"]
     mock_call_api.assert_called_once_with("POST", expected_endpoint, json_data=expected_payload)
 
+@patch("src.philograph.mcp.main.call_backend_api_sync")
+def test_philograph_search_hybrid_mode(mock_call_api):
+    """Test philograph_search tool forwards the search mode to the backend."""
+    mock_call_api.return_value = {"results": []}
+
+    mcp_main.handle_search_tool({"query": "Aufhebung", "limit": 5, "mode": "hybrid"})
+
+    mock_call_api.assert_called_once_with("POST", "/search", json_data={"query": "Aufhebung", "limit": 5, "mode": "hybrid"})
+
 @patch("src.philograph.mcp.main.call_backend_api_sync")
 def test_philograph_search_success_with_filters(mock_call_api):
     """Test philograph_search tool success with query and filters."""
@@ -226,6 +265,32 @@ def test_philograph_search_api_error(mock_call_api):
 
     mock_call_api.assert_called_once_with("POST", expected_endpoint, json_data=expected_payload)
 
+@patch("src.philograph.mcp.main.call_backend_api_sync")
+def test_philograph_search_batch_queries(mock_call_api):
+    """Test philograph_search tool sends 'queries' to /search/batch and returns results per query."""
+    # Arrange
+    args = {"queries": ["What is critique?", "What is Geist?"], "filters": {"author": "Kant"}, "limit": 3}
+    expected_payload = {"queries": [
+        {"query": "What is critique?", "limit": 3, "filters": {"author": "Kant"}},
+        {"query": "What is Geist?", "limit": 3, "filters": {"author": "Kant"}},
+    ]}
+    mock_call_api.return_value = {"results": [{"results": [{"chunk_id": 1}]}, {"results": []}]}
+
+    # Act
+    result = mcp_main.handle_search_tool(args)
+
+    # Assert
+    assert result == [
+        {"query": "What is critique?", "results": [{"chunk_id": 1}]},
+        {"query": "What is Geist?", "results": []},
+    ]
+    mock_call_api.assert_called_once_with("POST", "/search/batch", json_data=expected_payload)
+
+def test_philograph_search_invalid_queries():
+    """Test philograph_search tool validation for non-string batch queries."""
+    with pytest.raises(mcp_main.MCPValidationError, match="must be a list of non-empty strings"):
+        mcp_main.handle_search_tool({"queries": ["ok", ""]})
+
 def test_philograph_search_missing_query():
     """Test philograph_search tool validation for missing query."""
     # Arrange
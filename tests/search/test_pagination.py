@@ -0,0 +1,47 @@
+import pytest
+
+from src.philograph.search import pagination
+
+# --- Tests for continuation tokens ---
+
+def test_continuation_token_round_trips_position():
+    """Test that a token decodes to the exact distance and chunk id it was built from."""
+    key = pagination.query_key("What is Geist?", {"author": "Hegel"})
+    token = pagination.encode_continuation_token(0.123456789012345, 42, key, depth=40)
+    assert "=" not in token
+    assert pagination.decode_continuation_token(token, key) == (0.123456789012345, 42, 40)
+
+def test_query_key_ignores_whitespace_and_filter_order():
+    """Test that equivalent searches share a key while different settings do not."""
+    base = pagination.query_key("What is  Geist?", {"author": "Hegel", "year": 1807})
+    assert pagination.query_key(" What is Geist? ", {"year": 1807, "author": "Hegel"}) == base
+    assert pagination.query_key("What is Geist?", {"author": "Hegel", "year": 1807}, exact=True) != base
+
+def test_continuation_token_rejected_for_other_search():
+    """Test that a token issued for one search cannot continue another."""
+    token = pagination.encode_continuation_token(0.1, 1, pagination.query_key("first", None))
+    with pytest.raises(ValueError, match="does not belong to this search"):
+        pagination.decode_continuation_token(token, pagination.query_key("second", None))
+
+@pytest.mark.parametrize("token", [
+    "not-a-token", "", "eyJ2IjoyfQ",
+    "eyJ2IjoxLCJrIjoia2V5IiwiZCI6MC4xLCJjIjoxfQ", # Version 1 token (no depth)
+])
+def test_malformed_continuation_token_rejected(token):
+    """Test that garbage and unknown token versions raise ValueError."""
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        pagination.decode_continuation_token(token, "key")
+
+def test_next_continuation_token_only_for_full_pages():
+    """Test that a token is issued from the last row of a full page and not for a short page."""
+    results = [{"chunk_id": 7, "distance": 0.1}, {"chunk_id": 3, "distance": 0.2}]
+    token = pagination.next_continuation_token(results, 2, "key", depth=4)
+    assert pagination.decode_continuation_token(token, "key") == (0.2, 3, 6)
+    assert pagination.next_continuation_token(results, 3, "key") is None
+    assert pagination.next_continuation_token([], 0, "key") is None
+
+def test_next_continuation_token_ends_at_max_depth():
+    """Test that the token chain ends instead of continuing past the depth the index scan budget covers."""
+    results = [{"chunk_id": 7, "distance": 0.1}, {"chunk_id": 3, "distance": 0.2}]
+    assert pagination.next_continuation_token(results, 2, "key", depth=6, max_depth=10) is not None
+    assert pagination.next_continuation_token(results, 2, "key", depth=7, max_depth=10) is None
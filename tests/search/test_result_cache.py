@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.philograph.search.result_cache import SearchResultCache
+
+# --- Tests for SearchResultCache ---
+
+def test_fingerprint_normalizes_query_and_filter_order():
+    """Test that whitespace and filter key order do not change the fingerprint, but offset does."""
+    base = SearchResultCache.fingerprint("What is  Geist?", 10, {"author": "Hegel", "year": 1807}, 0)
+    assert SearchResultCache.fingerprint(" What is Geist? ", 10, {"year": 1807, "author": "Hegel"}, 0) == base
+    assert SearchResultCache.fingerprint("What is Geist?", 10, {"author": "Hegel", "year": 1807}, 10) != base
+    assert SearchResultCache.fingerprint("What is Geist?", 5, {"author": "Hegel", "year": 1807}, 0) != base
+
+def test_results_scoped_to_generation():
+    """Test that results stored at an older generation are not served at a newer one, nor without a generation."""
+    cache = SearchResultCache(10)
+    fingerprint = SearchResultCache.fingerprint("q", 10, None, 0)
+    cache.set(fingerprint, [{"chunk_id": 1}], 4)
+    assert cache.get(fingerprint, 4) == [{"chunk_id": 1}]
+    assert cache.get(fingerprint, 5) is None
+    assert cache.get(fingerprint, None) is None
+
+    cache.set(fingerprint, [{"chunk_id": 2}], None)
+    assert cache.get(fingerprint, 4) == [{"chunk_id": 1}]
+
+@pytest.mark.asyncio
+async def test_current_generation_read_from_database():
+    """Test that the generation is read through the given db layer, and caching is bypassed when that fails."""
+    db = MagicMock()
+    db.get_db_connection.return_value.__aenter__.return_value = "conn"
+    db.get_corpus_generation = AsyncMock(return_value=7)
+    cache = SearchResultCache(10)
+
+    assert await cache.current_generation(db) == 7
+    db.get_corpus_generation.assert_awaited_once_with("conn")
+    assert cache.stats()["generation"] == 7
+
+    db.get_corpus_generation.side_effect = RuntimeError("database unavailable")
+    assert await cache.current_generation(db) is None
+    assert await SearchResultCache(0).current_generation(db) is None # Disabled cache: no read
+
+def test_fingerprint_includes_recall_settings():
+    """Test that ef_search and exact mode change the fingerprint, and defaults keep the base key."""
+    base = SearchResultCache.fingerprint("q", 10, None, 0)
+    assert SearchResultCache.fingerprint("q", 10, None, 0, None, False) == base
+    assert SearchResultCache.fingerprint("q", 10, None, 0, ef_search=100) != base
+    assert SearchResultCache.fingerprint("q", 10, None, 0, exact=True) not in (base, SearchResultCache.fingerprint("q", 10, None, 0, ef_search=100))
+
+def test_fingerprint_includes_keyset_position():
+    """Test that pages continuing from different positions are cached separately."""
+    base = SearchResultCache.fingerprint("q", 10, None, 0)
+    after = SearchResultCache.fingerprint("q", 10, None, 0, after=(0.25, 42))
+    assert after != base
+    assert SearchResultCache.fingerprint("q", 10, None, 0, after=(0.25, 43)) != after
@@ -29,6 +29,7 @@ def mock_db_layer():
     mock.get_db_connection.return_value.__aenter__.return_value = mock_conn
     # Mock the function called within the context
     mock.vector_search_chunks = AsyncMock(return_value=MOCK_DB_RESULTS)
+    mock.get_corpus_generation = AsyncMock(return_value=0)
     return mock
 
 @pytest.fixture
@@ -62,7 +63,10 @@ class TestSearchService:
             mock_db_layer.get_db_connection.return_value.__aenter__.return_value, # Check connection object passed
             TEST_EMBEDDING,
             config.SEARCH_TOP_K, # Check default top_k
-            None # Check default filters
+            None, # Check default filters
+            offset=0, # Check default offset
+            ef_search=None,
+            exact=False
         )
         assert results == EXPECTED_FORMATTED_RESULT
 
@@ -83,7 +87,10 @@ class TestSearchService:
             mock_db_layer.get_db_connection.return_value.__aenter__.return_value,
             TEST_EMBEDDING,
             5, # Check specific top_k passed
-            TEST_FILTERS # Check filters passed
+            TEST_FILTERS, # Check filters passed
+            offset=0,
+            ef_search=None,
+            exact=False
         )
         assert results == EXPECTED_FORMATTED_RESULT # Check formatting still works
 
@@ -162,4 +169,293 @@ class TestSearchService:
 
         mock_get_embedding.assert_awaited_once_with(TEST_QUERY)
         mock_db_layer.vector_search_chunks.assert_awaited_once()
-        assert results == []
\ No newline at end of file
+        assert results == []
+# --- Tests for query embedding caching ---
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service._request_query_embedding', new_callable=AsyncMock)
+async def test_get_query_embedding_repeat_query_skips_proxy(mock_request):
+    """Test that a repeated (whitespace-normalized) query is served from the query embedding cache."""
+    from src.philograph.search import service
+    from src.philograph.utils.embedding_cache import EmbeddingCache
+    mock_request.return_value = TEST_EMBEDDING
+
+    with patch.object(service, 'embedding_cache', EmbeddingCache(10, persist=False)):
+        first = await service.get_query_embedding(TEST_QUERY)
+        second = await service.get_query_embedding(f"  {TEST_QUERY} ")
+
+    mock_request.assert_awaited_once_with(TEST_QUERY)
+    assert first is second
+    stats = service.get_query_embedding_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service._request_query_embedding', new_callable=AsyncMock)
+async def test_get_query_embedding_coalesces_concurrent_misses(mock_request):
+    """Test that concurrent identical misses share a single proxy request."""
+    import asyncio
+    from src.philograph.search import service
+    from src.philograph.utils.embedding_cache import EmbeddingCache
+
+    async def slow_request(text):
+        await asyncio.sleep(0.01)
+        return TEST_EMBEDDING
+    mock_request.side_effect = slow_request
+
+    with patch.object(service, 'embedding_cache', EmbeddingCache(10, persist=False)):
+        results = await asyncio.gather(*(service.get_query_embedding(TEST_QUERY) for _ in range(4)))
+
+    assert mock_request.await_count == 1
+    assert all(result == TEST_EMBEDDING for result in results)
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service._request_query_embedding', new_callable=AsyncMock)
+async def test_get_query_embedding_expired_entry_refetches(mock_request):
+    """Test that an entry past its TTL is fetched again."""
+    from src.philograph.search import service
+    from src.philograph.utils.cache import LRUCache
+    from src.philograph.utils.embedding_cache import EmbeddingCache
+    now = [0.0]
+    mock_request.return_value = TEST_EMBEDDING
+
+    with patch.object(service, 'embedding_cache', EmbeddingCache(10, persist=False)), \
+         patch.object(service, 'query_embedding_cache', LRUCache(10, ttl_seconds=60, clock=lambda: now[0])):
+        await service.get_query_embedding(TEST_QUERY)
+        now[0] = 61.0
+        service.embedding_cache.clear() # Force the second lookup past both caches
+        await service.get_query_embedding(TEST_QUERY)
+
+    assert mock_request.await_count == 2
+
+# --- Tests for the search result cache ---
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_results_cached_per_fingerprint(mock_get_embedding, search_service, mock_db_layer):
+    """Test that repeated searches are served from the result cache and offset is part of the key."""
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    first = await search_service.perform_search(TEST_QUERY, top_k=5, filters=TEST_FILTERS)
+    second = await search_service.perform_search(TEST_QUERY, top_k=5, filters={"year": 2023, "author": "Test Author"})
+    await search_service.perform_search(TEST_QUERY, top_k=5, filters=TEST_FILTERS, offset=5)
+
+    assert first == second == EXPECTED_FORMATTED_RESULT
+    assert mock_get_embedding.await_count == 2
+    assert mock_db_layer.vector_search_chunks.await_count == 2
+    assert mock_db_layer.vector_search_chunks.await_args.kwargs == {"offset": 5, "ef_search": None, "exact": False}
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_hybrid_mode(mock_get_embedding, search_service, mock_db_layer):
+    """Test that hybrid mode uses the hybrid DB search, reports the fusion score and is cached separately."""
+    mock_get_embedding.return_value = TEST_EMBEDDING
+    mock_db_layer.hybrid_search_chunks = AsyncMock(return_value=[MOCK_DB_RESULT_ROW.model_copy(update={"score": 0.03})])
+
+    hybrid = await search_service.perform_search(TEST_QUERY, top_k=5, mode="hybrid")
+    vector = await search_service.perform_search(TEST_QUERY, top_k=5)
+
+    mock_db_layer.hybrid_search_chunks.assert_awaited_once()
+    args = mock_db_layer.hybrid_search_chunks.await_args.args
+    assert args[1:4] == (TEST_QUERY, TEST_EMBEDDING, 5)
+    assert hybrid[0]["score"] == 0.03
+    assert "score" not in vector[0]
+    mock_db_layer.vector_search_chunks.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_search_unknown_mode(search_service, mock_db_layer):
+    """Test that an unknown search mode is rejected."""
+    with pytest.raises(ValueError, match="Unknown search mode"):
+        await search_service.perform_search(TEST_QUERY, mode="fuzzy")
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_records_stage_metrics(mock_get_embedding, search_service, mock_db_layer):
+    """Test that searches count result cache hits/misses and time the embedding, DB and formatting stages."""
+    from src.philograph.utils.metrics import SEARCH_REQUESTS_TOTAL, SEARCH_STAGE_SECONDS
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    await search_service.perform_search(TEST_QUERY)
+    await search_service.perform_search(TEST_QUERY)
+
+    assert SEARCH_REQUESTS_TOTAL.value(cache="miss") == 1
+    assert SEARCH_REQUESTS_TOTAL.value(cache="hit") == 1
+    for stage in ("query_embedding", "db_search", "formatting"):
+        assert SEARCH_STAGE_SECONDS.count(stage=stage) == 1
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_results_invalidated_by_generation_bump(mock_get_embedding, search_service, mock_db_layer):
+    """Test that an advanced corpus generation (an ingest committed in any process) invalidates cached results."""
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    await search_service.perform_search(TEST_QUERY)
+    await search_service.perform_search(TEST_QUERY)
+    mock_db_layer.get_corpus_generation.return_value = 1
+    await search_service.perform_search(TEST_QUERY)
+
+    assert mock_db_layer.vector_search_chunks.await_count == 2
+    assert mock_db_layer.get_corpus_generation.await_count == 3 # Read by every search, cached or not
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_bypasses_result_cache_when_generation_unreadable(mock_get_embedding, search_service, mock_db_layer):
+    """Test that searches still run, uncached, when the corpus generation cannot be read."""
+    mock_get_embedding.return_value = TEST_EMBEDDING
+    mock_db_layer.get_corpus_generation.side_effect = psycopg.OperationalError("relation \"corpus_generation\" does not exist")
+
+    await search_service.perform_search(TEST_QUERY)
+    results = await search_service.perform_search(TEST_QUERY)
+
+    assert results == EXPECTED_FORMATTED_RESULT
+    assert mock_db_layer.vector_search_chunks.await_count == 2
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_results_racing_ingest_not_cached(mock_get_embedding, search_service, mock_db_layer):
+    """Test that results computed while an ingest committed are not served under the new generation."""
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    async def search_during_ingest(*args, **kwargs):
+        mock_db_layer.get_corpus_generation.return_value += 1 # An ingest commits while the search runs
+        return MOCK_DB_RESULTS
+    mock_db_layer.vector_search_chunks.side_effect = search_during_ingest
+
+    await search_service.perform_search(TEST_QUERY)
+    await search_service.perform_search(TEST_QUERY)
+
+    assert mock_db_layer.vector_search_chunks.await_count == 2
+
+# --- Tests for batch search ---
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service._request_query_embeddings', new_callable=AsyncMock)
+async def test_get_query_embeddings_single_request_for_misses(mock_request):
+    """Test that uncached queries are embedded in one request, deduplicated, with cached ones skipped."""
+    from src.philograph.search import service
+    from src.philograph.utils.embedding_cache import EmbeddingCache
+    import numpy as np
+    mock_request.side_effect = lambda texts: [np.full(768, i, dtype=np.float32) for i, _ in enumerate(texts)]
+
+    with patch.object(service, 'embedding_cache', EmbeddingCache(10, persist=False)):
+        cached = await service.get_query_embeddings(["cached query"])
+        results = await service.get_query_embeddings(["first", "cached query", " first ", "second"])
+
+    assert mock_request.await_count == 2
+    mock_request.assert_awaited_with(["first", "second"])
+    assert results[0] is results[2]
+    assert results[1] is cached[0]
+    assert float(results[3][0]) == 1.0
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embeddings', new_callable=AsyncMock)
+async def test_perform_batch_search_skips_cached_queries(mock_get_embeddings):
+    """Test that batch search only embeds and searches queries missing from the result cache, in one DB call."""
+    from src.philograph.search import service
+    mock_get_embeddings.side_effect = lambda texts: [TEST_EMBEDDING for _ in texts]
+    mock_conn = AsyncMock()
+    with patch.object(service, 'db_layer') as mock_db:
+        mock_db.get_db_connection.return_value.__aenter__.return_value = mock_conn
+        mock_db.get_corpus_generation = AsyncMock(return_value=0)
+        mock_db.vector_search_chunks_batch = AsyncMock(side_effect=lambda conn, searches: [MOCK_DB_RESULTS for _ in searches])
+
+        await service.perform_batch_search([{"query_text": "cached", "top_k": 5}])
+        results = await service.perform_batch_search([
+            {"query_text": "cached", "top_k": 5},
+            {"query_text": TEST_QUERY, "filters": TEST_FILTERS, "offset": 10},
+        ])
+
+    assert results == [EXPECTED_FORMATTED_RESULT, EXPECTED_FORMATTED_RESULT]
+    mock_get_embeddings.assert_awaited_with([TEST_QUERY])
+    conn, searches = mock_db.vector_search_chunks_batch.await_args.args
+    assert conn is mock_conn
+    assert searches == [(TEST_EMBEDDING, config.SEARCH_TOP_K, TEST_FILTERS, 10, None, False)]
+
+@pytest.mark.asyncio
+async def test_perform_batch_search_rejects_empty_query():
+    """Test that an empty query text anywhere in the batch is rejected before any work."""
+    from src.philograph.search import service
+    with pytest.raises(ValueError, match="Query text cannot be empty"):
+        await service.perform_batch_search([{"query_text": TEST_QUERY}, {"query_text": ""}])
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_recall_settings_passed_and_cached_separately(mock_get_embedding, search_service, mock_db_layer):
+    """Test that ef_search/exact reach the DB layer and are part of the result cache key."""
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    await search_service.perform_search(TEST_QUERY)
+    await search_service.perform_search(TEST_QUERY, ef_search=200)
+    await search_service.perform_search(TEST_QUERY, exact=True)
+    await search_service.perform_search(TEST_QUERY, exact=True)
+
+    assert mock_db_layer.vector_search_chunks.await_count == 3
+    assert mock_db_layer.vector_search_chunks.await_args.kwargs == {"offset": 0, "ef_search": None, "exact": True}
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_open_search_stream_yields_formatted_rows(mock_get_embedding):
+    """Test that a streamed search embeds up front, then yields formatted rows from the DB stream."""
+    from src.philograph.search import service
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    async def fake_stream(conn, *args, **kwargs):
+        for row in MOCK_DB_RESULTS:
+            yield row
+
+    with patch.object(service, 'db_layer') as mock_db:
+        mock_db.stream_search_chunks = MagicMock(side_effect=fake_stream)
+        stream = await service.open_search_stream(TEST_QUERY, top_k=5000, mode="hybrid")
+        mock_get_embedding.assert_awaited_once_with(TEST_QUERY)
+        mock_db.get_db_connection.assert_not_called() # No connection is held until the stream is read
+        results = [result async for result in stream]
+
+    assert results == EXPECTED_FORMATTED_RESULT
+    assert mock_db.stream_search_chunks.call_args.kwargs["lexical_query"] == TEST_QUERY
+    assert service.SEARCH_REQUESTS_TOTAL.value(cache="bypass") == 1
+
+@pytest.mark.asyncio
+async def test_open_search_stream_rejects_unknown_mode():
+    """Test that a streamed search validates its arguments before returning the stream."""
+    from src.philograph.search import service
+    with pytest.raises(ValueError, match="Unknown search mode"):
+        await service.open_search_stream(TEST_QUERY, mode="semantic")
+
+@pytest.mark.asyncio
+@patch('src.philograph.search.service.get_query_embedding', new_callable=AsyncMock)
+async def test_search_continues_from_continuation_token(mock_get_embedding, search_service, mock_db_layer):
+    """Test that next_page_token continues a full page from its last row's keyset position."""
+    from src.philograph.search import service
+    mock_get_embedding.return_value = TEST_EMBEDDING
+
+    first_page = await search_service.perform_search(TEST_QUERY, top_k=1, filters=TEST_FILTERS)
+    token = service.next_page_token(first_page, 1, TEST_QUERY, TEST_FILTERS)
+    await search_service.perform_search(TEST_QUERY, top_k=1, filters=TEST_FILTERS, continuation_token=token)
+
+    assert mock_db_layer.vector_search_chunks.await_count == 2
+    assert mock_db_layer.vector_search_chunks.await_args.kwargs["after"] == (0.5, 1)
+    assert mock_db_layer.vector_search_chunks.await_args.kwargs["scan_depth"] == 1 # Rows the index walks past
+    assert service.next_page_token(first_page, 2, TEST_QUERY, TEST_FILTERS) is None # Short page: no more results
+    assert service.next_page_token(first_page, 1, TEST_QUERY, TEST_FILTERS, mode="hybrid") is None
+
+def test_next_page_token_ends_chain_at_max_keyset_depth():
+    """Test that tokens stop once the next page would reach past the depth the index scan budget covers."""
+    from src.philograph.search import service
+    token = service.next_page_token(EXPECTED_FORMATTED_RESULT, 1, TEST_QUERY)
+    with patch('src.philograph.data_access.db_layer.max_keyset_depth', return_value=3):
+        second = service.next_page_token(EXPECTED_FORMATTED_RESULT, 1, TEST_QUERY, continuation_token=token)
+        assert second is not None
+        assert service.next_page_token(EXPECTED_FORMATTED_RESULT, 1, TEST_QUERY, continuation_token=second) is None
+
+@pytest.mark.asyncio
+async def test_search_rejects_continuation_token_misuse(search_service, mock_db_layer):
+    """Test that tokens for another query, with an offset, or in hybrid mode are rejected before searching."""
+    from src.philograph.search import service
+    token = service.next_page_token(EXPECTED_FORMATTED_RESULT, 1, "another query")
+    with pytest.raises(ValueError, match="does not belong to this search"):
+        await search_service.perform_search(TEST_QUERY, continuation_token=token)
+    with pytest.raises(ValueError, match="offset cannot be combined"):
+        await search_service.perform_search("another query", offset=10, continuation_token=token)
+    with pytest.raises(ValueError, match="only supported for vector searches"):
+        await search_service.perform_search("another query", mode="hybrid", continuation_token=token)
+    mock_db_layer.vector_search_chunks.assert_not_awaited()
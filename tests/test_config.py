@@ -72,6 +72,26 @@ def test_get_int_env_variable_no_default_raises_error():
     assert "Missing required environment variable: MISSING_INT_NO_DEFAULT" in str(excinfo.value)
 
 
+# --- Tests for get_float_env_variable ---
+
+@patch.dict(os.environ, {"EXISTING_FLOAT": "2.5"})
+def test_get_float_env_variable_exists():
+    """Test retrieving an existing float environment variable."""
+    assert config.get_float_env_variable("EXISTING_FLOAT", 1.0) == 2.5
+
+@patch.dict(os.environ, {}, clear=True)
+def test_get_float_env_variable_not_exists_with_default():
+    """Test retrieving a non-existent float variable returns the default."""
+    assert config.get_float_env_variable("NON_EXISTENT_FLOAT", 0.25) == 0.25
+
+@patch.dict(os.environ, {"INVALID_FLOAT": "fast"})
+def test_get_float_env_variable_invalid_value_raises_error():
+    """Test retrieving a float variable with an invalid value raises ValueError."""
+    with pytest.raises(ValueError) as excinfo:
+        config.get_float_env_variable("INVALID_FLOAT", 1.0)
+    assert "Invalid float value for environment variable: INVALID_FLOAT" in str(excinfo.value)
+
+
 # --- Tests for get_bool_env_variable ---
 
 @pytest.mark.parametrize("true_val", ['true', '1', 'yes', 'y', 'TRUE', 'YES'])
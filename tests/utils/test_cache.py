@@ -0,0 +1,75 @@
+import pytest
+
+from philograph.utils.cache import LRUCache
+
+# --- Tests for LRUCache ---
+
+def test_lru_cache_get_and_set():
+    """Test basic storage, retrieval and hit/miss counting."""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 1, "expired": 0, "hit_rate": 0.5}
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted beyond max_size."""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a") # 'b' is now least recently used
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+
+def test_lru_cache_zero_size_disables_caching():
+    """Test that max_size=0 stores nothing."""
+    cache = LRUCache(0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_lru_cache_clear_resets_counters():
+    """Test that clear() empties the cache and resets counters."""
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 0
+
+def test_lru_cache_rejects_negative_size():
+    """Test that a negative max_size is rejected."""
+    with pytest.raises(ValueError):
+        LRUCache(-1)
+
+def test_lru_cache_ttl_expires_entries():
+    """Test that entries expire after ttl_seconds and count as misses."""
+    now = [100.0]
+    cache = LRUCache(10, ttl_seconds=5.0, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 104.9
+    assert cache.get("a") == 1
+    now[0] = 105.0
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_cache_ttl_reset_on_set():
+    """Test that re-setting a key restarts its TTL."""
+    now = [0.0]
+    cache = LRUCache(10, ttl_seconds=5.0, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 4.0
+    cache.set("a", 2)
+    now[0] = 8.0
+    assert cache.get("a") == 2
+
+def test_lru_cache_invalid_ttl():
+    """Test that a non-positive TTL is rejected."""
+    with pytest.raises(ValueError):
+        LRUCache(10, ttl_seconds=0)
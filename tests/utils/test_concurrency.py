@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from philograph.utils.concurrency import AdaptiveConcurrencyLimiter, SingleFlight
+
+# Mark all tests in this module as asyncio
+pytestmark = pytest.mark.asyncio
+
+# --- Tests for AdaptiveConcurrencyLimiter ---
+
+async def test_limiter_bounds_in_flight_operations():
+    """Test that no more than `limit` holders run concurrently."""
+    limiter = AdaptiveConcurrencyLimiter(2)
+    running = 0
+    peak = 0
+
+    async def worker():
+        nonlocal running, peak
+        async with limiter.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(worker() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+async def test_limiter_overload_halves_limit_down_to_minimum():
+    """Test multiplicative decrease on overload, bounded by min_limit."""
+    limiter = AdaptiveConcurrencyLimiter(8, min_limit=2)
+    limiter.record_overload()
+    assert limiter.limit == 4
+    limiter.record_overload()
+    limiter.record_overload()
+    assert limiter.limit == 2
+
+async def test_limiter_concurrent_overloads_halve_limit_once():
+    """Test that overloads from operations dispatched before the last decrease do not decrease it again."""
+    limiter = AdaptiveConcurrencyLimiter(8)
+    burst = [await limiter.acquire() for _ in range(4)]
+    for dispatched in burst:
+        limiter.record_overload(dispatched)
+        limiter.release()
+    assert limiter.limit == 4
+
+    async with limiter.slot() as dispatched:
+        limiter.record_overload(dispatched)
+    assert limiter.limit == 2
+
+async def test_limiter_cancelled_woken_waiter_passes_slot_on():
+    """Test that a waiter cancelled after being woken does not strand the other waiters."""
+    limiter = AdaptiveConcurrencyLimiter(1)
+    await limiter.acquire()
+    first = asyncio.create_task(limiter.acquire())
+    second = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    limiter.release() # Wakes `first`...
+    first.cancel() # ...which is cancelled before it resumes
+    await asyncio.wait_for(second, timeout=1)
+    assert first.cancelled()
+    assert limiter.in_flight == 1
+
+async def test_limiter_success_window_grows_limit_up_to_maximum():
+    """Test additive increase after a full window of successes."""
+    limiter = AdaptiveConcurrencyLimiter(3)
+    limiter.record_overload()
+    assert limiter.limit == 1
+    limiter.record_success()
+    assert limiter.limit == 2
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.limit == 3
+    for _ in range(5):
+        limiter.record_success()
+    assert limiter.limit == 3
+
+async def test_limiter_growth_wakes_waiters():
+    """Test that raising the limit releases a blocked acquirer."""
+    limiter = AdaptiveConcurrencyLimiter(2)
+    limiter.record_overload()
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    limiter.record_success()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert limiter.in_flight == 2
+
+async def test_limiter_rejects_invalid_max_limit():
+    """Test that a limiter must allow at least one operation."""
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(0)
+
+# --- Tests for SingleFlight ---
+
+async def test_single_flight_coalesces_concurrent_calls():
+    """Test that concurrent calls for one key share a single execution."""
+    flights = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flights.do("k", load) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert flights.coalesced == 4
+
+async def test_single_flight_shares_exceptions_and_does_not_cache():
+    """Test that followers see the leader's exception and later calls run again."""
+    flights = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(flights.do("k", failing), flights.do("k", failing), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert calls == 1
+
+    with pytest.raises(RuntimeError):
+        await flights.do("k", failing)
+    assert calls == 2
+
+async def test_single_flight_leader_cancellation_does_not_cancel_followers():
+    """Test that cancelling the leading caller hands the call to a follower instead of cancelling it."""
+    flights = SingleFlight()
+    calls = 0
+    started = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.01)
+        return "value"
+
+    leader = asyncio.create_task(flights.do("k", load))
+    await started.wait()
+    followers = [asyncio.create_task(flights.do("k", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await asyncio.gather(*followers) == ["value"] * 3
+    assert calls == 2 # The cancelled leader's call and one re-run by a new leader
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+async def test_single_flight_cancelled_follower_leaves_leader_running():
+    """Test that cancelling a follower neither cancels the leader nor re-runs the call."""
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "value"
+
+    leader = asyncio.create_task(flights.do("k", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("k", load))
+    await asyncio.sleep(0)
+    follower.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    assert await leader == "value"
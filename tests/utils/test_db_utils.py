@@ -37,6 +37,26 @@ def test_format_vector_for_pgvector_empty():
 #     with pytest.raises(TypeError): # Simplified check
 #         db_utils.format_vector_for_pgvector(vector)
 
+# Tests for encode_vector_binary
+def test_encode_vector_binary_layout():
+    """Tests the pgvector binary layout: int16 dim, int16 unused, big-endian float4 values."""
+    import struct
+    vector = [1.0, 2.5, -0.5]
+    encoded = db_utils.encode_vector_binary(vector)
+    assert encoded == struct.pack('>HH3f', 3, 0, 1.0, 2.5, -0.5)
+    assert len(encoded) == 4 + 4 * len(vector)
+
+def test_encode_vector_binary_empty():
+    """Tests encoding an empty vector yields just the header."""
+    assert db_utils.encode_vector_binary([]) == b'\x00\x00\x00\x00'
+
+# Tests for normalize_author_key
+def test_normalize_author_key():
+    """Tests author keys are lower-cased with whitespace collapsed, and empty names map to None."""
+    assert db_utils.normalize_author_key("  Immanuel\tKANT ") == "immanuel kant"
+    assert db_utils.normalize_author_key("   ") is None
+    assert db_utils.normalize_author_key(None) is None
+
 # Tests for json_serialize
 def test_json_serialize_valid_dict():
     """Tests serializing a valid dictionary."""
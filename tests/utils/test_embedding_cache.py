@@ -0,0 +1,123 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from philograph import config
+from philograph.utils import embedding_cache as cache_module
+from philograph.utils.embedding_cache import EmbeddingCache, make_cache_key, normalize_text
+
+# --- Tests for cache keys ---
+
+def test_normalize_text_collapses_whitespace():
+    """Test that whitespace differences do not change the normalized text."""
+    assert normalize_text("  Being   and\n\tNothing ") == "Being and Nothing"
+
+def test_make_cache_key_depends_on_model_dimension_and_text():
+    """Test that keys are stable for equivalent text and differ across model/dimension/text."""
+    key = make_cache_key("Geist", model="m1", dimension=768)
+    assert key == make_cache_key(" Geist\n", model="m1", dimension=768)
+    assert key != make_cache_key("Geist", model="m2", dimension=768)
+    assert key != make_cache_key("Geist", model="m1", dimension=1024)
+    assert key != make_cache_key("geist", model="m1", dimension=768)
+
+def test_make_cache_key_defaults_to_config():
+    """Test that the configured model and dimension are used by default."""
+    assert make_cache_key("Geist") == make_cache_key(
+        "Geist", model=config.EMBEDDING_MODEL_NAME, dimension=config.TARGET_EMBEDDING_DIMENSION
+    )
+
+# --- Tests for EmbeddingCache ---
+
+@pytest.fixture
+def mock_db(mocker):
+    """Mocks the durable tier's DB access in the embedding_cache module."""
+    mock_conn = AsyncMock()
+    mock_get_conn = mocker.patch.object(cache_module.db_layer, "get_db_connection")
+    mock_get_conn.return_value.__aenter__.return_value = mock_conn
+    mock_get = mocker.patch.object(cache_module.db_layer, "get_cached_embeddings", new_callable=AsyncMock)
+    mock_add = mocker.patch.object(cache_module.db_layer, "add_cached_embeddings", new_callable=AsyncMock)
+    return mock_conn, mock_get, mock_add
+
+@pytest.mark.asyncio
+async def test_embedding_cache_memory_hit(mock_db):
+    """Test that stored embeddings are served from the memory tier without touching the DB."""
+    _, mock_get, mock_add = mock_db
+    cache = EmbeddingCache(10, persist=True)
+    await cache.put_many(["text a"], [[0.1, 0.2]])
+    mock_get.reset_mock()
+
+    result = await cache.get_many(["text a"])
+
+    assert len(result) == 1
+    assert result[0].dtype == np.float32
+    np.testing.assert_array_equal(result[0], np.asarray([0.1, 0.2], dtype=np.float32))
+    mock_get.assert_not_awaited()
+    mock_add.assert_awaited_once()
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["hit_rate"] == 1.0
+
+@pytest.mark.asyncio
+async def test_embedding_cache_durable_hit_is_promoted(mock_db):
+    """Test that durable hits fill the result and are promoted to the memory tier."""
+    mock_conn, mock_get, _ = mock_db
+    key = make_cache_key("text b")
+    mock_get.return_value = {key: [0.5, 0.5]}
+    cache = EmbeddingCache(10, persist=True)
+
+    result = await cache.get_many(["text b", "text c"])
+
+    assert result == [[0.5, 0.5], None]
+    mock_get.assert_awaited_once()
+    assert sorted(mock_get.call_args[0][1]) == sorted([key, make_cache_key("text c")])
+    assert key in cache.memory
+    stats = cache.stats()
+    assert stats["durable_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_embedding_cache_durable_failure_is_a_miss(mock_db):
+    """Test that durable tier errors degrade to cache misses."""
+    _, mock_get, mock_add = mock_db
+    mock_get.side_effect = RuntimeError("Database pool is not initialized.")
+    mock_add.side_effect = RuntimeError("Database pool is not initialized.")
+    cache = EmbeddingCache(10, persist=True)
+
+    assert await cache.get_many(["text d"]) == [None]
+    await cache.put_many(["text d"], [[1.0]]) # Must not raise
+    assert await cache.get_many(["text d"]) == [[1.0]]
+
+@pytest.mark.asyncio
+async def test_embedding_cache_without_persist_skips_db(mock_db):
+    """Test that persist=False never touches the durable tier."""
+    _, mock_get, mock_add = mock_db
+    cache = EmbeddingCache(10, persist=False)
+    await cache.put_many(["text e", "text e"], [[1.0], [1.0]])
+    assert await cache.get_many(["text f"]) == [None]
+    mock_get.assert_not_awaited()
+    mock_add.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_embedding_cache_bounds_durable_connections(mock_db):
+    """Test that concurrent durable lookups hold at most `db_connections` pool connections at once."""
+    import asyncio
+    _, mock_get, _ = mock_db
+    in_flight = 0
+    peak = 0
+
+    async def slow_lookup(conn, keys):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {}
+
+    mock_get.side_effect = slow_lookup
+    cache = EmbeddingCache(10, persist=True, db_connections=2)
+
+    await asyncio.gather(*(cache.get_many([f"text {i}"]) for i in range(6)))
+
+    assert mock_get.await_count == 6
+    assert peak == 2
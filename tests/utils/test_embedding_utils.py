@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from philograph.utils.embedding_utils import empty_embedding_matrix, to_embedding_matrix, to_embedding_vector
+
+def test_to_embedding_matrix_float32_contiguous():
+    """Test that a batch of lists becomes a contiguous float32 (n, dim) matrix."""
+    matrix = to_embedding_matrix([[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]])
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (2, 3)
+    assert matrix.flags["C_CONTIGUOUS"]
+    assert matrix.nbytes == 2 * 3 * 4
+
+def test_to_embedding_matrix_ragged_raises():
+    """Test that ragged batches are rejected with ValueError."""
+    with pytest.raises(ValueError):
+        to_embedding_matrix([[0.1, 0.2], [0.3]])
+
+def test_to_embedding_matrix_non_numeric_raises():
+    """Test that non-numeric values are rejected with ValueError."""
+    with pytest.raises(ValueError):
+        to_embedding_matrix([["a", "b"]])
+
+def test_to_embedding_vector_rejects_matrix():
+    """Test that a 2-D input is not accepted as a single embedding."""
+    assert to_embedding_vector([1, 2]).dtype == np.float32
+    with pytest.raises(ValueError, match="Expected a 1-D embedding"):
+        to_embedding_vector([[1.0], [2.0]])
+
+def test_empty_embedding_matrix_shape():
+    """Test the empty matrix keeps the embedding dimension."""
+    assert empty_embedding_matrix(768).shape == (0, 768)
@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+from src.philograph.utils import file_utils
+
+# --- Tests for file fingerprints ---
+
+def test_get_file_stat(tmp_path):
+    """Test that the stat fingerprint carries the file's size and nanosecond mtime."""
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"hello")
+    os.utime(path, ns=(1_700_000_000_123_456_789, 1_700_000_000_123_456_789))
+
+    assert file_utils.get_file_stat(path) == file_utils.FileStat(size=5, mtime_ns=1_700_000_000_123_456_789)
+
+def test_hash_file_reads_in_blocks(tmp_path):
+    """Test that the content hash is the SHA-256 of the whole file regardless of block size."""
+    path = tmp_path / "doc.txt"
+    content = b"philosophy " * 1000
+    path.write_bytes(content)
+
+    assert file_utils.hash_file(path, block_size=7) == hashlib.sha256(content).hexdigest()
+    assert file_utils.hash_file(path) == hashlib.sha256(content).hexdigest()
+
+# --- Tests for the directory scanner ---
+
+def _make_tree(root):
+    (root / "kant" / "critique").mkdir(parents=True)
+    (root / "hume").mkdir()
+    (root / "intro.md").write_text("intro")
+    (root / "notes.docx").write_text("skip")
+    (root / "kant" / "prolegomena.txt").write_text("kant")
+    (root / "kant" / "critique" / "pure.pdf").write_bytes(b"%PDF")
+    (root / "hume" / "enquiry.epub").write_bytes(b"epub!")
+
+def test_scan_files_recursive_with_stat(tmp_path):
+    """Test that the scanner finds matching files in nested directories along with their size and mtime."""
+    _make_tree(tmp_path)
+    os.utime(tmp_path / "intro.md", ns=(1_700_000_000_000_000_001, 1_700_000_000_000_000_001))
+
+    scanned = list(file_utils.scan_files(tmp_path, allowed_extensions=[".pdf", ".epub", ".md", ".txt"], recursive=True, workers=3))
+
+    assert sorted(item.path.relative_to(tmp_path).as_posix() for item in scanned) == [
+        "hume/enquiry.epub", "intro.md", "kant/critique/pure.pdf", "kant/prolegomena.txt"
+    ]
+    by_name = {item.path.name: item for item in scanned}
+    assert by_name["intro.md"].mtime_ns == 1_700_000_000_000_000_001
+    assert by_name["enquiry.epub"].size == 5
+
+def test_scan_files_non_recursive_and_unfiltered(tmp_path):
+    """Test that without recursion only the top directory is listed, and no filter lists every file."""
+    _make_tree(tmp_path)
+
+    assert [item.path.name for item in file_utils.scan_files(tmp_path)] == ["intro.md", "notes.docx"]
+    assert list(file_utils.list_files_in_directory(tmp_path, allowed_extensions=[".md"])) == [tmp_path / "intro.md"]
+
+def test_scan_files_missing_directory(tmp_path):
+    """Test that scanning a missing directory yields nothing."""
+    assert list(file_utils.scan_files(tmp_path / "missing", recursive=True)) == []
@@ -0,0 +1,57 @@
+import inspect
+import re
+
+import pytest
+
+from src.philograph.ingestion import pipeline
+from src.philograph.utils.metrics import INGESTION_STAGE_SECONDS, INGESTION_STAGES, Counter, Histogram, MetricsRegistry
+
+# --- Tests for metric types ---
+
+def test_counter_increments_per_label():
+    """Test that counters accumulate per label set and reject negative increments and unknown labels."""
+    counter = Counter("docs_total", "Docs.", ["status"])
+    counter.inc(status="success")
+    counter.inc(2, status="success")
+    counter.inc(status="error")
+    assert counter.value(status="success") == 3
+    assert counter.value(status="skipped") == 0
+    with pytest.raises(ValueError):
+        counter.inc(-1, status="success")
+    with pytest.raises(ValueError):
+        counter.inc(stage="x")
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that histograms render cumulative buckets, +Inf, sum and count in the exposition format."""
+    histogram = Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="embedding")
+    histogram.observe(0.5, stage="embedding")
+    histogram.observe(5.0, stage="embedding")
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP stage_seconds Stage time.", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{stage="embedding",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="embedding",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="embedding",le="+Inf"} 3' in lines
+    assert 'stage_seconds_sum{stage="embedding"} 5.55' in lines
+    assert 'stage_seconds_count{stage="embedding"} 3' in lines
+
+def test_registry_render_and_reset():
+    """Test that the registry renders every metric, escapes label values and rejects duplicate names."""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ["cache"])
+    registry.histogram("latency_seconds", "Latency.")
+    counter.inc(cache='a"b')
+    text = registry.render()
+    assert 'requests_total{cache="a\\"b"} 1' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert text.endswith("\n")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Again.")
+    registry.reset()
+    assert counter.value(cache='a"b') == 0
+
+def test_ingestion_stage_help_matches_pipeline_stages():
+    """Test that the stage histogram help lists exactly the stages the ingestion pipeline times."""
+    timed = set(re.findall(r'ingestion_stage_timings\.time\("(\w+)"\)', inspect.getsource(pipeline)))
+    assert timed == set(INGESTION_STAGES)
+    assert f"({', '.join(INGESTION_STAGES)})" in INGESTION_STAGE_SECONDS.documentation
@@ -0,0 +1,33 @@
+import pytest
+
+from src.philograph.utils.metrics import Histogram
+from src.philograph.utils.stage_timings import StageTimings
+
+# --- Tests for StageTimings ---
+
+def test_stage_timings_accumulate_and_reset():
+    """Test that timed blocks accumulate seconds and counts per stage, including blocks that raise."""
+    timings = StageTimings()
+    timings.record("embedding", 0.5)
+    with timings.time("embedding"):
+        pass
+    with pytest.raises(ValueError):
+        with timings.time("chunking"):
+            raise ValueError("boom")
+
+    snapshot = timings.snapshot()
+    assert snapshot["embedding"]["count"] == 2
+    assert snapshot["embedding"]["seconds"] >= 0.5
+    assert snapshot["chunking"]["count"] == 1
+
+    timings.reset()
+    assert timings.snapshot() == {}
+
+def test_stage_timings_observe_histogram():
+    """Test that recordings are also observed in the attached per-stage histogram."""
+    histogram = Histogram("test_stage_seconds", "Test.", ["stage"])
+    timings = StageTimings(histogram=histogram)
+    timings.record("extraction", 0.2)
+    timings.record("extraction", 3.0)
+    assert histogram.count(stage="extraction") == 2
+    assert histogram.count(stage="embedding") == 0